@@ -39,6 +39,54 @@ from scipy.ndimage.morphology import distance_transform_edt
 from improver.utilities.rescale import rescale
 
 
+def _check_blend_coord_matches(weights_cube, one_dimensional_weights_cube,
+                               blend_coord):
+    """
+    Check that the blend_coord on a cube of weights matches that on the
+    one_dimensional_weights_cube.
+
+    Args:
+        weights_cube (iris.cube.Cube):
+            A cube of weights with a coordinate matching blend_coord.
+        one_dimensional_weights_cube (iris.cube.Cube):
+            A cube with one dimensional weights along the blend_coord.
+        blend_coord (string):
+            The name of the coordinate to compare.
+
+    Raises:
+        ValueError: If the blend_coord does not match on the two cubes.
+    """
+    if (weights_cube.coord(blend_coord) !=
+            one_dimensional_weights_cube.coord(blend_coord)):
+        message = ("The blend_coord {} does not match on "
+                   "weights_from_mask and "
+                   "one_dimensional_weights_cube".format(blend_coord))
+        raise ValueError(message)
+
+
+def _warn_if_not_masked(cube):
+    """
+    Warn if the data of the input cube contain no masked points.
+
+    Args:
+        cube (iris.cube.Cube):
+            The cube whose mask will be used to create the weights.
+
+    Returns:
+        masked (bool):
+            True if the cube data contain masked points.
+
+    Warns:
+        UserWarning: If the cube data contain no masked points.
+    """
+    masked = np.ma.is_masked(cube.data)
+    if not masked:
+        message = ("Input cube to SpatiallyVaryingWeightsFromMask "
+                   "must be masked")
+        warnings.warn(message)
+    return masked
+
+
 class SpatiallyVaryingWeightsFromMask(object):
     """
     Plugin for adjusting weights spatially based on missing data in the input
@@ -107,13 +155,10 @@ class SpatiallyVaryingWeightsFromMask(object):
         Rasies:
             ValueError : If the input cube does not have a mask.
         """
-        if np.ma.is_masked(cube.data):
+        if _warn_if_not_masked(cube):
             weights_data = np.where(cube.data.mask, 0, 1).astype(np.float32)
         else:
             weights_data = np.ones(cube.data.shape, dtype=np.float32)
-            message = ("Input cube to SpatiallyVaryingWeightsFromMask "
-                       "must be masked")
-            warnings.warn(message)
         weights_from_mask = cube.copy(data=weights_data)
         weights_from_mask.rename("weights")
         return weights_from_mask
@@ -138,29 +183,67 @@ class SpatiallyVaryingWeightsFromMask(object):
         Returns:
             result (iris.cube.Cube):
                 A cube containing the fuzzy weights calculated based on the
-                weights_from_mask. The dimension order may have changed from
-                the input cube as it has been sliced over x and y coordinates.
+                weights_from_mask, with the same dimensions as the input cube.
         """
-        result = iris.cube.CubeList()
-        x_coord = weights_from_mask.coord(axis='x').name()
-        y_coord = weights_from_mask.coord(axis='y').name()
-        # The distance_transform_edt works on N-D cubes, so we want to make
-        # sure we only apply it to x-y slices.
-        for weights in weights_from_mask.slices([y_coord, x_coord]):
-            if np.all(weights.data == 1.0):
-                # distance_transform_edt doesn't produce what we want if there
-                # are no zeros present.
-                result.append(weights.copy())
-            else:
-                fuzzy_data = distance_transform_edt(weights.data == 1., 1)
-                fuzzy_data = fuzzy_data.astype(np.float32)
-                rescaled_fuzzy_data = rescale(
-                    fuzzy_data, data_range=[0., self.fuzzy_length],
-                    clip=True)
-                result.append(weights.copy(data=rescaled_fuzzy_data))
-        result = result.merge_cube()
+        y_dim, = weights_from_mask.coord_dims(
+            weights_from_mask.coord(axis='y'))
+        x_dim, = weights_from_mask.coord_dims(
+            weights_from_mask.coord(axis='x'))
+        # Points without a weight of one are treated as masked, and the
+        # distance transform is only applied within x-y slices.
+        masks = np.moveaxis(weights_from_mask.data != 1.0,
+                            [y_dim, x_dim], [-2, -1])
+        fuzzy_weights = self.fuzzy_weights_from_masks(
+            masks.reshape((-1,) + masks.shape[-2:])).reshape(masks.shape)
+        result = weights_from_mask.copy(
+            data=np.moveaxis(fuzzy_weights, [-2, -1], [y_dim, x_dim]))
         return result
 
+    def fuzzy_weights_from_masks(self, masks):
+        """
+        Create fuzzy weights for a stack of x-y masks at once. Each point is
+        given a weight based upon its euclidean distance from the nearest
+        masked point within the same x-y slice, rescaled so that points at
+        least the fuzzy_length away have a weight of one. Masked points have
+        a weight of zero, and slices with no masked points have weights of
+        one throughout.
+
+        Identical masks, such as those of blend members sharing a radar
+        mask, are only processed once. The distance transform is applied to
+        all the distinct masks together, with the slices separated by the
+        fuzzy_length so that no point is affected by a masked point in
+        another slice.
+
+        Args:
+            masks (numpy.ndarray):
+                Boolean array of shape (slice, y, x), which is True where
+                points are masked.
+        Returns:
+            fuzzy_weights (numpy.ndarray):
+                Float32 array of shape (slice, y, x) containing the fuzzy
+                weights.
+        """
+        fuzzy_weights = np.ones(masks.shape, dtype=np.float32)
+
+        # Find the distinct masks that contain masked points.
+        distinct_masks = {}
+        for index, mask in enumerate(masks):
+            if mask.any():
+                distinct_masks.setdefault(mask.tobytes(), []).append(index)
+        if not distinct_masks:
+            return fuzzy_weights
+        indices = [members[0] for members in distinct_masks.values()]
+
+        distances = distance_transform_edt(
+            ~masks[indices], sampling=[max(self.fuzzy_length, 1), 1, 1])
+        distances = distances.astype(np.float32)
+        rescaled_distances = rescale(
+            distances, data_range=[0., self.fuzzy_length], clip=True)
+        for rescaled, members in zip(rescaled_distances,
+                                     distinct_masks.values()):
+            fuzzy_weights[members] = rescaled
+        return fuzzy_weights
+
     @staticmethod
     def multiply_weights(weights_from_mask, one_dimensional_weights_cube,
                          blend_coord):
@@ -195,12 +278,8 @@ class SpatiallyVaryingWeightsFromMask(object):
                 leading dimension on the output cube.
         """
         result = iris.cube.CubeList()
-        if (weights_from_mask.coord(blend_coord) !=
-                one_dimensional_weights_cube.coord(blend_coord)):
-            message = ("The blend_coord {} does not match on "
-                       "weights_from_mask and "
-                       "one_dimensional_weights_cube".format(blend_coord))
-            raise ValueError(message)
+        _check_blend_coord_matches(
+            weights_from_mask, one_dimensional_weights_cube, blend_coord)
         for masked_weight_slice, one_dimensional_weight in zip(
                 weights_from_mask.slices_over(blend_coord),
                 one_dimensional_weights_cube.slices_over(blend_coord)):
@@ -311,7 +390,7 @@ class SpatiallyVaryingWeightsFromMask(object):
         coords_to_slice_over = [blend_coord, y_coord, x_coord]
         slices = cube_to_collapse.slices(coords_to_slice_over)
         # Check they all have the same mask
-        first_slice = slices.next()
+        first_slice = next(slices)
         if np.ma.is_masked(first_slice.data):
             first_mask = first_slice.data.mask
             for cube_slice in slices:
@@ -360,13 +439,26 @@ class SpatiallyVaryingWeightsFromMask(object):
         """
         template_cube = self.create_template_slice(
             cube_to_collapse, blend_coord)
-        weights_from_mask = self.create_initial_weights_from_mask(
-            template_cube)
-        weights_from_mask = self.smooth_initial_weights(
-            weights_from_mask)
-        final_weights = self.multiply_weights(
-            weights_from_mask, one_dimensional_weights_cube,
-            blend_coord)
-        final_weights = self.normalised_masked_weights(
-            final_weights, blend_coord)
-        return final_weights
+        _check_blend_coord_matches(
+            template_cube, one_dimensional_weights_cube, blend_coord)
+        _warn_if_not_masked(template_cube)
+
+        # Work on arrays with dimensions (blend_coord, y, x), modifying the
+        # weights in place rather than creating intermediate cubes.
+        template_cube.transpose([
+            template_cube.coord_dims(coord)[0] for coord in [
+                template_cube.coord(blend_coord),
+                template_cube.coord(axis='y'),
+                template_cube.coord(axis='x')]])
+        final_weights = self.fuzzy_weights_from_masks(
+            np.ma.getmaskarray(template_cube.data))
+        final_weights *= one_dimensional_weights_cube.data.reshape(-1, 1, 1)
+        summed_weights = final_weights.sum(axis=0)
+        # Only divide where the sum of weights are positive. Elsewhere all of
+        # the weights are already zero.
+        np.divide(final_weights, summed_weights, out=final_weights,
+                  where=(summed_weights > 0))
+
+        result = template_cube.copy(data=final_weights)
+        result.rename("weights")
+        return result
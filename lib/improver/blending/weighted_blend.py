@@ -222,7 +222,8 @@ class PercentileBlendingAggregator:
         return result
 
     @staticmethod
-    def aggregate(data, axis, arr_percent, arr_weights, perc_dim):
+    def aggregate(data, axis, arr_percent, arr_weights, perc_dim,
+                  chunk_size=2000):
         """ Blend percentile aggregate function to blend percentile data
             along a given axis of a cube.
 
@@ -243,12 +244,25 @@ class PercentileBlendingAggregator:
             (Note percent and weights have special meaning in Aggregator
              hence the rename.)
 
+        Keyword Args:
+            chunk_size (int or None):
+                     The maximum number of grid points blended together,
+                     which bounds the size of the temporary arrays used.
+                     Small chunks are quicker as they remain in the cache.
+                     If None, all grid points are blended together.
+
         Returns:
             result (np.array):
                      containing the weighted percentile blend data across
                      the chosen coord. The dimension associated with axis
                      has been collapsed, and the rest of the dimensions remain.
+
+        Raises:
+            ValueError: If chunk_size is not None and is less than 1.
         """
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError(
+                "Invalid chunk_size: must be >= 1: {}".format(chunk_size))
         # Iris aggregators support indexing from the end of the array.
         if axis < 0:
             axis += data.ndim
@@ -266,13 +280,17 @@ class PercentileBlendingAggregator:
         # Create the resulting data array, which is the shape of the original
         # data without dimension we are collapsing over
         result = np.zeros(input_shape[1:], dtype=np.float32)
-        # Loop over the flattened data, i.e. across all the data points in
-        # each slice of the coordinate we are collapsing over, finding the
-        # blended percentile values at each point.
-        for i in range(data.shape[-1]):
-            result[:, i] = (
-                PercentileBlendingAggregator.blend_percentiles(
-                    data[:, :, i], arr_percent, arr_weights[:, :, i]))
+        # Find the blended percentile values at all the data points in
+        # each slice of the coordinate we are collapsing over, a chunk of
+        # points at a time.
+        npoints = data.shape[-1]
+        if chunk_size is None:
+            chunk_size = max(npoints, 1)
+        for start in range(0, npoints, chunk_size):
+            index = slice(start, start + chunk_size)
+            result[:, index] = (
+                PercentileBlendingAggregator.blend_percentiles_batched(
+                    data[:, :, index], arr_percent, arr_weights[:, :, index]))
         # Reshape the data and put the percentile dimension
         # back in the right place
         shape = arr_percent.shape + shape
@@ -352,6 +370,156 @@ class PercentileBlendingAggregator:
                                           np.float32)
         return new_combined_perc
 
+    @staticmethod
+    def _interp_columns(x_values, xp_values, fp_values):
+        """Piecewise linear interpolation applied independently to each
+        column of a set of arrays.
+
+        This gives the same result as calling np.interp for each column,
+        including where xp_values contains repeated values, without looping
+        over the columns. For each value of x, the index of the interval of
+        xp in which it lies is found by counting the xp that are less than
+        or equal to it, which is quick for the short percentile axis.
+
+        Args:
+            x_values (np.array):
+                2D array of shape (m, columns) containing the x-coordinates
+                at which to evaluate the interpolated values.
+            xp_values (np.array):
+                2D array of shape (n, columns) containing the x-coordinates
+                of the data points, increasing along the first axis.
+            fp_values (np.array):
+                2D array of shape (n, columns), or (n, 1) to use the same
+                values for every column, containing the y-coordinates of the
+                data points.
+
+        Returns:
+            result (np.array):
+                2D float64 array of shape (m, columns) containing the
+                interpolated values.
+        """
+        x_values = np.asarray(x_values, dtype=np.float64)
+        xp_values = np.asarray(xp_values, dtype=np.float64)
+        fp_values = np.asarray(fp_values, dtype=np.float64)
+        npoints = xp_values.shape[0]
+        nvalues = x_values.shape[0]
+        columns = max(x_values.shape[1], xp_values.shape[1])
+        x_values = np.broadcast_to(x_values, (nvalues, columns))
+        xp_values = np.broadcast_to(xp_values, (npoints, columns))
+        if npoints == 1:
+            return np.repeat(np.broadcast_to(fp_values, (1, columns)),
+                             nvalues, axis=0)
+
+        # For each x, count the xp that are less than or equal to it.
+        index = np.full((nvalues, columns), -1, dtype=np.intp)
+        for xp_row in xp_values:
+            index += xp_row <= x_values
+
+        lower = np.clip(index, 0, npoints - 2)
+        xp_lower = np.take_along_axis(xp_values, lower, axis=0)
+        xp_upper = np.take_along_axis(xp_values, lower + 1, axis=0)
+        if fp_values.shape[1] == 1:
+            fp_values = fp_values[:, 0]
+            fp_lower = fp_values[lower]
+            fp_upper = fp_values[lower + 1]
+        else:
+            fp_lower = np.take_along_axis(fp_values, lower, axis=0)
+            fp_upper = np.take_along_axis(fp_values, lower + 1, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = (fp_upper - fp_lower) / (xp_upper - xp_lower)
+            result = slope * (x_values - xp_lower) + fp_lower
+            # If we get NaN in one direction, try the other, as np.interp.
+            retry = np.isnan(result)
+            if retry.any():
+                result = np.where(
+                    retry, slope * (x_values - xp_upper) + fp_upper, result)
+                result = np.where(
+                    np.isnan(result) & (fp_lower == fp_upper), fp_lower,
+                    result)
+        result = np.where(x_values == xp_lower, fp_lower, result)
+        result = np.where(index >= npoints - 1, fp_values[-1:], result)
+        result = np.where(index < 0, fp_values[:1], result)
+        return np.where(np.isnan(x_values), np.nan, result)
+
+    @staticmethod
+    def blend_percentiles_batched(perc_values, percentiles, weights):
+        """ Blend percentiles function, to calculate the weighted blend across
+            a given axis of percentile data for many grid points at once.
+
+        This gives the same result as calling blend_percentiles for each
+        grid point in turn. Points at which the percentile values are not
+        monotonic are passed to blend_percentiles individually.
+
+        Args:
+            perc_values (np.array):
+                Array containing the percentile values to blend, with
+                shape: (length of coord to blend, num of percentiles,
+                num of grid points)
+            percentiles (np.array):
+                Array of percentile values e.g [0, 20.0, 50.0, 70.0, 100.0],
+                same size as the percentile dimension of data.
+            weights (np.array):
+                Array of weights, the same shape as perc_values.
+
+        Returns:
+            new_combined_perc (np.array):
+                Array containing the weighted percentile blend data
+                across the chosen coord, with shape:
+                (num of percentiles, num of grid points)
+        """
+        interp = PercentileBlendingAggregator._interp_columns
+        num, num_percentiles, num_points = perc_values.shape
+        new_combined_perc = np.empty((num_percentiles, num_points),
+                                     dtype=np.float32)
+
+        # np.interp requires increasing x-coordinates, so the columns
+        # interpolated together must have monotonic percentile values. Any
+        # others are blended one at a time to reproduce np.interp exactly.
+        with np.errstate(invalid='ignore'):
+            monotonic = np.all(np.diff(perc_values, axis=1) >= 0,
+                               axis=(0, 1))
+        for point in np.flatnonzero(~monotonic):
+            new_combined_perc[:, point] = (
+                PercentileBlendingAggregator.blend_percentiles(
+                    perc_values[:, :, point], percentiles,
+                    weights[:, :, point]))
+        if not monotonic.any():
+            return new_combined_perc
+        if not monotonic.all():
+            perc_values = perc_values[:, :, monotonic]
+            weights = weights[:, :, monotonic]
+            num_points = perc_values.shape[-1]
+
+        percentile_column = np.asarray(percentiles)[:, np.newaxis]
+        # Find the probability of each threshold in the pdf of each of the
+        # points in the axis we are blending over, and add them multiplied
+        # by the correct weight to the running totals, as in
+        # blend_percentiles.
+        combined_pdf = np.zeros(perc_values.shape, dtype=np.float32)
+        for i in range(0, num):
+            for j in range(0, num):
+                if i == j:
+                    recalc_values_in_pdf = percentile_column
+                else:
+                    recalc_values_in_pdf = interp(
+                        perc_values[i], perc_values[j], percentile_column)
+                combined_pdf[i] += recalc_values_in_pdf*weights[j]
+
+        # Combine and sort the threshold values and the blended probability
+        # values for all the points we are blending.
+        combined_shape = (num * num_percentiles, num_points)
+        combined_perc_thres_data = np.sort(
+            perc_values.reshape(combined_shape), axis=0)
+        combined_perc_values = np.sort(
+            combined_pdf.reshape(combined_shape), axis=0)
+
+        # Find the percentile values from this combined data by interpolating
+        # back from probability values to the original percentiles.
+        new_combined_perc[:, monotonic] = interp(
+            percentile_column, combined_perc_values,
+            combined_perc_thres_data)
+        return new_combined_perc
+
 
 class MaxProbabilityAggregator:
     """Class for the Aggregator used to calculate the maximum weighted
@@ -901,3 +1069,155 @@ class WeightedBlendAcrossWholeDimension:
             result.data = np.ma.array(result.data)
 
         return result
+
+    def process_streaming(self, cube, weights=None,
+                          accumulator_dtype=np.float32):
+        """Calculate weighted blend across the chosen coord, realising the
+           data for only one slice along the blending coordinate at a time.
+           The weighted contributions of each slice are accumulated into
+           arrays with the shape of a single slice, so a lazily loaded cube
+           can be blended without holding all of its data in memory.
+
+           The result matches that of the process method for the
+           weighted_mean and weighted_maximum modes. Masked points do not
+           contribute to the blend, and points that are masked in every
+           slice are masked in the result. Percentile data cannot be
+           blended one slice at a time, so is passed to the process method.
+
+        Args:
+            cube (iris.cube.Cube):
+                Cube to blend across the coord.
+        Keyword Args:
+            weights (iris.cube.Cube):
+                Cube of blending weights. If None, the diagnostic cube is
+                blended with equal weights across the blending dimension.
+            accumulator_dtype (numpy.dtype):
+                The data type of the arrays in which the weighted
+                contributions are accumulated. Using np.float64 reduces the
+                rounding error when blending many slices. The result is
+                always returned as float32.
+        Returns:
+            result (iris.cube.Cube):
+                containing the weighted blend across the chosen coord.
+        Raises:
+            TypeError : If the first argument not a cube.
+            CoordinateNotFoundError : If coordinate to be collapsed not found
+                                      in cube.
+            CoordinateNotFoundError : If coordinate to be collapsed not found
+                                      in provided weights cube.
+            ValueError : If coordinate to be collapsed is not a dimension.
+            ValueError : If the weights cube does not have the same number of
+                         points along the blending coordinate as the cube.
+        """
+        if not isinstance(cube, iris.cube.Cube):
+            msg = ('The first argument must be an instance of iris.cube.Cube '
+                   'but is {}.'.format(type(cube)))
+            raise TypeError(msg)
+
+        if not cube.coords(self.coord):
+            msg = ('Coordinate to be collapsed not found in cube.')
+            raise CoordinateNotFoundError(msg)
+
+        coord_dim = cube.coord_dims(self.coord)
+        if not coord_dim:
+            raise ValueError('Blending coordinate {} has no associated '
+                             'dimension'.format(self.coord))
+
+        # Ensure input cube and weights cube are ordered equivalently along
+        # blending coordinate. Indexing a lazy cube does not realise its data.
+        cube = sort_coord_in_cube(cube, self.coord, order="ascending")
+        if weights is not None:
+            if not weights.coords(self.coord):
+                msg = ('Coordinate to be collapsed not found in weights cube.')
+                raise CoordinateNotFoundError(msg)
+            weights = sort_coord_in_cube(weights, self.coord,
+                                         order="ascending")
+
+        self.check_compatible_time_points(cube)
+
+        # Percentiles are blended by interpolation across all the slices at
+        # once, which cannot be accumulated slice by slice.
+        if self.check_percentile_coord(cube):
+            return self.process(cube, weights=weights)
+
+        number_of_fields, = cube.coord(self.coord).shape
+        if weights is None:
+            weights_slices = [None] * number_of_fields
+        elif weights.coord(self.coord).shape != (number_of_fields,):
+            msg = ("Weights cube is not a compatible shape with the"
+                   " data cube. Weights: {}, Diagnostic: {}".format(
+                       weights.shape, cube.shape))
+            raise ValueError(msg)
+        else:
+            weights_slices = weights.slices_over(self.coord)
+
+        field_shape = tuple(
+            length for dim, length in enumerate(cube.shape)
+            if dim != coord_dim[0])
+        weighted_mean = self.mode == "weighted_mean"
+        if weighted_mean:
+            blended = np.zeros(field_shape, dtype=accumulator_dtype)
+            normaliser = np.zeros(field_shape, dtype=accumulator_dtype)
+        else:
+            blended = np.full(field_shape, -np.inf, dtype=accumulator_dtype)
+            any_valid = np.zeros(field_shape, dtype=bool)
+        sum_of_weights = np.zeros(field_shape, dtype=accumulator_dtype)
+        input_masked = False
+
+        for field, field_weights in zip(cube.slices_over(self.coord),
+                                        weights_slices):
+            if field_weights is None:
+                weights_array = np.float32(1./number_of_fields)
+            elif field_weights.ndim == 0:
+                weights_array = np.float32(field_weights.data)
+            else:
+                weights_array = self.shape_weights(field, field_weights)
+            sum_of_weights += weights_array
+
+            data = field.data
+            valid = None
+            if isinstance(data, np.ma.core.MaskedArray):
+                input_masked = True
+                valid = ~np.ma.getmaskarray(data)
+                data = np.ma.getdata(data)
+            contribution = np.empty(field_shape, dtype=accumulator_dtype)
+            np.multiply(data, weights_array, out=contribution)
+
+            if weighted_mean:
+                if valid is None:
+                    normaliser += weights_array
+                else:
+                    contribution[~valid] = 0.
+                    normaliser += np.where(valid, weights_array, 0.)
+                blended += contribution
+            else:
+                if valid is None:
+                    any_valid[...] = True
+                else:
+                    contribution[~valid] = -np.inf
+                    any_valid |= valid
+                np.maximum(blended, contribution, out=blended)
+
+        self.check_weights(sum_of_weights[np.newaxis], 0)
+
+        if weighted_mean:
+            undefined = normaliser == 0
+            np.divide(blended, normaliser, out=blended, where=~undefined)
+            blended[undefined] = 0.
+            aggregator = iris.analysis.MEAN
+        else:
+            undefined = ~any_valid
+            blended[undefined] = 0.
+            aggregator = iris.analysis.MAX
+        blended = blended.astype(np.float32)
+        if input_masked or undefined.any():
+            blended = np.ma.masked_where(undefined, blended)
+
+        # Collapse a lazy view of the cube to get the blended metadata
+        # without computing anything from the input data.
+        cube_new = cube.copy(data=cube.lazy_data()).collapsed(
+            self.coord, aggregator)
+        cube_new.data = blended
+
+        return conform_metadata(
+            cube_new, cube, coord=self.coord, cycletime=self.cycletime)
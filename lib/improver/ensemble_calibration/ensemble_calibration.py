@@ -32,10 +32,13 @@
 This module defines all the "plugins" specific for ensemble calibration.
 
 """
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 from scipy import stats
 from scipy.optimize import minimize
 from scipy.stats import norm
+import time
 import warnings
 
 import cf_units as unit
@@ -43,7 +46,8 @@ import iris
 from iris.exceptions import CoordinateNotFoundError
 
 from improver.ensemble_calibration.ensemble_calibration_utilities import (
-    convert_cube_data_to_2d, check_predictor_of_mean_flag)
+    convert_cube_data_to_2d, check_predictor_of_mean_flag,
+    find_region_indices)
 from improver.utilities.cube_manipulation import (
     concatenate_cubes, enforce_coordinate_ordering)
 from improver.utilities.temporal import iris_time_to_datetime
@@ -65,6 +69,11 @@ class ContinuousRankedProbabilityScoreMinimisers(object):
     Note that the BFGS algorithm was initially trialled but had a bug
     in comparison to comparative results generated in R.
 
+    Alternatively, the L-BFGS-B algorithm can be used together with the
+    analytic gradient of the CRPS with respect to the coefficients. This
+    typically requires far fewer evaluations of the CRPS over the training
+    dataset than Nelder-Mead.
+
     """
 
     # Maximum iterations for minimisation using Nelder-Mead.
@@ -78,12 +87,49 @@ class ContinuousRankedProbabilityScoreMinimisers(object):
     # as part of the minimisation.
     BAD_VALUE = np.float64(999999)
 
-    def __init__(self):
+    # The supported minimisation methods.
+    MINIMISATION_METHODS = ["nelder-mead", "l-bfgs-b"]
+
+    def __init__(self, minimisation_method="nelder-mead"):
+        """
+        Initialise the class.
+
+        Keyword Args:
+            minimisation_method (str):
+                The scipy minimize method used to optimise the coefficients.
+                Either "nelder-mead", which uses only evaluations of the CRPS,
+                or "l-bfgs-b", which also uses the analytic gradient of the
+                CRPS.
+
+        Raises:
+            ValueError: If the minimisation method is not supported.
+        """
+        if minimisation_method.lower() not in self.MINIMISATION_METHODS:
+            msg = ("The minimisation method {} is not supported. "
+                   "Supported methods are {}".format(
+                       minimisation_method, self.MINIMISATION_METHODS))
+            raise ValueError(msg)
+        self.minimisation_method = minimisation_method.lower()
         # Dictionary containing the minimisation functions, which will
         # be used, depending upon the distribution, which is requested.
         self.minimisation_dict = {
             "gaussian": self.normal_crps_minimiser,
             "truncated gaussian": self.truncated_normal_crps_minimiser}
+        # Dictionary containing the functions returning the CRPS and its
+        # gradient, used for gradient-based minimisation.
+        self.gradient_minimisation_dict = {
+            "gaussian": self.normal_crps_and_gradient,
+            "truncated gaussian": self.truncated_normal_crps_and_gradient}
+        # Summary of the most recent minimisation, containing the method,
+        # the number of iterations and CRPS evaluations, the final CRPS and
+        # the time taken in seconds.
+        self.minimisation_summary = None
+
+    def __repr__(self):
+        """Represent the configured plugin instance as a string."""
+        result = ('<ContinuousRankedProbabilityScoreMinimisers: '
+                  'minimisation_method: {}>')
+        return result.format(self.minimisation_method)
 
     def crps_minimiser_wrapper(
             self, initial_guess, forecast_predictor, truth, forecast_var,
@@ -116,6 +162,286 @@ class ContinuousRankedProbabilityScoreMinimisers(object):
                 List of optimised coefficients.
                 Order of coefficients is [gamma, delta, alpha, beta].
 
+        The number of iterations and CRPS evaluations and the time taken
+        are recorded in self.minimisation_summary.
+
+        """
+        forecast_predictor_data, truth_data, forecast_var_data = (
+            self._extract_minimisation_data(
+                forecast_predictor, truth, forecast_var,
+                predictor_of_mean_flag, distribution))
+        return self.minimise_crps(
+            initial_guess, forecast_predictor_data, truth_data,
+            forecast_var_data, predictor_of_mean_flag, distribution)
+
+    def crps_minimiser_wrapper_for_regions(
+            self, initial_guess, forecast_predictor, truth, forecast_var,
+            predictor_of_mean_flag, distribution, region_labels,
+            max_workers=1):
+        """
+        Function to estimate optimised values for the coefficients
+        independently for each region, e.g. for each spot site, grid tile
+        or masked region. The minimisations are independent, so can be
+        run on a pool of processes.
+
+        Args:
+            initial_guess (List):
+                List of coefficients used as the initial guess for every
+                region. Order of coefficients is [gamma, delta, alpha, beta].
+            forecast_predictor (iris.cube.Cube):
+                Cube containing the fields to be used as the predictor,
+                either the ensemble mean or the ensemble realizations.
+            truth (iris.cube.Cube):
+                Cube containing the field, which will be used as truth.
+            forecast_var (iris.cube.Cube):
+                Cube containg the field containing the ensemble variance.
+            predictor_of_mean_flag (String):
+                String to specify the input to calculate the calibrated mean.
+                Currently the ensemble mean ("mean") and the ensemble
+                realizations ("realizations") are supported as the predictors.
+            distribution (String):
+                String used to access the appropriate minimisation function
+                within self.minimisation_dict.
+            region_labels (numpy.ndarray):
+                Array of labels matching the trailing (spatial) dimensions
+                of the truth, where each unique label defines a region.
+                See find_region_indices.
+
+        Keyword Args:
+            max_workers (int):
+                The number of processes used to run the minimisations.
+                If 1, the regions are processed in series.
+
+        Returns:
+            (tuple): tuple containing:
+                **region_ids** (numpy.ndarray):
+                    The sorted unique region labels.
+                **optimised_coeffs** (numpy.ndarray):
+                    Array of shape (number of regions, number of
+                    coefficients) containing the optimised coefficients
+                    for each region.
+
+        The summary of the minimisation for each region is recorded in
+        self.minimisation_summary as a list.
+
+        """
+        forecast_predictor_data, truth_data, forecast_var_data = (
+            self._extract_minimisation_data(
+                forecast_predictor, truth, forecast_var,
+                predictor_of_mean_flag, distribution))
+        region_ids, point_indices = find_region_indices(
+            region_labels, truth.shape)
+        optimised_coeffs = self.minimise_crps_for_regions(
+            initial_guess, forecast_predictor_data, truth_data,
+            forecast_var_data, predictor_of_mean_flag, distribution,
+            point_indices, len(region_ids), max_workers=max_workers)
+        return region_ids, optimised_coeffs
+
+    def minimise_crps(
+            self, initial_guess, forecast_predictor_data, truth_data,
+            forecast_var_data, predictor_of_mean_flag, distribution):
+        """
+        Estimate optimised values for the coefficients from arrays of
+        training data, e.g. the data accumulated by
+        AccumulateTrainingDataForEnsembleCalibration.
+
+        Args:
+            initial_guess (List):
+                List of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            forecast_predictor_data (numpy.ndarray):
+                Data to be used as the predictor, either the ensemble mean,
+                or the ensemble realizations with a trailing realization
+                dimension.
+            truth_data (numpy.ndarray):
+                Data to be used as the truth.
+            forecast_var_data (numpy.ndarray):
+                Data containing the ensemble variance.
+            predictor_of_mean_flag (String):
+                String to specify the input to calculate the calibrated mean.
+            distribution (String):
+                String used to access the appropriate minimisation function
+                within self.minimisation_dict.
+
+        Returns:
+            optimised_coeffs (numpy.ndarray):
+                Array of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+
+        """
+        optimised_coeffs, self.minimisation_summary = self._minimise(
+            initial_guess, forecast_predictor_data, truth_data,
+            forecast_var_data, predictor_of_mean_flag, distribution)
+        return optimised_coeffs
+
+    def minimise_crps_for_regions(
+            self, initial_guess, forecast_predictor_data, truth_data,
+            forecast_var_data, predictor_of_mean_flag, distribution,
+            point_indices, number_of_regions, max_workers=1):
+        """
+        Estimate optimised values for the coefficients independently for
+        each region from arrays of training data.
+
+        Args:
+            initial_guess (List):
+                List of coefficients used as the initial guess for every
+                region. Order of coefficients is [gamma, delta, alpha, beta].
+            forecast_predictor_data (numpy.ndarray):
+                Data to be used as the predictor, either the ensemble mean,
+                or the ensemble realizations with a trailing realization
+                dimension.
+            truth_data (numpy.ndarray):
+                Data to be used as the truth.
+            forecast_var_data (numpy.ndarray):
+                Data containing the ensemble variance.
+            predictor_of_mean_flag (String):
+                String to specify the input to calculate the calibrated mean.
+            distribution (String):
+                String used to access the appropriate minimisation function
+                within self.minimisation_dict.
+            point_indices (numpy.ndarray):
+                The index of the region of each point of the data.
+            number_of_regions (int):
+                The number of regions.
+
+        Keyword Args:
+            max_workers (int):
+                The number of processes used to run the minimisations.
+                If 1, the regions are processed in series.
+
+        Returns:
+            optimised_coeffs (numpy.ndarray):
+                Array of shape (number of regions, number of coefficients)
+                containing the optimised coefficients for each region.
+
+        Raises:
+            ValueError: If max_workers is less than one.
+
+        """
+        if max_workers < 1:
+            msg = "Number of workers is less than one: {}".format(max_workers)
+            raise ValueError(msg)
+
+        # Sort the points by region, so that the points within each region
+        # can be extracted as one contiguous slice.
+        order = np.argsort(point_indices, kind="stable")
+        boundaries = np.cumsum(
+            np.bincount(point_indices, minlength=number_of_regions))[:-1]
+        region_points = np.split(order, boundaries)
+
+        minimise_args = [
+            [initial_guess] * number_of_regions,
+            [forecast_predictor_data[points] for points in region_points],
+            [truth_data[points] for points in region_points],
+            [forecast_var_data[points] for points in region_points],
+            [predictor_of_mean_flag] * number_of_regions,
+            [distribution] * number_of_regions]
+        if max_workers == 1:
+            results = list(map(self._minimise, *minimise_args))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(self._minimise, *minimise_args))
+
+        self.minimisation_summary = [summary for _, summary in results]
+        return np.array([coeffs for coeffs, _ in results], dtype=np.float32)
+
+    def _extract_minimisation_data(
+            self, forecast_predictor, truth, forecast_var,
+            predictor_of_mean_flag, distribution):
+        """
+        Extract the flattened float32 arrays used by the minimisation
+        functions from the input cubes.
+
+        Args:
+            forecast_predictor (iris.cube.Cube):
+                Cube containing the fields to be used as the predictor,
+                either the ensemble mean or the ensemble realizations.
+            truth (iris.cube.Cube):
+                Cube containing the field, which will be used as truth.
+            forecast_var (iris.cube.Cube):
+                Cube containg the field containing the ensemble variance.
+            predictor_of_mean_flag (String):
+                String to specify the input to calculate the calibrated mean.
+            distribution (String):
+                String used to access the appropriate minimisation function
+                within self.minimisation_dict.
+
+        Returns:
+            (tuple): tuple containing:
+                **forecast_predictor_data** (numpy.ndarray):
+                    The forecast predictor for each point, with a trailing
+                    realization dimension if the realizations are used as
+                    the predictors.
+                **truth_data** (numpy.ndarray):
+                    The truth for each point.
+                **forecast_var_data** (numpy.ndarray):
+                    The ensemble variance for each point.
+
+        Raises:
+            KeyError: If the distribution is not supported.
+
+        """
+        try:
+            self.minimisation_dict[distribution]
+        except KeyError as err:
+            msg = ("Distribution requested {} is not supported in {}"
+                   "Error message is {}".format(
+                       distribution, self.minimisation_dict, err))
+            raise KeyError(msg)
+
+        # Ensure predictor_of_mean_flag is valid.
+        check_predictor_of_mean_flag(predictor_of_mean_flag)
+
+        if predictor_of_mean_flag.lower() in ["mean"]:
+            forecast_predictor_data = forecast_predictor.data.flatten()
+            truth_data = truth.data.flatten()
+            forecast_var_data = forecast_var.data.flatten()
+        elif predictor_of_mean_flag.lower() in ["realizations"]:
+            truth_data = truth.data.flatten()
+            forecast_predictor = (
+                enforce_coordinate_ordering(
+                    forecast_predictor, "realization"))
+            forecast_predictor_data = convert_cube_data_to_2d(
+                forecast_predictor)
+            forecast_var_data = forecast_var.data.flatten()
+
+        return (forecast_predictor_data.astype(np.float32),
+                truth_data.astype(np.float32),
+                forecast_var_data.astype(np.float32))
+
+    def _minimise(
+            self, initial_guess, forecast_predictor_data, truth_data,
+            forecast_var_data, predictor_of_mean_flag, distribution):
+        """
+        Minimise the CRPS for the data provided, using the minimisation
+        method selected for this plugin.
+
+        Args:
+            initial_guess (List):
+                List of optimised coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            forecast_predictor_data (numpy.ndarray):
+                Data to be used as the predictor, either the ensemble mean
+                or the ensemble realizations.
+            truth_data (numpy.ndarray):
+                Data to be used as the truth.
+            forecast_var_data (numpy.ndarray):
+                Data containing the ensemble variance.
+            predictor_of_mean_flag (String):
+                String to specify the input to calculate the calibrated mean.
+            distribution (String):
+                String used to access the appropriate minimisation function
+                within self.minimisation_dict.
+
+        Returns:
+            (tuple): tuple containing:
+                **optimised_coeffs** (numpy.ndarray):
+                    Array of optimised coefficients.
+                    Order of coefficients is [gamma, delta, alpha, beta].
+                **minimisation_summary** (dict):
+                    The method, number of iterations and CRPS evaluations,
+                    final CRPS and the time taken by the minimisation.
+
         """
         def calculate_percentage_change_in_last_iteration(allvecs):
             """
@@ -145,49 +471,268 @@ class ContinuousRankedProbabilityScoreMinimisers(object):
                            allvecs[-2], np.absolute(allvecs[-2]-allvecs[-1]))
                 warnings.warn(msg)
 
-        try:
-            minimisation_function = self.minimisation_dict[distribution]
-        except KeyError as err:
-            msg = ("Distribution requested {} is not supported in {}"
-                   "Error message is {}".format(
-                       distribution, self.minimisation_dict, err))
-            raise KeyError(msg)
-
-        # Ensure predictor_of_mean_flag is valid.
-        check_predictor_of_mean_flag(predictor_of_mean_flag)
-
-        if predictor_of_mean_flag.lower() in ["mean"]:
-            forecast_predictor_data = forecast_predictor.data.flatten()
-            truth_data = truth.data.flatten()
-            forecast_var_data = forecast_var.data.flatten()
-        elif predictor_of_mean_flag.lower() in ["realizations"]:
-            truth_data = truth.data.flatten()
-            forecast_predictor = (
-                enforce_coordinate_ordering(
-                    forecast_predictor, "realization"))
-            forecast_predictor_data = convert_cube_data_to_2d(
-                forecast_predictor)
-            forecast_var_data = forecast_var.data.flatten()
-
+        minimisation_function = self.minimisation_dict[distribution]
         initial_guess = np.array(initial_guess, dtype=np.float32)
-        forecast_predictor_data = forecast_predictor_data.astype(np.float32)
-        forecast_var_data = forecast_var_data.astype(np.float32)
-        truth_data = truth_data.astype(np.float32)
         sqrt_pi = np.sqrt(np.pi).astype(np.float32)
 
-        optimised_coeffs = minimize(
-            minimisation_function, initial_guess,
-            args=(forecast_predictor_data, truth_data,
-                  forecast_var_data, sqrt_pi, predictor_of_mean_flag),
-            method="Nelder-Mead",
-            options={"maxiter": self.MAX_ITERATIONS, "return_all": True})
+        start_time = time.time()
+        if self.minimisation_method == "l-bfgs-b":
+            # The gradient-based minimisation is performed in double
+            # precision, so that the line searches are not limited by the
+            # precision of the CRPS.
+            optimised_coeffs = minimize(
+                self.gradient_minimisation_dict[distribution],
+                initial_guess.astype(np.float64),
+                args=(forecast_predictor_data.astype(np.float64),
+                      truth_data.astype(np.float64),
+                      forecast_var_data.astype(np.float64),
+                      np.sqrt(np.pi), predictor_of_mean_flag),
+                method="L-BFGS-B", jac=True,
+                options={"maxiter": self.MAX_ITERATIONS})
+        else:
+            optimised_coeffs = minimize(
+                minimisation_function, initial_guess,
+                args=(forecast_predictor_data, truth_data,
+                      forecast_var_data, sqrt_pi, predictor_of_mean_flag),
+                method="Nelder-Mead",
+                options={"maxiter": self.MAX_ITERATIONS, "return_all": True})
+        minimisation_summary = {
+            "method": self.minimisation_method,
+            "iterations": optimised_coeffs.nit,
+            "evaluations": optimised_coeffs.nfev,
+            "crps": float(optimised_coeffs.fun),
+            "time": time.time() - start_time}
         if not optimised_coeffs.success:
             msg = ("Minimisation did not result in convergence after "
                    "{} iterations. \n{}".format(
                        self.MAX_ITERATIONS, optimised_coeffs.message))
             warnings.warn(msg)
+        if self.minimisation_method == "l-bfgs-b":
+            return optimised_coeffs.x.astype(np.float32), minimisation_summary
         calculate_percentage_change_in_last_iteration(optimised_coeffs.allvecs)
-        return optimised_coeffs.x
+        return optimised_coeffs.x, minimisation_summary
+
+    @staticmethod
+    def _mean_and_gradient_of_mean(
+            initial_guess, forecast_predictor, predictor_of_mean_flag):
+        """
+        Calculate the location parameter of the calibrated distribution and
+        its gradient with respect to the alpha and beta coefficients.
+
+        Args:
+            initial_guess (Numpy array):
+                Array of coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            forecast_predictor (Numpy array):
+                Data to be used as the predictor,
+                either the ensemble mean or the ensemble realizations.
+            predictor_of_mean_flag (String):
+                String to specify the input to calculate the calibrated mean.
+                Currently the ensemble mean ("mean") and the ensemble
+                realizations ("realizations") are supported as the predictors.
+
+        Returns:
+            (tuple): tuple containing:
+                **mu** (Numpy array):
+                    The location parameter at each point.
+                **mu_gradient** (Numpy array):
+                    The gradient of mu with respect to the coefficients from
+                    alpha onwards, with shape (points, coefficients).
+        """
+        new_col = np.ones(forecast_predictor.shape[0])
+        all_data = np.column_stack((new_col, forecast_predictor))
+        if predictor_of_mean_flag.lower() in ["mean"]:
+            beta = initial_guess[2:]
+            mu_gradient = all_data
+        elif predictor_of_mean_flag.lower() in ["realizations"]:
+            beta = np.concatenate(
+                [initial_guess[2:3], initial_guess[3:]**2])
+            mu_gradient = all_data * np.concatenate(
+                [[1.], 2 * initial_guess[3:]])
+        mu = np.dot(all_data, beta)
+        return mu, mu_gradient
+
+    def _crps_and_gradient_from_parameters(
+            self, initial_guess, mu, mu_gradient, sigma, forecast_var,
+            crps, crps_mu, crps_sigma):
+        """
+        Combine the CRPS at each point and its derivatives with respect to the
+        location and scale parameters into the total CRPS and its gradient
+        with respect to the coefficients. Points with a non-finite CRPS are
+        ignored, as in the nansum used by the minimisation functions.
+
+        Args:
+            initial_guess (Numpy array):
+                Array of coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            mu (Numpy array):
+                The location parameter at each point.
+            mu_gradient (Numpy array):
+                The gradient of mu with respect to the coefficients from
+                alpha onwards, with shape (points, coefficients).
+            sigma (Numpy array):
+                The scale parameter at each point.
+            forecast_var (Numpy array):
+                Ensemble variance data.
+            crps (Numpy array):
+                The CRPS at each point.
+            crps_mu (Numpy array):
+                The derivative of the CRPS with respect to mu at each point.
+            crps_sigma (Numpy array):
+                The derivative of the CRPS with respect to sigma at each
+                point.
+
+        Returns:
+            (tuple): tuple containing:
+                **result** (float):
+                    The total CRPS.
+                **gradient** (Numpy array):
+                    The gradient of the total CRPS with respect to the
+                    coefficients.
+        """
+        valid = np.isfinite(crps) & np.isfinite(crps_mu) & np.isfinite(
+            crps_sigma)
+        crps_mu = np.where(valid, crps_mu, 0.)
+        crps_sigma_over_sigma = np.where(valid, crps_sigma / sigma, 0.)
+        gradient = np.empty(len(initial_guess))
+        gradient[0] = initial_guess[0] * np.sum(crps_sigma_over_sigma)
+        gradient[1] = initial_guess[1] * np.sum(
+            crps_sigma_over_sigma * np.where(valid, forecast_var, 0.))
+        gradient[2:] = np.dot(crps_mu, mu_gradient)
+        return np.sum(crps[valid]), gradient
+
+    def normal_crps_and_gradient(
+            self, initial_guess, forecast_predictor, truth, forecast_var,
+            sqrt_pi, predictor_of_mean_flag):
+        """
+        Calculate the CRPS for a normal distribution, as in
+        normal_crps_minimiser, together with its analytic gradient with
+        respect to the coefficients.
+
+        For z = (truth - mu) / sigma, the derivatives of the CRPS at each
+        point are -(2 * cdf(z) - 1) with respect to mu and
+        2 * pdf(z) - 1 / sqrt(pi) with respect to sigma.
+
+        Args:
+            initial_guess (Numpy array):
+                Array of coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            forecast_predictor (Numpy array):
+                Data to be used as the predictor,
+                either the ensemble mean or the ensemble realizations.
+            truth (Numpy array):
+                Data to be used as truth.
+            forecast_var (Numpy array):
+                Ensemble variance data.
+            sqrt_pi (float):
+                Square root of Pi
+            predictor_of_mean_flag (String):
+                String to specify the input to calculate the calibrated mean.
+                Currently the ensemble mean ("mean") and the ensemble
+                realizations ("realizations") are supported as the predictors.
+
+        Returns:
+            (tuple): tuple containing:
+                **result** (float):
+                    The CRPS summed over all points.
+                **gradient** (Numpy array):
+                    The gradient of the CRPS with respect to the coefficients.
+
+        """
+        mu, mu_gradient = self._mean_and_gradient_of_mean(
+            initial_guess, forecast_predictor, predictor_of_mean_flag)
+        sigma = np.sqrt(
+            initial_guess[0]**2 + initial_guess[1]**2 * forecast_var)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if not np.isfinite(np.min(mu/sigma)):
+                return self.BAD_VALUE, np.zeros(len(initial_guess))
+            xz = (truth - mu) / sigma
+            normal_cdf = norm.cdf(xz)
+            normal_pdf = norm.pdf(xz)
+            crps = sigma * (
+                xz * (2 * normal_cdf - 1) + 2 * normal_pdf - 1 / sqrt_pi)
+            crps_mu = -(2 * normal_cdf - 1)
+            crps_sigma = 2 * normal_pdf - 1 / sqrt_pi
+        return self._crps_and_gradient_from_parameters(
+            initial_guess, mu, mu_gradient, sigma, forecast_var, crps,
+            crps_mu, crps_sigma)
+
+    def truncated_normal_crps_and_gradient(
+            self, initial_guess, forecast_predictor, truth, forecast_var,
+            sqrt_pi, predictor_of_mean_flag):
+        """
+        Calculate the CRPS for a truncated normal distribution, as in
+        truncated_normal_crps_minimiser, together with its analytic gradient
+        with respect to the coefficients.
+
+        The CRPS at each point is written as sigma * F(z, x0), where
+        z = (truth - mu) / sigma and x0 = mu / sigma, so that the
+        derivatives with respect to mu and sigma follow from the partial
+        derivatives of F.
+
+        Args:
+            initial_guess (Numpy array):
+                Array of coefficients.
+                Order of coefficients is [gamma, delta, alpha, beta].
+            forecast_predictor (Numpy array):
+                Data to be used as the predictor,
+                either the ensemble mean or the ensemble realizations.
+            truth (Numpy array):
+                Data to be used as truth.
+            forecast_var (Numpy array):
+                Ensemble variance data.
+            sqrt_pi (float):
+                Square root of Pi
+            predictor_of_mean_flag (String):
+                String to specify the input to calculate the calibrated mean.
+                Currently the ensemble mean ("mean") and the ensemble
+                realizations ("realizations") are supported as the predictors.
+
+        Returns:
+            (tuple): tuple containing:
+                **result** (float):
+                    The CRPS summed over all points.
+                **gradient** (Numpy array):
+                    The gradient of the CRPS with respect to the coefficients.
+
+        """
+        mu, mu_gradient = self._mean_and_gradient_of_mean(
+            initial_guess, forecast_predictor, predictor_of_mean_flag)
+        sigma = np.sqrt(
+            initial_guess[0]**2 + initial_guess[1]**2 * forecast_var)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x0 = mu / sigma
+            if not np.isfinite(np.min(x0)) or (np.min(x0) < -3):
+                return self.BAD_VALUE, np.zeros(len(initial_guess))
+            xz = (truth - mu) / sigma
+            normal_cdf = norm.cdf(xz)
+            normal_pdf = norm.pdf(xz)
+            normal_cdf_0 = norm.cdf(x0)
+            normal_pdf_0 = norm.pdf(x0)
+            normal_cdf_root_two = norm.cdf(np.sqrt(2) * x0)
+            normal_pdf_root_two = norm.pdf(np.sqrt(2) * x0)
+            scaled_crps = (
+                xz * (2 * normal_cdf + normal_cdf_0 - 2) / normal_cdf_0 +
+                2 * normal_pdf / normal_cdf_0 -
+                normal_cdf_root_two / (sqrt_pi * normal_cdf_0**2))
+            # Partial derivatives of the scaled CRPS with respect to xz
+            # and x0.
+            scaled_crps_xz = (
+                (2 * normal_cdf + normal_cdf_0 - 2) / normal_cdf_0)
+            scaled_crps_x0 = (
+                -(xz * (2 * normal_cdf - 2) + 2 * normal_pdf) *
+                normal_pdf_0 / normal_cdf_0**2 -
+                np.sqrt(2) * normal_pdf_root_two /
+                (sqrt_pi * normal_cdf_0**2) +
+                2 * normal_cdf_root_two * normal_pdf_0 /
+                (sqrt_pi * normal_cdf_0**3))
+            crps = sigma * scaled_crps
+            crps_mu = scaled_crps_x0 - scaled_crps_xz
+            crps_sigma = (
+                scaled_crps - xz * scaled_crps_xz - x0 * scaled_crps_x0)
+        return self._crps_and_gradient_from_parameters(
+            initial_guess, mu, mu_gradient, sigma, forecast_var, crps,
+            crps_mu, crps_sigma)
 
     def normal_crps_minimiser(
             self, initial_guess, forecast_predictor, truth, forecast_var,
@@ -313,6 +858,235 @@ class ContinuousRankedProbabilityScoreMinimisers(object):
         return result
 
 
+class AccumulateTrainingDataForEnsembleCalibration(object):
+    """
+    Class to accumulate the training data for ensemble calibration from
+    historic forecast and truth pairs provided one at a time, e.g. one file
+    or one day at a time, so that the training period is not limited by
+    the memory needed to hold the full historic forecast and truth cubes.
+
+    Only the data needed to evaluate the CRPS is kept for each training
+    point: the forecast predictor, the ensemble variance and the truth,
+    as float32, with any points containing non-finite values discarded.
+    The CRPS is not a sum of fixed-size statistics, so these values must
+    be kept for each point. The linear regression used for the initial
+    guess only needs running sums, which are accumulated as the data are
+    added.
+
+    """
+    def __init__(self, desired_units, predictor_of_mean_flag="mean"):
+        """
+        Initialise the accumulated training data.
+
+        Args:
+            desired_units (str or cf_units.Unit):
+                The unit that you would like the calibration to be undertaken
+                in. The historic forecasts and truths will be converted as
+                required.
+            predictor_of_mean_flag (str):
+                String to specify the input to calculate the calibrated mean.
+                Currently the ensemble mean ("mean") and the ensemble
+                realizations ("realizations") are supported as the predictors.
+
+        """
+        check_predictor_of_mean_flag(predictor_of_mean_flag)
+        self.desired_units = desired_units
+        self.predictor_of_mean_flag = predictor_of_mean_flag
+        self.spatial_shape = None
+        self.number_of_pairs = 0
+        self._forecast_predictor_data = []
+        self._forecast_var_data = []
+        self._truth_data = []
+        self._spatial_indices = []
+        # Running sums for the linear regression of the truth on the
+        # forecast predictor. The data are shifted by the mean of the first
+        # pair to reduce the loss of precision in the sums.
+        self._shift = None
+        self._normal_matrix = None
+        self._normal_vector = None
+
+    def __repr__(self):
+        """Represent the configured plugin instance as a string."""
+        result = ('<AccumulateTrainingDataForEnsembleCalibration: '
+                  'desired_units: {}; predictor_of_mean_flag: {}; '
+                  'number_of_pairs: {}>')
+        return result.format(
+            self.desired_units, self.predictor_of_mean_flag,
+            self.number_of_pairs)
+
+    def process(self, historic_forecast, truth):
+        """
+        Add a historic forecast and the matching truth to the training data.
+        The historic forecast and truth are converted to the desired units,
+        reduced to the forecast predictor, ensemble variance and truth for
+        each point, and then discarded.
+
+        Args:
+            historic_forecast (iris.cube.Cube):
+                Cube containing the historic forecast realizations for one
+                or more validity times.
+            truth (iris.cube.Cube):
+                Cube containing the truth for the same validity times as the
+                historic forecast.
+
+        Raises:
+            ValueError: If the spatial shape of the truth differs from the
+                data that has already been accumulated.
+
+        """
+        historic_forecast = historic_forecast.copy()
+        truth = truth.copy()
+        historic_forecast.convert_units(self.desired_units)
+        truth.convert_units(self.desired_units)
+
+        # Put any time dimension first, so that the remaining dimensions
+        # give the spatial position of each point.
+        enforce_coordinate_ordering(historic_forecast, ["realization", "time"])
+        enforce_coordinate_ordering(truth, "time")
+        try:
+            spatial_shape = truth.shape[len(truth.coord_dims("time")):]
+        except CoordinateNotFoundError:
+            spatial_shape = truth.shape
+        if self.spatial_shape is None:
+            self.spatial_shape = spatial_shape
+        elif spatial_shape != self.spatial_shape:
+            msg = ("The spatial shape of the truth {} does not match the "
+                   "shape of the training data already accumulated {}".format(
+                       spatial_shape, self.spatial_shape))
+            raise ValueError(msg)
+
+        forecast_var = historic_forecast.collapsed(
+            "realization", iris.analysis.VARIANCE)
+        if self.predictor_of_mean_flag.lower() in ["mean"]:
+            forecast_predictor = historic_forecast.collapsed(
+                "realization", iris.analysis.MEAN)
+            forecast_predictor_data = (
+                np.ma.filled(forecast_predictor.data, np.nan).reshape(-1, 1))
+        elif self.predictor_of_mean_flag.lower() in ["realizations"]:
+            forecast_predictor_data = convert_cube_data_to_2d(
+                historic_forecast)
+        forecast_predictor_data = forecast_predictor_data.astype(np.float32)
+        forecast_var_data = np.ma.filled(
+            forecast_var.data, np.nan).flatten().astype(np.float32)
+        truth_data = np.ma.filled(
+            truth.data, np.nan).flatten().astype(np.float32)
+
+        valid = (np.isfinite(truth_data) & np.isfinite(forecast_var_data) &
+                 np.all(np.isfinite(forecast_predictor_data), axis=1))
+        forecast_predictor_data = forecast_predictor_data[valid]
+        truth_data = truth_data[valid]
+        spatial_size = int(np.prod(self.spatial_shape))
+        self._spatial_indices.append(
+            (np.flatnonzero(valid) % spatial_size).astype(np.int32))
+        self._forecast_var_data.append(forecast_var_data[valid])
+        self._truth_data.append(truth_data)
+        if self.predictor_of_mean_flag.lower() in ["mean"]:
+            self._forecast_predictor_data.append(
+                forecast_predictor_data[:, 0])
+        else:
+            self._forecast_predictor_data.append(forecast_predictor_data)
+        self._update_regression_sums(forecast_predictor_data, truth_data)
+        self.number_of_pairs += 1
+
+    def _update_regression_sums(self, forecast_predictor_data, truth_data):
+        """
+        Update the running sums of the normal equations for the linear
+        regression of the truth on the forecast predictor.
+
+        Args:
+            forecast_predictor_data (numpy.ndarray):
+                2d array of the forecast predictor with a trailing predictor
+                dimension.
+            truth_data (numpy.ndarray):
+                1d array of the truth.
+
+        """
+        if not truth_data.size:
+            return
+        predictors = forecast_predictor_data.astype(np.float64)
+        truth_data = truth_data.astype(np.float64)
+        if self._shift is None:
+            self._shift = (predictors.mean(axis=0), truth_data.mean())
+            size = predictors.shape[1] + 1
+            self._normal_matrix = np.zeros((size, size))
+            self._normal_vector = np.zeros(size)
+        design = np.column_stack(
+            (np.ones(len(truth_data)), predictors - self._shift[0]))
+        self._normal_matrix += design.T.dot(design)
+        self._normal_vector += design.T.dot(truth_data - self._shift[1])
+
+    def get_training_data(self):
+        """
+        Get the accumulated training data.
+
+        Returns:
+            (tuple): tuple containing:
+                **forecast_predictor_data** (numpy.ndarray):
+                    The forecast predictor for each training point, with a
+                    trailing realization dimension if the realizations are
+                    used as the predictors.
+                **truth_data** (numpy.ndarray):
+                    The truth for each training point.
+                **forecast_var_data** (numpy.ndarray):
+                    The ensemble variance for each training point.
+                **spatial_indices** (numpy.ndarray):
+                    The index of each training point within the flattened
+                    spatial dimensions, given by self.spatial_shape.
+
+        Raises:
+            ValueError: If no training data has been accumulated.
+
+        """
+        if not self.number_of_pairs:
+            msg = "No training data has been accumulated."
+            raise ValueError(msg)
+        return (np.concatenate(self._forecast_predictor_data),
+                np.concatenate(self._truth_data),
+                np.concatenate(self._forecast_var_data),
+                np.concatenate(self._spatial_indices))
+
+    def compute_initial_guess(
+            self, estimate_coefficients_from_linear_model_flag=True):
+        """
+        Compute the initial guess of the EMOS coefficients from the running
+        sums of the linear regression of the truth on the forecast predictor,
+        if requested. Otherwise, default values for alpha and beta will be
+        used. This matches the initial guess from
+        EstimateCoefficientsForEnsembleCalibration.compute_initial_guess
+        without needing the training data to be held as cubes.
+
+        Args:
+            estimate_coefficients_from_linear_model_flag (bool):
+                Flag whether coefficients should be estimated from
+                the linear regression, or static estimates should be used.
+
+        Returns:
+            initial_guess (numpy.ndarray):
+                Array of coefficients to be used as initial guess.
+                Order of coefficients is [gamma, delta, alpha, beta].
+
+        """
+        if self.predictor_of_mean_flag.lower() in ["mean"]:
+            no_of_predictors = 1
+        elif self._forecast_predictor_data:
+            no_of_predictors = self._forecast_predictor_data[0].shape[1]
+        else:
+            no_of_predictors = 0
+
+        if not estimate_coefficients_from_linear_model_flag:
+            initial_guess = [1, 1, 0] + [1] * no_of_predictors
+        elif self._shift is None:
+            initial_guess = [1, 1] + [np.nan] * (no_of_predictors + 1)
+        else:
+            coefficients = np.linalg.pinv(self._normal_matrix).dot(
+                self._normal_vector)
+            gradient = coefficients[1:]
+            intercept = (coefficients[0] + self._shift[1] -
+                         gradient.dot(self._shift[0]))
+            initial_guess = [1, 1, intercept] + gradient.tolist()
+        return np.array(initial_guess, dtype=np.float32)
+
+
 class EstimateCoefficientsForEnsembleCalibration(object):
     """
     Class focussing on estimating the optimised coefficients for ensemble
@@ -326,7 +1100,9 @@ class EstimateCoefficientsForEnsembleCalibration(object):
     ESTIMATE_COEFFICIENTS_FROM_LINEAR_MODEL_FLAG = True
 
     def __init__(self, distribution, desired_units,
-                 predictor_of_mean_flag="mean"):
+                 predictor_of_mean_flag="mean",
+                 minimisation_method="nelder-mead", region_labels=None,
+                 max_workers=1):
         """
         Create an ensemble calibration plugin that, for Nonhomogeneous Gaussian
         Regression, calculates coefficients based on historical forecasts and
@@ -344,12 +1120,35 @@ class EstimateCoefficientsForEnsembleCalibration(object):
                 String to specify the input to calculate the calibrated mean.
                 Currently the ensemble mean ("mean") and the ensemble
                 realizations ("realizations") are supported as the predictors.
+            minimisation_method (str):
+                The method used to minimise the CRPS, either "nelder-mead"
+                or "l-bfgs-b". See ContinuousRankedProbabilityScoreMinimisers.
+            region_labels (numpy.ndarray or None):
+                If provided, coefficients are estimated independently for
+                each region, rather than for the whole domain. The labels
+                match the spatial dimensions of the truth and each unique
+                label defines a region, e.g. one label per spot site, the
+                tiles from create_tile_region_labels or the values of a
+                region mask.
+            max_workers (int):
+                The number of processes used to estimate the coefficients
+                for the regions.
+
+        Raises:
+            ValueError: If max_workers is less than one.
 
         """
         self.distribution = distribution
         self.desired_units = desired_units
         self.predictor_of_mean_flag = predictor_of_mean_flag
-        self.minimiser = ContinuousRankedProbabilityScoreMinimisers()
+        self.minimiser = ContinuousRankedProbabilityScoreMinimisers(
+            minimisation_method=minimisation_method)
+        if max_workers < 1:
+            msg = "Number of workers is less than one: {}".format(max_workers)
+            raise ValueError(msg)
+        self.region_labels = region_labels
+        self.max_workers = max_workers
+        self.region_ids = None
         # Setting default values for coeff_names. Beta is the final
         # coefficient name in the list, as there can potentially be
         # multiple beta coefficients if the ensemble realizations, rather
@@ -385,7 +1184,7 @@ class EstimateCoefficientsForEnsembleCalibration(object):
             self.predictor_of_mean_flag, self.minimiser)
 
     def create_coefficients_cube(
-            self, optimised_coeffs, current_forecast):
+            self, optimised_coeffs, current_forecast, region_ids=None):
         """Create a cube for storing the coefficients computed using EMOS.
 
         .. See the documentation for examples of these cubes.
@@ -396,8 +1195,13 @@ class EstimateCoefficientsForEnsembleCalibration(object):
             optimised_coeffs (list):
                 List of optimised coefficients.
                 Order of coefficients is [gamma, delta, alpha, beta].
+                If coefficients have been estimated for each region, this
+                is a 2d array with a leading region dimension.
             current_forecast (iris.cube.Cube):
                 The cube containing the current forecast.
+            region_ids (numpy.ndarray or None):
+                The label of each region, used as the points of the region
+                coordinate. If None, the regions are numbered from zero.
 
         Returns:
             cube (iris.cube.Cube):
@@ -407,6 +1211,8 @@ class EstimateCoefficientsForEnsembleCalibration(object):
                 of the coordinate are integer values and a
                 coefficient_name auxiliary coordinate where the points of
                 the coordinate are e.g. gamma, delta, alpha, beta.
+                Regional coefficients have an additional leading region
+                dimension coordinate.
 
         """
         if self.predictor_of_mean_flag.lower() == "realizations":
@@ -418,19 +1224,27 @@ class EstimateCoefficientsForEnsembleCalibration(object):
         else:
             coeff_names = self.coeff_names
 
-        if len(optimised_coeffs) != len(coeff_names):
+        optimised_coeffs = np.asarray(optimised_coeffs)
+        if optimised_coeffs.shape[-1] != len(coeff_names):
             msg = ("The number of coefficients in {} must equal the "
                    "number of coefficient names {}.".format(
                         optimised_coeffs, coeff_names))
             raise ValueError(msg)
 
+        coeff_dim = optimised_coeffs.ndim - 1
         coefficient_index = iris.coords.DimCoord(
-            np.arange(len(optimised_coeffs)),
+            np.arange(len(coeff_names)),
             long_name="coefficient_index", units="1")
         coefficient_name = iris.coords.AuxCoord(
             coeff_names, long_name="coefficient_name", units="no_unit")
-        dim_coords_and_dims = [(coefficient_index, 0)]
-        aux_coords_and_dims = [(coefficient_name, 0)]
+        dim_coords_and_dims = [(coefficient_index, coeff_dim)]
+        aux_coords_and_dims = [(coefficient_name, coeff_dim)]
+        if coeff_dim:
+            if region_ids is None:
+                region_ids = np.arange(len(optimised_coeffs))
+            region = iris.coords.DimCoord(
+                region_ids, long_name="region", units="1")
+            dim_coords_and_dims.append((region, 0))
         for coord_name in (
                 ["time", "forecast_period", "forecast_reference_time"]):
             try:
@@ -564,7 +1378,9 @@ class EstimateCoefficientsForEnsembleCalibration(object):
            4. Calculate initial guess at coefficient values by performing a
               linear regression, if requested, otherwise default values are
               used.
-           5. Perform minimisation.
+           5. Perform minimisation. If region labels have been provided,
+              a separate minimisation is performed for each region, starting
+              from the initial guess for the whole domain.
 
         Args:
             current_forecast (iris.cube.Cube):
@@ -579,7 +1395,9 @@ class EstimateCoefficientsForEnsembleCalibration(object):
             (tuple): tuple containing:
                 **optimised_coeffs** (dict):
                     Dictionary containing a list of the optimised coefficients
-                    for each date.
+                    for each date. If region labels have been provided, each
+                    entry is an array of shape (number of regions, number of
+                    coefficients), with the regions given by self.region_ids.
                 **coeff_names** (list):
                     The name of each coefficient.
 
@@ -627,7 +1445,21 @@ class EstimateCoefficientsForEnsembleCalibration(object):
         if np.any(np.isnan(initial_guess)):
             nan_in_initial_guess = True
 
-        if not nan_in_initial_guess:
+        if self.region_labels is not None:
+            if not nan_in_initial_guess:
+                self.region_ids, optimised_coeffs[date] = (
+                    self.minimiser.crps_minimiser_wrapper_for_regions(
+                        initial_guess, forecast_predictor,
+                        truth, forecast_var,
+                        self.predictor_of_mean_flag,
+                        self.distribution.lower(), self.region_labels,
+                        max_workers=self.max_workers))
+            else:
+                self.region_ids, _ = find_region_indices(
+                    self.region_labels, truth.shape)
+                optimised_coeffs[date] = np.tile(
+                    initial_guess, (len(self.region_ids), 1))
+        elif not nan_in_initial_guess:
             # Need to access the x attribute returned by the
             # minimisation function.
             optimised_coeffs[date] = (
@@ -642,6 +1474,75 @@ class EstimateCoefficientsForEnsembleCalibration(object):
 
         return optimised_coeffs
 
+    def estimate_coefficients_from_training_data(
+            self, current_forecast, training_data):
+        """
+        Using Nonhomogeneous Gaussian Regression/Ensemble Model Output
+        Statistics, estimate the required coefficients from training data
+        that has been accumulated from historic forecast and truth pairs
+        by AccumulateTrainingDataForEnsembleCalibration.
+
+        Args:
+            current_forecast (iris.cube.Cube):
+                The cube containing the current forecast.
+            training_data (AccumulateTrainingDataForEnsembleCalibration):
+                The accumulated training data.
+
+        Returns:
+            optimised_coeffs (dict):
+                Dictionary containing a list of the optimised coefficients
+                for each date. If region labels have been provided, each
+                entry is an array of shape (number of regions, number of
+                coefficients), with the regions given by self.region_ids.
+
+        Raises:
+            ValueError: If the training data was accumulated using a
+                different predictor_of_mean_flag.
+
+        """
+        if (training_data.predictor_of_mean_flag.lower() !=
+                self.predictor_of_mean_flag.lower()):
+            msg = ("The training data has been accumulated using the "
+                   "predictor_of_mean_flag {}, which does not match {}".format(
+                       training_data.predictor_of_mean_flag,
+                       self.predictor_of_mean_flag))
+            raise ValueError(msg)
+
+        date = unit.num2date(
+            current_forecast.coord("time").points,
+            current_forecast.coord("time").units.name,
+            current_forecast.coord("time").units.calendar)[0]
+
+        (forecast_predictor_data, truth_data, forecast_var_data,
+         spatial_indices) = training_data.get_training_data()
+        initial_guess = training_data.compute_initial_guess(
+            self.ESTIMATE_COEFFICIENTS_FROM_LINEAR_MODEL_FLAG)
+        nan_in_initial_guess = np.any(np.isnan(initial_guess))
+
+        optimised_coeffs = {}
+        if self.region_labels is not None:
+            self.region_ids, region_indices = find_region_indices(
+                self.region_labels, training_data.spatial_shape)
+            if not nan_in_initial_guess:
+                optimised_coeffs[date] = (
+                    self.minimiser.minimise_crps_for_regions(
+                        initial_guess, forecast_predictor_data, truth_data,
+                        forecast_var_data, self.predictor_of_mean_flag,
+                        self.distribution.lower(),
+                        region_indices[spatial_indices],
+                        len(self.region_ids), max_workers=self.max_workers))
+            else:
+                optimised_coeffs[date] = np.tile(
+                    initial_guess, (len(self.region_ids), 1))
+        elif not nan_in_initial_guess:
+            optimised_coeffs[date] = self.minimiser.minimise_crps(
+                initial_guess, forecast_predictor_data, truth_data,
+                forecast_var_data, self.predictor_of_mean_flag,
+                self.distribution.lower())
+        else:
+            optimised_coeffs[date] = initial_guess
+        return optimised_coeffs
+
 
 class ApplyCoefficientsFromEnsembleCalibration(object):
     """
@@ -650,7 +1551,7 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
     """
     def __init__(
             self, current_forecast, optimised_coeffs, coeff_names,
-            predictor_of_mean_flag="mean"):
+            predictor_of_mean_flag="mean", region_labels=None):
         """
         Create an ensemble calibration plugin that, for Nonhomogeneous Gaussian
         Regression, applies coefficients created using on historical forecasts
@@ -668,12 +1569,20 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
                 String to specify the input to calculate the calibrated mean.
                 Currently the ensemble mean ("mean") and the ensemble
                 realizations ("realizations") are supported as the predictors.
+            region_labels (numpy.ndarray or None):
+                The region labels used to estimate regional coefficients,
+                matching the spatial dimensions of the current forecast.
+                Required if the optimised coefficients have a leading
+                region dimension. The coefficients for each region are
+                ordered by sorted label, as returned by
+                EstimateCoefficientsForEnsembleCalibration.
 
         """
         self.current_forecast = current_forecast
         self.optimised_coeffs = optimised_coeffs
         self.coeff_names = coeff_names
         self.predictor_of_mean_flag = predictor_of_mean_flag
+        self.region_labels = region_labels
 
     def _find_coords_of_length_one(self, cube, add_dimension=True):
         """
@@ -751,6 +1660,7 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
         Returns:
             coeff_cubes (iris.cube.Cube):
                 Cube containing the coefficient value as the data array.
+                Regional coefficients have an additional region dimension.
 
         """
         length_one_coords = self._find_coords_of_length_one(cube)
@@ -759,6 +1669,16 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
             self._separate_length_one_coords_into_aux_and_dim(
                 length_one_coords))
 
+        optimised_coeffs_at_date = np.asarray(optimised_coeffs_at_date)
+        if optimised_coeffs_at_date.ndim == 2:
+            region_ids, _ = find_region_indices(
+                self.region_labels, np.shape(self.region_labels))
+            region = iris.coords.DimCoord(
+                region_ids, long_name="region", units="1")
+            length_one_coords_for_dim_coords = (
+                length_one_coords_for_dim_coords + [(region, 1)])
+            optimised_coeffs_at_date = optimised_coeffs_at_date.T
+
         coeff_cubes = iris.cube.CubeList([])
         for coeff, coeff_name in zip(optimised_coeffs_at_date, coeff_names):
             cube = iris.cube.Cube(
@@ -826,7 +1746,10 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
             forecast_vars (iris.cube.Cube):
                 Cube containing the forecast variance e.g. ensemble variance.
             optimised_coeffs (dict):
-                Coefficients for all dates.
+                Coefficients for all dates. The coefficients for a date may
+                be a 2d array with a leading region dimension, in which case
+                the coefficients are applied to each point according to
+                self.region_labels.
             coeff_names (List):
                 Coefficient names.
             predictor_of_mean_flag (str):
@@ -851,7 +1774,7 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
         """
         date = iris_time_to_datetime(
             forecast_predictors.coord("time").copy())[0]
-        if len(optimised_coeffs[date]) != len(coeff_names):
+        if np.shape(optimised_coeffs[date])[-1] != len(coeff_names):
             msg = ("Number of coefficient names {} with names {} "
                    "is not equal to the number of "
                    "optimised_coeffs_at_date values {} "
@@ -861,11 +1784,19 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
                    "if the number of coefficient names out number "
                    "the number of coefficients".format(
                         len(coeff_names), coeff_names,
-                        len(optimised_coeffs[date]),
+                        np.shape(optimised_coeffs[date])[-1],
                         optimised_coeffs[date]))
             raise ValueError(msg)
-        optimised_coeffs_at_date = dict(
-            zip(coeff_names, optimised_coeffs[date]))
+        if np.ndim(optimised_coeffs[date]) == 2:
+            # Look up the coefficients for the region of each point, so
+            # that the regional coefficients are applied in one pass.
+            optimised_coeffs_at_date = dict(
+                zip(coeff_names,
+                    self._coefficients_for_each_point(
+                        optimised_coeffs[date], forecast_vars.shape).T))
+        else:
+            optimised_coeffs_at_date = dict(
+                zip(coeff_names, optimised_coeffs[date]))
 
         if predictor_of_mean_flag.lower() in ["mean"]:
             # Calculate predicted mean = a + b*X, where X is the
@@ -878,25 +1809,30 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
                               dtype=np.float32)
             all_data = np.column_stack(
                 (new_col, forecast_predictor_flat))
-            predicted_mean = np.dot(all_data, beta)
+            if np.ndim(beta) == 2:
+                predicted_mean = np.einsum("ij,ji->i", all_data, beta)
+            else:
+                predicted_mean = np.dot(all_data, beta)
             calibrated_forecast_predictor = forecast_predictors
         elif predictor_of_mean_flag.lower() in ["realizations"]:
             # Calculate predicted mean = a + b*X, where X is the
             # raw ensemble mean. In this case, b = beta^2.
-            beta_values = np.array([], dtype=np.float32)
-            for key in optimised_coeffs_at_date.keys():
-                if key.startswith("beta"):
-                    beta_values = (
-                        np.append(beta_values, optimised_coeffs_at_date[key]))
-            beta = np.concatenate(
-                [[optimised_coeffs_at_date["alpha"]], beta_values**2])
+            beta_values = [
+                optimised_coeffs_at_date[key] for key in coeff_names
+                if key.startswith("beta")]
+            beta = np.array(
+                [optimised_coeffs_at_date["alpha"]] +
+                [value**2 for value in beta_values])
             forecast_predictor_flat = (
                 convert_cube_data_to_2d(forecast_predictors))
             forecast_var_flat = forecast_vars.data.flatten()
 
             new_col = np.ones(forecast_var_flat.shape, dtype=np.float32)
             all_data = np.column_stack((new_col, forecast_predictor_flat))
-            predicted_mean = np.dot(all_data, beta)
+            if beta.ndim == 2:
+                predicted_mean = np.einsum("ij,ji->i", all_data, beta)
+            else:
+                predicted_mean = np.dot(all_data, beta)
             # Calculate mean of ensemble realizations, as only the
             # calibrated ensemble mean will be returned.
             calibrated_forecast_predictor = (
@@ -911,9 +1847,12 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
         # Calculating the predicted variance, based on the
         # raw variance S^2, where predicted variance = c + dS^2,
         # where c = (gamma)^2 and d = (delta)^2
-        predicted_var = (optimised_coeffs_at_date["gamma"]**2 +
-                         optimised_coeffs_at_date["delta"]**2 *
-                         forecast_vars.data)
+        gamma = optimised_coeffs_at_date["gamma"]
+        delta = optimised_coeffs_at_date["delta"]
+        if np.ndim(gamma) == 1:
+            gamma = gamma.reshape(forecast_vars.shape)
+            delta = delta.reshape(forecast_vars.shape)
+        predicted_var = gamma**2 + delta**2 * forecast_vars.data
 
         calibrated_forecast_var = forecast_vars
         calibrated_forecast_var.data = predicted_var
@@ -924,6 +1863,41 @@ class ApplyCoefficientsFromEnsembleCalibration(object):
         return (calibrated_forecast_predictor,
                 calibrated_forecast_var, coeff_cubes)
 
+    def _coefficients_for_each_point(self, regional_coeffs, data_shape):
+        """
+        Look up the coefficients of the region containing each point.
+
+        Args:
+            regional_coeffs (numpy.ndarray):
+                Array of shape (number of regions, number of coefficients)
+                with the regions ordered by sorted label.
+            data_shape (tuple):
+                The shape of the data to be calibrated.
+
+        Returns:
+            point_coeffs (numpy.ndarray):
+                Array of shape (number of points, number of coefficients)
+                containing the coefficients for each point of the flattened
+                data.
+
+        Raises:
+            ValueError: If no region labels have been provided, or if the
+                number of regions does not match the coefficients.
+
+        """
+        if self.region_labels is None:
+            msg = ("Region labels must be provided to apply coefficients "
+                   "that have been estimated for each region.")
+            raise ValueError(msg)
+        region_ids, point_indices = find_region_indices(
+            self.region_labels, data_shape)
+        if len(region_ids) != len(regional_coeffs):
+            msg = ("The number of regions {} does not match the number of "
+                   "sets of coefficients {}".format(
+                       len(region_ids), len(regional_coeffs)))
+            raise ValueError(msg)
+        return np.asarray(regional_coeffs)[point_indices]
+
 
 class EnsembleCalibration(object):
     """
@@ -933,7 +1907,9 @@ class EnsembleCalibration(object):
 
     """
     def __init__(self, calibration_method, distribution, desired_units,
-                 predictor_of_mean_flag="mean"):
+                 predictor_of_mean_flag="mean",
+                 minimisation_method="nelder-mead", region_labels=None,
+                 max_workers=1, streaming=False):
         """
         Create an ensemble calibration plugin that, for Nonhomogeneous Gaussian
         Regression, calculates coefficients based on historical forecasts and
@@ -965,11 +1941,33 @@ class EnsembleCalibration(object):
                 String to specify the input to calculate the calibrated mean.
                 Currently the ensemble mean ("mean") and the ensemble
                 realizations ("realizations") are supported as the predictors.
+            minimisation_method (String):
+                The method used to minimise the CRPS, either "nelder-mead"
+                or "l-bfgs-b". See ContinuousRankedProbabilityScoreMinimisers.
+            region_labels (numpy.ndarray or None):
+                If provided, coefficients are estimated and applied
+                independently for each region identified by a unique label.
+                See EstimateCoefficientsForEnsembleCalibration.
+            max_workers (int):
+                The number of processes used to estimate the coefficients
+                for the regions.
+            streaming (bool):
+                If True, the historic forecasts and truths are processed
+                one validity time, or one cube, at a time and only the
+                training data needed for the minimisation is kept, using
+                AccumulateTrainingDataForEnsembleCalibration. This allows
+                long training periods to be used, particularly if the
+                historic forecasts and truths are provided as iterables of
+                cubes loaded on demand, or as cubes with lazy data.
         """
         self.calibration_method = calibration_method
         self.distribution = distribution
         self.desired_units = desired_units
         self.predictor_of_mean_flag = predictor_of_mean_flag
+        self.minimisation_method = minimisation_method
+        self.region_labels = region_labels
+        self.max_workers = max_workers
+        self.streaming = streaming
 
     def __str__(self):
         result = ('<EnsembleCalibration: ' +
@@ -993,10 +1991,13 @@ class EnsembleCalibration(object):
                 the current cycle.
             historic_forecast (Iris Cube or CubeList):
                 The Cube or CubeList that provides the input historic forecasts
-                for calibration.
+                for calibration. If streaming, this may be any iterable of
+                cubes, which are processed in turn.
             truth (Iris Cube or CubeList):
                 The Cube or CubeList that provides the input truth for
                 calibration with dates matching the historic forecasts.
+                If streaming, this may be any iterable of cubes, matching
+                the historic forecasts in order.
 
         Returns:
             (tuple): tuple containing:
@@ -1020,10 +2021,20 @@ class EnsembleCalibration(object):
                     ["gaussian", "truncated gaussian"]):
                 ec = EstimateCoefficientsForEnsembleCalibration(
                     self.distribution, self.desired_units,
-                    predictor_of_mean_flag=self.predictor_of_mean_flag)
-                optimised_coeffs = (
-                    ec.estimate_coefficients_for_ngr(
-                        current_forecast, historic_forecast, truth))
+                    predictor_of_mean_flag=self.predictor_of_mean_flag,
+                    minimisation_method=self.minimisation_method,
+                    region_labels=self.region_labels,
+                    max_workers=self.max_workers)
+                if self.streaming:
+                    training_data = self._accumulate_training_data(
+                        historic_forecast, truth)
+                    optimised_coeffs = (
+                        ec.estimate_coefficients_from_training_data(
+                            current_forecast, training_data))
+                else:
+                    optimised_coeffs = (
+                        ec.estimate_coefficients_for_ngr(
+                            current_forecast, historic_forecast, truth))
         else:
             msg = ("Other calibration methods are not available. "
                    "{} is not available".format(
@@ -1031,7 +2042,8 @@ class EnsembleCalibration(object):
             raise ValueError(msg)
         ac = ApplyCoefficientsFromEnsembleCalibration(
             current_forecast, optimised_coeffs, ec.coeff_names,
-            predictor_of_mean_flag=self.predictor_of_mean_flag)
+            predictor_of_mean_flag=self.predictor_of_mean_flag,
+            region_labels=self.region_labels)
         (calibrated_forecast_predictor, calibrated_forecast_variance,
          calibrated_forecast_coefficients) = ac.apply_params_entry()
 
@@ -1042,3 +2054,36 @@ class EnsembleCalibration(object):
             calibrated_forecast_variance.data.astype(np.float32))
 
         return calibrated_forecast_predictor, calibrated_forecast_variance
+
+    def _accumulate_training_data(self, historic_forecast, truth):
+        """
+        Accumulate the training data from the historic forecasts and truths
+        one pair at a time.
+
+        Args:
+            historic_forecast (Iris Cube or iterable of Iris Cubes):
+                The historic forecasts. A single cube is processed one
+                validity time at a time.
+            truth (Iris Cube or iterable of Iris Cubes):
+                The truths, matching the historic forecasts in order.
+
+        Returns:
+            training_data (AccumulateTrainingDataForEnsembleCalibration):
+                The accumulated training data.
+
+        """
+        def iterate_over_time(cubes):
+            """Iterate over the validity times of a single cube, otherwise
+            over the cubes provided."""
+            if isinstance(cubes, iris.cube.Cube):
+                return cubes.slices_over("time")
+            return cubes
+
+        training_data = AccumulateTrainingDataForEnsembleCalibration(
+            self.desired_units,
+            predictor_of_mean_flag=self.predictor_of_mean_flag)
+        for historic_forecast_slice, truth_slice in zip(
+                iterate_over_time(historic_forecast),
+                iterate_over_time(truth)):
+            training_data.process(historic_forecast_slice, truth_slice)
+        return training_data
@@ -91,3 +91,79 @@ def check_predictor_of_mean_flag(predictor_of_mean_flag):
                "Accepted values are 'mean' or 'realizations'").format(
                    predictor_of_mean_flag.lower())
         raise ValueError(msg)
+
+
+def create_tile_region_labels(grid_shape, tile_size):
+    """
+    Create an array of region labels that divides a grid into rectangular
+    tiles, so that EMOS coefficients can be estimated for each tile.
+
+    Args:
+        grid_shape (tuple):
+            The shape of the (y, x) grid.
+        tile_size (int or tuple):
+            The number of grid points along each side of a tile, or a
+            tuple of the number of grid points along the y and x axes.
+            Tiles at the upper edges of the grid may be smaller.
+
+    Returns:
+        region_labels (numpy.ndarray):
+            Integer array of shape grid_shape, containing the index of the
+            tile that each grid point lies within.
+
+    Raises:
+        ValueError: If a tile size is less than one.
+
+    """
+    tile_size = np.broadcast_to(tile_size, (2,))
+    if np.any(tile_size < 1):
+        msg = "Invalid tile_size: must be >= 1: {}".format(tile_size)
+        raise ValueError(msg)
+    y_tiles = np.arange(grid_shape[0]) // tile_size[0]
+    x_tiles = np.arange(grid_shape[1]) // tile_size[1]
+    n_x_tiles = x_tiles[-1] + 1
+    return y_tiles[:, np.newaxis] * n_x_tiles + x_tiles[np.newaxis, :]
+
+
+def find_region_indices(region_labels, data_shape):
+    """
+    Find the index of the region that each point of a data array belongs to.
+
+    The region labels are matched to the trailing dimensions of the data,
+    e.g. a (y, x) array of labels for gridded data with a leading time
+    dimension, or a 1d array of labels for spot data with a site dimension.
+    Each unique label defines one region, so that a unique label for each
+    spot site gives one region per site.
+
+    Args:
+        region_labels (numpy.ndarray):
+            Array of labels identifying the region of each point.
+        data_shape (tuple):
+            The shape of the data to which the labels are applied.
+
+    Returns:
+        (tuple): tuple containing:
+            **region_ids** (numpy.ndarray):
+                The sorted unique region labels.
+            **point_indices** (numpy.ndarray):
+                1d array with the index into region_ids for each point of
+                the flattened data.
+
+    Raises:
+        ValueError: If the labels do not match the trailing dimensions of
+            the data.
+
+    """
+    region_labels = np.asarray(region_labels)
+    data_shape = tuple(data_shape)
+    if (region_labels.ndim > len(data_shape) or
+            region_labels.shape !=
+            data_shape[len(data_shape) - region_labels.ndim:]):
+        msg = ("The shape of the region labels {} does not match the "
+               "trailing dimensions of the data {}".format(
+                   region_labels.shape, data_shape))
+        raise ValueError(msg)
+    region_ids, label_indices = np.unique(region_labels, return_inverse=True)
+    point_indices = np.broadcast_to(
+        label_indices.reshape(region_labels.shape), data_shape).ravel()
+    return region_ids, point_indices
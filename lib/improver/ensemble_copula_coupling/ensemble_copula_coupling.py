@@ -47,6 +47,7 @@ from improver.ensemble_copula_coupling.ensemble_copula_coupling_utilities \
             create_cube_with_percentiles, choose_set_of_percentiles,
             get_bounds_of_distribution,
             insert_lower_and_upper_endpoint_to_1d_array,
+            interpolate_multiple_rows,
             restore_non_probabilistic_dimensions)
 from improver.utilities.cube_manipulation import (
     concatenate_cubes, enforce_coordinate_ordering)
@@ -236,10 +237,10 @@ class ResamplePercentiles(object):
                 dtype=np.float32
             )
         )
-        for index in range(forecast_at_reshaped_percentiles.shape[0]):
-            forecast_at_interpolated_percentiles[:, index] = np.interp(
-                desired_percentiles, original_percentiles,
-                forecast_at_reshaped_percentiles[index, :])
+        interpolate_multiple_rows(
+            desired_percentiles, original_percentiles,
+            forecast_at_reshaped_percentiles,
+            out=forecast_at_interpolated_percentiles.T)
 
         # Reshape forecast_at_percentiles, so the percentiles dimension is
         # first, and any other dimension coordinates follow.
@@ -473,10 +474,9 @@ class GeneratePercentilesFromProbabilities(object):
             np.empty((len(percentiles), probabilities_for_cdf.shape[0]),
                      dtype=np.float32)
         )
-        for index in range(probabilities_for_cdf.shape[0]):
-            forecast_at_percentiles[:, index] = np.interp(
-                percentiles, probabilities_for_cdf[index, :],
-                threshold_points)
+        interpolate_multiple_rows(
+            percentiles, probabilities_for_cdf, threshold_points,
+            out=forecast_at_percentiles.T)
 
         # Convert percentiles back into percentages.
         percentiles = np.array([x*100.0 for x in percentiles],
@@ -914,9 +914,36 @@ class EnsembleReordering(object):
     Statistical Science, 28(4), pp.616-640.
 
     """
-    def __init__(self):
-        """Initialise the class"""
-        pass
+    def __init__(self, batched=False, chunk_size=None):
+        """
+        Initialise the class
+
+        Keyword Args:
+            batched (bool):
+                If True, the reordering is applied to the whole forecast at
+                once using rank_ecc_batched, rather than one time at a time
+                using rank_ecc. The random values used to split tied values
+                then depend only on the random seed and the position of each
+                value within the forecast.
+            chunk_size (int or None):
+                The maximum number of grid points (over all dimensions other
+                than realization) reordered together in batched mode, which
+                bounds the size of the temporary arrays used. If None, all
+                grid points are reordered together.
+
+        Raises:
+            ValueError: If chunk_size is not None and is less than 1.
+        """
+        if chunk_size is not None and chunk_size < 1:
+            msg = "Invalid chunk_size: must be >= 1: {}".format(chunk_size)
+            raise ValueError(msg)
+        self.batched = batched
+        self.chunk_size = chunk_size
+
+    def __repr__(self):
+        """Represent the configured plugin instance as a string."""
+        result = '<EnsembleReordering: batched: {}, chunk_size: {}>'
+        return result.format(self.batched, self.chunk_size)
 
     @staticmethod
     def _recycle_raw_ensemble_realizations(
@@ -1054,6 +1081,138 @@ class EnsembleReordering(object):
             post_processed_forecast_percentiles, results)
         return results
 
+    @staticmethod
+    def _counter_based_random(random_seed, indices):
+        """
+        Generate random values in the range [0, 1) from a counter-based
+        generator. Each value depends only on the random seed and on the
+        corresponding index, so the same values are produced however the
+        indices are split into chunks. The SplitMix64 finaliser is used to
+        mix each seeded index.
+
+        Args:
+            random_seed (int):
+                Integer used to seed the generator.
+            indices (np.array of ints):
+                Non-negative counters for which to generate random values.
+
+        Returns:
+            np.array:
+                Array of random float64 values of the same shape as indices.
+        """
+        with np.errstate(over='ignore'):
+            state = (np.asarray(indices, dtype=np.uint64) +
+                     np.uint64(random_seed % 2**64) *
+                     np.uint64(0x9E3779B97F4A7C15) +
+                     np.uint64(0x9E3779B97F4A7C15))
+            state = ((state ^ (state >> np.uint64(30))) *
+                     np.uint64(0xBF58476D1CE4E5B9))
+            state = ((state ^ (state >> np.uint64(27))) *
+                     np.uint64(0x94D049BB133111EB))
+            state = state ^ (state >> np.uint64(31))
+        # Use the upper 53 bits to fill the mantissa of a float64.
+        return (state >> np.uint64(11)).astype(np.float64) / 2.**53
+
+    @staticmethod
+    def rank_ecc_batched(
+            post_processed_forecast_percentiles, raw_forecast_realizations,
+            random_ordering=False, random_seed=None, chunk_size=None):
+        """
+        Function to apply Ensemble Copula Coupling to the whole forecast at
+        once. This ranks the post-processed forecast realizations based on a
+        ranking determined from the raw forecast realizations.
+
+        The raw forecast realizations are recycled, or only the first n are
+        used, to match the number of percentiles, as in
+        _recycle_raw_ensemble_realizations. Tied raw forecast values are
+        split randomly using a counter-based generator indexed by position
+        within the whole (realization, ...) forecast, so the result does not
+        depend on the chunk_size.
+
+        Args:
+            post_processed_forecast_percentiles (cube):
+                Cube for post-processed percentiles. The percentiles are
+                assumed to be in ascending order and to be the zeroth
+                dimension.
+            raw_forecast_realizations (cube):
+                Cube containing the raw (not post-processed) forecasts.
+                The probabilistic dimension is assumed to be the zeroth
+                dimension, and the other dimensions must match those of the
+                post-processed forecast.
+            random_ordering (Logical):
+                If random_ordering is True, the post-processed forecasts are
+                reordered randomly, rather than using the ordering of the
+                raw ensemble.
+            random_seed (Integer or None):
+                If random_seed is an integer, the integer value is used for
+                the random seed.
+                If random_seed is None, no random seed is set, so the random
+                values generated are not reproducible.
+            chunk_size (int or None):
+                The maximum number of grid points reordered together. If
+                None, all grid points are reordered together.
+
+        Returns:
+            iris.cube.Cube:
+                Cube for post-processed realizations where at a particular grid
+                point, the ranking of the values within the ensemble matches
+                the ranking from the raw ensemble.
+
+        Raises:
+            ValueError: If the non-probabilistic dimensions of the raw and
+                post-processed forecasts do not match.
+        """
+        calibrated_data = post_processed_forecast_percentiles.data
+        raw_data = raw_forecast_realizations.data
+        if raw_data.shape[1:] != calibrated_data.shape[1:]:
+            msg = ("The raw forecast shape {} does not match the "
+                   "post-processed forecast shape {} in dimensions other "
+                   "than the leading dimension.".format(
+                       raw_data.shape, calibrated_data.shape))
+            raise ValueError(msg)
+
+        # Recycle the raw ensemble realizations to match the number of
+        # percentiles, e.g. 1, 2, 3, 1, 2, 3, etc.
+        plen = calibrated_data.shape[0]
+        mlen = raw_data.shape[0]
+        realization_index = np.arange(plen) % mlen
+
+        if random_seed is None:
+            random_seed = np.random.randint(np.iinfo(np.int32).max)
+        random_seed = int(random_seed)
+
+        npoints = int(np.prod(calibrated_data.shape[1:], dtype=int))
+        calibrated_data = calibrated_data.reshape(plen, npoints)
+        raw_data = raw_data.reshape(mlen, npoints)
+        result = np.empty_like(calibrated_data)
+        if chunk_size is None:
+            chunk_size = max(npoints, 1)
+        for start in range(0, npoints, chunk_size):
+            index = slice(start, min(start + chunk_size, npoints))
+            counters = (np.arange(plen)[:, np.newaxis] * npoints +
+                        np.arange(index.start, index.stop))
+            random_data = EnsembleReordering._counter_based_random(
+                random_seed, counters)
+            if random_ordering:
+                sorting_index = np.argsort(random_data, axis=0)
+            else:
+                # Lexsort returns the indices sorted firstly by the raw
+                # forecast data and secondly by the random data, in order to
+                # split tied values randomly.
+                sorting_index = np.lexsort(
+                    (random_data, raw_data[realization_index, index]),
+                    axis=0)
+            # Place the ascending post-processed values at the positions
+            # that sort the raw forecast, which is equivalent to indexing
+            # them with the ranking of the raw forecast.
+            chunk_result = np.empty_like(calibrated_data[:, index])
+            np.put_along_axis(chunk_result, sorting_index,
+                              calibrated_data[:, index], axis=0)
+            result[:, index] = chunk_result
+
+        return post_processed_forecast_percentiles.copy(
+            data=result.reshape(post_processed_forecast_percentiles.shape))
+
     def process(
             self, post_processed_forecast, raw_forecast,
             random_ordering=False, random_seed=None):
@@ -1100,14 +1259,20 @@ class EnsembleReordering(object):
         raw_forecast_realizations = concatenate_cubes(raw_forecast)
         raw_forecast_realizations = enforce_coordinate_ordering(
             raw_forecast_realizations, "realization")
-        raw_forecast_realizations = (
-            self._recycle_raw_ensemble_realizations(
-                post_processed_forecast_percentiles, raw_forecast_realizations,
-                percentile_coord))
-        post_processed_forecast_realizations = self.rank_ecc(
-            post_processed_forecast_percentiles, raw_forecast_realizations,
-            random_ordering=random_ordering,
-            random_seed=random_seed)
+        if self.batched:
+            post_processed_forecast_realizations = self.rank_ecc_batched(
+                post_processed_forecast_percentiles,
+                raw_forecast_realizations, random_ordering=random_ordering,
+                random_seed=random_seed, chunk_size=self.chunk_size)
+        else:
+            raw_forecast_realizations = (
+                self._recycle_raw_ensemble_realizations(
+                    post_processed_forecast_percentiles,
+                    raw_forecast_realizations, percentile_coord))
+            post_processed_forecast_realizations = self.rank_ecc(
+                post_processed_forecast_percentiles,
+                raw_forecast_realizations, random_ordering=random_ordering,
+                random_seed=random_seed)
         post_processed_forecast_realizations = (
             RebadgePercentilesAsRealizations.process(
                 post_processed_forecast_realizations))
@@ -304,3 +304,114 @@ def restore_non_probabilistic_dimensions(
     shape_to_reshape_to = (
         [output_probabilistic_dimension_length] + shape_to_reshape_to)
     return array_to_reshape.reshape(shape_to_reshape_to)
+
+
+def interpolate_multiple_rows(x, xp, fp, out=None, chunk_size=10000):
+    """
+    Piecewise linear interpolation of many rows at once, equivalent to
+    calling numpy.interp for each row in turn. The same set of points, x,
+    is interpolated for every row. Either the knots, xp, or the values at
+    the knots, fp, (or both) may vary by row. Shared knots are located with
+    a single searchsorted, whilst knots that vary by row are located using
+    a binary search performed for all rows together. Rows are processed in
+    chunks to limit the memory used.
+
+    As with numpy.interp, the knots within each row must be ascending and
+    points beyond the knots take the value at the nearest end knot.
+
+    Args:
+        x (numpy.array):
+            1d array of the points at which to interpolate.
+        xp (numpy.array):
+            1d array of knots shared by all rows, or 2d array of knots with
+            shape (rows, knots).
+        fp (numpy.array):
+            1d array of values at the knots shared by all rows, or 2d array
+            of values with shape (rows, knots).
+
+    Keyword Args:
+        out (numpy.array):
+            Optional array of shape (rows, len(x)) into which the result is
+            written.
+        chunk_size (int):
+            The maximum number of rows interpolated at once.
+
+    Returns:
+        out (numpy.array):
+            Array of shape (rows, len(x)) containing the interpolated values
+            for each row.
+
+    Raises:
+        ValueError: If neither xp nor fp are 2d, or if the shapes of xp and
+            fp are not consistent.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    xp = np.ma.getdata(xp)
+    fp = np.ma.getdata(fp)
+    if xp.ndim == 1 and fp.ndim == 1:
+        msg = ("At least one of xp and fp must be 2d with a row for each "
+               "set of values to interpolate.")
+        raise ValueError(msg)
+    n_rows = xp.shape[0] if xp.ndim == 2 else fp.shape[0]
+    n_knots = xp.shape[-1]
+    if fp.shape[-1] != n_knots or any(
+            array.ndim == 2 and array.shape[0] != n_rows
+            for array in [xp, fp]):
+        msg = ("The shapes of xp {} and fp {} are not consistent.".format(
+            xp.shape, fp.shape))
+        raise ValueError(msg)
+    if out is None:
+        out = np.empty((n_rows, len(x)), dtype=np.float64)
+
+    if xp.ndim == 1:
+        shared_index = np.searchsorted(xp, x, side="right") - 1
+
+    for start in range(0, n_rows, chunk_size):
+        rows = slice(start, start + chunk_size)
+        xp_chunk = xp[rows] if xp.ndim == 2 else xp[np.newaxis, :]
+        fp_chunk = fp[rows] if fp.ndim == 2 else fp[np.newaxis, :]
+        xp_chunk = xp_chunk.astype(np.float64, copy=False)
+        fp_chunk = fp_chunk.astype(np.float64, copy=False)
+        chunk_rows = min(start + chunk_size, n_rows) - start
+
+        if n_knots == 1:
+            out[rows] = np.broadcast_to(fp_chunk, (chunk_rows, len(x)))
+            continue
+
+        # Find the index of the last knot less than or equal to each point.
+        if xp.ndim == 1:
+            index = np.broadcast_to(shared_index, (chunk_rows, len(x)))
+        else:
+            low = np.zeros((chunk_rows, len(x)), dtype=np.intp)
+            high = np.full((chunk_rows, len(x)), n_knots, dtype=np.intp)
+            for _ in range(n_knots.bit_length()):
+                searching = low < high
+                middle = np.minimum((low + high) // 2, n_knots - 1)
+                go_right = (
+                    np.take_along_axis(xp_chunk, middle, axis=1) <= x)
+                low = np.where(searching & go_right, middle + 1, low)
+                high = np.where(searching & ~go_right, middle, high)
+            index = low - 1
+
+        lower = np.clip(index, 0, n_knots - 2)
+        if xp.ndim == 1:
+            x_lower = xp_chunk[0, lower]
+            x_upper = xp_chunk[0, lower + 1]
+        else:
+            x_lower = np.take_along_axis(xp_chunk, lower, axis=1)
+            x_upper = np.take_along_axis(xp_chunk, lower + 1, axis=1)
+        if fp.ndim == 1:
+            f_lower = fp_chunk[0, lower]
+            f_upper = fp_chunk[0, lower + 1]
+        else:
+            f_lower = np.take_along_axis(fp_chunk, lower, axis=1)
+            f_upper = np.take_along_axis(fp_chunk, lower + 1, axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = ((f_upper - f_lower) / (x_upper - x_lower) *
+                      (x - x_lower) + f_lower)
+        result = np.where(x == x_lower, f_lower, result)
+        result = np.where(index < 0, fp_chunk[:, :1], result)
+        result = np.where(index >= n_knots - 1, fp_chunk[:, -1:], result)
+        out[rows] = result
+    return out
@@ -30,9 +30,10 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Module containing lapse rate calculation plugins."""
 
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 from numpy.linalg import lstsq
-from scipy.ndimage import generic_filter
 
 import iris
 from iris.analysis.maths import multiply
@@ -115,47 +116,6 @@ def apply_gridded_lapse_rate(temperature, lapse_rate, source_orog, dest_orog):
     return iris.cube.CubeList(adjusted_temperature).merge_cube()
 
 
-class SaveNeighbourhood(object):
-    """Saves the neighbourhood around each central point.
-
-    The "generic_filter" module extracts the neighbourhood around each
-    point as "buffer". This buffer is passed to the "SaveNeighbourhood" class.
-    The "filter" function then saves this buffer into the "allbuffers" array.
-
-    """
-    def __init__(self, allbuffers):
-        """Initialise the class.
-
-        Create the global variables that allows the "filter" function
-        to save each extracted buffer into "allbuffers".
-
-        """
-        # Initialises the iterator.
-        self.i = 0
-        # Saves all the buffers into this array.
-        self.allbuffers = allbuffers
-
-    def filter(self, buffer):
-        """Defines filter function to be applied to extracted buffers.
-
-        Saves the contents of the buffer into "allbuffers" array. Therefore
-        a return value isn't required. However "generic_filter"
-        requires a return value - so use zero.
-
-        Args:
-            buffer (array):
-                Array containing neighourbood points.
-
-        Returns:
-            zero (float)
-                Blank return value required by "generic_filter".
-
-        """
-        self.allbuffers[self.i, :] = buffer
-        self.i += 1
-        return 0.0
-
-
 class LapseRate(object):
     """
     Plugin to calculate the lapse rate from orography and temperature
@@ -168,28 +128,24 @@ class LapseRate(object):
     Code methodology:
 
     1) Apply land/sea mask to temperature and orography datasets. Mask sea
-       points as NaN since image processing module does not recognise Numpy
-       masks.
-    2) Extracts neighbourhoods from both datasets:
-       Apply "generic_filter" image processing module to temperature data
-       to extract a neighbourhood for each single point and save this
-       neighbourhood into a larger array.
-       Repeat for orography data.
-       generic_filter mode="constant" ensures that points beyond edges of
-       dataset will be filled with "cval". (NaN in this case)
-    3) For all the stored orography neighbourhoods - take the neighbours around
-       the central point and create a mask where the height difference from
+       points as NaN so that they are excluded from the calculation.
+    2) Consider the neighbourhood around each point in both datasets.
+       Points beyond the edges of the dataset are treated as NaN.
+    3) For each orography neighbourhood - take the neighbours around
+       the central point and mask those where the height difference from
        the central point is greater than 35m.
-    4) Loop through array of neighbourhoods and take the height and temperature
-       of all grid points and calculate the
-       temperature/height gradient = lapse rate
+    4) Take the height and temperature of all unmasked points in each
+       neighbourhood and calculate the temperature/height gradient = lapse
+       rate. This is done for the whole grid at once by accumulating the
+       least-squares sums over the offsets within the neighbourhood, rather
+       than by fitting each neighbourhood in turn.
     5) Constrain the returned lapse rates between min_lapse_rate and
        max_lapse_rate. These default to > DALR and < -3.0*DALR but are user
        configurable
     """
 
     def __init__(self, max_height_diff=35, nbhood_radius=7,
-                 max_lapse_rate=-3*DALR, min_lapse_rate=DALR):
+                 max_lapse_rate=-3*DALR, min_lapse_rate=DALR, max_workers=1):
         """
         The class is called with the default constraints for the processing
         code.
@@ -212,12 +168,18 @@ class LapseRate(object):
             min_lapse_rate (float):
                 Minimum lapse rate allowed.
 
+            max_workers (int):
+                The number of threads across which realizations are shared
+                when calculating the lapse rate. The default of 1 processes
+                all realizations in the calling thread.
+
         """
 
         self.max_height_diff = max_height_diff
         self.nbhood_radius = nbhood_radius
         self.max_lapse_rate = max_lapse_rate
         self.min_lapse_rate = min_lapse_rate
+        self.max_workers = max_workers
 
         if self.max_lapse_rate < self.min_lapse_rate:
             msg = "Maximum lapse rate is less than minimum lapse rate"
@@ -231,6 +193,10 @@ class LapseRate(object):
             msg = "Maximum height difference is less than zero"
             raise ValueError(msg)
 
+        if self.max_workers < 1:
+            msg = "Number of workers is less than one"
+            raise ValueError(msg)
+
         # nbhood_size=3 corresponds to a 3x3 array centred on the
         # central point.
         self.nbhood_size = int((2*nbhood_radius) + 1)
@@ -325,6 +291,96 @@ class LapseRate(object):
 
         return height_diff_mask
 
+    def _calc_lapse_rate_grid(self, temperature, orography):
+        """Function to calculate the lapse rate at every point of a grid.
+
+        This gives the same result as extracting the neighbourhood around
+        each point, masking it with _create_heightdiff_mask and passing it
+        to _calc_lapse_rate, without storing the neighbourhoods. The
+        least-squares sums over the unmasked neighbours are accumulated for
+        the whole grid one neighbourhood offset at a time. Heights and
+        temperatures are taken relative to the central point, which leaves
+        the gradient unchanged but avoids a loss of precision when the sums
+        are combined.
+
+        Args:
+            temperature (2D np.array):
+                Temperature values (K), with NaN at points to be ignored.
+
+            orography (2D np.array):
+                Height values (metres), with NaN at points to be ignored.
+
+        Returns:
+            gradient (2D np.array):
+                The gradient of the temperature/orography values within the
+                neighbourhood of each point. This represents the lapse rate.
+
+        """
+        # Match the single precision used by the neighbourhood buffers so
+        # that the height difference mask is identical.
+        temperature = temperature.astype(np.float32)
+        orography = orography.astype(np.float32)
+        shape = temperature.shape
+        radius = self.nbhood_radius
+
+        # Points beyond the edges of the grid are NaN.
+        padded_temp = np.pad(temperature, radius, mode='constant',
+                             constant_values=np.nan)
+        padded_orog = np.pad(orography, radius, mode='constant',
+                             constant_values=np.nan)
+        central_temp = temperature.astype(np.float64)
+        central_orog = orography.astype(np.float64)
+
+        npoints = np.zeros(shape, dtype=np.float64)
+        sum_x = np.zeros(shape, dtype=np.float64)
+        sum_y = np.zeros(shape, dtype=np.float64)
+        sum_xx = np.zeros(shape, dtype=np.float64)
+        sum_xy = np.zeros(shape, dtype=np.float64)
+        sum_yy = np.zeros(shape, dtype=np.float64)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for y_offset in range(self.nbhood_size):
+                for x_offset in range(self.nbhood_size):
+                    temp = padded_temp[y_offset:y_offset + shape[0],
+                                       x_offset:x_offset + shape[1]]
+                    orog = padded_orog[y_offset:y_offset + shape[0],
+                                       x_offset:x_offset + shape[1]]
+                    # Neighbours with NaN heights are not excluded by the
+                    # height difference mask, as in _create_heightdiff_mask.
+                    use = (~np.isnan(temp) &
+                           ~(np.absolute(orog - orography) >=
+                             self.max_height_diff))
+                    x_data = np.where(use, orog - central_orog, 0.)
+                    y_data = np.where(use, temp - central_temp, 0.)
+                    npoints += use
+                    sum_x += x_data
+                    sum_y += y_data
+                    sum_xx += x_data * x_data
+                    sum_xy += x_data * y_data
+                    sum_yy += y_data * y_data
+
+            mean_x = sum_x / npoints
+            mean_y = sum_y / npoints
+            var_x = np.maximum(sum_xx / npoints - mean_x * mean_x, 0.)
+            var_y = np.maximum(sum_yy / npoints - mean_y * mean_y, 0.)
+            covariance = sum_xy / npoints - mean_x * mean_y
+            gradient = covariance / var_x
+
+            # With constant heights the least-squares problem is rank
+            # deficient, for which lstsq returns the minimum norm solution.
+            constant_x = np.isclose(np.sqrt(var_x), 0.0)
+            mean_temp = central_temp + mean_y
+            min_norm_gradient = (
+                central_orog * mean_temp / (central_orog**2 + 1.))
+            gradient = np.where(constant_x, min_norm_gradient, gradient)
+
+            constant = constant_x & np.isclose(np.sqrt(var_y), 0.0)
+            gradient = np.where(
+                np.isnan(central_temp) | (npoints == 0) | constant,
+                DALR, gradient)
+
+        return gradient.astype(np.float32)
+
     def process(self, temperature_cube, orography_cube, land_sea_mask_cube):
         """Calculates the lapse rate from the temperature and orography cubes.
 
@@ -380,82 +436,43 @@ class LapseRate(object):
         # Fill sea points with NaN values.
         orography_data = np.where(land_sea_mask, orography_data, np.nan)
 
-        # Extract data array dimensions to define output arrays.
-        dataarray_shape = next(temperature_cube.slices([y_coord,
-                                                        x_coord])).shape
-        dataarray_size = dataarray_shape[0] * dataarray_shape[1]
-
-        # Array containing all of the subsections extracted from data array.
-        # Also enforce single precision to speed up calculations.
-        all_temp_subsections = np.zeros(
-            (dataarray_size, self.nbhoodarray_size), dtype=np.float32)
-        all_orog_subsections = np.zeros(
-            (dataarray_size, self.nbhoodarray_size), dtype=np.float32)
-
         # Attempts to extract realizations. If cube doesn't contain the
         # dimension then place within list.
         try:
-            slices_over_realization = temperature_cube.slices_over(
-                "realization")
+            slices_over_realization = list(temperature_cube.slices_over(
+                "realization"))
         except iris.exceptions.CoordinateNotFoundError:
             slices_over_realization = [temperature_cube]
 
-        # Creates cube list to hold lapse rate data.
-        lapse_rate_cube_list = iris.cube.CubeList([])
-
-        for temp_slice in slices_over_realization:
-
-            # Create slice to store lapse rate values.
-            lapse_rate_slice = temp_slice
-
-            temperature_data = temp_slice.data
-
-            # Fill sea points with NaN values. Can't use Numpy mask since not
-            # recognised by "generic_filter" function.
-            temperature_data = np.where(land_sea_mask, temperature_data,
+        def calculate_slice(temp_slice):
+            """Calculate the limited lapse rates for a realization."""
+            # Fill sea points with NaN values.
+            temperature_data = np.where(land_sea_mask, temp_slice.data,
                                         np.nan)
-
-            # Saves all neighbourhoods into "all_temp_subsections".
-            # cval is value given to points outside the array.
-            fnc = SaveNeighbourhood(allbuffers=all_temp_subsections)
-            generic_filter(temperature_data, fnc.filter,
-                           size=self.nbhood_size,
-                           mode='constant', cval=np.nan)
-
-            fnc = SaveNeighbourhood(allbuffers=all_orog_subsections)
-            generic_filter(orography_data, fnc.filter,
-                           size=self.nbhood_size,
-                           mode='constant', cval=np.nan)
-
-            # height_diff_mask is True for points where the height
-            # difference between the central point and its neighbours
-            # is > max_height_diff.
-            height_diff_mask = self._create_heightdiff_mask(
-                all_orog_subsections)
-
-            # Mask points with extreme height differences as NaN.
-            all_orog_subsections = np.where(height_diff_mask, np.nan,
-                                            all_orog_subsections)
-            all_temp_subsections = np.where(height_diff_mask, np.nan,
-                                            all_temp_subsections)
-
-            # Loop through both arrays and find gradient of each subsection.
-            # The gradient indicates lapse rate - save into another array.
-            # TODO: This for loop is the bottleneck in the code and needs to
-            # be parallelised.
-            lapse_rate_array = [self._calc_lapse_rate(temp, orog)
-                                for temp, orog in zip(all_temp_subsections,
-                                                      all_orog_subsections)]
-
-            lapse_rate_array = np.array(
-                lapse_rate_array, dtype=np.float32).reshape(dataarray_shape)
+            lapse_rate_array = self._calc_lapse_rate_grid(temperature_data,
+                                                          orography_data)
 
             # Enforces upper and lower limits on lapse rate values.
             lapse_rate_array = np.where(lapse_rate_array < self.min_lapse_rate,
                                         self.min_lapse_rate, lapse_rate_array)
             lapse_rate_array = np.where(lapse_rate_array > self.max_lapse_rate,
                                         self.max_lapse_rate, lapse_rate_array)
+            return lapse_rate_array.astype(np.float32)
+
+        # Realizations are independent so may be shared between threads;
+        # the array operations release the GIL.
+        if self.max_workers > 1 and len(slices_over_realization) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                lapse_rate_arrays = list(
+                    executor.map(calculate_slice, slices_over_realization))
+        else:
+            lapse_rate_arrays = [calculate_slice(temp_slice)
+                                 for temp_slice in slices_over_realization]
 
+        # Creates cube list to hold lapse rate data.
+        lapse_rate_cube_list = iris.cube.CubeList([])
+        for lapse_rate_slice, lapse_rate_array in zip(
+                slices_over_realization, lapse_rate_arrays):
             lapse_rate_slice.data = lapse_rate_array
             lapse_rate_cube_list.append(lapse_rate_slice)
 
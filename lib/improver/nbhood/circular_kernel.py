@@ -32,6 +32,7 @@
 
 import numpy as np
 import scipy.ndimage.filters
+import scipy.signal
 
 import iris
 
@@ -45,6 +46,27 @@ from improver.utilities.spatial import (
 # Maximum radius of the neighbourhood width in grid cells.
 MAX_RADIUS_IN_GRID_CELLS = 500
 
+# Available methods for applying a circular kernel.
+CONVOLUTION_BACKENDS = ["direct", "fft", "spans"]
+
+# Overlap-add convolution, which transforms the grid in tiles, is only
+# available from scipy 1.4. With older versions the FFT backend transforms
+# the whole padded grid at once.
+OACONVOLVE_AVAILABLE = hasattr(scipy.signal, "oaconvolve")
+
+# Approximate cost of the FFT based backend per output point, per doubling
+# of the transform size, relative to the cost of one kernel point when
+# correlating directly.
+FFT_COST_PER_LOG2_POINT = 8.
+
+# Default limit, in megabytes, on the memory used to hold the neighbourhood
+# points of each tile when calculating percentiles over a neighbourhood.
+DEFAULT_PERCENTILE_MEMORY_BUDGET = 1024
+
+# Approximate cost of the row-span backend per output point, per kernel row,
+# relative to the cost of one kernel point when correlating directly.
+SPAN_COST_PER_ROW = 3.
+
 
 def circular_kernel(fullranges, ranges, weighted_mode):
     """
@@ -99,7 +121,7 @@ class CircularNeighbourhood(object):
     """
 
     def __init__(self, weighted_mode=True, sum_or_fraction="fraction",
-                 re_mask=False):
+                 re_mask=False, convolution_backend="direct"):
         """
         Initialise class.
 
@@ -121,6 +143,17 @@ class CircularNeighbourhood(object):
                 mask is not applied. Therefore, the neighbourhood processing
                 may result in values being present in areas that were
                 originally masked.
+            convolution_backend (string):
+                Method used to apply the kernel. "direct" correlates the
+                data with the dense kernel; "fft" uses FFT based overlap-add
+                convolution; "spans" decomposes the circle into one span of
+                grid cells per kernel row and sums each span using
+                cumulative sums, which is only possible with
+                weighted_mode=False. "auto" selects the cheapest available
+                method from the kernel size and grid shape. The fft and
+                spans methods are approximate, so the exact "direct" method
+                is the default. The method used for the most recent kernel
+                application is recorded in the backend_used attribute.
         """
         self.weighted_mode = weighted_mode
         if sum_or_fraction not in ["sum", "fraction"]:
@@ -132,6 +165,17 @@ class CircularNeighbourhood(object):
             raise ValueError(msg)
         self.sum_or_fraction = sum_or_fraction
         self.re_mask = re_mask
+        if convolution_backend not in CONVOLUTION_BACKENDS + ["auto"]:
+            msg = ("The {} convolution backend is invalid. Valid options "
+                   "are {} or 'auto'.".format(convolution_backend,
+                                              CONVOLUTION_BACKENDS))
+            raise ValueError(msg)
+        if convolution_backend == "spans" and weighted_mode:
+            msg = ("The spans convolution backend can only be used with "
+                   "weighted_mode=False.")
+            raise ValueError(msg)
+        self.convolution_backend = convolution_backend
+        self.backend_used = None
 
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
@@ -170,15 +214,176 @@ class CircularNeighbourhood(object):
         self.kernel = circular_kernel(fullranges, ranges,
                                       self.weighted_mode)
         # Smooth the data by applying the kernel.
-        if self.sum_or_fraction is "fraction":
+        if self.sum_or_fraction == "fraction":
             total_area = np.sum(self.kernel)
-        elif self.sum_or_fraction is "sum":
+        elif self.sum_or_fraction == "sum":
             total_area = 1.0
 
-        cube.data = scipy.ndimage.filters.correlate(
-            data, self.kernel, mode='nearest') / total_area
+        # Arrange the kernel and a view of the data so that y and x are
+        # the last two dimensions, as required by the fast backends.
+        x_axis, y_axis = axes
+        kernel_2d = np.moveaxis(self.kernel, [y_axis, x_axis], [-2, -1])
+        kernel_2d = kernel_2d.reshape(kernel_2d.shape[-2:])
+        self.backend_used = self._select_backend(
+            data, kernel_2d, (data.shape[y_axis], data.shape[x_axis]))
+
+        if self.backend_used == "direct":
+            result = scipy.ndimage.filters.correlate(
+                data, self.kernel, mode='nearest')
+        else:
+            data_yx = np.moveaxis(np.asarray(data), [y_axis, x_axis],
+                                  [-2, -1])
+            if self.backend_used == "fft":
+                result = self._correlate_fft(data_yx, kernel_2d)
+            else:
+                result = self._correlate_spans(data_yx, kernel_2d)
+            result = np.moveaxis(result, [-2, -1], [y_axis, x_axis])
+            result = result.astype(data.dtype)
+        result = result / total_area
+
+        if self.backend_used != "direct":
+            # Round-off in the fast backends can push the result slightly
+            # outside the range that the kernel can produce from the data,
+            # e.g. probabilities below 0 or above 1.
+            scaling = np.sum(self.kernel) / total_area
+            np.clip(result, np.min(data) * scaling, np.max(data) * scaling,
+                    out=result)
+        cube.data = result
         return cube
 
+    def _select_backend(self, data, kernel, grid_shape):
+        """
+        Choose the method used to apply the kernel.
+
+        If a specific backend has been requested, it is used. Otherwise the
+        cheapest backend is estimated from the number of points in the
+        kernel, the number of kernel rows and the size of the FFT tiles
+        that would be needed for the grid. The FFT and span backends are
+        only considered for finite floating point data, as a single NaN
+        would otherwise spread across an FFT tile or a whole grid row.
+
+        Args:
+            data (numpy array):
+                Data to which the kernel will be applied.
+            kernel (numpy array):
+                2D (y, x) kernel.
+            grid_shape (tuple):
+                Number of grid points along the y and x axes.
+
+        Returns:
+            backend (string):
+                Name of the selected backend.
+
+        Raises:
+            ValueError: If the fft or spans backend has been requested for
+                data that are not finite floating point values.
+        """
+        fast_backends_allowed = (
+            np.issubdtype(data.dtype, np.floating) and
+            np.isfinite(data).all())
+        if self.convolution_backend != "auto":
+            if (self.convolution_backend != "direct" and
+                    not fast_backends_allowed):
+                msg = ("The {} convolution backend can only be used with "
+                       "finite floating point data.".format(
+                           self.convolution_backend))
+                raise ValueError(msg)
+            return self.convolution_backend
+
+        costs = {"direct": np.count_nonzero(kernel)}
+        if fast_backends_allowed:
+            tile_points = ((grid_shape[0] + kernel.shape[0]) *
+                           (grid_shape[1] + kernel.shape[1]))
+            if OACONVOLVE_AVAILABLE:
+                tile_points = min(4 * kernel.size, tile_points)
+            costs["fft"] = FFT_COST_PER_LOG2_POINT * np.log2(tile_points)
+            if not self.weighted_mode:
+                costs["spans"] = SPAN_COST_PER_ROW * kernel.shape[0]
+        return min(costs, key=costs.get)
+
+    @staticmethod
+    def _correlate_fft(data, kernel):
+        """
+        Correlate the data with the kernel using FFT based overlap-add
+        convolution, or a single FFT convolution of the whole array where
+        overlap-add convolution is not available. Values beyond the edge of
+        the domain are taken from the nearest edge point, as for the direct
+        method.
+
+        Args:
+            data (numpy array):
+                Array with y and x as the last two dimensions.
+            kernel (numpy array):
+                2D (y, x) kernel.
+
+        Returns:
+            result (numpy array):
+                Array of the same shape as data.
+        """
+        ranges_y, ranges_x = [size // 2 for size in kernel.shape]
+        padding = ([(0, 0)] * (data.ndim - 2) +
+                   [(ranges_y, ranges_y), (ranges_x, ranges_x)])
+        padded = np.pad(data.astype(np.float64), padding, mode='edge')
+        # Correlation is convolution with the reflected kernel.
+        kernel = kernel[::-1, ::-1].reshape(
+            (1,) * (data.ndim - 2) + kernel.shape)
+        if OACONVOLVE_AVAILABLE:
+            convolve = scipy.signal.oaconvolve
+        else:
+            convolve = scipy.signal.fftconvolve
+        return convolve(padded, kernel, mode='valid', axes=(-2, -1))
+
+    @staticmethod
+    def _correlate_spans(data, kernel):
+        """
+        Correlate the data with a kernel of constant weighting by
+        decomposing the kernel into a contiguous span of grid cells along
+        x for each kernel row. The sum over each span is found from
+        cumulative sums along the x axis, which are shared between all
+        rows with the same span width, and the row sums are then added
+        together with the appropriate offset in y. Values beyond the edge
+        of the domain are taken from the nearest edge point, as for the
+        direct method.
+
+        Args:
+            data (numpy array):
+                Array with y and x as the last two dimensions.
+            kernel (numpy array):
+                2D (y, x) kernel, in which the non-zero points of each row
+                are contiguous, centred and have the same value.
+
+        Returns:
+            result (numpy array):
+                Array of the same shape as data.
+        """
+        n_rows, n_columns = data.shape[-2:]
+        ranges_y, ranges_x = [size // 2 for size in kernel.shape]
+        padding = ([(0, 0)] * (data.ndim - 2) +
+                   [(ranges_y, ranges_y), (ranges_x + 1, ranges_x)])
+        cumulated = np.pad(data.astype(np.float64), padding, mode='edge')
+        # The first column becomes the leading zero of the cumulative sum.
+        cumulated[..., 0] = 0.
+        np.cumsum(cumulated, axis=-1, out=cumulated)
+
+        spans = {}
+        for row_index, row in enumerate(kernel):
+            nonzero, = np.nonzero(row)
+            if nonzero.size:
+                half_width = ranges_x - nonzero[0]
+                spans.setdefault(
+                    (half_width, row[ranges_x]), []).append(row_index)
+
+        result = np.zeros(data.shape, dtype=np.float64)
+        for (half_width, weight), row_indices in spans.items():
+            start = ranges_x - half_width
+            stop = ranges_x + half_width + 1
+            span_sums = (cumulated[..., stop:stop+n_columns] -
+                         cumulated[..., start:start+n_columns])
+            span_sums *= weight
+            for row_index in row_indices:
+                result += span_sums[..., row_index:row_index+n_rows, :]
+        return result
+
     def run(self, cube, radius, mask_cube=None):
         """
 
@@ -223,7 +428,8 @@ class GeneratePercentilesFromACircularNeighbourhood(object):
     A maximum kernel radius of 500 grid cells is imposed in order to
     avoid computational ineffiency and possible memory errors.
     """
-    def __init__(self, percentiles=DEFAULT_PERCENTILES):
+    def __init__(self, percentiles=DEFAULT_PERCENTILES,
+                 memory_budget=DEFAULT_PERCENTILE_MEMORY_BUDGET):
         """
         Initialise class.
 
@@ -231,12 +437,25 @@ class GeneratePercentilesFromACircularNeighbourhood(object):
             percentiles (list or float):
                 Percentile values at which to calculate; if not provided uses
                 DEFAULT_PERCENTILES.
+            memory_budget (float):
+                Approximate limit, in megabytes, on the memory used to hold
+                the neighbourhood points of each block of rows for which
+                the percentiles are calculated at once. At least one row is
+                always processed at a time.
+
+        Raises:
+            ValueError: If memory_budget is not positive.
 
         """
         try:
             self.percentiles = tuple(percentiles)
         except TypeError:
             self.percentiles = tuple([percentiles])
+        if not memory_budget > 0:
+            msg = "Invalid memory_budget: must be > 0: {}".format(
+                memory_budget)
+            raise ValueError(msg)
+        self.memory_budget = memory_budget
 
     def __repr__(self):
         """Represent the configured class instance as a string."""
@@ -392,6 +611,74 @@ class GeneratePercentilesFromACircularNeighbourhood(object):
                                  ranges_xy[1]:-ranges_xy[1]]
         return pctcube
 
+    def pad_and_unpad_cube_tiled(self, slice_2d, kernel):
+        """
+        Method to calculate percentiles over a neighbourhood around each point
+        of a two dimensional cube, giving identical results to
+        pad_and_unpad_cube but without holding a copy of the padded field
+        for every point in the kernel at once.
+
+        The input array is padded in the same way as in pad_and_unpad_cube.
+        The output rows are then processed in blocks: for each block, the
+        neighbourhood points are gathered from the padded array as slices
+        into a (kernel points, rows, columns) array, from which the
+        percentiles are calculated. The number of rows in each block is
+        chosen so that this array fits within self.memory_budget.
+
+        Args:
+            slice_2d (Iris.cube.Cube):
+                2d cube to be padded with a halo.
+            kernel (Numpy array):
+                Kernel used to specify the neighbourhood to consider when
+                calculating the percentiles within a neighbourhood.
+
+        Returns:
+            pctcube (Iris.cube.Cube):
+                Cube containing the percentiles over the neighbourhood of
+                each point, with an added leading percentile dimension.
+        """
+        ranges_xy = np.empty(2, dtype=int)
+        ranges_xy[0] = int(np.floor(kernel.shape[0] / 2.0))
+        ranges_xy[1] = int(np.floor(kernel.shape[1] / 2.0))
+        padded = np.pad(slice_2d.data, ranges_xy, mode='mean',
+                        stat_length=np.max(ranges_xy))
+        n_rows, n_columns = slice_2d.shape
+
+        # Offsets (in x and y) of the points within the kernel, ordered as in
+        # pad_and_unpad_cube.
+        offsets = [
+            (i, j)
+            for i in range(-ranges_xy[1], ranges_xy[1]+1)
+            for j in range(-ranges_xy[0], ranges_xy[0]+1)
+            if kernel[..., i+ranges_xy[1], j+ranges_xy[0]] > 0.]
+
+        percentiles = np.array(self.percentiles, dtype=np.float32)
+        bytes_per_row = n_columns * (
+            len(offsets) * padded.itemsize + len(percentiles) * 8)
+        rows_per_block = max(
+            1, int(self.memory_budget * 1024**2 // bytes_per_row))
+
+        perc_data = np.empty((len(percentiles), n_rows, n_columns),
+                             dtype=np.float32)
+        block = np.empty(
+            (len(offsets), min(rows_per_block, n_rows), n_columns),
+            dtype=padded.dtype)
+        for start in range(0, n_rows, rows_per_block):
+            stop = min(start + rows_per_block, n_rows)
+            block_rows = stop - start
+            for index, (i, j) in enumerate(offsets):
+                row = start + ranges_xy[0] - j
+                column = ranges_xy[1] - i
+                block[index, :block_rows] = padded[
+                    row:row+block_rows, column:column+n_columns]
+            perc_data[:, start:stop] = np.percentile(
+                block[:, :block_rows], percentiles, axis=0,
+                overwrite_input=True)
+
+        pctcube = self.make_percentile_cube(slice_2d)
+        pctcube.data = perc_data
+        return pctcube
+
     def run(self, cube, radius, mask_cube=None):
         """
         Method to apply a circular kernel to the data within the input cube in
@@ -432,7 +719,7 @@ class GeneratePercentilesFromACircularNeighbourhood(object):
         for slice_2d in cube.slices(['projection_y_coordinate',
                                      'projection_x_coordinate']):
             pctcubelist.append(
-                self.pad_and_unpad_cube(slice_2d, kernel))
+                self.pad_and_unpad_cube_tiled(slice_2d, kernel))
         result = pctcubelist.merge_cube()
         exception_coordinates = (
             find_dimension_coordinate_mismatch(
@@ -34,7 +34,8 @@ import iris
 import numpy as np
 
 from improver.nbhood.circular_kernel import (
-    CircularNeighbourhood, GeneratePercentilesFromACircularNeighbourhood)
+    DEFAULT_PERCENTILE_MEMORY_BUDGET, CircularNeighbourhood,
+    GeneratePercentilesFromACircularNeighbourhood)
 from improver.nbhood.square_kernel import SquareNeighbourhood
 
 from improver.constants import DEFAULT_PERCENTILES
@@ -214,7 +215,8 @@ class GeneratePercentilesFromANeighbourhood(BaseNeighbourhoodProcessing):
 
     def __init__(
             self, neighbourhood_method, radii, lead_times=None,
-            percentiles=DEFAULT_PERCENTILES):
+            percentiles=DEFAULT_PERCENTILES,
+            memory_budget=DEFAULT_PERCENTILE_MEMORY_BUDGET):
         """
         Create a neighbourhood processing subclass that generates percentiles
         from a neighbourhood of points.
@@ -236,6 +238,11 @@ class GeneratePercentilesFromANeighbourhood(BaseNeighbourhoodProcessing):
             percentiles (list):
                 Percentile values at which to calculate; if not provided uses
                 DEFAULT_PERCENTILES.
+            memory_budget (float):
+                Approximate limit, in megabytes, on the memory used to hold
+                the neighbourhood points for which the percentiles are
+                calculated at once. See
+                GeneratePercentilesFromACircularNeighbourhood for details.
         """
         super(GeneratePercentilesFromANeighbourhood, self).__init__(
             neighbourhood_method, radii, lead_times=lead_times)
@@ -244,7 +251,8 @@ class GeneratePercentilesFromANeighbourhood(BaseNeighbourhoodProcessing):
             "circular": GeneratePercentilesFromACircularNeighbourhood}
         try:
             method = methods[neighbourhood_method]
-            self.neighbourhood_method = method(percentiles=percentiles)
+            self.neighbourhood_method = method(
+                percentiles=percentiles, memory_budget=memory_budget)
         except KeyError:
             msg = ("The neighbourhood_method requested: {} is not a "
                    "supported method. Please choose from: {}".format(
@@ -260,7 +268,8 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
     def __init__(
             self, neighbourhood_method, radii, lead_times=None,
             weighted_mode=True, sum_or_fraction="fraction",
-            re_mask=False):
+            re_mask=False, convolution_backend="direct",
+            accumulation_precision="float64"):
         """
         Create a neighbourhood processing subclass that applies a smoothing
         to points in a cube.
@@ -298,6 +307,14 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
                 mask is not applied. Therefore, the neighbourhood processing
                 may result in values being present in areas that were
                 originally masked.
+            convolution_backend (string):
+                Method used to apply a circular kernel. Options: "direct",
+                "fft", "spans" or "auto". See CircularNeighbourhood for
+                details. Only used for the circular neighbourhood method.
+            accumulation_precision (string):
+                Precision used to calculate the neighbourhood sums.
+                Options: "float64" or "longdouble". See SquareNeighbourhood
+                for details. Only used for the square neighbourhood method.
         """
         super(NeighbourhoodProcessing, self).__init__(
             neighbourhood_method, radii, lead_times=lead_times)
@@ -305,10 +322,14 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
         methods = {
             "circular": CircularNeighbourhood,
             "square": SquareNeighbourhood}
+        method_kwargs = {
+            "circular": {"convolution_backend": convolution_backend},
+            "square": {"accumulation_precision": accumulation_precision}}
         try:
             method = methods[neighbourhood_method]
             self.neighbourhood_method = method(
-                weighted_mode, sum_or_fraction, re_mask)
+                weighted_mode, sum_or_fraction, re_mask,
+                **method_kwargs[neighbourhood_method])
         except KeyError:
             msg = ("The neighbourhood_method requested: {} is not a "
                    "supported method. Please choose from: {}".format(
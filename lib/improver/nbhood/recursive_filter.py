@@ -30,6 +30,8 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Module to apply a recursive filter to neighbourhooded data."""
 
+from concurrent.futures import ThreadPoolExecutor
+
 import iris
 import numpy as np
 
@@ -46,7 +48,7 @@ class RecursiveFilter(object):
     """
 
     def __init__(self, alpha_x=None, alpha_y=None, iterations=None,
-                 edge_width=1, re_mask=False):
+                 edge_width=1, re_mask=False, max_workers=1):
         """
         Initialise the class.
 
@@ -71,12 +73,18 @@ class RecursiveFilter(object):
                 mask is not applied. Therefore, the recursive filtering
                 may result in values being present in areas that were
                 originally masked.
+            max_workers (integer):
+                The number of threads across which independent x-y slices
+                (e.g. realizations, times or thresholds) are shared when
+                running the recursive filter. The default of 1 processes
+                all slices in the calling thread.
 
         Raises:
             ValueError: If alpha_x is not set such that 0 < alpha_x < 1
             ValueError: If alpha_y is not set such that 0 < alpha_y < 1
             ValueError: If number of iterations is not None and is set such
                         that iterations is not >= 1
+            ValueError: If max_workers is not >= 1
 
         """
         if alpha_x is not None:
@@ -97,11 +105,17 @@ class RecursiveFilter(object):
                     "Invalid number of iterations: must be >= 1: {}".format(
                         iterations))
 
+        if not max_workers >= 1:
+            raise ValueError(
+                "Invalid number of workers: must be >= 1: {}".format(
+                    max_workers))
+
         self.alpha_x = alpha_x
         self.alpha_y = alpha_y
         self.iterations = iterations
         self.edge_width = edge_width
         self.re_mask = re_mask
+        self.max_workers = max_workers
 
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
@@ -227,6 +241,130 @@ class RecursiveFilter(object):
             cube.data = output
         return cube
 
+    @staticmethod
+    def _recurse_batched(data, alphas, one_minus_alphas, axis, backward,
+                         workspace):
+        """
+        Method to run the recursive filter in one direction along one
+        spatial axis for every x-y slice of a 3D array at once.
+
+        Each step along the axis updates the whole (slice, row) or
+        (slice, column) section of the array in place, using
+        preallocated workspace arrays for the intermediate products. The
+        arithmetic is performed in the same order as in _recurse_forward
+        and _recurse_backward so that the results are identical.
+
+        Args:
+            data (numpy array):
+                3D array of shape (slices, y, x) containing the input data
+                to which the recursive filter will be applied. This is
+                modified in place.
+            alphas (numpy array):
+                2D array of alpha values of shape (y, x) that will be used
+                when applying the recursive filter along the specified axis.
+            one_minus_alphas (numpy array):
+                2D array containing 1 - alphas.
+            axis (integer):
+                Index of the spatial axis of the 3D array (1 for y or 2 for
+                x) over which to recurse.
+            backward (boolean):
+                If True, recurse from the last gridpoint to the first,
+                otherwise recurse from the first gridpoint to the last.
+            workspace (tuple of numpy arrays):
+                Two arrays with the shape of a single section of data
+                perpendicular to the specified axis.
+        """
+        current_term, previous_term = workspace
+        lim = data.shape[axis]
+        if backward:
+            indices = range(lim-2, -1, -1)
+            step = 1
+        else:
+            indices = range(1, lim)
+            step = -1
+        for i in indices:
+            if axis == 1:
+                current = data[:, i, :]
+                previous = data[:, i+step, :]
+                alpha = alphas[i, :]
+                one_minus_alpha = one_minus_alphas[i, :]
+            else:
+                current = data[:, :, i]
+                previous = data[:, :, i+step]
+                alpha = alphas[:, i]
+                one_minus_alpha = one_minus_alphas[:, i]
+            np.multiply(one_minus_alpha, current, out=current_term)
+            np.multiply(alpha, previous, out=previous_term)
+            np.add(current_term, previous_term, out=current,
+                   casting='same_kind')
+
+    @staticmethod
+    def _run_recursion_batched(data, alphas_x, alphas_y, iterations,
+                               max_workers=1):
+        """
+        Method to run the recursive filter over a stack of x-y slices.
+
+        This produces the same result as applying _run_recursion to each
+        x-y slice in turn, but processes all slices together so that the
+        Python loop over rows and columns is only executed once per
+        iteration. If more than one worker is requested, contiguous blocks
+        of slices are filtered concurrently in separate threads.
+
+        Args:
+            data (numpy array):
+                3D array of shape (slices, y, x) containing the padded
+                input data to which the recursive filter will be applied.
+                This is modified in place.
+            alphas_x (numpy array):
+                2D array of shape (y, x) containing the alpha values that
+                will be used when applying the recursive filter along the
+                x-axis.
+            alphas_y (numpy array):
+                2D array of shape (y, x) containing the alpha values that
+                will be used when applying the recursive filter along the
+                y-axis.
+            iterations (integer):
+                The number of iterations of the recursive filter.
+
+        Keyword Args:
+            max_workers (integer):
+                The maximum number of threads used to process the slices.
+
+        Returns:
+            data (numpy array):
+                3D array containing the smoothed fields after the recursive
+                filter method has been applied to each slice.
+        """
+        one_minus_alphas_x = 1. - alphas_x
+        one_minus_alphas_y = 1. - alphas_y
+        work_dtype = np.result_type(data, alphas_x, alphas_y)
+
+        def _filter_block(block):
+            """Apply all iterations of the filter to a block of slices."""
+            nslices, ny, nx = block.shape
+            workspace_x = (np.empty((nslices, ny), dtype=work_dtype),
+                           np.empty((nslices, ny), dtype=work_dtype))
+            workspace_y = (np.empty((nslices, nx), dtype=work_dtype),
+                           np.empty((nslices, nx), dtype=work_dtype))
+            for _ in range(iterations):
+                for backward in [False, True]:
+                    RecursiveFilter._recurse_batched(
+                        block, alphas_x, one_minus_alphas_x, 2, backward,
+                        workspace_x)
+                for backward in [False, True]:
+                    RecursiveFilter._recurse_batched(
+                        block, alphas_y, one_minus_alphas_y, 1, backward,
+                        workspace_y)
+
+        nblocks = min(max_workers, data.shape[0])
+        blocks = np.array_split(data, nblocks, axis=0)
+        if nblocks > 1:
+            with ThreadPoolExecutor(max_workers=nblocks) as executor:
+                list(executor.map(_filter_block, blocks))
+        else:
+            _filter_block(data)
+        return data
+
     def _set_alphas(self, cube, alpha, alphas_cube):
         """
         Set up the alpha parameter.
@@ -292,8 +430,9 @@ class RecursiveFilter(object):
            each cube slice that are used to weight the recursive filter in
            the x- and y-directions.
         3. Pad each cube slice with a square-neighbourhood halo and apply
-           the recursive filter for the required number of iterations.
-        4. Remove the halo from the cube slice and append the recursed cube
+           the recursive filter for the required number of iterations to
+           all of the padded slices together.
+        4. Remove the halo from each cube slice and append the recursed cube
            slice to a 'recursed cube'.
         5. Merge all the cube slices in the 'recursed cube' into a 'new cube'.
         6. Modify the 'new cube' so that its scalar dimension co-ordinates are
@@ -327,7 +466,12 @@ class RecursiveFilter(object):
         alphas_x = self._set_alphas(cube_format, self.alpha_x, alphas_x)
         alphas_y = self._set_alphas(cube_format, self.alpha_y, alphas_y)
 
-        recursed_cube = iris.cube.CubeList()
+        # Set up each slice for processing and gather the padded data into
+        # a single array so that the recursion is run across all slices at
+        # once.
+        padded_cubes = []
+        masks = []
+        nan_arrays = []
         for output in cube.slices([cube.coord(axis='y'),
                                    cube.coord(axis='x')]):
 
@@ -337,15 +481,24 @@ class RecursiveFilter(object):
             output, mask, nan_array = (
                 SquareNeighbourhood().set_up_cubes_to_be_neighbourhooded(
                     output, mask_cube))
-            mask = mask.data.squeeze()
+            masks.append(mask.data.squeeze())
+            nan_arrays.append(nan_array)
+
+            padded_cubes.append(pad_cube_with_halo(
+                output, 2*self.edge_width, 2*self.edge_width))
 
-            padded_cube = pad_cube_with_halo(
-                output, 2*self.edge_width, 2*self.edge_width)
+        padded_data = np.stack([padded_cube.data
+                                for padded_cube in padded_cubes])
+        padded_data = self._run_recursion_batched(
+            padded_data, alphas_x.data, alphas_y.data, self.iterations,
+            max_workers=self.max_workers)
 
-            new_cube = self._run_recursion(padded_cube, alphas_x, alphas_y,
-                                           self.iterations)
+        recursed_cube = iris.cube.CubeList()
+        for padded_cube, data, mask, nan_array in zip(
+                padded_cubes, padded_data, masks, nan_arrays):
+            padded_cube.data = data
             new_cube = remove_halo_from_cube(
-                new_cube, 2*self.edge_width, 2*self.edge_width)
+                padded_cube, 2*self.edge_width, 2*self.edge_width)
             if self.re_mask:
                 new_cube.data[nan_array.astype(bool)] = np.nan
                 new_cube.data = np.ma.masked_array(new_cube.data,
@@ -30,20 +30,23 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """This module contains methods for square neighbourhood processing."""
 
+from itertools import islice
+
 import iris
 import numpy as np
 
-from improver.utilities.cube_checker import (
-    check_for_x_and_y_axes, check_cube_coordinates)
+from improver.utilities.cube_checker import check_cube_coordinates
 from improver.utilities.cube_manipulation import clip_cube_data
-from improver.utilities.pad_spatial import (
-    pad_cube_with_halo, remove_halo_from_cube)
 from improver.utilities.spatial import (
     convert_distance_into_number_of_grid_cells)
 
 # Maximum radius of the neighbourhood width in grid cells.
 MAX_RADIUS_IN_GRID_CELLS = 500
 
+# Maximum number of grid points in a block of x-y slices that are
+# neighbourhood processed together within the run method.
+MAX_POINTS_PER_BLOCK = 2**22
+
 
 class SquareNeighbourhood(object):
 
@@ -52,7 +55,7 @@ class SquareNeighbourhood(object):
     """
 
     def __init__(self, weighted_mode=True, sum_or_fraction="fraction",
-                 re_mask=True):
+                 re_mask=True, accumulation_precision="float64"):
         """
         Initialise class.
 
@@ -73,6 +76,12 @@ class SquareNeighbourhood(object):
                 mask is not applied. Therefore, the neighbourhood processing
                 may result in values being present in areas that were
                 originally masked.
+            accumulation_precision (string):
+                Precision used when cumulating the data to calculate the
+                neighbourhood sums within the run method. "float64" uses
+                a compensated double precision sum; "longdouble" uses numpy's
+                extended precision type, which needs more memory.
+                Valid options are "float64" or "longdouble".
         """
         self.weighted_mode = weighted_mode
         if sum_or_fraction not in ["sum", "fraction"]:
@@ -84,226 +93,203 @@ class SquareNeighbourhood(object):
             raise ValueError(msg)
         self.sum_or_fraction = sum_or_fraction
         self.re_mask = re_mask
+        if accumulation_precision not in ["float64", "longdouble"]:
+            msg = ("The {} accumulation precision is invalid. "
+                   "Valid options are 'float64' or 'longdouble'.".format(
+                       accumulation_precision))
+            raise ValueError(msg)
+        self.accumulation_precision = accumulation_precision
 
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
         result = ('<SquareNeighbourhood: weighted_mode: {}, '
-                  'sum_or_fraction: {}, re_mask: {}>')
+                  'sum_or_fraction: {}, re_mask: {}, '
+                  'accumulation_precision: {}>')
         return result.format(self.weighted_mode, self.sum_or_fraction,
-                             self.re_mask)
+                             self.re_mask, self.accumulation_precision)
 
     @staticmethod
-    def cumulate_array(cube, iscomplex=False):
+    def _compensated_cumsum(summed, compensation, axis):
         """
-        Method to calculate the cumulative sum of an m x n array, by first
-        cumulating along the y direction so that the largest values
-        are in the nth row, and then cumulating along the x direction,
-        so that the largest values are in the mth column. Each grid point
-        will contain the cumulative sum from the origin to that grid point.
+        Cumulate an array in place along the y or x axis, keeping track of
+        the rounding error of each addition so that the cumulative sum is
+        represented to approximately twice the working precision by
+        summed + compensation.
+
+        numpy's cumsum adds each element to the previous partial sum in
+        turn, so the error of each of these additions can be found exactly
+        afterwards from neighbouring partial sums, using the TwoSum algorithm
+        of Knuth. The errors are then cumulated in the compensation array,
+        along with any compensation already present (e.g. from a previous
+        cumulation along another axis).
 
         Args:
-            cube (Iris.cube.Cube):
-                Cube to which the cumulative summing along the y and x
-                direction will be applied. The cube should contain only x and
-                y dimensions, so will generally be a slice of a cube ordered
-                so that y is first in the cube (i.e. axis=0).
-
-        Kwargs:
-            iscomplex (bool):
-                Flag indicating whether cube.data contains complex values.
-
-        Returns:
-            summed_cube (Iris.cube.Cube):
-                Cube to which the cumulative summing
-                along the y and x direction has been applied.
+            summed (numpy array):
+                Array of at least 2 dimensions with y and x as the last two
+                dimensions, which is cumulated in place.
+            compensation (numpy array):
+                Array of the same shape and type as summed, containing the
+                low order part of each value, which is cumulated in place.
+            axis (int):
+                Axis over which to cumulate: -2 for y or -1 for x.
         """
-        summed_cube = cube.copy()
-        if iscomplex:
-            data = cube.data.astype(complex)
-        elif cube.name().startswith("probability_of"):
-            # No need for high precision calculation, just between 0 and 1.
-            data = cube.data.astype(np.float32)
-        else:
-            # Go to high precision for safety.
-            data = cube.data.astype(np.longdouble)
-        data_summed_along_y = np.cumsum(data, axis=0)
-        data_summed_along_x = (
-            np.cumsum(data_summed_along_y, axis=1))
-        summed_cube.data = data_summed_along_x
-        return summed_cube
+        def index(section):
+            """Index a section of rows (axis=-2) or columns (axis=-1)."""
+            if axis == -2:
+                return (Ellipsis, section, slice(None))
+            return (Ellipsis, section)
+
+        later = index(slice(1, None))
+        addend = summed[later].copy()
+        np.cumsum(summed, axis=axis, out=summed)
+        previous = summed[index(slice(None, -1))]
+        total = summed[later]
+
+        # TwoSum: the exact error of each addition total = previous + addend
+        error = np.subtract(total, previous)
+        addend -= error
+        np.subtract(total, error, out=error)
+        np.subtract(previous, error, out=error)
+        error += addend
+
+        compensation[later] += error
+        np.cumsum(compensation, axis=axis, out=compensation)
 
     @staticmethod
-    def calculate_neighbourhood(summed_cube,
-                                ymax_xmax_disp, ymin_xmax_disp,
-                                ymin_xmin_disp, ymax_xmin_disp,
-                                n_rows, n_columns):
+    def neighbourhood_totals(data, cells_x, cells_y,
+                             accumulation_precision="float64"):
         """
-        Fast vectorised approach to calculating neighbourhood totals.
-
-        Displacements are calculated as follows for the following input array,
-        where the accumulation has occurred from top to
-        bottom and left to right::
+        Calculate the sum over a square neighbourhood around every point of
+        a block of x-y slices, using summed-area tables.
 
-        | 1 | 2 | 2 | 2 |
-        | 1 | 3 | 4 | 4 |
-        | 2 | 4 | 5 | 6 |
-        | 2 | 4 | 6 | 7 |
+        The summed-area table of each slice is built in a single array
+        that is padded by the neighbourhood radius (plus a leading row and
+        column of zeros), so that points outside the domain contribute
+        zero. The four corner terms for every point are then taken from
+        this table as array slices, without the need to flatten and roll
+        copies of the table.
 
-
-        For a 3x3 neighbourhood centred around the point with a value of 5::
+        For example, for the following summed-area table, where the
+        accumulation has occurred from top to bottom and left to right::
 
         | 1 (C) | 2 | 2                 | 2 (D) |
         | 1     | 3 | 4                 | 4     |
         | 2     | 4 | 5 (Central point) | 6     |
         | 2 (A) | 4 | 6                 | 7 (B) |
 
-        To calculate the value for the neighbourhood sum at the "Central point"
-        with a value of 5, calculate::
-
-          Neighbourhood sum = B - A - D + C
+        the sum over the 3x3 neighbourhood of the central point is::
 
-        At the central point, this will yield::
-
-          Neighbourhood sum = 7 - 2 - 2 +1 => 4
+          Neighbourhood sum = B - A - D + C = 7 - 2 - 2 + 1 = 4
 
         Args:
-            summed_cube (iris.cube.Cube):
-                cube on which to calculate the neighbourhood total.
-            ymax_xmax_disp (int):
-                Displacement from the point at the centre
-                of the neighbourhood.
-                Equivalent to point B in the docstring example.
-            ymax_xmin_disp (int):
-                Displacement from the point at the centre
-                of the neighbourhood.
-                Equivalent to point A in the docstring example.
-            ymin_xmax_disp (int):
-                Displacement from the point at the centre
-                of the neighbourhood.
-                Equivalent to point D in the docstring example.
-            ymin_xmin_disp (int):
-                Displacement from the point at the centre
-                of the neighbourhood.
-                Equivalent to point C in the docstring example.
-            n_rows (int):
-                Number of rows
-            n_columns (int):
-                Number of columns
+            data (numpy array):
+                Array of at least 2 dimensions, with y and x as the last two
+                dimensions, e.g. (realization, threshold, y, x).
+            cells_x, cells_y (int):
+                The radius of the neighbourhood in grid points, in the x and y
+                directions (excluding the central grid point).
+
+        Keyword Args:
+            accumulation_precision (str):
+                Precision used to build the summed-area tables. "float64"
+                uses a compensated double precision sum; "longdouble" uses
+                numpy's extended precision type. Complex data are
+                accumulated using the equivalent complex type.
 
         Returns:
-            neighbourhood_total (np.array):
-                Array containing the calculated neighbourhood total.
+            totals (numpy array):
+                Array of the same shape as data, of type float64 (or
+                complex128 for complex data), containing the neighbourhood
+                total at each point.
         """
-        flattened = summed_cube.data.flatten()
-        ymax_xmax_array = np.roll(flattened, -ymax_xmax_disp)
-        ymin_xmax_array = np.roll(flattened, -ymin_xmax_disp)
-        ymin_xmin_array = np.roll(flattened, -ymin_xmin_disp)
-        ymax_xmin_array = np.roll(flattened, -ymax_xmin_disp)
-        neighbourhood_total = (ymax_xmax_array - ymin_xmax_array +
-                               ymin_xmin_array - ymax_xmin_array)
-        neighbourhood_total.resize(n_rows, n_columns)
-        return neighbourhood_total
-
-    def mean_over_neighbourhood(self, summed_cube, summed_mask,
-                                cells_x, cells_y, iscomplex=False):
+        is_complex = np.iscomplexobj(data)
+        if accumulation_precision == "longdouble":
+            dtype = np.clongdouble if is_complex else np.longdouble
+        else:
+            dtype = np.complex128 if is_complex else np.float64
+
+        n_rows, n_columns = data.shape[-2:]
+        width_y = 2*cells_y + 1
+        width_x = 2*cells_x + 1
+        table = np.zeros(data.shape[:-2] + (n_rows + width_y,
+                                            n_columns + width_x),
+                         dtype=dtype)
+        table[..., cells_y+1:cells_y+1+n_rows,
+              cells_x+1:cells_x+1+n_columns] = data
+
+        # Equivalent to points B, D, A and C in the docstring example.
+        ymax_xmax = (Ellipsis, slice(width_y, None), slice(width_x, None))
+        ymin_xmax = (Ellipsis, slice(None, n_rows), slice(width_x, None))
+        ymax_xmin = (Ellipsis, slice(width_y, None), slice(None, n_columns))
+        ymin_xmin = (Ellipsis, slice(None, n_rows), slice(None, n_columns))
+
+        def corner_sum(array, out):
+            """Calculate B - D - A + C from the table array into out."""
+            np.subtract(array[ymax_xmax], array[ymin_xmax], out=out)
+            out -= array[ymax_xmin]
+            out += array[ymin_xmin]
+            return out
+
+        if accumulation_precision == "longdouble":
+            np.cumsum(table, axis=-2, out=table)
+            np.cumsum(table, axis=-1, out=table)
+            totals = corner_sum(table, np.empty(data.shape, dtype=dtype))
+            return totals.astype(
+                np.complex128 if is_complex else np.float64)
+
+        compensation = np.zeros_like(table)
+        SquareNeighbourhood._compensated_cumsum(table, compensation, -2)
+        SquareNeighbourhood._compensated_cumsum(table, compensation, -1)
+        totals = corner_sum(table, np.empty(data.shape, dtype=dtype))
+        totals += corner_sum(compensation, np.empty(data.shape, dtype=dtype))
+        return totals
+
+    def _calculate_neighbourhood_block(self, data, mask, cells_x, cells_y):
         """
-        Method to calculate the average value in a square neighbourhood using
-        the 4-point algorithm to find the total sum over the neighbourhood.
-
-        The output from the cumulate_array method can be used to
-        calculate the sum over a neighbourhood of size
-        (2*cells_x+1)*(2*cells_y+1). This sum is then divided by the area of
-        the neighbourhood to calculate the mean value in the neighbourhood.
-
-        For all points, a fast vectorised approach is taken:
-
-        1. The displacements between the four points used to calculate the
-           neighbourhood total sum and the central grid point are calculated.
-        2. Within the function calculate_neighbourhood...
-           Four copies of the cumulate array output are flattened and rolled
-           by these displacements to align the four terms used in the
-           neighbourhood total sum calculation.
-        3. The neighbourhood total at all points can then be calculated
-           simultaneously in a single vector sum.
-
-        Neighbourhood mean = Neighbourhood sum / Neighbourhood area
+        Calculate the neighbourhood sum or fraction for a block of x-y
+        slices at once.
 
-        Neighbourhood area = (2 * nb_width +1)^2 if there are no missing
-        points, nb_width is the neighbourhood width, which is equal to 1 for a
-        3x3 neighbourhood.
+        Where every slice shares the same mask, the neighbourhood area is
+        only calculated once and broadcast across the block.
 
         Args:
-            summed_cube (iris.cube.Cube):
-                Summed Cube to which neighbourhood processing is being
-                applied. Must be passed through cumulate_array method first.
-                The cube should contain only x and y dimensions,
-                so will generally be a slice of a cube.
-            summed_mask (iris.cube.Cube):
-                Summed Mask used to calculate neighbourhood size.
-                Must be passed through cumulate_array method first.
-                The cube should contain only x and y dimensions,
-                so will generally be a slice of a cube.
+            data (numpy array):
+                Array of shape (slices, y, x) with masked or NaN values set
+                to 0.0.
+            mask (numpy array):
+                Array of shape (slices, y, x) with masked or NaN values set
+                to 0.0.
             cells_x, cells_y (int):
                 The radius of the neighbourhood in grid points, in the x and y
                 directions (excluding the central grid point).
 
-        Kwargs:
-            iscomplex (bool):
-                Flag indicating whether cube.data contains complex values.
-
         Returns:
-            cube (iris.cube.Cube):
-                Cube to which square neighbourhood has been applied.
+            result (numpy array):
+                Array of shape (slices, y, x) containing the neighbourhood
+                processed data, of type float32 or complex128 for complex
+                data.
         """
-        cube = summed_cube
-        check_for_x_and_y_axes(summed_cube)
-
-        # Calculate displacement factors to find 4-points after flattening the
-        # array.
-        n_rows = len(cube.coord(axis="y").points)
-        n_columns = len(cube.coord(axis="x").points)
-
-        # Displacements from the point at the centre of the neighbourhood.
-        # Equivalent to point B in the docstring example.
-        ymax_xmax_disp = (cells_y*n_columns) + cells_x
-        # Equivalent to point A in the docstring example.
-        ymax_xmin_disp = (cells_y*n_columns) - cells_x - 1
-
-        # Equivalent to point D in the docstring example.
-        ymin_xmax_disp = (-1*(cells_y+1)*n_columns) + cells_x
-        # Equivalent to point C in the docstring example.
-        ymin_xmin_disp = (-1*(cells_y+1)*n_columns) - cells_x - 1
-
-        # Flatten the cube data and create 4 copies of the flattened
-        # array which are rolled to align the 4-points which are needed
-        # for the calculation.
-        neighbourhood_total = self.calculate_neighbourhood(
-            summed_cube, ymax_xmax_disp, ymin_xmax_disp,
-            ymin_xmin_disp, ymax_xmin_disp,
-            n_rows, n_columns)
+        is_complex = np.any(np.iscomplex(data))
+        if not is_complex:
+            data = np.real(data)
+        totals = self.neighbourhood_totals(
+            data, cells_x, cells_y,
+            accumulation_precision=self.accumulation_precision)
 
         if self.sum_or_fraction == "fraction":
-            # Initialise and calculate the neighbourhood area.
-            neighbourhood_area = self.calculate_neighbourhood(
-                summed_mask, ymax_xmax_disp, ymin_xmax_disp,
-                ymin_xmin_disp, ymax_xmin_disp,
-                n_rows, n_columns)
-
+            if all(np.array_equal(mask[0], mask_slice)
+                   for mask_slice in mask[1:]):
+                mask = mask[:1]
+            area = self.neighbourhood_totals(
+                np.real(mask), cells_x, cells_y,
+                accumulation_precision=self.accumulation_precision)
             with np.errstate(invalid='ignore', divide='ignore'):
-                if iscomplex:
-                    cube.data = (neighbourhood_total.astype(complex) /
-                                 neighbourhood_area.astype(complex))
-                else:
-                    cube.data = (neighbourhood_total.astype(float) /
-                                 neighbourhood_area.astype(float))
-                cube.data[~np.isfinite(cube.data)] = np.nan
-        elif self.sum_or_fraction == "sum":
-            if iscomplex:
-                cube.data = neighbourhood_total.astype(complex)
-            else:
-                cube.data = neighbourhood_total.astype(float)
-
-        return cube
+                totals /= area
+            totals[~np.isfinite(totals)] = np.nan
+
+        if is_complex:
+            return totals
+        return totals.astype(np.float32)
 
     @staticmethod
     def set_up_cubes_to_be_neighbourhooded(cube, mask_cube=None):
@@ -356,62 +342,10 @@ class SquareNeighbourhood(object):
             cube.data.dtype)
         return cube, mask, nan_array
 
-    def _pad_and_calculate_neighbourhood(
-            self, cube, mask, grid_cells_x, grid_cells_y):
+    def _mask_and_clip(self, neighbourhood_averaged_cube, original_cube,
+                       mask):
         """
-        Apply neighbourhood processing consisting of the following steps:
-
-        1. Pad a halo around the input cube to allow vectorised
-           neighbourhooding at edgepoints.
-        2. Cumulate the array along the x and y axes.
-        3. Apply neighbourhood processing to the cumulated array.
-
-        Args:
-            cube (Iris.cube.Cube):
-                Cube with masked or NaN values set to 0.0
-            mask (Iris.cube.Cube):
-                Cube with masked or NaN values set to 0.0
-            grid_cells_x (Float):
-                The number of grid cells along the x axis used to create a
-                square neighbourhood.
-            grid_cells_y (Float):
-                The number of grid cells along the y axis used to create a
-                square neighbourhood.
-
-        Returns:
-            neighbourhood_averaged_cube (Iris.cube):
-                Cube containing the smoothed field after the square
-                neighbourhood method has been applied with halo added.
-        """
-        # Pad the iris cube with the neighbourhood radius plus 1 grid point.
-        # Since the neighbourhood size is 2*radius + 1, this means that all
-        # grid points within the original domain will have data available for
-        # the full neighbourhood size.  The halo is removed later.
-        padded_cube = pad_cube_with_halo(cube, grid_cells_x+1, grid_cells_y+1,
-                                         halo_mean_data=False)
-        padded_mask = pad_cube_with_halo(mask, grid_cells_x+1, grid_cells_y+1,
-                                         halo_mean_data=False)
-
-        # Check whether cube contains complex values
-        is_complex = np.any(np.iscomplex(cube.data))
-
-        summed_up_cube = self.cumulate_array(padded_cube, is_complex)
-        summed_up_mask = self.cumulate_array(padded_mask)
-        neighbourhood_averaged_cube = (
-            self.mean_over_neighbourhood(summed_up_cube, summed_up_mask,
-                                         grid_cells_x, grid_cells_y,
-                                         is_complex))
-        if neighbourhood_averaged_cube.dtype in [np.float64, np.longdouble]:
-            neighbourhood_averaged_cube.data = (
-                neighbourhood_averaged_cube.data.astype(np.float32))
-        return neighbourhood_averaged_cube
-
-    def _remove_padding_and_mask(
-            self, neighbourhood_averaged_cube,
-            original_cube, mask,
-            grid_cells_x, grid_cells_y):
-        """
-        Remove the halo from the padded array and apply the mask, if required.
+        Apply the mask to the neighbourhood processed cube, if required.
         If fraction option set, clip the data so values lie within
         the range of the original cube.
 
@@ -423,23 +357,16 @@ class SquareNeighbourhood(object):
                 The original cube slice.
             mask (Iris.cube.Cube):
                 The mask cube created by set_up_cubes_to_be_neighbourhooded.
-            grid_cells_x (Float):
-                The number of grid cells along the x axis used to create a
-                square neighbourhood.
-            grid_cells_y (Float):
-                The number of grid cells along the y axis used to create a
-                square neighbourhood.
 
         Returns:
             neighbourhood_averaged_cube (Iris.cube.Cube):
                 Cube containing the smoothed field after the square
-                neighbourhood method has been applied and halo removed.
+                neighbourhood method has been applied, with the mask
+                applied and the data clipped, if required.
         """
         # Correct neighbourhood averages for masked data, which may have been
         # calculated using larger neighbourhood areas than are present in
         # reality.
-        neighbourhood_averaged_cube = remove_halo_from_cube(
-            neighbourhood_averaged_cube, grid_cells_x+1, grid_cells_y+1)
         if self.re_mask and mask.data.min() < 1.0:
             neighbourhood_averaged_cube.data = np.ma.masked_array(
                 neighbourhood_averaged_cube.data,
@@ -461,10 +388,10 @@ class SquareNeighbourhood(object):
         The steps undertaken are:
 
         1. Set up cubes by determining, if the arrays are masked.
-        2. Pad the input array with a halo and then calculate the neighbourhood
-           of the haloed array.
-        3. Remove the halo from the neighbourhooded array and deal with a mask,
-           if required.
+        2. Calculate the neighbourhood of blocks of x-y slices together,
+           using summed-area tables padded by the neighbourhood radius.
+        3. Deal with a mask, if required, and clip the data to the range
+           of the original slice.
 
         Args:
             cube (Iris.cube.Cube):
@@ -491,23 +418,36 @@ class SquareNeighbourhood(object):
             convert_distance_into_number_of_grid_cells(
                 cube, radius,
                 max_distance_in_grid_cells=MAX_RADIUS_IN_GRID_CELLS))
+
+        # Process the x-y slices in blocks of a bounded size, so that the
+        # summed-area tables for a cube with many slices (e.g. thresholds)
+        # do not all have to be held in memory at once.
+        slice_shape = (cube.coord(axis='y').shape[0],
+                       cube.coord(axis='x').shape[0])
+        slices_per_block = max(
+            1, MAX_POINTS_PER_BLOCK // (slice_shape[0]*slice_shape[1]))
+        cube_slices = cube.slices([cube.coord(axis='y'),
+                                   cube.coord(axis='x')])
+
         result_slices = iris.cube.CubeList()
-        for cube_slice in cube.slices([cube.coord(axis='y'),
-                                       cube.coord(axis='x')]):
-            (cube_slice, mask, nan_array) = (
-                self.set_up_cubes_to_be_neighbourhooded(cube_slice,
-                                                        mask_cube))
-            neighbourhood_averaged_cube = (
-                self._pad_and_calculate_neighbourhood(
-                    cube_slice, mask,
-                    grid_cells_x, grid_cells_y))
-            neighbourhood_averaged_cube = (
-                self._remove_padding_and_mask(
-                    neighbourhood_averaged_cube,
-                    cube_slice, mask,
-                    grid_cells_x, grid_cells_y))
-            neighbourhood_averaged_cube.data[nan_array.astype(bool)] = np.nan
-            result_slices.append(neighbourhood_averaged_cube)
+        while True:
+            block = [
+                self.set_up_cubes_to_be_neighbourhooded(cube_slice, mask_cube)
+                for cube_slice in islice(cube_slices, slices_per_block)]
+            if not block:
+                break
+            neighbourhood_data = self._calculate_neighbourhood_block(
+                np.stack([cube_slice.data for cube_slice, _, _ in block]),
+                np.stack([mask.data for _, mask, _ in block]),
+                grid_cells_x, grid_cells_y)
+
+            for (cube_slice, mask, nan_array), data in zip(
+                    block, neighbourhood_data):
+                neighbourhood_averaged_cube = self._mask_and_clip(
+                    cube_slice.copy(data=data), cube_slice, mask)
+                neighbourhood_averaged_cube.data[
+                    nan_array.astype(bool)] = np.nan
+                result_slices.append(neighbourhood_averaged_cube)
 
         neighbourhood_averaged_cube = result_slices.merge_cube()
 
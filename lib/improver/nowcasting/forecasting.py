@@ -31,6 +31,7 @@
 """
 This module defines plugins used to create nowcast extrapolation forecasts.
 """
+from concurrent.futures import ThreadPoolExecutor
 import datetime
 import warnings
 import numpy as np
@@ -50,7 +51,8 @@ class AdvectField():
     dimensions
     """
 
-    def __init__(self, vel_x, vel_y, metadata_dict=None):
+    def __init__(self, vel_x, vel_y, metadata_dict=None,
+                 advection_method="scatter", single_precision=False):
         """
         Initialises the plugin.  Velocities are expected to be on a regular
         grid (such that grid spacing in metres is the same at all points in
@@ -71,7 +73,27 @@ class AdvectField():
                 :func:`improver.utilities.cube_metadata.amend_metadata`
                 for information regarding the allowed contents of the metadata
                 dictionary.
+            advection_method (str):
+                Method used to advect the data: "scatter", which adds the
+                contribution of each of the four source points surrounding
+                the fractional source location in turn, or "gather", which
+                interpolates bilinearly at the fractional source locations
+                in a single pass.  The results are the same to within
+                floating point precision, but "gather" is faster and uses
+                less temporary memory.
+            single_precision (bool):
+                If True, and the "gather" method is used, the interpolation
+                is performed using float32 arithmetic only.
+
+        Raises:
+            ValueError: If the advection method is not recognised.
         """
+        if advection_method not in ["scatter", "gather"]:
+            msg = ("Advection method '{}' not recognised. Choose from "
+                   "'scatter' or 'gather'.".format(advection_method))
+            raise ValueError(msg)
+        self.advection_method = advection_method
+        self.single_precision = single_precision
 
         # check each input velocity cube has precisely two non-scalar
         # dimension coordinates (spatial x/y)
@@ -92,6 +114,9 @@ class AdvectField():
         self.x_coord = vel_x.coord(axis="x")
         self.y_coord = vel_x.coord(axis="y")
 
+        # Grids of data coordinates, calculated once on first use.
+        self._coordinate_grids = None
+
         # Initialise metadata dictionary.
         if metadata_dict is None:
             metadata_dict = {}
@@ -142,7 +167,97 @@ class AdvectField():
         outdata[ydest, xdest] += (
             indata[ysrc, xsrc]*x_weight[ydest, xdest]*y_weight[ydest, xdest])
 
-    def _advect_field(self, data, grid_vel_x, grid_vel_y, timestep):
+    def _gather_advected_field(self, data, grid_vel_x, grid_vel_y, timestep,
+                               adv_field):
+        """
+        Performs the same backwards advection as _advect_field, but gathers
+        the bilinearly interpolated data at each fractional source location
+        directly, rather than scattering the contribution of each source
+        point in turn.  The data are padded with a row and column of zeros,
+        so that source points beyond the last row or column contribute
+        nothing, as in _advect_field.  Masked or NaN data propagate to any
+        point to which they would contribute.
+
+        Args:
+            data (numpy.ndarray or numpy.ma.MaskedArray):
+                2D numpy data array to be advected
+            grid_vel_x (numpy.ndarray):
+                Velocity in the x direction (in grid points per second)
+            grid_vel_y (numpy.ndarray):
+                Velocity in the y direction (in grid points per second)
+            timestep (int):
+                Advection time step in seconds
+            adv_field (numpy.ndarray):
+                2D float32 array, initialised with np.nan, into which the
+                advected data are written (modified in place).
+        """
+        dtype = np.float32 if self.single_precision else np.float64
+        ydim, xdim = data.shape
+
+        # Trace the (x, y) source location of each grid point backwards, and
+        # select the points whose source lies within the field.
+        xsrc_point_frac = (-grid_vel_x * timestep +
+                           np.arange(xdim, dtype=np.float32)[np.newaxis, :])
+        ysrc_point_frac = (-grid_vel_y * timestep +
+                           np.arange(ydim, dtype=np.float32)[:, np.newaxis])
+        in_bounds = ((xsrc_point_frac >= 0.) & (xsrc_point_frac < xdim) &
+                     (ysrc_point_frac >= 0.) & (ysrc_point_frac < ydim))
+        xsrc_point_frac = xsrc_point_frac[in_bounds]
+        ysrc_point_frac = ysrc_point_frac[in_bounds]
+
+        # Find the lower integer source points and the distance-weighted
+        # fractional contribution of the upper source points.
+        xsrc_point_lower = xsrc_point_frac.astype(np.int64)
+        ysrc_point_lower = ysrc_point_frac.astype(np.int64)
+        x_weight_upper = (xsrc_point_frac - xsrc_point_lower).astype(
+            np.float32).astype(dtype)
+        y_weight_upper = (ysrc_point_frac - ysrc_point_lower).astype(
+            np.float32).astype(dtype)
+
+        # Substitute NaNs for any masked data, and pad with zeros.
+        padded = np.zeros((ydim + 1, xdim + 1), dtype=dtype)
+        if isinstance(data, np.ma.MaskedArray):
+            padded[:ydim, :xdim] = np.where(data.mask, np.nan, data.data)
+        else:
+            padded[:ydim, :xdim] = data
+        padded = padded.ravel()
+
+        # Gather the four surrounding source points and interpolate.
+        lower_index = ysrc_point_lower * (xdim + 1) + xsrc_point_lower
+        upper_index = lower_index + xdim + 1
+        lower_row = (padded[lower_index] * (1 - x_weight_upper) +
+                     padded[lower_index + 1] * x_weight_upper)
+        upper_row = (padded[upper_index] * (1 - x_weight_upper) +
+                     padded[upper_index + 1] * x_weight_upper)
+        adv_field[in_bounds] = (lower_row * (1 - y_weight_upper) +
+                                upper_row * y_weight_upper)
+
+    def _get_coordinate_grids(self, shape):
+        """
+        Return grids of the integer data coordinates, which are calculated
+        once and reused for every subsequent advection time step.
+
+        Args:
+            shape (tuple):
+                Shape of the 2D data array to be advected
+
+        Returns:
+            (tuple) : tuple containing:
+                **xgrid** (numpy.ndarray):
+                    Integer x-coordinates of all points on the grid
+                **ygrid** (numpy.ndarray):
+                    Integer y-coordinates of all points on the grid
+        """
+        if (self._coordinate_grids is None or
+                self._coordinate_grids[0].shape != shape):
+            # meshgrid inverts coordinate order
+            ydim, xdim = shape
+            self._coordinate_grids = np.meshgrid(np.arange(xdim),
+                                                 np.arange(ydim))
+        return self._coordinate_grids
+
+    def _advect_field(self, data, grid_vel_x, grid_vel_y, timestep,
+                      adv_field=None):
         """
         Performs a dimensionless grid-based extrapolation of spatial data
         using advection velocities via a backwards method.  Points where data
@@ -159,6 +274,12 @@ class AdvectField():
             timestep (int):
                 Advection time step in seconds
 
+        Keyword Args:
+            adv_field (numpy.ndarray or None):
+                Preallocated 2D float32 array, e.g. a slice of an array
+                holding all lead times, into which the advected data are
+                written.  If None, a new array is allocated.
+
         Returns:
             adv_field (numpy.ma.MaskedArray):
                 2D float array of advected data values with masked "no data"
@@ -169,12 +290,20 @@ class AdvectField():
             return data
 
         # Initialise advected field with np.nan
-        adv_field = np.full(data.shape, np.nan, dtype=np.float32)
+        if adv_field is None:
+            adv_field = np.full(data.shape, np.nan, dtype=np.float32)
+        else:
+            adv_field.fill(np.nan)
+
+        if self.advection_method == "gather":
+            self._gather_advected_field(data, grid_vel_x, grid_vel_y,
+                                        timestep, adv_field)
+            return np.ma.masked_where(~np.isfinite(adv_field), adv_field,
+                                      copy=False)
 
-        # Set up grids of data coordinates (meshgrid inverts coordinate order)
+        # Set up grids of data coordinates
         ydim, xdim = data.shape
-        (xgrid, ygrid) = np.meshgrid(np.arange(xdim),
-                                     np.arange(ydim))
+        (xgrid, ygrid) = self._get_coordinate_grids(data.shape)
 
         # For each grid point on the output field, trace its (x,y) "source"
         # location backwards using advection velocities.  The source location
@@ -222,34 +351,29 @@ class AdvectField():
                     data, adv_field, cond, xgrid, ygrid, xpt, ypt, xwt, ywt)
 
         # Replace NaNs with a mask
-        adv_field = np.ma.masked_where(~np.isfinite(adv_field), adv_field)
+        adv_field = np.ma.masked_where(~np.isfinite(adv_field), adv_field,
+                                       copy=False)
 
         return adv_field
 
-    def process(self, cube, timestep):
+    def _check_input_cube(self, cube):
         """
-        Extrapolates input cube data and updates validity time.  The input
-        cube should have precisely two non-scalar dimension coordinates
-        (spatial x/y), and is expected to be in a projection such that grid
-        spacing is the same (or very close) at all points within the spatial
-        domain.  The input cube should also have a "time" coordinate.
+        Check that the input cube has precisely two non-scalar dimension
+        coordinates (spatial x/y) and a scalar time coordinate, on the same
+        grid as the plugin velocities, and warn if it contains unmasked NaNs.
 
         Args:
             cube (iris.cube.Cube):
                 The 2D cube containing data to be advected
-            timestep (datetime.timedelta):
-                Advection time step
 
-        Returns:
-            advected_cube (iris.cube.Cube):
-                New cube with updated time and extrapolated data.  New data
-                are filled with np.nan and masked where source data were
-                out of bounds (ie where data could not be advected from outside
-                the cube domain).
+        Raises:
+            InvalidCubeError:
+                If the input data grid does not match the advection
+                velocities.
 
+        Warns:
+            UserWarning: If the input data contains unmasked NaNs.
         """
-        # check that the input cube has precisely two non-scalar dimension
-        # coordinates (spatial x/y) and a scalar time coordinate
         check_input_coords(cube, require_time=True)
 
         # check spatial coordinates match those of plugin velocities
@@ -258,7 +382,27 @@ class AdvectField():
             raise InvalidCubeError("Input data grid does not match advection "
                                    "velocities")
 
-        # derive velocities in "grid squares per second"
+        # raise a warning if data contains unmasked NaNs
+        nan_count = np.count_nonzero(~np.isfinite(cube.data))
+        if nan_count > 0:
+            warnings.warn("input data contains unmasked NaNs")
+
+    def _grid_velocities(self, cube):
+        """
+        Derive the plugin velocities in "grid squares per second" on the grid
+        of the input cube.
+
+        Args:
+            cube (iris.cube.Cube):
+                The 2D cube containing data to be advected
+
+        Returns:
+            (tuple) : tuple containing:
+                **grid_vel_x** (numpy.ndarray):
+                    Velocity in the x direction (in grid points per second)
+                **grid_vel_y** (numpy.ndarray):
+                    Velocity in the y direction (in grid points per second)
+        """
         def grid_spacing(coord):
             """Calculate grid spacing along a given spatial axis"""
             new_coord = coord.copy()
@@ -267,15 +411,25 @@ class AdvectField():
 
         grid_vel_x = self.vel_x.data / grid_spacing(cube.coord(axis="x"))
         grid_vel_y = self.vel_y.data / grid_spacing(cube.coord(axis="y"))
+        return grid_vel_x, grid_vel_y
 
-        # raise a warning if data contains unmasked NaNs
-        nan_count = np.count_nonzero(~np.isfinite(cube.data))
-        if nan_count > 0:
-            warnings.warn("input data contains unmasked NaNs")
+    def _create_advected_cube(self, cube, advected_data, timestep):
+        """
+        Create a cube of advected data with an updated validity time and
+        forecast period, and the metadata of a nowcast.
 
-        # perform advection and create output cube
-        advected_data = self._advect_field(cube.data, grid_vel_x, grid_vel_y,
-                                           timestep.total_seconds())
+        Args:
+            cube (iris.cube.Cube):
+                The 2D cube containing data that were advected
+            advected_data (numpy.ma.MaskedArray):
+                2D array of advected data values
+            timestep (datetime.timedelta):
+                Advection time step
+
+        Returns:
+            advected_cube (iris.cube.Cube):
+                New cube with updated time and extrapolated data.
+        """
         advected_cube = cube.copy(data=advected_data)
 
         # increment output cube time and add a "forecast_period" coordinate
@@ -328,6 +482,101 @@ class AdvectField():
         advected_cube = amend_metadata(advected_cube, **self.metadata_dict)
         return advected_cube
 
+    def process(self, cube, timestep):
+        """
+        Extrapolates input cube data and updates validity time.  The input
+        cube should have precisely two non-scalar dimension coordinates
+        (spatial x/y), and is expected to be in a projection such that grid
+        spacing is the same (or very close) at all points within the spatial
+        domain.  The input cube should also have a "time" coordinate.
+
+        Args:
+            cube (iris.cube.Cube):
+                The 2D cube containing data to be advected
+            timestep (datetime.timedelta):
+                Advection time step
+
+        Returns:
+            advected_cube (iris.cube.Cube):
+                New cube with updated time and extrapolated data.  New data
+                are filled with np.nan and masked where source data were
+                out of bounds (ie where data could not be advected from outside
+                the cube domain).
+
+        """
+        self._check_input_cube(cube)
+        grid_vel_x, grid_vel_y = self._grid_velocities(cube)
+
+        # perform advection and create output cube
+        advected_data = self._advect_field(cube.data, grid_vel_x, grid_vel_y,
+                                           timestep.total_seconds())
+        return self._create_advected_cube(cube, advected_data, timestep)
+
+    def process_multiple(self, cube, timesteps, max_workers=1):
+        """
+        Extrapolates input cube data to several time steps.  The input cube
+        is checked, and the grid velocities and coordinate grids are
+        calculated, only once.  The advected fields for all the time steps
+        are written into a single preallocated (time, y, x) array, and can
+        be calculated in parallel using a pool of threads.
+
+        The advected cubes are returned by an iterator in the order of the
+        time steps, each as soon as it is ready, so that they can be written
+        out while later time steps are still being calculated.
+
+        Args:
+            cube (iris.cube.Cube):
+                The 2D cube containing data to be advected
+            timesteps (list of datetime.timedelta):
+                Advection time steps
+
+        Keyword Args:
+            max_workers (int):
+                Maximum number of threads used to advect the data for
+                different time steps at the same time.
+
+        Returns:
+            advected_cubes (iterator of iris.cube.Cube):
+                New cubes with updated time and extrapolated data for each
+                time step, as returned by the process method.
+
+        Raises:
+            ValueError: If max_workers is less than one.
+        """
+        if max_workers < 1:
+            msg = "Number of workers is less than one: {}".format(max_workers)
+            raise ValueError(msg)
+
+        self._check_input_cube(cube)
+        grid_vel_x, grid_vel_y = self._grid_velocities(cube)
+        data = cube.data
+        self._get_coordinate_grids(data.shape)
+        advected_fields = np.empty((len(timesteps),) + data.shape,
+                                   dtype=np.float32)
+
+        def advect(index):
+            """Advect the data for one time step into the output array."""
+            return self._advect_field(
+                data, grid_vel_x, grid_vel_y,
+                timesteps[index].total_seconds(),
+                adv_field=advected_fields[index])
+
+        def advected_cubes():
+            """Yield the advected cubes in the order of the time steps."""
+            indices = range(len(timesteps))
+            if max_workers > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    for index, advected_data in zip(
+                            indices, executor.map(advect, indices)):
+                        yield self._create_advected_cube(
+                            cube, advected_data, timesteps[index])
+            else:
+                for index in indices:
+                    yield self._create_advected_cube(
+                        cube, advect(index), timesteps[index])
+
+        return advected_cubes()
+
 
 class CreateExtrapolationForecast():
     """
@@ -336,7 +585,8 @@ class CreateExtrapolationForecast():
     """
 
     def __init__(self, input_cube, vel_x, vel_y,
-                 orographic_enhancement_cube=None, metadata_dict=None):
+                 orographic_enhancement_cube=None, metadata_dict=None,
+                 advection_method="scatter", single_precision=False):
         """
         Initialises the object.
         This includes checking if orographic enhancement is provided and
@@ -367,6 +617,12 @@ class CreateExtrapolationForecast():
                 :func:`improver.utilities.cube_metadata.amend_metadata`
                 for information regarding the allowed contents of the metadata
                 dictionary.
+            advection_method (str):
+                Method used to advect the data, "scatter" or "gather". See
+                AdvectField for details.
+            single_precision (bool):
+                If True, and the "gather" method is used, the advection is
+                performed using float32 arithmetic only.
         """
         self.orographic_enhancement_cube = orographic_enhancement_cube
         if self.orographic_enhancement_cube:
@@ -378,7 +634,9 @@ class CreateExtrapolationForecast():
             raise ValueError(msg)
         self.input_cube = input_cube
         self.advection_plugin = AdvectField(
-            vel_x, vel_y, metadata_dict=metadata_dict)
+            vel_x, vel_y, metadata_dict=metadata_dict,
+            advection_method=advection_method,
+            single_precision=single_precision)
 
     def __repr__(self):
         """Represent the plugin instance as a string."""
@@ -425,3 +683,43 @@ class CreateExtrapolationForecast():
                 forecast_cube, self.orographic_enhancement_cube)
 
         return forecast_cube
+
+    def extrapolate_multiple(self, leadtimes_minutes, max_workers=1):
+        """
+        Produce new forecast cubes for each of the supplied lead times in a
+        single pass, reapplying the orographic enhancement to each if it is
+        supplied.  See AdvectField.process_multiple.
+
+        Args:
+            leadtimes_minutes (list of float):
+                The forecast leadtimes we want to generate forecasts for
+                in minutes.
+
+        Keyword Args:
+            max_workers (int):
+                Maximum number of threads used to advect the data for
+                different lead times at the same time.
+
+        Returns:
+            forecast_cubes (iterator of iris.cube.Cube):
+                New cubes with updated time and extrapolated data for each
+                lead time, in the order of the lead times, each returned as
+                soon as it is ready.
+        """
+        # cast to float as datetime.timedelta cannot accept np.int
+        timesteps = [datetime.timedelta(minutes=float(leadtime_minutes))
+                     for leadtime_minutes in leadtimes_minutes]
+        advected_cubes = self.advection_plugin.process_multiple(
+            self.input_cube, timesteps, max_workers=max_workers)
+
+        def forecast_cubes():
+            """Yield the forecast cubes in the order of the lead times."""
+            for forecast_cube in advected_cubes:
+                if self.orographic_enhancement_cube:
+                    # Add orographic enhancement.
+                    forecast_cube, = ApplyOrographicEnhancement(
+                        "add").process(forecast_cube,
+                                       self.orographic_enhancement_cube)
+                yield forecast_cube
+
+        return forecast_cubes()
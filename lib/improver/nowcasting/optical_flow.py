@@ -37,7 +37,6 @@ import numpy as np
 
 import scipy.linalg
 import scipy.ndimage
-import scipy.signal
 
 import iris
 from iris.exceptions import CoordinateNotFoundError, InvalidCubeError
@@ -258,10 +257,65 @@ class OpticalFlow(object):
         weights[weights < 0.01] = 0
         return boxes, weights
 
+    def _box_sums(self, field):
+        """
+        Sum a field over each of the non-overlapping "boxes" of size
+        self.boxsize**2 used by _make_subboxes.  The whole boxes are
+        reshaped into contiguous blocks, so that each is summed in the same
+        order, and so with the same rounding, as summing the box on its own.
+        The smaller boxes along the far edges of the field are summed
+        individually.
+
+        Args:
+            field (np.ndarray):
+                2D input field
+
+        Returns:
+            box_sums (np.ndarray):
+                2D array, of the same dtype as the field, containing the sum
+                of the field over each box, on the "box grid".
+        """
+        size = self.boxsize
+        nboxes = [-(-length // size) for length in field.shape]
+        nwhole = [length // size for length in field.shape]
+        box_sums = np.zeros(nboxes, dtype=field.dtype)
+
+        blocks = field[:nwhole[0]*size, :nwhole[1]*size].reshape(
+            nwhole[0], size, nwhole[1], size).transpose(0, 2, 1, 3)
+        box_sums[:nwhole[0], :nwhole[1]] = (
+            np.ascontiguousarray(blocks).sum(axis=(2, 3)))
+
+        edge_boxes = [(i, j) for i in range(nwhole[0], nboxes[0])
+                      for j in range(nboxes[1])]
+        edge_boxes += [(i, j) for i in range(nwhole[0])
+                       for j in range(nwhole[1], nboxes[1])]
+        for i, j in edge_boxes:
+            box_sums[i, j] = (
+                field[i*size:(i+1)*size, j*size:(j+1)*size].sum())
+        return box_sums
+
+    def _box_weights(self):
+        """
+        Calculate the weights of each box on the "box grid" from the data
+        values at times 1 and 2, as in _make_subboxes.
+
+        Returns:
+            weights (np.ndarray):
+                2D array of weights associated with each box.
+        """
+        weighting_factor = 0.5 / self.boxsize**2.
+        weights = weighting_factor*(
+            self._box_sums(self.data1) +
+            self._box_sums(self.data2)).astype(np.float64)
+        weights = (1. - np.exp(-1.*weights/0.8)).astype(np.float32)
+        weights[weights < 0.01] = 0
+        return weights
+
     def _box_to_grid(self, box_data):
         """
         Regrids calculated displacements from "box grid" (on which OFC
-        equations are solved) to input data grid.
+        equations are solved) to input data grid.  Any leading dimensions,
+        e.g. stacked u and v displacements, are preserved.
 
         Args:
             box_data (np.ndarray):
@@ -271,9 +325,9 @@ class OpticalFlow(object):
             grid_data (np.ndarray):
                 Displacement on original data grid
         """
-        grid_data = np.repeat(np.repeat(box_data, self.boxsize, axis=0),
-                              self.boxsize, axis=1)
-        grid_data = grid_data[:self.shape[0],
+        grid_data = np.repeat(np.repeat(box_data, self.boxsize, axis=-2),
+                              self.boxsize, axis=-1)
+        grid_data = grid_data[..., :self.shape[0],
                               :self.shape[1]].astype(np.float32)
         return grid_data
 
@@ -317,7 +371,10 @@ class OpticalFlow(object):
     def smooth(self, field, radius, method='box'):
         """
         Smoothing method using a square ('box') or circular kernel.  Kernel
-        smoothing with a radius of 1 has no effect.
+        smoothing with a radius of 1 has no effect.  The kernel is the outer
+        product of two 1D kernels, so is applied as a 1D convolution along
+        each spatial axis in turn.  Smoothing is applied over the last two
+        dimensions only, so stacked fields are smoothed independently.
 
         Args:
             field (np.ndarray):
@@ -332,17 +389,22 @@ class OpticalFlow(object):
                 Smoothed data on input-shaped grid
         """
         if method == 'kernel':
-            kernel = self.makekernel(radius)
-            smoothed_field = scipy.signal.convolve2d(
-                field, kernel, mode='same', boundary="symm")
+            kernel_1d = 1 - np.abs(np.linspace(-1, 1, radius*2+1))
+            kernel_1d /= kernel_1d.sum()
+            smoothed_field = field.astype(np.float64)
+            for axis in [-2, -1]:
+                smoothed_field = scipy.ndimage.convolve1d(
+                    smoothed_field, kernel_1d, axis=axis, mode='reflect')
         elif method == 'box':
+            size = [1]*(field.ndim-2) + [radius*2+1]*2
             smoothed_field = scipy.ndimage.filters.uniform_filter(
-                field, size=radius*2+1, mode='nearest')
+                field, size=size, mode='nearest')
         # Ensure the dtype does not change.
         smoothed_field = smoothed_field.astype(field.dtype)
         return smoothed_field
 
-    def _smart_smooth(self, vel_point, vel_iter, weights):
+    def _smart_smooth(self, vel_point, vel_iter, weights,
+                      neighbour_weights=None):
         """
         Performs a single iteration of "smart smoothing" over a point and its
         neighbours as implemented in STEPS.  This smoothing (through the
@@ -350,13 +412,21 @@ class OpticalFlow(object):
         identically zero, as these are assumed to occur only where there is no
         data structure from which to calculate displacements.
 
+        Several displacement fields, e.g. u and v, can be smoothed together
+        by stacking them along a leading dimension of vel_point and vel_iter.
+
         Args:
             vel_point (np.ndarray):
                 Original unsmoothed data
             vel_iter (np.ndarray):
                 Latest iteration of smart-smoothed displacement
             weights (np.ndarray):
-                Weight of each grid point for averaging
+                2D weight of each grid point for averaging
+
+        Keyword Args:
+            neighbour_weights (np.ndarray or None):
+                Kernel-smoothed weights, which do not change between
+                iterations. If None, these are calculated from the weights.
 
         Returns:
             vel (np.ndarray):
@@ -366,11 +436,16 @@ class OpticalFlow(object):
         neighbour_kernel = (np.array([[0.5, 1, 0.5],
                                       [1.0, 0, 1.0],
                                       [0.5, 1, 0.5]])/6.).astype(np.float32)
-
-        # smooth input data and weights fields
+        if neighbour_weights is None:
+            neighbour_weights = scipy.ndimage.convolve(weights,
+                                                       neighbour_kernel)
+        # smooth each stacked field over the spatial dimensions only
+        neighbour_kernel = neighbour_kernel.reshape(
+            (1,)*(vel_iter.ndim-2) + neighbour_kernel.shape)
+
+        # smooth input data fields
         vel_neighbour = scipy.ndimage.convolve(weights*vel_iter,
                                                neighbour_kernel)
-        neighbour_weights = scipy.ndimage.convolve(weights, neighbour_kernel)
 
         # initialise output data from latest iteration
         vel = scipy.ndimage.convolve(vel_iter, neighbour_kernel)
@@ -382,7 +457,8 @@ class OpticalFlow(object):
 
         # where neighbouring points have weight, set up a "background" of
         # weighted average neighbouring values
-        vel[nmask] = vel_neighbour[nmask] / neighbour_weights[nmask]
+        vel[..., nmask] = (vel_neighbour[..., nmask] /
+                           neighbour_weights[nmask])
 
         # where a point has weight, calculate a weighted sum of the original
         # (uniterated) point value and its smoothed neighbours
@@ -390,8 +466,9 @@ class OpticalFlow(object):
         pweight = self.point_weight * weights
         norm = nweight * neighbour_weights + pweight
 
-        vel[pmask] = (vel_neighbour[pmask] * nweight +
-                      vel_point[pmask] * pweight[pmask]) / norm[pmask]
+        vel[..., pmask] = (
+            (vel_neighbour[..., pmask] * nweight +
+             vel_point[..., pmask] * pweight[pmask]) / norm[pmask])
         return vel
 
     def _smooth_advection_fields(self, box_data, weights):
@@ -405,7 +482,9 @@ class OpticalFlow(object):
 
         Args:
             box_data (np.ndarray):
-                Displacements on box grid (modified by this function)
+                Displacements on box grid (modified by this function).  The
+                u and v displacements can be smoothed together by stacking
+                them along a leading dimension.
             weights (np.ndarray):
                 Weights for smart smoothing
 
@@ -419,10 +498,16 @@ class OpticalFlow(object):
             techniques. Journal of Hydrology, 288, 74-91.
         """
         v_orig = np.copy(box_data)
+        neighbour_kernel = (np.array([[0.5, 1, 0.5],
+                                      [1.0, 0, 1.0],
+                                      [0.5, 1, 0.5]])/6.).astype(np.float32)
+        neighbour_weights = scipy.ndimage.convolve(weights, neighbour_kernel)
 
         # iteratively smooth umat and vmat
         for _ in range(self.iterations):
-            box_data = self._smart_smooth(v_orig, box_data, weights)
+            box_data = self._smart_smooth(
+                v_orig, box_data, weights,
+                neighbour_weights=neighbour_weights)
 
         # reshape smoothed box velocity arrays to match input data grid
         grid_data = self._box_to_grid(box_data)
@@ -464,6 +549,46 @@ class OpticalFlow(object):
             velocity = -m_inverted.dot(scale)[:, 0]
         return velocity
 
+    @staticmethod
+    def solve_for_uv_boxes(sum_xx, sum_xy, sum_yy, sum_xt, sum_yt):
+        """
+        Solve the 2x2 systems of linear simultaneous equations for u and v
+        (equation 19 in STEPS document) for every box at once, in closed
+        form.  This gives the same result as solve_for_uv, which is passed
+        the individual derivatives rather than their sums over each box.
+        Where the system is singular, the displacements are 0.
+
+        Args:
+            sum_xx (np.ndarray):
+                Sum of d/dx * d/dx over each box
+            sum_xy (np.ndarray):
+                Sum of d/dx * d/dy over each box
+            sum_yy (np.ndarray):
+                Sum of d/dy * d/dy over each box
+            sum_xt (np.ndarray):
+                Sum of d/dx * d/dt over each box
+            sum_yt (np.ndarray):
+                Sum of d/dy * d/dt over each box
+
+        Returns:
+            (tuple) : tuple containing:
+                **umat** (np.ndarray):
+                    Displacements in the x-direction for each box
+                **vmat** (np.ndarray):
+                    Displacements in the y-direction for each box
+        """
+        determinant = sum_xx*sum_yy - sum_xy*sum_xy
+        invertible = determinant != 0
+        umat = np.zeros(determinant.shape, dtype=np.float64)
+        vmat = np.zeros(determinant.shape, dtype=np.float64)
+        umat[invertible] = -(
+            sum_yy[invertible]*sum_xt[invertible] -
+            sum_xy[invertible]*sum_yt[invertible]) / determinant[invertible]
+        vmat[invertible] = -(
+            sum_xx[invertible]*sum_yt[invertible] -
+            sum_xy[invertible]*sum_xt[invertible]) / determinant[invertible]
+        return umat, vmat
+
     @staticmethod
     def extreme_value_check(umat, vmat, weights):
         """
@@ -506,43 +631,30 @@ class OpticalFlow(object):
                     2D array of displacements in the y-direction
         """
 
-        # (a) Generate lists of subboxes over which velocity is constant
-        dx_boxed, box_weights = self._make_subboxes(partial_dx)
-        dy_boxed, _ = self._make_subboxes(partial_dy)
-        dt_boxed, _ = self._make_subboxes(partial_dt)
-
-        # (b) Solve optical flow displacement calculation on each subbox
-        velocity = ([], [])
-        for deriv_x, deriv_y, deriv_t in zip(dx_boxed, dy_boxed, dt_boxed):
-
-            # Flatten arrays to create the system of linear simultaneous
-            # equations to solve for this subbox
-            deriv_x = deriv_x.flatten()
-            deriv_y = deriv_y.flatten()
-            deriv_t = deriv_t.flatten()
-            # deriv_xy must be float64 in order to work OK.
-            deriv_xy = (
-                np.array([deriv_x, deriv_y], dtype=np.float64)).transpose()
-
-            # Solve equations for u and v through matrix inversion
-            u, v = self.solve_for_uv(deriv_xy, deriv_t)
-            velocity[0].append(u)
-            velocity[1].append(v)
-
-        # (c) Reshape displacement arrays to match array of subbox points
-        newshape = [int((self.shape[0]-1)/self.boxsize) + 1,
-                    int((self.shape[1]-1)/self.boxsize) + 1]
-        umat = np.array(velocity[0], dtype=np.float32).reshape(newshape)
-        vmat = np.array(velocity[1], dtype=np.float32).reshape(newshape)
-        weights = box_weights.reshape(newshape)
-
-        # (d) Check for extreme advection displacements (over a significant
+        # (a) Sum the products of the partial derivatives over each of the
+        #     subboxes over which velocity is constant.  The sums must be
+        #     float64 in order to work OK.
+        partial_dx = partial_dx.astype(np.float64)
+        partial_dy = partial_dy.astype(np.float64)
+        sums = [self._box_sums(product) for product in (
+            partial_dx*partial_dx, partial_dx*partial_dy,
+            partial_dy*partial_dy, partial_dx*partial_dt,
+            partial_dy*partial_dt)]
+        weights = self._box_weights()
+
+        # (b) Solve optical flow displacement calculation on every subbox
+        umat, vmat = self.solve_for_uv_boxes(*sums)
+        umat = umat.astype(np.float32)
+        vmat = vmat.astype(np.float32)
+
+        # (c) Check for extreme advection displacements (over a significant
         #     proportion of the domain size) and set to zero
         self.extreme_value_check(umat, vmat, weights)
 
-        # (e) smooth and reshape displacement arrays to match input data grid
-        umat = self._smooth_advection_fields(umat, weights)
-        vmat = self._smooth_advection_fields(vmat, weights)
+        # (d) smooth u and v together and reshape displacement arrays to
+        #     match input data grid
+        umat, vmat = self._smooth_advection_fields(
+            np.stack([umat, vmat]), weights)
 
         return umat, vmat
 
@@ -301,37 +301,50 @@ class OrographicEnhancement(object):
             numerator[~mask], self.temperature.data[~mask])
         return np.where(point_orogenh > 0, point_orogenh, 0)
 
-    def _get_point_distances(self, wind_speed, max_sin_cos):
+    def _get_max_roi(self, max_sin_cos):
         """
-        Generate 3d array of distances to upstream components
+        Calculate the maximum upstream range of influence at each grid point,
+        which is the number of upstream source points contributing to it.
 
         Args:
-            wind_speed (np.ndarray):
-                2D array of wind speeds
-            max_roi (np.ndarray):
-                2D array of maximum ranges of influence in grid squares
             max_sin_cos (np.ndarray):
                 2D array containing the larger of sin(wind_direction) or
                 cos(wind_direction) with respect to grid north
 
         Returns:
-            distance (np.ndarray):
-                3D array of source-to-destination distances in grid points,
-                with np.nan filled in for out of range values
+            max_roi (np.ndarray):
+                2D integer array of maximum ranges of influence in grid
+                squares
         """
-        # calculate maximum upstream radius of influence at each grid cell
         upstream_roi = (
             self.upstream_range_of_influence_km / self.grid_spacing_km)
-        max_roi = (upstream_roi * max_sin_cos).astype(int)
+        return (upstream_roi * max_sin_cos).astype(int)
 
-        length = np.amax(max_roi)
-        shape = (length, wind_speed.shape[0], wind_speed.shape[1])
-        distance = np.full(shape, np.nan, dtype=np.float32)
-        for y in range(distance.shape[1]):
-            for x in range(distance.shape[2]):
-                distance[:max_roi[y, x], y, x] = (
-                    np.arange(max_roi[y, x]) / max_sin_cos[y, x])
+    @staticmethod
+    def _get_point_distance_layer(step, max_roi, max_sin_cos):
+        """
+        Generate the distances to the upstream components at one step
+        upstream. Points for which the step is beyond the maximum range of
+        influence are set to np.nan.
 
+        Args:
+            step (int):
+                Number of the upstream step
+            max_roi (np.ndarray):
+                2D array of maximum ranges of influence in grid squares
+            max_sin_cos (np.ndarray):
+                2D array containing the larger of sin(wind_direction) or
+                cos(wind_direction) with respect to grid north
+
+        Returns:
+            distance (np.ndarray):
+                3D array of shape (1, y, x) of source-to-destination
+                distances in grid points, with np.nan filled in for out of
+                range values
+        """
+        distance = np.full((1,) + max_roi.shape, np.nan, dtype=np.float32)
+        in_range = step < max_roi
+        distance[0][in_range] = step / max_sin_cos[in_range]
         return distance
 
     @staticmethod
@@ -367,13 +380,8 @@ class OrographicEnhancement(object):
                                                 cos_wind_dir)).astype(int)
 
         # force coordinates into bounds to avoid truncation at domain edges
-        x_source = np.where(x_source < 0, 0, x_source)
-        x_source = np.where(x_source > wind_speed.shape[1]-1,
-                            wind_speed.shape[1]-1, x_source)
-
-        y_source = np.where(y_source < 0, 0, y_source)
-        y_source = np.where(y_source > wind_speed.shape[0]-1,
-                            wind_speed.shape[0]-1, y_source)
+        np.clip(x_source, 0, wind_speed.shape[1]-1, out=x_source)
+        np.clip(y_source, 0, wind_speed.shape[0]-1, out=y_source)
 
         return x_source, y_source
 
@@ -405,10 +413,8 @@ class OrographicEnhancement(object):
                 **sum_of_weights** (np.ndarray):
                     2D array containing weights for normalisation
         """
-        source_values = np.fromiter(
-            (point_orogenh[y, x] for (x, y) in zip(x_source.flatten(),
-                                                   y_source.flatten())),
-            np.float32, count=x_source.size).reshape(x_source.shape)
+        source_values = point_orogenh[y_source, x_source].astype(
+            np.float32, copy=False)
 
         # set standard deviation for Gaussian weighting function in grid
         # squares
@@ -453,16 +459,21 @@ class OrographicEnhancement(object):
         max_sin_cos = np.where(abs(sin_wind_dir) > abs(cos_wind_dir),
                                abs(sin_wind_dir), abs(cos_wind_dir))
 
-        # generate 3D array of distances to source points
-        distance = self._get_point_distances(wind_speed, max_sin_cos)
-
-        # calculate positions of source points
-        x_source, y_source = self._locate_source_points(
-            wind_speed, distance, sin_wind_dir, cos_wind_dir)
-
-        # compute weighted enhancements summed over all source points
-        orogenh, sum_of_weights = self._compute_weighted_values(
-            point_orogenh, x_source, y_source, distance, wind_speed)
+        # compute weighted enhancements summed over all source points,
+        # streaming over the upstream steps so that only one layer of
+        # distances and source points is held at a time
+        max_roi = self._get_max_roi(max_sin_cos)
+        orogenh = np.zeros(wind_speed.shape, dtype=np.float32)
+        sum_of_weights = np.zeros(wind_speed.shape, dtype=np.float32)
+        for step in range(np.amax(max_roi)):
+            distance = self._get_point_distance_layer(
+                step, max_roi, max_sin_cos)
+            x_source, y_source = self._locate_source_points(
+                wind_speed, distance, sin_wind_dir, cos_wind_dir)
+            step_orogenh, step_weights = self._compute_weighted_values(
+                point_orogenh, x_source, y_source, distance, wind_speed)
+            orogenh += step_orogenh
+            sum_of_weights += step_weights
 
         # normalise by weights and scale by efficiency factor
         orogenh[~mask] = self.efficiency_factor * np.divide(
@@ -283,13 +283,32 @@ class WetBulbTemperature(object):
             UserWarning : If any of the values in cube.data are outside the
                           bounds set by the low and high variables.
         """
-        if cube.data.max() > high or cube.data.min() < low:
+        WetBulbTemperature._check_range_data(cube.data, low, high)
+
+    @staticmethod
+    def _check_range_data(data, low, high):
+        """Raise the check_range warning for a plain array of temperatures.
+
+        Args:
+            data (numpy.ndarray):
+                An array of temperatures (K).
+            low (int or float):
+                Lowest allowable temperature for check
+            high (int or float):
+                Highest allowable temperature for check
+
+        Raises:
+            UserWarning : If any of the values in data are outside the
+                          bounds set by the low and high variables.
+        """
+        if data.size == 0:
+            return
+        if data.max() > high or data.min() < low:
             emsg = ("Wet bulb temperatures are being calculated for conditions"
                     " beyond the valid range of the saturated vapour pressure"
                     " lookup table (< {}K or > {}K). Input cube has\n"
                     "Lowest temperature = {}\nHighest temperature = {}")
-            warnings.warn(emsg.format(low, high, cube.data.min(),
-                                      cube.data.max()))
+            warnings.warn(emsg.format(low, high, data.min(), data.max()))
 
     def lookup_svp(self, temperature):
         """
@@ -305,25 +324,42 @@ class WetBulbTemperature(object):
             svp (iris.cube.Cube):
                 A cube of saturated vapour pressures (Pa).
         """
+        svps = self._lookup_svp_data(temperature.data)
+        svp = temperature.copy(data=svps)
+        svp.units = Unit('Pa')
+        svp.rename("saturated_vapour_pressure")
+        return svp
+
+    def _lookup_svp_data(self, temperatures):
+        """
+        Look up saturated vapour pressures for a plain array of temperatures.
+        This is the array equivalent of lookup_svp.
+
+        Args:
+            temperatures (numpy.ndarray):
+                An array of air temperatures (K).
+        Returns:
+            svps (numpy.ndarray):
+                An array of saturated vapour pressures (Pa).
+        """
         T_min = svp_table.T_MIN
         T_max = svp_table.T_MAX
         delta_T = svp_table.T_INCREMENT
-        self.check_range(temperature, T_min, T_max)
-        temperatures = temperature.data
+        self._check_range_data(temperatures, T_min, T_max)
         T_clipped = np.clip(temperatures, T_min, T_max)
 
         # Note the indexing below differs by -1 compared with the UM due to
-        # Python vs. Fortran indexing.
-        table_position = (T_clipped - T_min + delta_T)/delta_T - 1.
-        table_index = table_position.astype(int)
+        # Python vs. Fortran indexing. The table position is calculated in
+        # float64 as float32 rounding can place T_MAX beyond the last
+        # interval of the table.
+        table_position = (
+            (T_clipped.astype(np.float64) - T_min + delta_T)/delta_T - 1.)
+        table_index = np.clip(table_position.astype(int), 0,
+                              len(svp_table.DATA) - 2)
         interpolation_factor = table_position - table_index
         svps = ((1.0 - interpolation_factor) * svp_table.DATA[table_index] +
                 interpolation_factor * svp_table.DATA[table_index + 1])
-
-        svp = temperature.copy(data=svps)
-        svp.units = Unit('Pa')
-        svp.rename("saturated_vapour_pressure")
-        return svp
+        return svps
 
     @staticmethod
     def pressure_correct_svp(svp, temperature, pressure):
@@ -392,79 +428,192 @@ class WetBulbTemperature(object):
         mixing_ratio.units = Unit("1")
         return mixing_ratio
 
-    def calculate_wet_bulb_temperature(self, temperature, relative_humidity,
-                                       pressure):
-        """
-        Perform the calculation of wet bulb temperatures. A Newton iterator is
-        used to minimise the gradient of enthalpy against temperature.
+    def _calculate_mixing_ratio_data(self, temperature, pressure):
+        """Compute the mixing ratio from plain arrays of temperature and
+        pressure. This is the array equivalent of _calculate_mixing_ratio and
+        returns values in the precision of the temperature array.
 
         Args:
-            temperature (iris.cube.Cube):
-                Cube of air temperatures (K).
-            relative_humidity (iris.cube.Cube):
-                Cube of relative humidities (%, converted to fractional).
-            pressure (iris.cube.Cube):
-                Cube of air pressures (Pa).
+            temperature (numpy.ndarray):
+                Array of air temperatures (K).
+            pressure (numpy.ndarray):
+                Array of air pressures (Pa).
 
         Returns:
-            wbt (iris.cube.Cube):
-                Cube of wet bulb temperature (K).
+            mixing_ratio (numpy.ndarray):
+                Array of mixing ratios.
+        """
+        svp = self._lookup_svp_data(temperature).astype(
+            temperature.dtype, copy=False)
+        svp *= (1. + 1.0E-8 * pressure *
+                (4.5 + 6.0E-4 * (temperature + cc.ABSOLUTE_ZERO) ** 2))
+
+        mixing_ratio = np.maximum(svp, pressure)
+        mixing_ratio -= (1. - cc.EARTH_REPSILON) * svp
+        np.divide(cc.EARTH_REPSILON * svp, mixing_ratio, out=mixing_ratio)
+        return mixing_ratio
 
+    def _solve_wet_bulb_temperature(self, temperature, relative_humidity,
+                                    pressure):
         """
-        precision = np.full(temperature.data.shape, self.precision)
+        Newton iterate a one dimensional block of points to find wet bulb
+        temperatures. Points are dropped from the calculation as soon as they
+        converge, so each iteration works only on a compacted set of those
+        points that are yet to converge.
 
-        # Set units of input diagnostics.
-        relative_humidity.convert_units(1)
-        pressure.convert_units('Pa')
-        temperature.convert_units('K')
+        Args:
+            temperature (numpy.ndarray):
+                1D array of air temperatures (K).
+            relative_humidity (numpy.ndarray):
+                1D array of fractional relative humidities.
+            pressure (numpy.ndarray):
+                1D array of air pressures (Pa).
 
-        # Calculate mixing ratios.
-        saturation_mixing_ratio = self._calculate_mixing_ratio(temperature,
-                                                               pressure)
+        Returns:
+            wbt (numpy.ndarray):
+                1D array of wet bulb temperatures (K).
+        """
+        saturation_mixing_ratio = self._calculate_mixing_ratio_data(
+            temperature, pressure)
         mixing_ratio = relative_humidity * saturation_mixing_ratio
-        # Calculate specific and latent heats.
-        specific_heat = Utilities.specific_heat_of_moist_air(mixing_ratio)
-        latent_heat = Utilities.latent_heat_of_condensation(temperature)
+        specific_heat = ((1. - mixing_ratio) * cc.CP_DRY_AIR +
+                         mixing_ratio * cc.CP_WATER_VAPOUR)
+        latent_heat = (-1. * cc.LATENT_HEAT_T_DEPENDENCE *
+                       (temperature + cc.ABSOLUTE_ZERO) +
+                       cc.LH_CONDENSATION_WATER)
+        g_tw = latent_heat * mixing_ratio + specific_heat * temperature
 
-        # Calculate enthalpy.
-        g_tw = Utilities.calculate_enthalpy(mixing_ratio, specific_heat,
-                                            latent_heat, temperature)
         # Use air temperature as a first guess for wet bulb temperature.
         wbt = temperature.copy()
-        wbt.rename('wet_bulb_temperature')
-        delta_wbt = temperature.copy(data=(10. * precision))
-        delta_wbt_history = temperature.copy(data=(5. * precision))
+        active = np.arange(wbt.size)
+        delta_wbt_history = np.full(wbt.shape, 5. * self.precision,
+                                    dtype=wbt.dtype)
         max_iterations = 20
         iteration = 0
 
-        # Iterate to find the wet bulb temperature
-        while (np.abs(delta_wbt.data) > precision).any():
-            g_tw_new = Utilities.calculate_enthalpy(
-                saturation_mixing_ratio, specific_heat, latent_heat, wbt)
-            dg_dt = Utilities.calculate_d_enthalpy_dt(
-                saturation_mixing_ratio, specific_heat, latent_heat, wbt)
-            delta_wbt = (g_tw - g_tw_new) / dg_dt
+        while active.size > 0:
+            wbt_active = wbt[active]
+            specific_heat_active = specific_heat[active]
+            latent_heat_active = latent_heat[active]
+            g_tw_new = (latent_heat_active * saturation_mixing_ratio +
+                        specific_heat_active * wbt_active)
+            dg_dt = (saturation_mixing_ratio * latent_heat_active ** 2 /
+                     (cc.R_WATER_VAPOUR * wbt_active ** 2) +
+                     specific_heat_active)
+            delta_wbt = g_tw[active]
+            delta_wbt -= g_tw_new
+            delta_wbt /= dg_dt
 
             # Only change values at those points yet to converge to avoid
-            # oscillating solutions (the now fixed points are still calculated
-            # unfortunately).
-            unfinished = np.where(np.abs(delta_wbt.data) > precision)
-            wbt.data[unfinished] = (wbt.data[unfinished] +
-                                    delta_wbt.data[unfinished])
+            # oscillating solutions.
+            unfinished = np.abs(delta_wbt) > self.precision
+            wbt[active[unfinished]] += delta_wbt[unfinished]
 
             # If the errors are identical between two iterations, stop.
-            if (np.array_equal(delta_wbt.data, delta_wbt_history.data) or
+            if (np.array_equal(delta_wbt, delta_wbt_history) or
                     iteration > max_iterations):
                 warnings.warn('No further refinement occuring; breaking out '
                               'of Newton iterator and returning result.')
                 break
-            delta_wbt_history = delta_wbt
+            delta_wbt_history = delta_wbt[unfinished]
+            active = active[unfinished]
             iteration += 1
 
-            # Recalculate the saturation mixing ratio
-            saturation_mixing_ratio = self._calculate_mixing_ratio(
-                wbt, pressure)
+            # Recalculate the saturation mixing ratio for unconverged points.
+            saturation_mixing_ratio = self._calculate_mixing_ratio_data(
+                wbt[active], pressure[active])
+
+        return wbt
+
+    def calculate_wet_bulb_temperature_data(
+            self, temperature, relative_humidity, pressure,
+            chunk_size=1000000):
+        """
+        Calculate wet bulb temperatures from plain arrays. The arrays may have
+        any shape, e.g. (realization, height, y, x), and are processed in
+        chunks of chunk_size points to limit the memory used by the Newton
+        iterator. Calculations are performed in the precision of the
+        temperature array, so float32 inputs are solved in float32.
+
+        Args:
+            temperature (numpy.ndarray):
+                Array of air temperatures (K).
+            relative_humidity (numpy.ndarray):
+                Array of fractional relative humidities, broadcastable to the
+                shape of the temperature array.
+            pressure (numpy.ndarray):
+                Array of air pressures (Pa), broadcastable to the shape of the
+                temperature array.
+
+        Keyword Args:
+            chunk_size (int):
+                The maximum number of points passed to the Newton iterator at
+                once.
+
+        Returns:
+            wbt (numpy.ndarray):
+                Array of wet bulb temperatures (K) with the shape of the
+                temperature array.
+        """
+        if not np.issubdtype(np.asarray(temperature).dtype, np.floating):
+            temperature = np.asarray(temperature, dtype=np.float32)
+        dtype = temperature.dtype
+        shape = temperature.shape
+        mask = np.ma.getmaskarray(temperature)
+        mask = (mask | np.ma.getmaskarray(relative_humidity) |
+                np.ma.getmaskarray(pressure))
+
+        temperature = np.ma.getdata(temperature).astype(
+            dtype, copy=False).reshape(-1)
+        relative_humidity = np.broadcast_to(
+            np.ma.getdata(relative_humidity).astype(dtype, copy=False),
+            shape).reshape(-1)
+        pressure = np.broadcast_to(
+            np.ma.getdata(pressure).astype(dtype, copy=False),
+            shape).reshape(-1)
+
+        # Only unmasked points are solved, so that fill values under the mask
+        # are neither range checked nor iterated upon. Masked points retain
+        # their input temperature.
+        wbt = temperature.copy()
+        valid = np.flatnonzero(~mask)
+        for start in range(0, valid.size, chunk_size):
+            chunk = valid[start:start + chunk_size]
+            wbt[chunk] = self._solve_wet_bulb_temperature(
+                temperature[chunk], relative_humidity[chunk], pressure[chunk])
+
+        wbt = wbt.reshape(shape)
+        if mask.any():
+            wbt = np.ma.masked_where(mask, wbt)
+        return wbt
+
+    def calculate_wet_bulb_temperature(self, temperature, relative_humidity,
+                                       pressure):
+        """
+        Perform the calculation of wet bulb temperatures. A Newton iterator is
+        used to minimise the gradient of enthalpy against temperature.
+
+        Args:
+            temperature (iris.cube.Cube):
+                Cube of air temperatures (K).
+            relative_humidity (iris.cube.Cube):
+                Cube of relative humidities (%, converted to fractional).
+            pressure (iris.cube.Cube):
+                Cube of air pressures (Pa).
+
+        Returns:
+            wbt (iris.cube.Cube):
+                Cube of wet bulb temperature (K).
 
+        """
+        # Set units of input diagnostics.
+        relative_humidity.convert_units(1)
+        pressure.convert_units('Pa')
+        temperature.convert_units('K')
+
+        wbt = temperature.copy(data=self.calculate_wet_bulb_temperature_data(
+            temperature.data, relative_humidity.data, pressure.data))
+        wbt.rename('wet_bulb_temperature')
         return wbt
 
     def process(self, temperature, relative_humidity, pressure):
@@ -31,6 +31,9 @@
 
 """Neighbour finding for the Improver site specific process chain."""
 
+import hashlib
+import os
+import tempfile
 import warnings
 import numpy as np
 from scipy.spatial import cKDTree
@@ -65,7 +68,8 @@ class NeighbourSelection:
                  search_radius=1.0E4,
                  site_coordinate_system=ccrs.PlateCarree(),
                  site_x_coordinate='longitude', site_y_coordinate='latitude',
-                 grid_metadata_identifier='mosg', node_limit=36):
+                 grid_metadata_identifier='mosg', node_limit=36,
+                 neighbour_cache_directory=None):
         """
         Args:
             land_constraint (bool):
@@ -97,6 +101,14 @@ class NeighbourSelection:
                 The upper limit for the number of nearest neighbours to return
                 when querying the tree for a selection of neighbours from which
                 one matching the minimum_dz constraint will be picked.
+            neighbour_cache_directory (str or None):
+                A directory in which the KDTree nodes for each grid are
+                stored, keyed by a hash of the grid coordinates and the
+                included (e.g. land) points. Stored nodes are memory-mapped
+                and reused by later calls for the same grid, avoiding the
+                cost of recalculating them, e.g. the geocentric transform
+                for global grids. If None, the nodes are calculated on
+                every call.
         """
         self.minimum_dz = minimum_dz
         self.land_constraint = land_constraint
@@ -107,6 +119,7 @@ class NeighbourSelection:
         self.site_altitude = 'altitude'
         self.grid_metadata_identifier = grid_metadata_identifier
         self.node_limit = node_limit
+        self.neighbour_cache_directory = neighbour_cache_directory
         self.global_coordinate_system = False
 
     def __repr__(self):
@@ -289,11 +302,146 @@ class NeighbourSelection:
             coordinate_system, x_coords, y_coords, z_coords)
         return cartesian_nodes
 
+    def _included_points(self, land_mask):
+        """
+        Find the indices of the grid points that are to be included in the
+        KDTree, e.g. only land points if a land constraint is imposed.
+
+        Args:
+            land_mask (iris.cube.Cube):
+                A land mask cube for the model/grid from which grid point
+                neighbours are being selected.
+        Returns:
+            (tuple): tuple containing:
+                x_indices (np.array):
+                    The x indices of the included grid points.
+                y_indices (np.array):
+                    The y indices of the included grid points.
+        """
+        if self.land_constraint:
+            included_points = np.nonzero(land_mask.data)
+        else:
+            included_points = np.where(np.isfinite(land_mask.data.data))
+        return included_points[0], included_points[1]
+
+    def grid_identity(self, land_mask, x_indices, y_indices):
+        """
+        Create a hash that identifies the KDTree nodes for a grid, so that
+        nodes stored in the neighbour cache directory can be matched to the
+        grid for which neighbours are being found. The hash is built from
+        the spatial coordinates and coordinate system of the grid, whether it
+        is treated as global, and the indices of the included grid points.
+
+        Args:
+            land_mask (iris.cube.Cube):
+                A land mask cube for the model/grid from which grid point
+                neighbours are being selected.
+            x_indices (np.array):
+                The x indices of the grid points included in the tree.
+            y_indices (np.array):
+                The y indices of the grid points included in the tree.
+        Returns:
+            str:
+                A hexadecimal hash identifying the grid and included points.
+        """
+        identity = hashlib.sha1()
+        for axis in ['x', 'y']:
+            coord = land_mask.coord(axis=axis)
+            identity.update('{} {}'.format(coord.name(), coord.units).encode())
+            identity.update(
+                np.ascontiguousarray(coord.points, dtype=np.float64).tobytes())
+        identity.update(
+            '{} {}'.format(land_mask.coord_system(),
+                           self.global_coordinate_system).encode())
+        for indices in [x_indices, y_indices]:
+            identity.update(
+                np.ascontiguousarray(indices, dtype=np.int64).tobytes())
+        return identity.hexdigest()
+
+    def _create_nodes(self, land_mask, x_indices, y_indices):
+        """
+        Calculate the coordinates of the KDTree nodes for the included grid
+        points, as described in build_KDTree.
+
+        Args:
+            land_mask (iris.cube.Cube):
+                A land mask cube for the model/grid from which grid point
+                neighbours are being selected.
+            x_indices (np.array):
+                The x indices of the grid points included in the tree.
+            y_indices (np.array):
+                The y indices of the grid points included in the tree.
+        Returns:
+            (tuple): tuple containing:
+                nodes (np.array):
+                    An array of shape (n_nodes, 2), or (n_nodes, 3) in
+                    geocentric cartesian coordinates for a global grid, that
+                    contains the coordinates of each node.
+                index_nodes (np.array):
+                    An array of shape (n_nodes, 2) that contains the x and y
+                    indices that correspond to each node.
+        """
+        x_coords = land_mask.coord(axis='x').points[x_indices]
+        y_coords = land_mask.coord(axis='y').points[y_indices]
+
+        if self.global_coordinate_system:
+            nodes = self.geocentric_cartesian(land_mask, x_coords, y_coords)
+        else:
+            nodes = np.stack((x_coords, y_coords), axis=1)
+
+        index_nodes = np.stack((x_indices, y_indices), axis=1)
+        return nodes, index_nodes
+
+    def _load_or_create_nodes(self, land_mask, x_indices, y_indices):
+        """
+        Load the KDTree nodes for a grid from the neighbour cache directory,
+        memory-mapping the stored arrays. If no nodes are stored for this
+        grid they are calculated and written to the cache directory. Files
+        are written under a temporary name and then moved into place, so
+        that concurrent runs never read a partially written file.
+
+        Args:
+            land_mask (iris.cube.Cube):
+                A land mask cube for the model/grid from which grid point
+                neighbours are being selected.
+            x_indices (np.array):
+                The x indices of the grid points included in the tree.
+            y_indices (np.array):
+                The y indices of the grid points included in the tree.
+        Returns:
+            (tuple): tuple containing:
+                nodes (np.array):
+                    The node coordinates, as returned by _create_nodes.
+                index_nodes (np.array):
+                    The node grid indices, as returned by _create_nodes.
+        """
+        identity = self.grid_identity(land_mask, x_indices, y_indices)
+        filepaths = [
+            os.path.join(self.neighbour_cache_directory,
+                         'neighbour_{}_{}.npy'.format(name, identity))
+            for name in ['nodes', 'index_nodes']]
+
+        if all(os.path.exists(filepath) for filepath in filepaths):
+            return tuple(np.load(filepath, mmap_mode='r')
+                         for filepath in filepaths)
+
+        arrays = self._create_nodes(land_mask, x_indices, y_indices)
+        os.makedirs(self.neighbour_cache_directory, exist_ok=True)
+        for array, filepath in zip(arrays, filepaths):
+            with tempfile.NamedTemporaryFile(
+                    dir=self.neighbour_cache_directory, suffix='.npy',
+                    delete=False) as temporary_file:
+                np.save(temporary_file, array)
+            os.replace(temporary_file.name, filepath)
+        return arrays
+
     def build_KDTree(self, land_mask):
         """
         Build a KDTree for extracting the nearest point or points to a site.
         The tree can be built with a constrained set of grid points, e.g. only
-        land points, if required.
+        land points, if required. If a neighbour cache directory has been
+        set, the tree nodes are reused from any previous call for the same
+        grid.
 
         Args:
             land_mask (iris.cube.Cube):
@@ -310,22 +458,14 @@ class NeighbourSelection:
                     e.g. node=100 -->  x_coord_index=10, y_coord_index=300,
                     index_nodes[100] = [10, 300]
         """
-        if self.land_constraint:
-            included_points = np.nonzero(land_mask.data)
-        else:
-            included_points = np.where(np.isfinite(land_mask.data.data))
+        x_indices, y_indices = self._included_points(land_mask)
 
-        x_indices = included_points[0]
-        y_indices = included_points[1]
-        x_coords = land_mask.coord(axis='x').points[x_indices]
-        y_coords = land_mask.coord(axis='y').points[y_indices]
-
-        if self.global_coordinate_system:
-            nodes = self.geocentric_cartesian(land_mask, x_coords, y_coords)
+        if self.neighbour_cache_directory is None:
+            nodes, index_nodes = self._create_nodes(
+                land_mask, x_indices, y_indices)
         else:
-            nodes = list(zip(x_coords, y_coords))
-
-        index_nodes = np.array(list(zip(x_indices, y_indices)))
+            nodes, index_nodes = self._load_or_create_nodes(
+                land_mask, x_indices, y_indices)
 
         return cKDTree(nodes), index_nodes
 
@@ -397,6 +537,80 @@ class NeighbourSelection:
 
         return grid_point
 
+    def select_minimum_dz_multiple(self, orography, site_altitudes,
+                                   index_nodes, distances, indices):
+        """
+        Select the neighbour with the minimum vertical displacement for all
+        sites at once, as select_minimum_dz does for a single site. The
+        distances and indices are those returned by a single KDTree query for
+        all the sites, with one row per site. Neighbours beyond the search
+        radius are excluded, and of the neighbours with the minimum vertical
+        displacement the nearest is chosen.
+
+        Args:
+            orography (iris.cube.Cube):
+                A cube of orography, used to obtain the grid point altitudes.
+            site_altitudes (np.array):
+                The altitudes of the spot sites, of shape (n_sites,).
+            index_nodes (np.array):
+                An array of shape (n_nodes, 2) that contains the x and y
+                indices that correspond to the selected node,
+            distances (np.array):
+                An array of shape (n_sites, node_limit) that contains the
+                distances from each spot site to each grid point neighbour
+                being considered. The number is np.inf if the neighbour is
+                beyond the search_radius.
+            indices (np.array):
+                An array of shape (n_sites, node_limit) of tree node indices
+                identifying the neighbouring grid points, corresponding to
+                the array of distances.
+        Returns:
+            (tuple): tuple containing:
+                grid_points (np.array):
+                    An array of shape (n_sites, 2) giving the x and y indices
+                    of the chosen grid point neighbour for each site.
+                    Values for sites without a valid neighbour are arbitrary.
+                found (np.array):
+                    A boolean array of shape (n_sites,) that is True for
+                    sites for which a valid neighbour was found.
+        """
+        n_sites = len(site_altitudes)
+        distances = distances.reshape(n_sites, -1)
+        indices = indices.reshape(n_sites, -1)
+
+        # Values beyond the imposed search radius are set to inf,
+        # these need to be excluded.
+        valid = np.isfinite(distances)
+        found = valid.any(axis=1)
+
+        # If the last distance is finite the number of tree nodes may not be
+        # sufficient to fill the search radius, raise a warning.
+        if valid[:, -1].any():
+            msg = ('Limit on number of nearest neighbours to return, {}, may '
+                   'not be sufficiently large to fill search_radius {}'.format(
+                       self.node_limit, self.search_radius))
+            warnings.warn(msg)
+
+        # The tree returns the number of nodes as the index of any missing
+        # neighbour, so these are replaced with a valid index before lookup.
+        candidates = index_nodes[np.where(valid, indices, 0)]
+
+        # Calculate the difference in height between the spot sites and
+        # the grid points, excluding the invalid neighbours.
+        grid_point_altitudes = orography.data[
+            candidates[..., 0], candidates[..., 1]]
+        vertical_displacements = np.ma.masked_where(
+            ~valid, abs(grid_point_altitudes -
+                        site_altitudes.astype(float)[:, np.newaxis]))
+
+        # The tree returns ordered arrays, the first element being the
+        # closest, and argmin returns the first of any tied minima, giving
+        # us the nearest such point.
+        index_of_minimum = np.ma.argmin(vertical_displacements, axis=1)
+        grid_points = candidates[np.arange(n_sites), index_of_minimum]
+
+        return grid_points, found
+
     def process(self, sites, orography, land_mask):
         """
         Using the constraints provided, find the nearest grid point neighbours
@@ -504,17 +718,14 @@ class NeighbourSelection:
                 distances, node_indices = tree.query(
                     [site_coords], distance_upper_bound=self.search_radius,
                     k=self.node_limit)
-                # Loop over the sites and for each choose the returned
-                # neighbour with the minimum vertical displacement.
-                for index, (distance, indices) in enumerate(zip(
-                        distances[0], node_indices[0])):
-                    grid_point = self.select_minimum_dz(
-                        orography, site_altitudes[index], index_nodes,
-                        distance, indices)
-                    # None is returned if the tree query returned no neighbours
-                    # within the search radius.
-                    if grid_point is not None:
-                        nearest_indices[index] = grid_point
+                # For each site choose the returned neighbour with the
+                # minimum vertical displacement, keeping the nearest
+                # neighbour for sites with no neighbours within the search
+                # radius.
+                grid_points, found = self.select_minimum_dz_multiple(
+                    orography, site_altitudes, index_nodes,
+                    distances[0], node_indices[0])
+                nearest_indices[found] = grid_points[found]
 
         # Calculate the vertical displacements between the chosen grid point
         # and the spot site.
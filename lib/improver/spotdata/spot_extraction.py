@@ -133,6 +133,139 @@ class SpotExtraction():
         spot_values = diagnostic_cube.data[tuple(coordinate_cube.data.T)]
         return spot_values
 
+    @staticmethod
+    def grid_point_indices(coordinate_cube, diagnostic_cube):
+        """
+        Calculates the flattened indices of the grid point neighbours within
+        the spatial dimensions of the diagnostic cube, in the native order of
+        those dimensions, so that data can be extracted without reordering
+        the diagnostic cube.
+
+        Args:
+            coordinate_cube (iris.cube.Cube):
+                A cube containing the x and y grid coordinates for the grid
+                point neighbours.
+            diagnostic_cube (iris.cube.Cube):
+                A cube of diagnostic data from which spot data is being taken.
+        Returns:
+            flat_indices (np.array):
+                An array of the indices of the grid point neighbours within
+                the flattened spatial dimensions of the diagnostic cube.
+        """
+        x_dim, = diagnostic_cube.coord_dims(diagnostic_cube.coord(axis='x'))
+        y_dim, = diagnostic_cube.coord_dims(diagnostic_cube.coord(axis='y'))
+        x_indices, y_indices = coordinate_cube.data.T
+        if x_dim < y_dim:
+            return np.ravel_multi_index(
+                (x_indices, y_indices),
+                (diagnostic_cube.shape[x_dim], diagnostic_cube.shape[y_dim]))
+        return np.ravel_multi_index(
+            (y_indices, x_indices),
+            (diagnostic_cube.shape[y_dim], diagnostic_cube.shape[x_dim]))
+
+    @staticmethod
+    def extract_diagnostic_data_multiple(flat_indices, diagnostic_cube):
+        """
+        Extracts diagnostic data at the grid point neighbours for all the
+        leading dimensions of the diagnostic cube (e.g. time, realization,
+        percentile) at once, with a single take from the data flattened over
+        its spatial dimensions. The data are only reordered if the spatial
+        dimensions are not the trailing dimensions of the cube.
+
+        Args:
+            flat_indices (np.array):
+                The indices of the grid point neighbours within the flattened
+                spatial dimensions, as returned by grid_point_indices.
+            diagnostic_cube (iris.cube.Cube):
+                A cube of diagnostic data from which spot data is being taken.
+        Returns:
+            spot_values (np.array):
+                An array of diagnostic values at the grid point neighbours,
+                with the leading dimensions of the diagnostic cube followed by
+                a spot index dimension.
+        """
+        spatial_dims = sorted(
+            diagnostic_cube.coord_dims(diagnostic_cube.coord(axis=axis))[0]
+            for axis in ['x', 'y'])
+        data = diagnostic_cube.data
+        if spatial_dims != [data.ndim - 2, data.ndim - 1]:
+            data = np.moveaxis(data, spatial_dims, [-2, -1])
+        data = data.reshape(data.shape[:-2] + (-1,))
+        return np.take(data, flat_indices, axis=-1)
+
+    @staticmethod
+    def extract_diagnostic_data_lazy(coordinate_cube, diagnostic_cube,
+                                     tile_size=256):
+        """
+        Extracts diagnostic data at the grid point neighbours from a cube
+        with lazy (deferred) data, such as one returned by load_cube, without
+        realising the whole field. The sites are grouped by the spatial chunk
+        of the lazy data in which their grid point neighbour lies, which
+        matches the chunking of the NetCDF file, and further by square tiles
+        so that unchunked files are not read in full. For each group only the
+        region bounding its grid points is realised, for all the leading
+        dimensions, and the values are taken from it. Memory use and reading
+        from file therefore scale with the number of sites rather than with
+        the size of the grid.
+
+        Args:
+            coordinate_cube (iris.cube.Cube):
+                A cube containing the x and y grid coordinates for the grid
+                point neighbours.
+            diagnostic_cube (iris.cube.Cube):
+                A cube of diagnostic data with lazy data from which spot data
+                is being taken.
+
+        Keyword Args:
+            tile_size (int):
+                The maximum extent, in grid points along each spatial axis,
+                of the region realised for each group of sites.
+        Returns:
+            spot_values (np.array or np.ma.MaskedArray):
+                An array of diagnostic values at the grid point neighbours,
+                with the leading dimensions of the diagnostic cube followed by
+                a spot index dimension, as for
+                extract_diagnostic_data_multiple.
+        """
+        x_dim, = diagnostic_cube.coord_dims(diagnostic_cube.coord(axis='x'))
+        y_dim, = diagnostic_cube.coord_dims(diagnostic_cube.coord(axis='y'))
+        leading_dims = [dim for dim in range(diagnostic_cube.ndim)
+                        if dim not in [x_dim, y_dim]]
+
+        # Order the lazy data as (leading dimensions, y, x); this is only a
+        # reordering of the task graph, and reads no data.
+        data = diagnostic_cube.lazy_data()
+        if [x_dim, y_dim] != [data.ndim - 1, data.ndim - 2]:
+            data = data.transpose(leading_dims + [y_dim, x_dim])
+        x_indices, y_indices = coordinate_cube.data.T
+
+        # Find the spatial chunk and tile containing each grid point
+        # neighbour, and group the sites by these.
+        groups = []
+        for chunks, indices in zip(data.chunks[-2:], [y_indices, x_indices]):
+            groups.append(
+                np.searchsorted(np.cumsum(chunks), indices, side='right'))
+            groups.append(indices // tile_size)
+        _, site_groups = np.unique(np.stack(groups, axis=1), axis=0,
+                                   return_inverse=True)
+        site_groups = site_groups.ravel()
+        sites_by_group = np.split(
+            np.argsort(site_groups, kind='stable'),
+            np.cumsum(np.bincount(site_groups))[:-1])
+
+        spot_values = np.ma.empty(data.shape[:-2] + (len(x_indices),),
+                                  dtype=data.dtype)
+        for sites in sites_by_group:
+            y_min, x_min = y_indices[sites].min(), x_indices[sites].min()
+            y_max, x_max = y_indices[sites].max(), x_indices[sites].max()
+            block = data[..., y_min:y_max + 1, x_min:x_max + 1].compute()
+            spot_values[..., sites] = block[
+                ..., y_indices[sites] - y_min, x_indices[sites] - x_min]
+
+        if not np.ma.is_masked(spot_values):
+            spot_values = spot_values.data
+        return spot_values
+
     @staticmethod
     def build_diagnostic_cube(neighbour_cube, diagnostic_cube,
                               spot_values):
@@ -162,6 +295,66 @@ class SpotExtraction():
             neighbour_cube.coord('wmo_id').points)
         return neighbour_cube
 
+    def build_diagnostic_cube_multiple(self, neighbour_cube, diagnostic_cube,
+                                       spot_values):
+        """
+        Builds a spot data cube containing the extracted diagnostic values,
+        with the leading dimensions of the diagnostic cube followed by a spot
+        index dimension. Leading dimensions of length one are made scalar
+        coordinates. This gives the same cube as the slice-by-slice
+        extraction and merging in process.
+
+        Args:
+            neighbour_cube (iris.cube.Cube):
+                This cube is needed as a source for information about the spot
+                sites which needs to be included in the spot diagnostic cube.
+            diagnostic_cube (iris.cube.Cube):
+                The cube provides the name, units, attributes and non-spatial
+                coordinates of the diagnostic that is being processed.
+            spot_values (np.array):
+                An array containing the diagnostic values extracted for the
+                required spot sites, as returned by
+                extract_diagnostic_data_multiple.
+        Returns:
+            spotdata_cube (iris.cube.Cube):
+                A spot data cube containing the extracted diagnostic data.
+        """
+        spatial_dims = [
+            diagnostic_cube.coord_dims(diagnostic_cube.coord(axis=axis))[0]
+            for axis in ['x', 'y']]
+        leading_dims = [dim for dim in range(diagnostic_cube.ndim)
+                        if dim not in spatial_dims]
+
+        # Build the cube with the spot index first, as expected by
+        # build_spotdata_cube, and move it to the end once the leading
+        # coordinates have been added.
+        spotdata_cube = self.build_diagnostic_cube(
+            neighbour_cube, diagnostic_cube, np.moveaxis(spot_values, -1, 0))
+        for coord in diagnostic_cube.dim_coords:
+            dim, = diagnostic_cube.coord_dims(coord)
+            if dim in leading_dims:
+                spotdata_cube.add_dim_coord(
+                    coord.copy(), leading_dims.index(dim) + 1)
+        for coord in diagnostic_cube.aux_coords:
+            coord_dims = diagnostic_cube.coord_dims(coord)
+            if all(dim in leading_dims for dim in coord_dims):
+                spotdata_cube.add_aux_coord(
+                    coord.copy(),
+                    tuple(leading_dims.index(dim) + 1 for dim in coord_dims))
+        spotdata_cube.transpose(list(range(1, spotdata_cube.ndim)) + [0])
+
+        # Leading dimensions of length one become scalar coordinates, as they
+        # do when the slices are merged in process.
+        if 1 in spotdata_cube.shape[:-1]:
+            spotdata_cube = spotdata_cube[tuple(
+                0 if length == 1 else slice(None)
+                for length in spotdata_cube.shape[:-1])]
+
+        # Copy attributes from the diagnostic cube that describe the data's
+        # provenance.
+        spotdata_cube.attributes = diagnostic_cube.attributes
+        return spotdata_cube
+
     def process(self, neighbour_cube, diagnostic_cube):
         """
         Create a spot data cube containing diagnostic data extracted at the
@@ -212,6 +405,61 @@ class SpotExtraction():
 
         return spotdata_cube
 
+    def process_multiple(self, neighbour_cube, diagnostic_cubes):
+        """
+        Create spot data cubes containing diagnostic data extracted at the
+        coordinates provided by the neighbour cube for many diagnostics at
+        once. The grid point neighbours are extracted from the neighbour cube
+        once, and their flattened indices calculated once for each grid
+        shape and dimension order. The data for all the leading dimensions
+        of each diagnostic (e.g. time, realization, percentile) are then
+        extracted with a single take, without reordering the gridded data.
+        Diagnostics with lazy data are not realised in full; only the chunks
+        containing grid point neighbours are read.
+
+        Args:
+            neighbour_cube (iris.cube.Cube):
+                A cube containing information about the spot data sites and
+                their grid point neighbours.
+            diagnostic_cubes (iris.cube.CubeList or list of iris.cube.Cube):
+                Cubes of diagnostic data from which spot data is being taken,
+                all on the grid of the neighbour cube.
+        Returns:
+            spotdata_cubes (iris.cube.CubeList):
+                A cube for each diagnostic, in the order given, containing
+                diagnostic data for each spot site, as well as information
+                about the sites themselves.
+        """
+        # Check we are using a matched neighbour/diagnostic cube set
+        check_grid_match(self.grid_metadata_identifier,
+                         [neighbour_cube] + list(diagnostic_cubes))
+
+        coordinate_cube = self.extract_coordinates(neighbour_cube)
+
+        # Flattened indices keyed by the order and sizes of the spatial
+        # dimensions, which are all that they depend upon.
+        flat_indices = {}
+        spotdata_cubes = iris.cube.CubeList()
+        for diagnostic_cube in diagnostic_cubes:
+            if diagnostic_cube.has_lazy_data():
+                spot_values = self.extract_diagnostic_data_lazy(
+                    coordinate_cube, diagnostic_cube)
+            else:
+                x_coord = diagnostic_cube.coord(axis='x')
+                y_coord = diagnostic_cube.coord(axis='y')
+                key = (diagnostic_cube.coord_dims(x_coord) <
+                       diagnostic_cube.coord_dims(y_coord),
+                       len(x_coord.points), len(y_coord.points))
+                if key not in flat_indices:
+                    flat_indices[key] = self.grid_point_indices(
+                        coordinate_cube, diagnostic_cube)
+                spot_values = self.extract_diagnostic_data_multiple(
+                    flat_indices[key], diagnostic_cube)
+            spotdata_cubes.append(self.build_diagnostic_cube_multiple(
+                neighbour_cube, diagnostic_cube, spot_values))
+
+        return spotdata_cubes
+
 
 def check_grid_match(grid_metadata_identifier, cubes):
     """
@@ -305,6 +305,51 @@ class Test_smooth_initial_weights(IrisTest):
         self.assertArrayAlmostEqual(result.data, expected)
 
 
+class Test_fuzzy_weights_from_masks(IrisTest):
+    """Test the fuzzy_weights_from_masks method"""
+
+    def setUp(self):
+        """Set up a stack of masks, including repeated masks, a mask with
+        no masked points and a fully masked slice."""
+        masks = np.zeros((6, 7, 7), dtype=bool)
+        masks[0, 3, 3] = True
+        masks[1, 0, 0] = True
+        masks[2, 3, 3] = True
+        masks[4] = True
+        masks[5, 2:4, 3:5] = True
+        self.masks = masks
+
+    def test_matches_single_slices(self):
+        """Test that the fuzzy weights for the stack match those calculated
+        for each slice individually, with no influence between slices."""
+        plugin = SpatiallyVaryingWeightsFromMask(fuzzy_length=3)
+        result = plugin.fuzzy_weights_from_masks(self.masks)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertEqual(result.shape, (6, 7, 7))
+        for mask, weights in zip(self.masks, result):
+            expected = plugin.fuzzy_weights_from_masks(mask[np.newaxis])[0]
+            self.assertArrayAlmostEqual(weights, expected)
+        self.assertArrayEqual(result[0], result[2])
+        self.assertArrayEqual(result[3], np.ones((7, 7)))
+        self.assertArrayEqual(result[4], np.zeros((7, 7)))
+
+    def test_values(self):
+        """Test the fuzzy weights around a single masked point."""
+        plugin = SpatiallyVaryingWeightsFromMask(fuzzy_length=2)
+        result = plugin.fuzzy_weights_from_masks(self.masks[:2])
+        expected = np.ones((7, 7), dtype=np.float32)
+        expected[2:5, 2:5] = [[0.70710678, 0.5, 0.70710678],
+                              [0.5, 0., 0.5],
+                              [0.70710678, 0.5, 0.70710678]]
+        self.assertArrayAlmostEqual(result[0], expected)
+
+    def test_no_masked_points(self):
+        """Test that weights of one are returned if nothing is masked."""
+        plugin = SpatiallyVaryingWeightsFromMask(fuzzy_length=2)
+        result = plugin.fuzzy_weights_from_masks(np.zeros((2, 3, 3), bool))
+        self.assertArrayEqual(result, np.ones((2, 3, 3)))
+
+
 class Test_multiply_weights(IrisTest):
     """Test multiply_weights method"""
 
@@ -249,6 +249,31 @@ class Test_aggregate(IrisTest):
         self.assertArrayAlmostEqual(result, expected_result)
         self.assertEqual(result.shape, expected_result_shape)
 
+    def test_chunk_size(self):
+        """Test that blending the points in chunks gives the same result as
+        blending them all together."""
+        weights = np.array([0.6, 0.3, 0.1])
+        weights = generate_matching_weights_array(weights, (4, 6, 3))
+        weights = np.moveaxis(weights, (0, 1, 2), (2, 1, 0))
+
+        percentiles = np.array([0, 20, 40, 60, 80, 100]).astype(np.float32)
+        for chunk_size in [1, 3, None]:
+            result = PercentileBlendingAggregator.aggregate(
+                np.reshape(PERCENTILE_DATA, (6, 3, 2, 2)), 1,
+                percentiles, weights, 0, chunk_size=chunk_size)
+            self.assertArrayAlmostEqual(result, BLENDED_PERCENTILE_DATA)
+
+    def test_invalid_chunk_size(self):
+        """Test that an error is raised for a chunk size less than one."""
+        weights = np.array([0.6, 0.3, 0.1])
+        weights = generate_matching_weights_array(weights, (4, 6, 3))
+        percentiles = np.array([0, 20, 40, 60, 80, 100]).astype(np.float32)
+        msg = "Invalid chunk_size: must be >= 1: 0"
+        with self.assertRaisesRegex(ValueError, msg):
+            PercentileBlendingAggregator.aggregate(
+                np.reshape(PERCENTILE_DATA, (6, 3, 2, 2)), 1,
+                percentiles, weights, 0, chunk_size=0)
+
 
 class Test_blend_percentiles(IrisTest):
     """Test the blend_percentiles method"""
@@ -301,5 +326,95 @@ class Test_blend_percentiles(IrisTest):
         self.assertArrayAlmostEqual(result, expected_result)
 
 
+class Test__interp_columns(IrisTest):
+    """Test the _interp_columns method"""
+    def test_matches_interp(self):
+        """Test that the result for each column matches np.interp, including
+        values outside the range of xp and repeated values in xp."""
+        x_values = np.array([[-1.0, 0.0, 1.0],
+                             [1.5, 2.0, 2.0],
+                             [3.0, 5.0, 4.0]])
+        xp_values = np.array([[0.0, 0.0, 1.0],
+                              [2.0, 2.0, 2.0],
+                              [2.0, 4.0, 3.0]])
+        fp_values = np.array([[10.0], [20.0], [30.0]])
+        result = PercentileBlendingAggregator._interp_columns(
+            x_values, xp_values, fp_values)
+        for column in range(3):
+            expected = np.interp(x_values[:, column], xp_values[:, column],
+                                 fp_values[:, 0])
+            self.assertArrayEqual(result[:, column], expected)
+
+    def test_fp_per_column(self):
+        """Test that fp values may be given for each column."""
+        x_values = np.array([[0.5], [1.5]])
+        xp_values = np.array([[0.0, 0.0], [1.0, 2.0]])
+        fp_values = np.array([[0.0, 10.0], [1.0, 30.0]])
+        expected = np.array([[0.5, 15.0], [1.0, 25.0]])
+        result = PercentileBlendingAggregator._interp_columns(
+            x_values, xp_values, fp_values)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_single_point(self):
+        """Test that the fp value is returned if xp has only one point."""
+        result = PercentileBlendingAggregator._interp_columns(
+            np.array([[0.0], [5.0]]), np.array([[1.0]]), np.array([[3.0]]))
+        self.assertArrayEqual(result, np.array([[3.0], [3.0]]))
+
+
+class Test_blend_percentiles_batched(IrisTest):
+    """Test the blend_percentiles_batched method"""
+    def test_matches_blend_percentiles(self):
+        """Test that the result for each point matches blend_percentiles."""
+        percentiles = np.array([0, 20, 40, 60, 80, 100]).astype(np.float32)
+        perc_values = np.sort(
+            np.reshape(PERCENTILE_DATA, (6, 3, 4)), axis=0).transpose(1, 0, 2)
+        weights = np.broadcast_to(
+            np.array([0.6, 0.3, 0.1])[:, np.newaxis, np.newaxis],
+            perc_values.shape)
+        result = PercentileBlendingAggregator.blend_percentiles_batched(
+            perc_values, percentiles, weights)
+        self.assertEqual(result.shape, (6, 4))
+        self.assertEqual(result.dtype, np.float32)
+        for point in range(4):
+            expected = PercentileBlendingAggregator.blend_percentiles(
+                perc_values[:, :, point], percentiles,
+                weights[:, :, point])
+            self.assertArrayEqual(result[:, point], expected)
+
+    def test_repeated_values(self):
+        """Test that the result matches blend_percentiles where many of the
+        percentile values are the same, as for precipitation."""
+        percentiles = np.array([20.0, 50.0, 80.0])
+        perc_values = np.array([[[0.0, 0.0], [0.0, 1.0], [2.0, 1.0]],
+                                [[0.0, 0.0], [0.0, 0.0], [0.0, 3.0]]])
+        weights = np.full(perc_values.shape, 0.5)
+        result = PercentileBlendingAggregator.blend_percentiles_batched(
+            perc_values, percentiles, weights)
+        for point in range(2):
+            expected = PercentileBlendingAggregator.blend_percentiles(
+                perc_values[:, :, point], percentiles,
+                weights[:, :, point])
+            self.assertArrayEqual(result[:, point], expected)
+
+    def test_non_monotonic_values(self):
+        """Test that points with percentile values that are not monotonic
+        give the same result as blend_percentiles."""
+        percentiles = np.array([0, 20, 40, 60, 80, 100]).astype(np.float32)
+        perc_values = np.reshape(PERCENTILE_DATA, (6, 3, 4)).transpose(
+            1, 0, 2).copy()
+        perc_values[:, :, :2] = np.sort(perc_values[:, :, :2], axis=1)
+        weights = np.broadcast_to(
+            np.array([0.6, 0.3, 0.1])[:, np.newaxis, np.newaxis],
+            perc_values.shape)
+        result = PercentileBlendingAggregator.blend_percentiles_batched(
+            perc_values, percentiles, weights)
+        for point in range(4):
+            expected = PercentileBlendingAggregator.blend_percentiles(
+                perc_values[:, :, point], percentiles,
+                weights[:, :, point])
+            self.assertArrayEqual(result[:, point], expected)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -898,5 +898,152 @@ class Test_process(Test_weighted_blend):
                          expected_forecast_period)
 
 
+class Test_process_streaming(Test_weighted_blend):
+
+    """Test the process_streaming method."""
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_matches_process_weighted_mean(self):
+        """Test that blending one slice at a time gives the same data and
+        metadata as the process method for a weighted mean."""
+        coord = "forecast_reference_time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_mean')
+        expected = plugin.process(self.cube, self.weights1d)
+        result = plugin.process_streaming(self.cube, self.weights1d)
+
+        self.assertEqual(result.data.dtype, np.float32)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(result.metadata, expected.metadata)
+        self.assertEqual(result.coords(), expected.coords())
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_matches_process_weighted_maximum(self):
+        """Test that blending one slice at a time gives the same data and
+        metadata as the process method for a weighted maximum."""
+        coord = "forecast_reference_time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_maximum')
+        expected = plugin.process(self.cube, self.weights1d)
+        result = plugin.process_streaming(self.cube, self.weights1d)
+
+        self.assertEqual(result.data.dtype, np.float32)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(result.metadata, expected.metadata)
+        self.assertEqual(result.coords(), expected.coords())
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_with_spatially_varying_weights(self):
+        """Test that spatially varying weights are applied to each slice for
+        both blending modes."""
+        coord = "forecast_reference_time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_mean')
+        result = plugin.process_streaming(self.cube, self.weights3d)
+        self.assertArrayAlmostEqual(
+            result.data, np.array([[2.7, 2.1], [2.4, 1.8]]))
+
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_maximum')
+        result = plugin.process_streaming(self.cube, self.weights3d)
+        self.assertArrayAlmostEqual(
+            result.data, np.array([[2.4, 1.2], [1.8, 0.8]]))
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_without_weights(self):
+        """Test that equal weights are used if no weights cube is provided."""
+        coord = "forecast_reference_time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_mean')
+        result = plugin.process_streaming(self.cube)
+        self.assertArrayAlmostEqual(result.data, np.full((2, 2), 2.))
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_float64_accumulator(self):
+        """Test that accumulating in float64 still returns float32 data."""
+        coord = "forecast_reference_time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_mean')
+        result = plugin.process_streaming(
+            self.cube, self.weights1d, accumulator_dtype=np.float64)
+        self.assertEqual(result.data.dtype, np.float32)
+        self.assertArrayAlmostEqual(result.data, np.full((2, 2), 1.5))
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_threshold_cube(self):
+        """Test blending a cube with a threshold dimension ahead of the
+        blending dimension."""
+        coord = "forecast_reference_time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_maximum')
+        result = plugin.process_streaming(self.cube_threshold, self.weights1d)
+        expected_result_array = np.ones((2, 2, 2))*0.12
+        expected_result_array[1, :, :] = 0.24
+
+        self.assertArrayAlmostEqual(result.data, expected_result_array)
+        self.assertEqual(result.attributes, self.attributes)
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_masked_data(self):
+        """Test that masked points are excluded from the weighted mean, with
+        the weights renormalised over the unmasked slices, and that points
+        masked in every slice are masked in the result."""
+        mask = np.zeros(self.cube.shape, dtype=bool)
+        mask[1, 0, 0] = True
+        mask[:, 1, 1] = True
+        self.cube.data = np.ma.masked_array(self.cube.data, mask=mask)
+        coord = "forecast_reference_time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_mean')
+        expected = plugin.process(self.cube, self.weights1d)
+        result = plugin.process_streaming(self.cube, self.weights1d)
+        expected_data = np.array([[0.9/0.7, 1.5], [1.5, 0.]])
+        expected_mask = np.array([[False, False], [False, True]])
+
+        self.assertIsInstance(result.data, np.ma.MaskedArray)
+        self.assertArrayAlmostEqual(result.data.data, expected_data)
+        self.assertArrayEqual(result.data.mask, expected_mask)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_lazy_data(self):
+        """Test that a cube with lazy data is blended without realising the
+        data of the input cube."""
+        cube = self.cube.copy(data=self.cube.lazy_data())
+        coord = "forecast_reference_time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_mean')
+        result = plugin.process_streaming(cube, self.weights1d)
+
+        self.assertTrue(cube.has_lazy_data())
+        self.assertArrayAlmostEqual(result.data, np.full((2, 2), 1.5))
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_percentile_data(self):
+        """Test that percentile data are blended by the process method."""
+        perc_cube = percentile_cube()
+        coord = "forecast_reference_time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_mean')
+        result = plugin.process_streaming(perc_cube, self.weights1d)
+        self.assertArrayAlmostEqual(result.data, BLENDED_PERCENTILE_DATA)
+
+    def test_incompatible_weights(self):
+        """Test an error is raised if the weights cube does not have the same
+        number of points along the blending coordinate as the data cube."""
+        coord = "forecast_reference_time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_mean')
+        msg = "Weights cube is not a compatible shape with the data cube."
+        with self.assertRaisesRegex(ValueError, msg):
+            plugin.process_streaming(self.cube, self.weights1d[:2])
+
+    def test_fails_coord_not_in_cube(self):
+        """Test it raises CoordinateNotFoundError if the blending coord is not
+        found in the cube."""
+        plugin = WeightedBlendAcrossWholeDimension('notset', 'weighted_mean')
+        msg = ('Coordinate to be collapsed not found in cube.')
+        with self.assertRaisesRegex(CoordinateNotFoundError, msg):
+            plugin.process_streaming(self.cube)
+
+
 if __name__ == '__main__':
     unittest.main()
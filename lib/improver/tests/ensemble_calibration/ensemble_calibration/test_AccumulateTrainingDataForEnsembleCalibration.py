@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017-2019 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""
+Unit tests for the
+`ensemble_calibration.AccumulateTrainingDataForEnsembleCalibration`
+class.
+
+"""
+import unittest
+
+import iris
+from iris.tests import IrisTest
+import numpy as np
+
+from improver.ensemble_calibration.ensemble_calibration import (
+    AccumulateTrainingDataForEnsembleCalibration as Plugin,
+    EstimateCoefficientsForEnsembleCalibration)
+from improver.tests.ensemble_calibration.ensemble_calibration.\
+    helper_functions import _create_historic_forecasts, _create_truth
+from improver.tests.set_up_test_cubes import set_up_variable_cube
+from improver.utilities.warnings_handler import ManageWarnings
+
+IGNORED_MESSAGES = ["Collapsing a non-contiguous coordinate.",
+                    "The statsmodels can not be imported"]
+WARNING_TYPES = [UserWarning, ImportWarning]
+
+
+def set_up_training_cubes():
+    """Set up historic forecast and truth cubes for testing."""
+    data = (np.tile(np.linspace(-45.0, 45.0, 9), 3).reshape(3, 3, 3) +
+            273.15)
+    data[0] -= 2
+    data[1] += 2
+    data[2] += 4
+    current_forecast = set_up_variable_cube(
+        data.astype(np.float32), units="Kelvin", realizations=[0, 1, 2])
+    historic_forecast = _create_historic_forecasts(current_forecast)
+    truth = _create_truth(current_forecast)
+    return historic_forecast, truth
+
+
+class Test__init__(IrisTest):
+
+    """Test the __init__ method."""
+
+    def test_basic(self):
+        """Test that no training data is initially accumulated."""
+        plugin = Plugin("degreesC", predictor_of_mean_flag="realizations")
+        self.assertEqual(plugin.desired_units, "degreesC")
+        self.assertEqual(plugin.predictor_of_mean_flag, "realizations")
+        self.assertEqual(plugin.number_of_pairs, 0)
+        self.assertIsNone(plugin.spatial_shape)
+
+    def test_invalid_predictor_of_mean_flag(self):
+        """Test that an error is raised for an invalid predictor."""
+        msg = "The requested value for the predictor_of_mean_flag"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin("degreesC", predictor_of_mean_flag="median")
+
+
+class Test__repr__(IrisTest):
+
+    """Test the __repr__ method."""
+
+    def test_basic(self):
+        """Test that the __repr__ returns the expected string."""
+        result = str(Plugin("degreesC"))
+        msg = ("<AccumulateTrainingDataForEnsembleCalibration: "
+               "desired_units: degreesC; predictor_of_mean_flag: mean; "
+               "number_of_pairs: 0>")
+        self.assertEqual(result, msg)
+
+
+class Test_process(IrisTest):
+
+    """Test the process method."""
+
+    def setUp(self):
+        """Set up historic forecast and truth cubes."""
+        self.historic_forecast, self.truth = set_up_training_cubes()
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_mean_predictor(self):
+        """Test that the training data contains the ensemble mean and
+        variance and the truth for each point, in the desired units."""
+        historic_forecast = self.historic_forecast.copy()
+        truth = self.truth.copy()
+        historic_forecast.convert_units("degreesC")
+        truth.convert_units("degreesC")
+        expected_mean = historic_forecast.collapsed(
+            "realization", iris.analysis.MEAN).data.flatten()
+        expected_var = historic_forecast.collapsed(
+            "realization", iris.analysis.VARIANCE).data.flatten()
+
+        plugin = Plugin("degreesC")
+        plugin.process(self.historic_forecast, self.truth)
+        (forecast_predictor_data, truth_data, forecast_var_data,
+         spatial_indices) = plugin.get_training_data()
+
+        self.assertEqual(plugin.number_of_pairs, 1)
+        self.assertEqual(plugin.spatial_shape, (3, 3))
+        self.assertArrayAlmostEqual(forecast_predictor_data, expected_mean)
+        self.assertArrayAlmostEqual(forecast_var_data, expected_var)
+        self.assertArrayAlmostEqual(truth_data, truth.data.flatten())
+        self.assertArrayEqual(spatial_indices, np.tile(np.arange(9), 5))
+        self.assertEqual(forecast_predictor_data.dtype, np.float32)
+        self.assertEqual(self.historic_forecast.units, "K")
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_realizations_predictor(self):
+        """Test that the training data contains the ensemble realizations
+        for each point, if the realizations are the predictors."""
+        plugin = Plugin("degreesC", predictor_of_mean_flag="realizations")
+        plugin.process(self.historic_forecast, self.truth)
+        forecast_predictor_data, truth_data, _, _ = (
+            plugin.get_training_data())
+        self.assertEqual(forecast_predictor_data.shape, (45, 3))
+        self.assertEqual(truth_data.shape, (45,))
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_one_time_at_a_time(self):
+        """Test that accumulating the training data one validity time at a
+        time gives the same training data as processing all the times at
+        once."""
+        expected = Plugin("degreesC")
+        expected.process(self.historic_forecast, self.truth)
+        plugin = Plugin("degreesC")
+        for historic_forecast, truth in zip(
+                self.historic_forecast.slices_over("time"),
+                self.truth.slices_over("time")):
+            plugin.process(historic_forecast, truth)
+        self.assertEqual(plugin.number_of_pairs, 5)
+        for result, expected_result in zip(
+                plugin.get_training_data(), expected.get_training_data()):
+            self.assertArrayEqual(result, expected_result)
+        self.assertArrayAlmostEqual(
+            plugin.compute_initial_guess(), expected.compute_initial_guess())
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_non_finite_points_discarded(self):
+        """Test that points with a non-finite truth are discarded."""
+        self.truth.data[0, 1, 1] = np.nan
+        plugin = Plugin("degreesC")
+        plugin.process(self.historic_forecast, self.truth)
+        _, truth_data, _, spatial_indices = plugin.get_training_data()
+        self.assertEqual(len(truth_data), 44)
+        self.assertTrue(np.all(np.isfinite(truth_data)))
+        self.assertArrayEqual(
+            spatial_indices[:9], [0, 1, 2, 3, 5, 6, 7, 8, 0])
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_mismatched_spatial_shape(self):
+        """Test that an error is raised if the spatial shape of the data
+        changes between pairs."""
+        plugin = Plugin("degreesC")
+        plugin.process(self.historic_forecast, self.truth)
+        msg = "The spatial shape of the truth"
+        with self.assertRaisesRegex(ValueError, msg):
+            plugin.process(
+                self.historic_forecast[..., :2], self.truth[..., :2])
+
+
+class Test_get_training_data(IrisTest):
+
+    """Test the get_training_data method."""
+
+    def test_no_training_data(self):
+        """Test that an error is raised if no data has been accumulated."""
+        msg = "No training data has been accumulated"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin("degreesC").get_training_data()
+
+
+class Test_compute_initial_guess(IrisTest):
+
+    """Test the compute_initial_guess method."""
+
+    def setUp(self):
+        """Set up historic forecast and truth cubes."""
+        self.historic_forecast, self.truth = set_up_training_cubes()
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_mean_predictor(self):
+        """Test that the initial guess matches the linear regression of the
+        truth on the ensemble mean."""
+        historic_forecast = self.historic_forecast.copy()
+        truth = self.truth.copy()
+        historic_forecast.convert_units("degreesC")
+        truth.convert_units("degreesC")
+        expected = (
+            EstimateCoefficientsForEnsembleCalibration(
+                "gaussian", "degreesC").compute_initial_guess(
+                    truth, historic_forecast.collapsed(
+                        "realization", iris.analysis.MEAN),
+                    "mean", True))
+
+        plugin = Plugin("degreesC")
+        plugin.process(self.historic_forecast, self.truth)
+        result = plugin.compute_initial_guess()
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(result, expected, decimal=4)
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_realizations_predictor(self):
+        """Test that the initial guess contains a coefficient for each
+        realization, and that the linear model reproduces the truth."""
+        plugin = Plugin("degreesC", predictor_of_mean_flag="realizations")
+        plugin.process(self.historic_forecast, self.truth)
+        result = plugin.compute_initial_guess()
+        self.assertEqual(len(result), 6)
+        forecast_predictor_data, truth_data, _, _ = (
+            plugin.get_training_data())
+        predicted = result[2] + forecast_predictor_data.dot(result[3:])
+        self.assertArrayAlmostEqual(predicted, truth_data, decimal=3)
+
+    def test_default_values(self):
+        """Test the default initial guess if the coefficients are not
+        estimated from a linear model."""
+        result = Plugin("degreesC").compute_initial_guess(False)
+        self.assertArrayEqual(result, [1, 1, 0, 1])
+
+    def test_no_training_data(self):
+        """Test that the initial guess contains NaNs if there is no training
+        data to estimate the coefficients from."""
+        result = Plugin("degreesC").compute_initial_guess()
+        self.assertTrue(np.any(np.isnan(result)))
+
+
+if __name__ == '__main__':
+    unittest.main()
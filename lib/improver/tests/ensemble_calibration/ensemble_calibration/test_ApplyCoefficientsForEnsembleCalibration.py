@@ -715,6 +715,104 @@ class Test__apply_params(IrisTest):
                 predictor_cube, variance_cube, optimised_coeffs,
                 coeff_names, predictor_of_mean_flag)
 
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate.",
+                          "invalid escape sequence"],
+        warning_types=[UserWarning, DeprecationWarning])
+    def test_regional_coefficients(self):
+        """
+        Test that the coefficients for each region are applied to the
+        points within that region.
+        """
+        expected_predictor = np.array(
+            [[231.15001794, 242.40001917, 253.98333333],
+             [264.90000639, 276.15000763, 287.73333333],
+             [298.6500101, 309.90001134, 321.48333333]])
+        expected_variance = np.array(
+            [[2.07777316e-11, 2.07777316e-11, 9.33333333],
+             [2.07777316e-11, 2.07777316e-11, 9.33333333],
+             [2.07777316e-11, 2.07777316e-11, 9.33333333]])
+        cube = self.current_temperature_forecast_cube
+
+        optimised_coeffs = {}
+        the_date = datetime_from_timestamp(cube.coord("time").points)
+        optimised_coeffs[the_date] = np.array(
+            [self.default_optimised_coeffs, [0, 1, 2, 1]])
+        region_labels = np.array([[5, 5, 7], [5, 5, 7], [5, 5, 7]])
+
+        predictor_cube = cube.collapsed("realization", iris.analysis.MEAN)
+        variance_cube = cube.collapsed("realization", iris.analysis.VARIANCE)
+
+        plugin = Plugin(cube, optimised_coeffs, self.coeff_names,
+                        region_labels=region_labels)
+        forecast_predictor, forecast_variance, coefficients = (
+            plugin._apply_params(
+                predictor_cube, variance_cube, optimised_coeffs,
+                self.coeff_names, "mean"))
+        self.assertArrayAlmostEqual(
+            forecast_predictor.data, expected_predictor, decimal=4)
+        self.assertArrayAlmostEqual(
+            forecast_variance.data, expected_variance, decimal=4)
+        self.assertArrayEqual(coefficients[3].coord("region").points, [5, 7])
+        self.assertArrayAlmostEqual(
+            coefficients[3].data, [[1.00000011, 1]])
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate.",
+                          "invalid escape sequence"],
+        warning_types=[UserWarning, DeprecationWarning])
+    def test_regional_coefficients_realizations(self):
+        """
+        Test that applying the same coefficients to every region gives the
+        same result as applying the coefficients to the whole domain, when
+        the individual ensemble realizations are used as the predictor.
+        """
+        cube = self.current_temperature_forecast_cube
+        coeff_names = ["gamma", "delta", "alpha", "beta0", "beta1", "beta2"]
+        coeffs = np.array([5, 1, 0, 0.57, 0.6, 0.6], dtype=np.float32)
+        the_date = datetime_from_timestamp(cube.coord("time").points)
+        variance_cube = cube.collapsed("realization", iris.analysis.VARIANCE)
+
+        expected_predictor, expected_variance, _ = Plugin(
+            cube, {the_date: coeffs}, coeff_names)._apply_params(
+                cube.copy(), variance_cube.copy(), {the_date: coeffs},
+                coeff_names, "realizations")
+
+        optimised_coeffs = {the_date: np.tile(coeffs, (3, 1))}
+        plugin = Plugin(cube, optimised_coeffs, coeff_names,
+                        region_labels=np.arange(3))
+        forecast_predictor, forecast_variance, _ = plugin._apply_params(
+            cube.copy(), variance_cube.copy(), optimised_coeffs,
+            coeff_names, "realizations")
+        self.assertArrayAlmostEqual(
+            forecast_predictor.data, expected_predictor.data)
+        self.assertArrayAlmostEqual(
+            forecast_variance.data, expected_variance.data)
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate.",
+                          "invalid escape sequence"],
+        warning_types=[UserWarning, DeprecationWarning])
+    def test_regional_coefficients_without_labels(self):
+        """
+        Test that an exception is raised if regional coefficients are
+        provided without the region labels.
+        """
+        cube = self.current_temperature_forecast_cube
+        the_date = datetime_from_timestamp(cube.coord("time").points)
+        optimised_coeffs = {
+            the_date: np.tile(self.default_optimised_coeffs, (2, 1))}
+
+        predictor_cube = cube.collapsed("realization", iris.analysis.MEAN)
+        variance_cube = cube.collapsed("realization", iris.analysis.VARIANCE)
+
+        plugin = Plugin(cube, optimised_coeffs, self.coeff_names)
+        msg = "Region labels must be provided"
+        with self.assertRaisesRegex(ValueError, msg):
+            plugin._apply_params(
+                predictor_cube, variance_cube, optimised_coeffs,
+                self.coeff_names, "mean")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -49,6 +49,40 @@ from improver.tests.ensemble_calibration.ensemble_calibration.\
 from improver.utilities.warnings_handler import ManageWarnings
 
 
+class Test__init__(IrisTest):
+
+    """Test the __init__ method."""
+
+    def test_default(self):
+        """Test the default minimisation method."""
+        plugin = Plugin()
+        self.assertEqual(plugin.minimisation_method, "nelder-mead")
+        self.assertIsNone(plugin.minimisation_summary)
+
+    def test_lbfgsb(self):
+        """Test that the method name is case insensitive."""
+        plugin = Plugin(minimisation_method="L-BFGS-B")
+        self.assertEqual(plugin.minimisation_method, "l-bfgs-b")
+
+    def test_invalid_method(self):
+        """Test that an error is raised for an unsupported method."""
+        msg = "The minimisation method powell is not supported"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin(minimisation_method="powell")
+
+
+class Test__repr__(IrisTest):
+
+    """Test the __repr__ method."""
+
+    def test_basic(self):
+        """Test that the __repr__ returns the expected string."""
+        result = str(Plugin(minimisation_method="l-bfgs-b"))
+        msg = ('<ContinuousRankedProbabilityScoreMinimisers: '
+               'minimisation_method: l-bfgs-b>')
+        self.assertEqual(result, msg)
+
+
 class Test_normal_crps_minimiser(IrisTest):
 
     """
@@ -752,5 +786,227 @@ class Test_crps_minimiser_wrapper(IrisTest):
                             for item in warning_list))
 
 
+class CRPSGradientTest(IrisTest):
+
+    """Common set up and checks for the CRPS gradient tests."""
+
+    def setUp(self):
+        """Set up forecast and truth data."""
+        random_state = np.random.RandomState(0)
+        self.forecast_realizations = (
+            10 + 3 * random_state.randn(50, 3))
+        self.forecast_predictor = self.forecast_realizations.mean(axis=1)
+        self.forecast_variance = self.forecast_realizations.var(axis=1)
+        self.truth = np.absolute(
+            1.1 * self.forecast_predictor + 0.5 + random_state.randn(50))
+        self.sqrt_pi = np.sqrt(np.pi)
+        self.plugin = Plugin()
+
+    def check_gradient(self, function, initial_guess, forecast_predictor,
+                       predictor_of_mean_flag):
+        """Check the gradient against central differences."""
+        args = (forecast_predictor, self.truth, self.forecast_variance,
+                self.sqrt_pi, predictor_of_mean_flag)
+        _, gradient = function(initial_guess, *args)
+        step = 1e-6
+        expected = []
+        for index in range(len(initial_guess)):
+            offset = np.zeros(len(initial_guess))
+            offset[index] = step
+            expected.append(
+                (function(initial_guess + offset, *args)[0] -
+                 function(initial_guess - offset, *args)[0]) / (2 * step))
+        self.assertArrayAlmostEqual(gradient, expected, decimal=4)
+
+
+class Test_normal_crps_and_gradient(CRPSGradientTest):
+
+    """Test the CRPS and its gradient for a normal distribution."""
+
+    def test_crps_matches_minimiser(self):
+        """Test that the CRPS matches normal_crps_minimiser."""
+        initial_guess = np.array([0.8, 0.9, 0.3, 1.05])
+        args = (self.forecast_predictor, self.truth, self.forecast_variance,
+                self.sqrt_pi, "mean")
+        result, _ = self.plugin.normal_crps_and_gradient(initial_guess, *args)
+        self.assertAlmostEqual(
+            result, self.plugin.normal_crps_minimiser(initial_guess, *args))
+
+    def test_gradient_mean_predictor(self):
+        """Test the gradient with the ensemble mean as the predictor."""
+        self.check_gradient(
+            self.plugin.normal_crps_and_gradient,
+            np.array([0.8, 0.9, 0.3, 1.05]), self.forecast_predictor, "mean")
+
+    def test_gradient_realizations_predictor(self):
+        """Test the gradient with the ensemble realizations as the
+        predictors."""
+        self.check_gradient(
+            self.plugin.normal_crps_and_gradient,
+            np.array([0.8, 0.9, 0.3, 0.5, 0.6, 0.7]),
+            self.forecast_realizations, "realizations")
+
+    def test_bad_value(self):
+        """Test that the BAD_VALUE is returned when the appropriate condition
+        is found."""
+        initial_guess = np.array([0., 0., 0.3, 1.05])
+        result, gradient = self.plugin.normal_crps_and_gradient(
+            initial_guess, self.forecast_predictor, self.truth,
+            np.zeros(self.truth.shape), self.sqrt_pi, "mean")
+        self.assertEqual(result, self.plugin.BAD_VALUE)
+        self.assertArrayEqual(gradient, np.zeros(4))
+
+
+class Test_truncated_normal_crps_and_gradient(CRPSGradientTest):
+
+    """Test the CRPS and its gradient for a truncated normal distribution."""
+
+    def test_crps_matches_minimiser(self):
+        """Test that the CRPS matches truncated_normal_crps_minimiser."""
+        initial_guess = np.array([0.8, 0.9, 0.3, 1.05])
+        args = (self.forecast_predictor, self.truth, self.forecast_variance,
+                self.sqrt_pi, "mean")
+        result, _ = self.plugin.truncated_normal_crps_and_gradient(
+            initial_guess, *args)
+        self.assertAlmostEqual(
+            result,
+            self.plugin.truncated_normal_crps_minimiser(initial_guess, *args))
+
+    def test_gradient_mean_predictor(self):
+        """Test the gradient with the ensemble mean as the predictor."""
+        self.check_gradient(
+            self.plugin.truncated_normal_crps_and_gradient,
+            np.array([0.8, 0.9, 0.3, 1.05]), self.forecast_predictor, "mean")
+
+    def test_gradient_realizations_predictor(self):
+        """Test the gradient with the ensemble realizations as the
+        predictors."""
+        self.check_gradient(
+            self.plugin.truncated_normal_crps_and_gradient,
+            np.array([0.8, 0.9, 0.3, 0.5, 0.6, 0.7]),
+            self.forecast_realizations, "realizations")
+
+    def test_bad_value(self):
+        """Test that the BAD_VALUE is returned when the location parameter
+        is too far below zero."""
+        initial_guess = np.array([0.8, 0.9, -100., 1.05])
+        result, gradient = self.plugin.truncated_normal_crps_and_gradient(
+            initial_guess, self.forecast_predictor, self.truth,
+            self.forecast_variance, self.sqrt_pi, "mean")
+        self.assertEqual(result, self.plugin.BAD_VALUE)
+        self.assertArrayEqual(gradient, np.zeros(4))
+
+
+class Test_crps_minimiser_wrapper_lbfgsb(IrisTest):
+
+    """Test minimising the CRPS using the L-BFGS-B method."""
+
+    def setUp(self):
+        """Set up forecast and truth cubes."""
+        cube = set_up_temperature_cube()
+        self.forecast_predictor = cube.collapsed(
+            "realization", iris.analysis.MEAN)
+        self.forecast_variance = cube.collapsed(
+            "realization", iris.analysis.VARIANCE)
+        self.truth = cube.collapsed("realization", iris.analysis.MAX)
+        self.initial_guess = np.array([5, 1, 0, 1], dtype=np.float32)
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate.",
+                          "Minimisation did not result in convergence"])
+    def test_matches_nelder_mead(self):
+        """Test that the CRPS achieved is no larger than that achieved by
+        the Nelder-Mead method, and that the minimisation is summarised."""
+        for distribution in ["gaussian", "truncated gaussian"]:
+            nelder_mead = Plugin()
+            nelder_mead.crps_minimiser_wrapper(
+                self.initial_guess, self.forecast_predictor, self.truth,
+                self.forecast_variance, "mean", distribution)
+            plugin = Plugin(minimisation_method="l-bfgs-b")
+            result = plugin.crps_minimiser_wrapper(
+                self.initial_guess, self.forecast_predictor, self.truth,
+                self.forecast_variance, "mean", distribution)
+            self.assertIsInstance(result, np.ndarray)
+            self.assertEqual(result.dtype, np.float32)
+            summary = plugin.minimisation_summary
+            self.assertEqual(summary["method"], "l-bfgs-b")
+            self.assertLessEqual(
+                summary["crps"],
+                nelder_mead.minimisation_summary["crps"] + 1e-4)
+            self.assertLessEqual(summary["evaluations"],
+                                 nelder_mead.minimisation_summary[
+                                     "evaluations"])
+            self.assertGreaterEqual(summary["time"], 0)
+
+
+class Test_crps_minimiser_wrapper_for_regions(IrisTest):
+
+    """Test minimising the CRPS independently for each region."""
+
+    def setUp(self):
+        """Set up forecast and truth cubes."""
+        cube = set_up_temperature_cube()
+        self.forecast_predictor = cube.collapsed(
+            "realization", iris.analysis.MEAN)
+        self.forecast_variance = cube.collapsed(
+            "realization", iris.analysis.VARIANCE)
+        self.truth = cube.collapsed("realization", iris.analysis.MAX)
+        self.initial_guess = np.array([5, 1, 0, 1], dtype=np.float32)
+        self.region_labels = np.array([[4, 4, 9],
+                                       [4, 4, 9],
+                                       [4, 4, 9]])
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate.",
+                          "Minimisation did not result in convergence",
+                          "\nThe final iteration resulted in a percentage "
+                          "change"])
+    def test_basic(self):
+        """Test that a set of coefficients is returned for each region,
+        which matches the coefficients from minimising the CRPS for the
+        points within that region."""
+        plugin = Plugin(minimisation_method="l-bfgs-b")
+        region_ids, result = plugin.crps_minimiser_wrapper_for_regions(
+            self.initial_guess, self.forecast_predictor, self.truth,
+            self.forecast_variance, "mean", "gaussian", self.region_labels)
+        self.assertArrayEqual(region_ids, [4, 9])
+        self.assertEqual(result.shape, (2, 4))
+        self.assertEqual(result.dtype, np.float32)
+        self.assertEqual(len(plugin.minimisation_summary), 2)
+
+        expected = plugin.crps_minimiser_wrapper(
+            self.initial_guess, self.forecast_predictor[..., 2:],
+            self.truth[..., 2:], self.forecast_variance[..., 2:],
+            "mean", "gaussian")
+        self.assertArrayAlmostEqual(result[1], expected)
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate.",
+                          "Minimisation did not result in convergence",
+                          "\nThe final iteration resulted in a percentage "
+                          "change"])
+    def test_multiple_workers(self):
+        """Test that the coefficients are the same when the regions are
+        processed on a pool of processes."""
+        plugin = Plugin()
+        _, expected = plugin.crps_minimiser_wrapper_for_regions(
+            self.initial_guess, self.forecast_predictor, self.truth,
+            self.forecast_variance, "mean", "gaussian", self.region_labels)
+        _, result = plugin.crps_minimiser_wrapper_for_regions(
+            self.initial_guess, self.forecast_predictor, self.truth,
+            self.forecast_variance, "mean", "gaussian", self.region_labels,
+            max_workers=2)
+        self.assertArrayEqual(result, expected)
+
+    def test_invalid_max_workers(self):
+        """Test that an error is raised if max_workers is less than one."""
+        msg = "Number of workers is less than one"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin().crps_minimiser_wrapper_for_regions(
+                self.initial_guess, self.forecast_predictor, self.truth,
+                self.forecast_variance, "mean", "gaussian",
+                self.region_labels, max_workers=0)
+
+
 if __name__ == '__main__':
     unittest.main()
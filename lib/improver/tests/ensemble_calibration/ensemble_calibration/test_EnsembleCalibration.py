@@ -216,6 +216,40 @@ class Test_process(IrisTest):
         self.assertArrayAlmostEqual(calibrated_predictor.data, predictor_data)
         self.assertArrayAlmostEqual(calibrated_variance.data, variance_data)
 
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_temperature_data_check_streaming(self):
+        """
+        Test that the plugin returns the expected calibrated data when the
+        historic forecasts and truths are provided as lists of cubes that
+        are processed one at a time.
+        The ensemble mean is the predictor.
+        """
+        predictor_data = np.array(
+            [[231.150024, 242.400024, 253.650024],
+             [264.899994, 276.149994, 287.399994],
+             [298.650024, 309.900024, 321.150024]],
+            dtype=np.float32
+        )
+        variance_data = np.array(
+            [[2.07777316e-11, 2.07777316e-11, 2.07777316e-11],
+             [2.07777316e-11, 2.07777316e-11, 2.07777316e-11],
+             [2.07777316e-11, 2.07777316e-11, 2.07777316e-11]])
+        calibration_method = "ensemble model output_statistics"
+        distribution = "gaussian"
+        desired_units = "degreesC"
+        plugin = Plugin(calibration_method, distribution, desired_units,
+                        streaming=True)
+        calibrated_predictor, calibrated_variance = plugin.process(
+            self.current_temperature_forecast_cube,
+            list(self.historic_temperature_forecast_cube.slices_over("time")),
+            list(self.temperature_truth_cube.slices_over("time")))
+
+        self.assertArrayAlmostEqual(
+            calibrated_predictor.data, predictor_data, decimal=3)
+        self.assertArrayAlmostEqual(
+            calibrated_variance.data, variance_data, decimal=3)
+
     @ManageWarnings(
         ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
     def test_temperature_realizations_data_check(self):
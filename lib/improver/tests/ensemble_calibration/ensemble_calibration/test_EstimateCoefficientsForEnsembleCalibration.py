@@ -42,6 +42,7 @@ from iris.tests import IrisTest
 import numpy as np
 
 from improver.ensemble_calibration.ensemble_calibration import (
+    AccumulateTrainingDataForEnsembleCalibration,
     EstimateCoefficientsForEnsembleCalibration as Plugin)
 from improver.tests.ensemble_calibration.ensemble_calibration.\
     helper_functions import (set_up_temperature_cube, set_up_wind_speed_cube,
@@ -171,6 +172,12 @@ class Test__init__(IrisTest):
             self.assertTrue(any(warning_msg in str(item)
                                 for item in warning_list))
 
+    def test_invalid_max_workers(self):
+        """Test that an error is raised if max_workers is less than one."""
+        msg = "Number of workers is less than one"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin("gaussian", "degreesC", max_workers=0)
+
 
 class Test_create_coefficients_cube(IrisTest):
 
@@ -295,6 +302,23 @@ class Test_create_coefficients_cube(IrisTest):
             self.optimised_coeffs, self.current_forecast)
         self.assertEqual(result, self.expected)
 
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_regional_coefficients(self):
+        """Test that the coefficient cube has a leading region dimension
+        when coefficients have been estimated for each region."""
+        optimised_coeffs = np.array([[0, 1, 2, 3], [4, 5, 6, 7]])
+        result = self.plugin.create_coefficients_cube(
+            optimised_coeffs, self.current_forecast,
+            region_ids=np.array([3, 8]))
+        self.assertArrayEqual(result.data, optimised_coeffs)
+        self.assertEqual(result.coord_dims("region"), (0,))
+        self.assertEqual(result.coord_dims("coefficient_index"), (1,))
+        self.assertArrayEqual(result.coord("region").points, [3, 8])
+        self.assertArrayEqual(
+            result.coord("coefficient_name").points,
+            ["gamma", "delta", "alpha", "beta"])
+
     @ManageWarnings(
         ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
     def test_mismatching_number_of_coefficients(self):
@@ -823,6 +847,139 @@ class Test_estimate_coefficients_for_ngr(IrisTest):
         for key in result.keys():
             self.assertArrayAlmostEqual(result[key], data)
 
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_regional_coefficients(self):
+        """
+        Ensure that coefficients are estimated for each region, and that
+        a single region covering the domain gives the same coefficients as
+        estimating the coefficients for the whole domain.
+        """
+        data = [4.55819380e-06, -8.02401974e-09,
+                1.66667055e+00, 1.00000011e+00]
+
+        current_forecast = self.current_temperature_forecast_cube
+
+        historic_forecasts = self.historic_temperature_forecast_cube
+
+        truth = self.temperature_truth_cube
+
+        distribution = "gaussian"
+        desired_units = "degreesC"
+
+        plugin = Plugin(distribution, desired_units,
+                        region_labels=np.zeros((3, 3)))
+        result = plugin.estimate_coefficients_for_ngr(
+            current_forecast, historic_forecasts, truth)
+
+        self.assertArrayEqual(plugin.region_ids, [0])
+        for key in result.keys():
+            self.assertEqual(result[key].shape, (1, 4))
+            self.assertArrayAlmostEqual(result[key][0], data)
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_regional_coefficients_multiple_workers(self):
+        """
+        Ensure that a set of coefficients is returned for each region, and
+        that the coefficients do not depend on the number of workers.
+        """
+        current_forecast = self.current_temperature_forecast_cube
+
+        historic_forecasts = self.historic_temperature_forecast_cube
+
+        truth = self.temperature_truth_cube
+
+        distribution = "gaussian"
+        desired_units = "degreesC"
+        region_labels = np.array([[0, 0, 1], [0, 0, 1], [2, 2, 2]])
+
+        expected = Plugin(
+            distribution, desired_units,
+            region_labels=region_labels).estimate_coefficients_for_ngr(
+                current_forecast, historic_forecasts, truth)
+        plugin = Plugin(distribution, desired_units,
+                        region_labels=region_labels, max_workers=2)
+        result = plugin.estimate_coefficients_for_ngr(
+            current_forecast, historic_forecasts, truth)
+
+        self.assertArrayEqual(plugin.region_ids, [0, 1, 2])
+        for key in result.keys():
+            self.assertEqual(result[key].shape, (3, 4))
+            self.assertArrayEqual(result[key], expected[key])
+
+
+class Test_estimate_coefficients_from_training_data(IrisTest):
+
+    """Test the estimate_coefficients_from_training_data method."""
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def setUp(self):
+        """Set up the current forecast and accumulated training data."""
+        self.current_forecast = (
+            add_forecast_reference_time_and_forecast_period(
+                set_up_temperature_cube()))
+        self.historic_forecast = (
+            _create_historic_forecasts(self.current_forecast))
+        self.truth = _create_truth(self.current_forecast)
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_matches_estimate_coefficients_for_ngr(self):
+        """
+        Ensure that the coefficients estimated from training data accumulated
+        one validity time at a time match the coefficients estimated from the
+        full historic forecast and truth cubes.
+        """
+        data = [4.55819380e-06, -8.02401974e-09,
+                1.66667055e+00, 1.00000011e+00]
+        training_data = AccumulateTrainingDataForEnsembleCalibration(
+            "degreesC")
+        for historic_forecast, truth in zip(
+                self.historic_forecast.slices_over("time"),
+                self.truth.slices_over("time")):
+            training_data.process(historic_forecast, truth)
+
+        plugin = Plugin("gaussian", "degreesC")
+        result = plugin.estimate_coefficients_from_training_data(
+            self.current_forecast, training_data)
+        self.assertEqual(len(result), 1)
+        for key in result.keys():
+            self.assertArrayAlmostEqual(result[key], data, decimal=4)
+
+    @ManageWarnings(
+        ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_regional_coefficients(self):
+        """
+        Ensure that coefficients are estimated for each region from the
+        accumulated training data.
+        """
+        training_data = AccumulateTrainingDataForEnsembleCalibration(
+            "degreesC")
+        training_data.process(self.historic_forecast, self.truth)
+
+        plugin = Plugin("gaussian", "degreesC",
+                        region_labels=np.array([[0, 0, 1]] * 3))
+        result = plugin.estimate_coefficients_from_training_data(
+            self.current_forecast, training_data)
+        self.assertArrayEqual(plugin.region_ids, [0, 1])
+        for key in result.keys():
+            self.assertEqual(result[key].shape, (2, 4))
+
+    def test_mismatched_predictor_of_mean_flag(self):
+        """
+        Ensure that an error is raised if the training data was accumulated
+        for a different predictor.
+        """
+        training_data = AccumulateTrainingDataForEnsembleCalibration(
+            "degreesC", predictor_of_mean_flag="realizations")
+        plugin = Plugin("gaussian", "degreesC")
+        msg = "The training data has been accumulated using"
+        with self.assertRaisesRegex(ValueError, msg):
+            plugin.estimate_coefficients_from_training_data(
+                self.current_forecast, training_data)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -40,7 +40,8 @@ from iris.tests import IrisTest
 import numpy as np
 
 from improver.ensemble_calibration.ensemble_calibration_utilities import (
-    convert_cube_data_to_2d, check_predictor_of_mean_flag)
+    convert_cube_data_to_2d, check_predictor_of_mean_flag,
+    create_tile_region_labels, find_region_indices)
 from improver.tests.ensemble_calibration.ensemble_calibration.\
     helper_functions import set_up_temperature_cube
 
@@ -220,5 +221,59 @@ class Test_check_predictor_of_mean_flag(IrisTest):
             check_predictor_of_mean_flag(predictor_of_mean_flag)
 
 
+class Test_create_tile_region_labels(IrisTest):
+
+    """Test the create_tile_region_labels utility."""
+
+    def test_basic(self):
+        """Test the labels for tiles that do not divide the grid exactly."""
+        expected = np.array([[0, 0, 1],
+                             [0, 0, 1],
+                             [2, 2, 3]])
+        result = create_tile_region_labels((3, 3), 2)
+        self.assertArrayEqual(result, expected)
+
+    def test_tile_size_per_axis(self):
+        """Test different tile sizes along the y and x axes."""
+        expected = np.array([[0, 0, 1, 1],
+                             [2, 2, 3, 3],
+                             [4, 4, 5, 5]])
+        result = create_tile_region_labels((3, 4), (1, 2))
+        self.assertArrayEqual(result, expected)
+
+    def test_invalid_tile_size(self):
+        """Test that an error is raised for a tile size less than one."""
+        msg = "Invalid tile_size: must be >= 1"
+        with self.assertRaisesRegex(ValueError, msg):
+            create_tile_region_labels((3, 3), 0)
+
+
+class Test_find_region_indices(IrisTest):
+
+    """Test the find_region_indices utility."""
+
+    def test_basic(self):
+        """Test that the regions are ordered by label."""
+        region_ids, point_indices = find_region_indices(
+            np.array([[7, 3], [3, 5]]), (2, 2))
+        self.assertArrayEqual(region_ids, [3, 5, 7])
+        self.assertArrayEqual(point_indices, [2, 0, 0, 1])
+
+    def test_leading_dimension(self):
+        """Test that the labels are repeated over leading dimensions, e.g.
+        for spot data with a time dimension."""
+        region_ids, point_indices = find_region_indices(
+            np.arange(3), (2, 3))
+        self.assertArrayEqual(region_ids, [0, 1, 2])
+        self.assertArrayEqual(point_indices, [0, 1, 2, 0, 1, 2])
+
+    def test_mismatched_shape(self):
+        """Test that an error is raised if the labels do not match the
+        trailing dimensions of the data."""
+        msg = "The shape of the region labels"
+        with self.assertRaisesRegex(ValueError, msg):
+            find_region_indices(np.zeros((3, 2)), (4, 2, 3))
+
+
 if __name__ == '__main__':
     unittest.main()
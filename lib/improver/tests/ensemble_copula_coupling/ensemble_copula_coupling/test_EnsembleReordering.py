@@ -48,6 +48,34 @@ from improver.tests.ensemble_calibration.ensemble_calibration. \
 from improver.utilities.warnings_handler import ManageWarnings
 
 
+class Test__init__(IrisTest):
+
+    """Test the __init__ method in the EnsembleReordering plugin."""
+
+    def test_basic(self):
+        """Test the default settings."""
+        plugin = Plugin()
+        self.assertFalse(plugin.batched)
+        self.assertIsNone(plugin.chunk_size)
+
+    def test_invalid_chunk_size(self):
+        """Test that an error is raised for a chunk size less than one."""
+        msg = "Invalid chunk_size: must be >= 1: 0"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin(batched=True, chunk_size=0)
+
+
+class Test__repr__(IrisTest):
+
+    """Test the __repr__ method in the EnsembleReordering plugin."""
+
+    def test_basic(self):
+        """Test that the __repr__ returns the expected string."""
+        result = str(Plugin(batched=True, chunk_size=10))
+        msg = '<EnsembleReordering: batched: True, chunk_size: 10>'
+        self.assertEqual(result, msg)
+
+
 class Test__recycle_raw_ensemble_realizations(IrisTest):
 
     """
@@ -724,6 +752,160 @@ class Test_process(IrisTest):
             np.array_equal(aresult, result.data) for aresult in permutations]
         self.assertIn(True, matches)
 
+    @ManageWarnings(
+        ignored_messages=["Only a single cube so no differences"])
+    def test_batched(self):
+        """
+        Test that the plugin returns the same realizations in batched mode
+        where there are no tied values.
+        """
+        self.raw_cube.data = np.random.RandomState(0).rand(
+            *self.raw_cube.shape).astype(np.float32)
+        expected = Plugin().process(self.post_processed_percentiles.copy(),
+                                    self.raw_cube.copy())
+        result = Plugin(batched=True, chunk_size=5).process(
+            self.post_processed_percentiles.copy(), self.raw_cube.copy())
+        self.assertArrayEqual(result.data, expected.data)
+        self.assertArrayAlmostEqual(
+            result.coord("realization").points, [0, 1, 2])
+
+
+class Test__counter_based_random(IrisTest):
+
+    """Test the _counter_based_random method in the EnsembleReordering
+    plugin."""
+
+    def test_basic(self):
+        """Test that the values are in the range [0, 1) and depend only on
+        the seed and the counter."""
+        indices = np.arange(1000).reshape(10, 100)
+        result = Plugin._counter_based_random(0, indices)
+        self.assertEqual(result.shape, (10, 100))
+        self.assertTrue(np.all((result >= 0) & (result < 1)))
+        self.assertArrayEqual(
+            result[2:4], Plugin._counter_based_random(0, indices[2:4]))
+        self.assertFalse(np.array_equal(
+            result, Plugin._counter_based_random(1, indices)))
+
+
+class Test_rank_ecc_batched(IrisTest):
+
+    """Test the rank_ecc_batched method in the EnsembleReordering plugin."""
+
+    def setUp(self):
+        """
+        Create a cube with forecast_reference_time and
+        forecast_period coordinates.
+        """
+        self.cube = (
+            add_forecast_reference_time_and_forecast_period(
+                set_up_temperature_cube()))
+
+    def test_matches_rank_ecc(self):
+        """Test that the result matches rank_ecc where there are no tied
+        values, whatever the chunk size."""
+        raw_data = np.array([[[[3, 1, 2],
+                               [1, 2, 3],
+                               [2, 3, 1]]],
+                             [[[1, 2, 3],
+                               [2, 3, 1],
+                               [3, 1, 2]]],
+                             [[[2, 3, 1],
+                               [3, 1, 2],
+                               [1, 2, 3]]]], dtype=np.float32)
+        calibrated_data = np.array([[[[0.5]]], [[[2.5]]], [[[4.5]]]],
+                                   dtype=np.float32) * np.ones(raw_data.shape)
+
+        raw_cube = self.cube.copy()
+        raw_cube.data = raw_data
+        calibrated_cube = self.cube.copy()
+        calibrated_cube.data = calibrated_data.astype(np.float32)
+
+        expected = Plugin.rank_ecc(calibrated_cube.copy(), raw_cube)
+        for chunk_size in [None, 1, 4]:
+            result = Plugin.rank_ecc_batched(
+                calibrated_cube, raw_cube, chunk_size=chunk_size)
+            self.assertIsInstance(result, Cube)
+            self.assertArrayEqual(result.data, expected.data)
+            self.assertEqual(result.shape, expected.shape)
+
+    def test_tied_values_chunk_size(self):
+        """Test that tied values are split in the same way whatever the
+        chunk size, when a random seed is set."""
+        raw_data = np.ones((3, 1, 3, 3), dtype=np.float32)
+        calibrated_data = (
+            np.arange(3, dtype=np.float32).reshape(3, 1, 1, 1) *
+            np.ones(raw_data.shape, dtype=np.float32))
+
+        raw_cube = self.cube.copy()
+        raw_cube.data = raw_data
+        calibrated_cube = self.cube.copy()
+        calibrated_cube.data = calibrated_data
+
+        expected = Plugin.rank_ecc_batched(
+            calibrated_cube, raw_cube, random_seed=0)
+        result = Plugin.rank_ecc_batched(
+            calibrated_cube, raw_cube, random_seed=0, chunk_size=2)
+        self.assertArrayEqual(result.data, expected.data)
+        self.assertArrayEqual(np.sort(result.data, axis=0), calibrated_data)
+
+    def test_recycling_raw_ensemble_realizations(self):
+        """Test that the raw ensemble realizations are recycled when there
+        are fewer of them than percentiles."""
+        raw_data = np.array([[1],
+                             [2]])
+        post_processed_percentiles_data = np.array([[1],
+                                                    [2],
+                                                    [3]])
+        expected_first = np.array([[1],
+                                   [3],
+                                   [2]])
+        expected_second = np.array([[2],
+                                    [3],
+                                    [1]])
+
+        raw_cube = self.cube[:2, :, 0, 0]
+        raw_cube.data = raw_data
+        calibrated_cube = self.cube[:, :, 0, 0]
+        calibrated_cube.data = post_processed_percentiles_data
+
+        result = Plugin.rank_ecc_batched(calibrated_cube, raw_cube)
+        matches = [
+            np.array_equal(aresult, result.data)
+            for aresult in [expected_first, expected_second]]
+        self.assertIn(True, matches)
+
+    def test_random_ordering(self):
+        """Test that the result is a permutation of the post-processed
+        values if random ordering is selected."""
+        raw_data = np.array([[3],
+                             [2],
+                             [1]])
+        calibrated_data = np.array([[1],
+                                    [2],
+                                    [3]])
+
+        raw_cube = self.cube[:, :, 0, 0]
+        raw_cube.data = raw_data
+        calibrated_cube = self.cube[:, :, 0, 0]
+        calibrated_cube.data = calibrated_data
+
+        result = Plugin.rank_ecc_batched(calibrated_cube, raw_cube,
+                                         random_ordering=True)
+        permutations = [np.array(permutation) for permutation in
+                        itertools.permutations(calibrated_data)]
+        matches = [
+            np.array_equal(aresult, result.data) for aresult in permutations]
+        self.assertIn(True, matches)
+
+    def test_mismatched_shape(self):
+        """Test that an error is raised if the raw and post-processed
+        forecasts have different spatial shapes."""
+        raw_cube = self.cube[:, :, :2, :]
+        msg = "The raw forecast shape"
+        with self.assertRaisesRegex(ValueError, msg):
+            Plugin.rank_ecc_batched(self.cube, raw_cube)
+
 
 if __name__ == '__main__':
     unittest.main()
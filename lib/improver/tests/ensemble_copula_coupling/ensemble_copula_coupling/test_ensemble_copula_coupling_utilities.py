@@ -45,7 +45,7 @@ from improver.ensemble_copula_coupling.ensemble_copula_coupling_utilities \
     import (choose_set_of_percentiles, create_cube_with_percentiles,
             insert_lower_and_upper_endpoint_to_1d_array,
             concatenate_2d_array_with_2d_array_endpoints,
-            get_bounds_of_distribution,
+            get_bounds_of_distribution, interpolate_multiple_rows,
             restore_non_probabilistic_dimensions)
 from improver.tests.ensemble_calibration.ensemble_calibration. \
     helper_functions import (
@@ -556,5 +556,80 @@ class Test_restore_non_probabilistic_dimensions(IrisTest):
                 cube.data, cube, "nonsense", plen)
 
 
+class Test_interpolate_multiple_rows(IrisTest):
+
+    """Test the interpolate_multiple_rows function."""
+
+    def setUp(self):
+        """Set up points, knots and values at the knots."""
+        self.x = np.array([-5., 0., 10., 25., 50., 80., 100., 120.])
+        self.xp = np.array([0., 25., 50., 75., 100.])
+        self.fp = np.array([[1., 2., 3., 4., 5.],
+                            [0., 0., 10., 10., 20.],
+                            [-3., -1., 2., 8., 9.]])
+
+    def expected(self, xp, fp):
+        """Calculate the expected result by looping over np.interp."""
+        xp = np.broadcast_to(xp, (3, 5))
+        fp = np.broadcast_to(fp, (3, 5))
+        return np.array([np.interp(self.x, xp_row, fp_row)
+                         for xp_row, fp_row in zip(xp, fp)])
+
+    def test_shared_knots(self):
+        """Test interpolation with knots shared by all rows and values that
+        vary by row."""
+        result = interpolate_multiple_rows(self.x, self.xp, self.fp)
+        self.assertEqual(result.shape, (3, 8))
+        self.assertArrayAlmostEqual(result, self.expected(self.xp, self.fp))
+
+    def test_knots_per_row(self):
+        """Test interpolation with knots that vary by row, including
+        repeated knots, and values shared by all rows."""
+        xp = np.array([[0., 0., 0.3, 1., 1.],
+                       [0.1, 0.2, 0.5, 0.5, 0.9],
+                       [0., 0.25, 0.5, 0.75, 1.]])
+        fp = np.array([270., 275., 280., 285., 290.])
+        self.x = np.array([0., 0.05, 0.2, 0.5, 0.6, 0.95, 1.])
+        result = interpolate_multiple_rows(self.x, xp, fp)
+        self.assertArrayAlmostEqual(result, self.expected(xp, fp))
+
+    def test_chunking(self):
+        """Test that interpolating in chunks gives the same result."""
+        xp = np.sort(np.random.RandomState(0).rand(7, 5), axis=1)
+        fp = np.random.RandomState(1).rand(7, 5)
+        self.x = np.linspace(-0.1, 1.1, 13)
+        expected = interpolate_multiple_rows(self.x, xp, fp)
+        result = interpolate_multiple_rows(self.x, xp, fp, chunk_size=2)
+        self.assertArrayEqual(result, expected)
+
+    def test_out(self):
+        """Test that the result is written into a transposed output array
+        with the dtype of that array."""
+        out = np.empty((8, 3), dtype=np.float32)
+        result = interpolate_multiple_rows(
+            self.x, self.xp, self.fp, out=out.T)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(
+            out, self.expected(self.xp, self.fp).T, decimal=5)
+
+    def test_single_knot(self):
+        """Test that a single knot gives the value at that knot everywhere."""
+        result = interpolate_multiple_rows(
+            self.x, np.array([50.]), np.array([[1.], [2.], [3.]]))
+        self.assertArrayEqual(result, np.repeat([[1.], [2.], [3.]], 8, 1))
+
+    def test_no_rows(self):
+        """Test that an error is raised if neither xp nor fp are 2d."""
+        msg = "At least one of xp and fp must be 2d"
+        with self.assertRaisesRegex(ValueError, msg):
+            interpolate_multiple_rows(self.x, self.xp, self.fp[0])
+
+    def test_inconsistent_shapes(self):
+        """Test that an error is raised if xp and fp differ in shape."""
+        msg = "are not consistent"
+        with self.assertRaisesRegex(ValueError, msg):
+            interpolate_multiple_rows(self.x, self.xp[:4], self.fp)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -130,6 +130,97 @@ class Test__create_heightdiff_mask(IrisTest):
         self.assertArrayAlmostEqual(result, expected_out)
 
 
+class Test__calc_lapse_rate_grid(IrisTest):
+    """Test the _calc_lapse_rate_grid function."""
+
+    def setUp(self):
+        """Sets up arrays."""
+        self.temperature = np.array([[280.06, 279.97, 279.90],
+                                     [280.15, 280.03, 279.96],
+                                     [280.25, 280.33, 280.27]],
+                                    dtype=np.float32)
+        self.orography = np.array([[174.67, 179.87, 188.46],
+                                   [155.84, 169.58, 185.05],
+                                   [134.90, 144.00, 157.89]],
+                                  dtype=np.float32)
+        self.plugin = LapseRate(nbhood_radius=1)
+
+    def calc_lapse_rate_by_point(self, temperature, orography):
+        """Calculate the lapse rate by fitting each neighbourhood in turn."""
+        padded_temp = np.pad(temperature, 1, mode='constant',
+                             constant_values=np.nan)
+        padded_orog = np.pad(orography, 1, mode='constant',
+                             constant_values=np.nan)
+        temp_subsections = []
+        orog_subsections = []
+        for i in range(temperature.shape[0]):
+            for j in range(temperature.shape[1]):
+                temp_subsections.append(
+                    padded_temp[i:i + 3, j:j + 3].flatten())
+                orog_subsections.append(
+                    padded_orog[i:i + 3, j:j + 3].flatten())
+        orog_subsections = np.array(orog_subsections)
+        temp_subsections = np.array(temp_subsections)
+        mask = self.plugin._create_heightdiff_mask(orog_subsections)
+        orog_subsections = np.where(mask, np.nan, orog_subsections)
+        temp_subsections = np.where(mask, np.nan, temp_subsections)
+        expected = [self.plugin._calc_lapse_rate(temp, orog)
+                    for temp, orog in zip(temp_subsections,
+                                          orog_subsections)]
+        return np.array(expected).reshape(temperature.shape)
+
+    def test_returns_expected_values(self):
+        """Test that the function returns the same lapse rate as fitting
+        the central neighbourhood with _calc_lapse_rate."""
+        result = self.plugin._calc_lapse_rate_grid(self.temperature,
+                                                   self.orography)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertAlmostEqual(result[1, 1], -0.00765005774676)
+
+    @ManageWarnings(
+        ignored_messages=["invalid value encountered in greater_equal"],
+        warning_types=[RuntimeWarning])
+    def test_matches_fit_by_point(self):
+        """Test that the function matches fitting each neighbourhood in
+        turn, including the treatment of NaN values and masked height
+        differences."""
+        self.temperature[0, 2] = np.nan
+        self.orography[2, 0] = 100.
+        expected = self.calc_lapse_rate_by_point(self.temperature,
+                                                 self.orography)
+        result = self.plugin._calc_lapse_rate_grid(self.temperature,
+                                                   self.orography)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_handles_nan(self):
+        """Test that the function returns DALR where the central point is
+        NaN."""
+        self.temperature[1, 1] = np.nan
+        result = self.plugin._calc_lapse_rate_grid(self.temperature,
+                                                   self.orography)
+        self.assertAlmostEqual(result[1, 1], DALR)
+
+    def test_constant_orography(self):
+        """Test that the function matches the least-squares solution
+        returned by _calc_lapse_rate where the orography is constant and
+        the temperature is not."""
+        self.orography[:] = 10.
+        expected = self.calc_lapse_rate_by_point(self.temperature,
+                                                 self.orography)
+        result = self.plugin._calc_lapse_rate_grid(self.temperature,
+                                                   self.orography)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_constant_temp_orog(self):
+        """Test that the function returns DALR where the temperature and
+        orography are both constant."""
+        self.temperature[:] = 280.
+        self.orography[:] = 10.
+        result = self.plugin._calc_lapse_rate_grid(self.temperature,
+                                                   self.orography)
+        self.assertArrayAlmostEqual(result, np.full((3, 3), DALR))
+
+
 class Test_process(IrisTest):
     """Test the LapseRate processing works"""
 
@@ -309,6 +400,16 @@ class Test_process(IrisTest):
                                                   self.orography,
                                                   self.land_sea_mask)
 
+    def test_fails_if_max_workers_less_than_one(self):
+        """Test code raises a Value Error if the number of workers is less
+        than one"""
+        msg = "Number of workers is less than one"
+
+        with self.assertRaisesRegexp(ValueError, msg):
+            LapseRate(max_workers=0).process(self.temperature,
+                                             self.orography,
+                                             self.land_sea_mask)
+
     @ManageWarnings(
         ignored_messages=["invalid value encountered in greater_equal"],
         warning_types=[RuntimeWarning])
@@ -599,6 +700,26 @@ class Test_process(IrisTest):
                                                     self.land_sea_mask)
         self.assertArrayAlmostEqual(result.data, expected_out)
 
+    @ManageWarnings(
+        ignored_messages=["invalid value encountered in greater_equal"],
+        warning_types=[RuntimeWarning])
+    def test_multiple_realizations_with_workers(self):
+        """Test that realizations shared between threads give the same
+        result as processing them in turn."""
+        data = np.zeros((3, 5, 5), dtype=np.float32)
+        for index in range(3):
+            data[index] = -0.005 * index * np.arange(25).reshape(5, 5)
+        temperature = set_up_variable_cube(data, spatial_grid='equalarea')
+        self.orography.data = np.arange(25, dtype=np.float32).reshape(5, 5)
+
+        expected = LapseRate(nbhood_radius=1).process(
+            temperature.copy(), self.orography, self.land_sea_mask)
+        result = LapseRate(nbhood_radius=1, max_workers=3).process(
+            temperature.copy(), self.orography, self.land_sea_mask)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(result.coord('realization'),
+                         expected.coord('realization'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -32,6 +32,7 @@
 
 
 import unittest
+from unittest.mock import patch
 
 from iris.cube import Cube
 from iris.tests import IrisTest
@@ -55,6 +56,21 @@ class Test__init__(IrisTest):
         with self.assertRaisesRegex(ValueError, msg):
             CircularNeighbourhood(sum_or_fraction=sum_or_fraction)
 
+    def test_convolution_backend(self):
+        """Test that a ValueError is raised if an invalid option is passed
+        in for convolution_backend."""
+        msg = "The nonsense convolution backend is invalid"
+        with self.assertRaisesRegex(ValueError, msg):
+            CircularNeighbourhood(convolution_backend="nonsense")
+
+    def test_spans_weighted_mode(self):
+        """Test that a ValueError is raised if the spans backend is requested
+        with a weighted kernel."""
+        msg = "The spans convolution backend can only be used with"
+        with self.assertRaisesRegex(ValueError, msg):
+            CircularNeighbourhood(weighted_mode=True,
+                                  convolution_backend="spans")
+
 
 class Test__repr__(IrisTest):
 
@@ -316,6 +332,136 @@ class Test_apply_circular_kernel(IrisTest):
                 weighted_mode=True).apply_circular_kernel(cube, ranges))
         self.assertArrayAlmostEqual(result.data, expected)
 
+    def test_backends_weighted(self):
+        """Test that the direct and FFT backends give the same result for a
+        weighted kernel over the edge of the domain and multiple times."""
+        cube = set_up_cube(
+            zero_point_indices=[(0, 0, 7, 1), (0, 1, 2, 2)],
+            num_time_points=2)
+        ranges = (3, 3)
+        expected = CircularNeighbourhood(
+            weighted_mode=True, convolution_backend="direct"
+        ).apply_circular_kernel(cube.copy(), ranges)
+        plugin = CircularNeighbourhood(weighted_mode=True,
+                                       convolution_backend="fft")
+        result = plugin.apply_circular_kernel(cube.copy(), ranges)
+        self.assertEqual(plugin.backend_used, "fft")
+        self.assertEqual(result.dtype, expected.dtype)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
+    def test_backends_unweighted(self):
+        """Test that all backends give the same result for an unweighted
+        kernel over the edge of the domain."""
+        cube = set_up_cube(
+            zero_point_indices=[(0, 0, 7, 1), (0, 0, 2, 2)])
+        ranges = (4, 4)
+        expected = CircularNeighbourhood(
+            weighted_mode=False, convolution_backend="direct"
+        ).apply_circular_kernel(cube.copy(), ranges)
+        for backend in ["fft", "spans"]:
+            plugin = CircularNeighbourhood(weighted_mode=False,
+                                           convolution_backend=backend)
+            result = plugin.apply_circular_kernel(cube.copy(), ranges)
+            self.assertEqual(plugin.backend_used, backend)
+            self.assertArrayAlmostEqual(result.data, expected.data)
+
+    def test_fft_without_oaconvolve(self):
+        """Test that the FFT backend gives the same result as the direct
+        method when overlap-add convolution is not available."""
+        cube = set_up_cube(
+            zero_point_indices=[(0, 0, 7, 1), (0, 1, 2, 2)],
+            num_time_points=2)
+        ranges = (3, 3)
+        expected = CircularNeighbourhood(
+            weighted_mode=True, convolution_backend="direct"
+        ).apply_circular_kernel(cube.copy(), ranges)
+        plugin = CircularNeighbourhood(weighted_mode=True,
+                                       convolution_backend="fft")
+        with patch("improver.nbhood.circular_kernel.OACONVOLVE_AVAILABLE",
+                   False):
+            result = plugin.apply_circular_kernel(cube.copy(), ranges)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
+    def test_fast_backends_within_data_range(self):
+        """Test that the fast backends do not return probabilities outside
+        the range of the input data."""
+        cube = set_up_cube(num_grid_points=32)
+        cube.data = (
+            np.arange(cube.data.size).reshape(cube.shape) % 7 == 0).astype(
+                np.float32)
+        for backend in ["fft", "spans"]:
+            plugin = CircularNeighbourhood(weighted_mode=False,
+                                           convolution_backend=backend)
+            result = plugin.apply_circular_kernel(cube.copy(), (6, 6))
+            self.assertTrue(result.data.min() >= 0.)
+            self.assertTrue(result.data.max() <= 1.)
+
+    def test_fast_backend_nan(self):
+        """Test that a ValueError is raised if the FFT backend is requested
+        for data containing NaNs."""
+        cube = set_up_cube()
+        cube.data[0, 0, 7, 7] = np.nan
+        plugin = CircularNeighbourhood(convolution_backend="fft")
+        msg = "The fft convolution backend can only be used with finite"
+        with self.assertRaisesRegex(ValueError, msg):
+            plugin.apply_circular_kernel(cube, (3, 3))
+
+
+class Test__select_backend(IrisTest):
+
+    """Test the automatic selection of the convolution backend."""
+
+    def setUp(self):
+        """Set up data and kernels."""
+        self.data = np.ones((1, 100, 100), dtype=np.float32)
+        self.small_kernel = np.ones((3, 3))
+        self.large_kernel = np.ones((41, 41))
+
+    def test_small_kernel(self):
+        """Test that the direct method is used for a small kernel."""
+        result = CircularNeighbourhood(
+            convolution_backend="auto")._select_backend(
+                self.data, self.small_kernel, (100, 100))
+        self.assertEqual(result, "direct")
+
+    def test_large_weighted_kernel(self):
+        """Test that the FFT method is used for a large weighted kernel."""
+        result = CircularNeighbourhood(
+            convolution_backend="auto")._select_backend(
+                self.data, self.large_kernel, (100, 100))
+        self.assertEqual(result, "fft")
+
+    def test_unweighted_kernel(self):
+        """Test that the span method is used for a medium sized unweighted
+        kernel."""
+        kernel = np.ones((11, 11))
+        result = CircularNeighbourhood(
+            weighted_mode=False, convolution_backend="auto")._select_backend(
+                self.data, kernel, (100, 100))
+        self.assertEqual(result, "spans")
+
+    def test_nan_data(self):
+        """Test that the direct method is used for data containing NaNs."""
+        self.data[0, 0, 0] = np.nan
+        result = CircularNeighbourhood(
+            convolution_backend="auto")._select_backend(
+                self.data, self.large_kernel, (100, 100))
+        self.assertEqual(result, "direct")
+
+    def test_requested_backend(self):
+        """Test that a requested backend is always used."""
+        result = CircularNeighbourhood(
+            convolution_backend="spans", weighted_mode=False)._select_backend(
+                self.data, self.small_kernel, (100, 100))
+        self.assertEqual(result, "spans")
+
+    def test_default_backend(self):
+        """Test that the exact direct method is used by default, whatever
+        the size of the kernel."""
+        result = CircularNeighbourhood()._select_backend(
+            self.data, self.large_kernel, (100, 100))
+        self.assertEqual(result, "direct")
+
 
 class Test_run(IrisTest):
 
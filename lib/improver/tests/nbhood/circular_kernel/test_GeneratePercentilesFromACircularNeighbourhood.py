@@ -47,6 +47,18 @@ from improver.tests.nbhood.nbhood.test_BaseNeighbourhoodProcessing import (
     set_up_cube, set_up_cube_lat_long)
 
 
+class Test__init__(IrisTest):
+
+    """Test the init method."""
+
+    def test_memory_budget(self):
+        """Test that a ValueError is raised for a memory budget that is not
+        positive."""
+        msg = "Invalid memory_budget: must be > 0: 0"
+        with self.assertRaisesRegex(ValueError, msg):
+            GeneratePercentilesFromACircularNeighbourhood(memory_budget=0)
+
+
 class Test__repr__(IrisTest):
 
     """Test the repr method."""
@@ -312,6 +324,49 @@ class Test_pad_and_unpad_cube(IrisTest):
         self.assertArrayAlmostEqual(result.data, expected)
 
 
+class Test_pad_and_unpad_cube_tiled(IrisTest):
+
+    """Test the calculation of neighbourhood percentiles in blocks of
+    rows."""
+
+    def setUp(self):
+        """Set up a cube with varied data and an irregular kernel."""
+        self.cube = set_up_cube(
+            zero_point_indices=((0, 0, 3, 3),),
+            num_grid_points=7)[0, 0, :, :]
+        self.cube.data = np.arange(49, dtype=np.float32).reshape(7, 7) % 5
+        self.kernel = np.array(
+            [[0., 1., 0.],
+             [1., 0., 1.],
+             [0., 0., 1.]])
+
+    def test_matches_pad_and_unpad_cube(self):
+        """Test that the result is identical to that of pad_and_unpad_cube
+        for a range of memory budgets, including one so small that each row
+        is processed separately."""
+        plugin = GeneratePercentilesFromACircularNeighbourhood(
+            percentiles=[0, 10, 50, 90, 100])
+        expected = plugin.pad_and_unpad_cube(self.cube, self.kernel)
+        for memory_budget in [1.e-6, 1.e-4, 1024]:
+            plugin.memory_budget = memory_budget
+            result = plugin.pad_and_unpad_cube_tiled(self.cube, self.kernel)
+            self.assertIsInstance(result, Cube)
+            self.assertEqual(result.dtype, np.float32)
+            self.assertEqual(result.coord_dims(
+                "percentile_over_neighbourhood"), (0,))
+            self.assertArrayEqual(result.data, expected.data)
+
+    def test_single_percentile(self):
+        """Test that a single percentile is returned with a leading
+        percentile dimension."""
+        plugin = GeneratePercentilesFromACircularNeighbourhood(
+            percentiles=50, memory_budget=1.e-6)
+        expected = plugin.pad_and_unpad_cube(self.cube, self.kernel)
+        result = plugin.pad_and_unpad_cube_tiled(self.cube, self.kernel)
+        self.assertEqual(result.shape, (1, 7, 7))
+        self.assertArrayEqual(result.data, expected.data)
+
+
 class Test_run(IrisTest):
 
     """Test the run method within the plugin to calculate percentile values
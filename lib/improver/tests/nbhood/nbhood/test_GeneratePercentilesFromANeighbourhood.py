@@ -69,6 +69,13 @@ class Test__init__(IrisTest):
         with self.assertRaisesRegex(KeyError, msg):
             NBHood(neighbourhood_method, radii)
 
+    def test_memory_budget(self):
+        """
+        Test that the memory budget is passed to the neighbourhood method.
+        """
+        result = NBHood('circular', 10000, memory_budget=16)
+        self.assertEqual(result.neighbourhood_method.memory_budget, 16)
+
 
 class Test__repr__(IrisTest):
 
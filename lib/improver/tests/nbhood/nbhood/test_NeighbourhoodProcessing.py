@@ -65,6 +65,26 @@ class Test__init__(IrisTest):
         with self.assertRaisesRegex(KeyError, msg):
             NBHood(neighbourhood_method, radii)
 
+    def test_convolution_backend(self):
+        """Test that the convolution backend is passed to the circular
+        neighbourhood method, and that the direct method is the default."""
+        result = NBHood('circular', 10000)
+        self.assertEqual(
+            result.neighbourhood_method.convolution_backend, 'direct')
+        result = NBHood('circular', 10000, convolution_backend='fft')
+        self.assertEqual(
+            result.neighbourhood_method.convolution_backend, 'fft')
+
+    def test_accumulation_precision(self):
+        """Test that the accumulation precision is passed to the square
+        neighbourhood method."""
+        result = NBHood('square', 10000)
+        self.assertEqual(
+            result.neighbourhood_method.accumulation_precision, 'float64')
+        result = NBHood('square', 10000, accumulation_precision='longdouble')
+        self.assertEqual(
+            result.neighbourhood_method.accumulation_precision, 'longdouble')
+
 
 class Test__repr__(IrisTest):
 
@@ -131,6 +131,13 @@ class Test__init__(Test_RecursiveFilter):
             RecursiveFilter(alpha_x=None, alpha_y=None,
                             iterations=iterations, edge_width=1)
 
+    def test_max_workers(self):
+        """Test when max_workers value less than unity is given (invalid)."""
+        msg = "Invalid number of workers: must be >= 1: 0"
+        with self.assertRaisesRegex(ValueError, msg):
+            RecursiveFilter(alpha_x=None, alpha_y=None,
+                            iterations=None, max_workers=0)
+
 
 class Test__set_alphas(Test_RecursiveFilter):
 
@@ -302,6 +309,56 @@ class Test__run_recursion(Test_RecursiveFilter):
         self.assertArrayAlmostEqual(unpadded_result, expected_result)
 
 
+class Test__run_recursion_batched(Test_RecursiveFilter):
+
+    """Test the _run_recursion_batched method"""
+
+    def setUp(self):
+        """Set up a stack of padded slices and varying alphas."""
+        super().setUp()
+        cube = iris.util.squeeze(self.cube)
+        self.padded_cube = pad_cube_with_halo(cube, 2, 2)
+        self.alphas_x = RecursiveFilter()._set_alphas(
+            cube, self.alpha_x, None)
+        alphas_y_cube = self.alphas_cube.copy(
+            data=np.linspace(0.1, 0.9, 25, dtype=np.float32).reshape(5, 5))
+        self.alphas_y = RecursiveFilter()._set_alphas(
+            cube, None, alphas_y_cube)
+        self.data = np.stack([self.padded_cube.data,
+                              2.*self.padded_cube.data,
+                              self.padded_cube.data[::-1, :]])
+
+    def reference_result(self, iterations):
+        """Apply the per-slice _run_recursion method to each slice."""
+        expected = []
+        for data_slice in self.data:
+            result = RecursiveFilter()._run_recursion(
+                self.padded_cube.copy(data=data_slice.copy()),
+                self.alphas_x, self.alphas_y, iterations)
+            expected.append(result.data)
+        return np.stack(expected)
+
+    def test_matches_run_recursion(self):
+        """Test that the batched method reproduces the result of applying
+        _run_recursion to each slice exactly."""
+        expected = self.reference_result(2)
+        result = RecursiveFilter()._run_recursion_batched(
+            self.data.copy(), self.alphas_x.data, self.alphas_y.data, 2)
+        self.assertIsInstance(result, np.ndarray)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayEqual(result, expected)
+
+    def test_multiple_workers(self):
+        """Test that the result is unchanged when slices are shared across
+        several threads, including more threads than slices."""
+        expected = self.reference_result(2)
+        for max_workers in [2, 5]:
+            result = RecursiveFilter()._run_recursion_batched(
+                self.data.copy(), self.alphas_x.data, self.alphas_y.data, 2,
+                max_workers=max_workers)
+            self.assertArrayEqual(result, expected)
+
+
 class Test_process(Test_RecursiveFilter):
 
     """Test the process method. """
@@ -381,6 +438,25 @@ class Test_process(Test_RecursiveFilter):
         self.assertEqual(result.data.shape, expected_shape)
         self.assertEqual(result.data.shape, expected_shape)
 
+    def test_multiple_slices_with_workers(self):
+        """Test that each x-y slice of a multi-realization cube is filtered
+        independently and that using several workers gives the same
+        result."""
+        data = np.stack([self.cube.data[0], 2.*self.cube.data[0],
+                         self.cube.data[0].T])
+        cube = set_up_variable_cube(
+            data, name="precipitation_amount", units="kg m^-2 s^-1")
+        single_slice = RecursiveFilter(
+            alpha_x=self.alpha_x, alpha_y=self.alpha_y,
+            iterations=self.iterations).process(self.cube)
+        result = RecursiveFilter(
+            alpha_x=self.alpha_x, alpha_y=self.alpha_y,
+            iterations=self.iterations, max_workers=2).process(cube)
+        self.assertEqual(result.shape, (3, 5, 5))
+        self.assertArrayAlmostEqual(result.data[0], single_slice.data[0])
+        self.assertArrayAlmostEqual(result.data[1],
+                                    2.*single_slice.data[0])
+
     def test_coordinate_reordering_with_different_alphas(self):
         """Test that x and y alphas still apply to the right coordinate when
         the input cube spatial dimensions are (x, y) not (y, x)"""
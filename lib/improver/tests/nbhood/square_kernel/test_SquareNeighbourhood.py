@@ -32,16 +32,16 @@
 
 
 import unittest
+from unittest.mock import patch
 
 import iris
-from iris.coords import CellMethod, DimCoord
+from iris.coords import CellMethod
 from iris.cube import Cube
 from iris.tests import IrisTest
 
 import numpy as np
 
 from improver.nbhood.square_kernel import SquareNeighbourhood
-from improver.wind_calculations.wind_direction import WindDirection
 from improver.tests.nbhood.nbhood.test_NeighbourhoodProcessing import (
     set_up_cube)
 
@@ -58,6 +58,13 @@ class Test__init__(IrisTest):
         with self.assertRaisesRegex(ValueError, msg):
             SquareNeighbourhood(sum_or_fraction=sum_or_fraction)
 
+    def test_accumulation_precision(self):
+        """Test that a ValueError is raised if an invalid option is passed
+        in for accumulation_precision."""
+        msg = "The float32 accumulation precision is invalid"
+        with self.assertRaisesRegex(ValueError, msg):
+            SquareNeighbourhood(accumulation_precision="float32")
+
 
 class Test__repr__(IrisTest):
 
@@ -67,169 +74,131 @@ class Test__repr__(IrisTest):
         """Test that the __repr__ returns the expected string."""
         result = str(SquareNeighbourhood())
         msg = ('<SquareNeighbourhood: weighted_mode: {}, '
-               'sum_or_fraction: {}, re_mask: {}>'.format(
-                   True, "fraction", True))
+               'sum_or_fraction: {}, re_mask: {}, '
+               'accumulation_precision: {}>'.format(
+                   True, "fraction", True, "float64"))
         self.assertEqual(result, msg)
 
 
-class Test_cumulate_array(IrisTest):
+class Test__compensated_cumsum(IrisTest):
 
-    """Test for cumulating an array in the y and x dimension."""
+    """Test the compensated cumulative sum."""
 
     def test_basic(self):
-        """
-        Test that the y-dimension and x-dimension accumulation produces the
-        intended result. A 2d cube is passed in.
-        """
-        data = np.array([[1., 2., 3., 4., 5.],
-                         [2., 4., 6., 8., 10.],
-                         [3., 6., 8., 11., 14.],
-                         [4., 8., 11., 15., 19.],
-                         [5., 10., 14., 19., 24.]])
-        cube = set_up_cube(
-            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
-            num_grid_points=5)
-        cube = iris.util.squeeze(cube)
-        result_cube = SquareNeighbourhood().cumulate_array(cube)
-        self.assertIsInstance(result_cube, Cube)
-        self.assertArrayAlmostEqual(result_cube.data, data)
-
-
-class Test_calculate_neighbourhood(IrisTest):
-
-    """ Test calculating neighbourhood """
+        """Test that cumulating along y then x gives the same result as
+        cumulating with numpy."""
+        data = np.ones((1, 5, 5))
+        data[0, 2, 2] = 0.
+        summed = data.copy()
+        compensation = np.zeros_like(summed)
+        SquareNeighbourhood._compensated_cumsum(summed, compensation, -2)
+        SquareNeighbourhood._compensated_cumsum(summed, compensation, -1)
+        expected = np.cumsum(np.cumsum(data, axis=-2), axis=-1)
+        self.assertArrayEqual(summed + compensation, expected)
+
+    def test_rounding_error_retained(self):
+        """Test that the rounding error of each addition is kept in the
+        compensation array."""
+        summed = np.array([[1.e16, 1., 1., -1.e16]])
+        compensation = np.zeros_like(summed)
+        SquareNeighbourhood._compensated_cumsum(summed, compensation, -1)
+        self.assertArrayEqual(summed[0], [1.e16, 1.e16, 1.e16, 0.])
+        self.assertArrayEqual(compensation[0], [0., 1., 2., 2.])
+        self.assertEqual(summed[0, -1] + compensation[0, -1], 2.)
+
+
+class Test_neighbourhood_totals(IrisTest):
+
+    """Test the calculation of neighbourhood totals from summed-area
+    tables."""
 
     def setUp(self):
-        """Set up cube and expected results for tests."""
-
-        # This array is the output from cumulate_array when a 3x3 array of 1's
-        # with a 0 at the centre point (1,1) is passed in.
-        # A Halo has been added to the data.
-        self.data = np.array(
-            [[0., 0., 0., 0., 0., 0., 0.],
-             [0., 0., 0., 0., 0., 0., 0.],
-             [0., 0., 1., 2., 3., 3., 3.],
-             [0., 0., 2., 3., 5., 5., 5.],
-             [0., 0., 3., 5., 8., 8., 8.],
-             [0., 0., 3., 5., 8., 8., 8.],
-             [0., 0., 3., 5., 8., 8., 8.]])
-        self.cube = Cube(self.data, long_name='test')
-        self.x_coord = DimCoord([0, 1, 2, 3, 4, 5, 6],
-                                standard_name='longitude')
-        self.y_coord = DimCoord([0, 1, 2, 3, 4, 5, 6],
-                                standard_name='latitude')
-        self.cube.add_dim_coord(self.x_coord, 1)
-        self.cube.add_dim_coord(self.y_coord, 0)
-        cells_x = cells_y = 1
-        self.n_rows = 7
-        self.n_columns = 7
-        self.ymax_xmax_disp = (cells_y*self.n_columns) + cells_x
-        self.ymax_xmin_disp = (cells_y*self.n_columns) - cells_x - 1
-        self.ymin_xmax_disp = (-1*(cells_y+1)*self.n_columns) + cells_x
-        self.ymin_xmin_disp = (-1*(cells_y+1)*self.n_columns) - cells_x - 1
+        """Set up a block of two 5x5 slices, each of 1's with a single 0."""
+        self.data = np.ones((2, 5, 5), dtype=np.float32)
+        self.data[0, 2, 2] = 0.
+        self.data[1, 0, 0] = 0.
+        self.expected = np.array(
+            [[[4., 6., 6., 6., 4.],
+              [6., 8., 8., 8., 6.],
+              [6., 8., 8., 8., 6.],
+              [6., 8., 8., 8., 6.],
+              [4., 6., 6., 6., 4.]],
+             [[3., 5., 6., 6., 4.],
+              [5., 8., 9., 9., 6.],
+              [6., 9., 9., 9., 6.],
+              [6., 9., 9., 9., 6.],
+              [4., 6., 6., 6., 4.]]])
 
     def test_basic(self):
-        """ Test that calculate neighbourhood returns correct values """
-        expected = np.array(
-            [[8., 5., -5., -8., -5., -3., 8.],
-             [8., 6., -3., -5., -3., -2., 5.],
-             [5., 7., 3., 5., 3., 2., -5.],
-             [-5., -2., 5., 8., 5., 3., -8.],
-             [-8., -6., 3., 5., 3., 2., -5.],
-             [-5., -4., 2., 3., 2., 1., -3.],
-             [-3., -6., -5., -8., -5., -3., 8.]])
-        result = (
-            SquareNeighbourhood().calculate_neighbourhood(self.cube,
-                                                          self.ymax_xmax_disp,
-                                                          self.ymin_xmax_disp,
-                                                          self.ymin_xmin_disp,
-                                                          self.ymax_xmin_disp,
-                                                          self.n_rows,
-                                                          self.n_columns))
+        """Test that the neighbourhood totals are as expected for all slices
+        of the block, with points outside the domain contributing zero."""
+        result = SquareNeighbourhood.neighbourhood_totals(self.data, 1, 1)
+        self.assertEqual(result.dtype, np.float64)
+        self.assertArrayEqual(result, self.expected)
+
+    def test_longdouble(self):
+        """Test that the same result is obtained when accumulating using
+        longdouble precision."""
+        result = SquareNeighbourhood.neighbourhood_totals(
+            self.data, 1, 1, accumulation_precision="longdouble")
+        self.assertEqual(result.dtype, np.float64)
+        self.assertArrayEqual(result, self.expected)
+
+    def test_rectangular_neighbourhood(self):
+        """Test that different radii in the x and y directions are applied
+        along the correct axes."""
+        data = np.zeros((1, 5, 5))
+        data[0, 2, 2] = 1.
+        expected = np.zeros((1, 5, 5))
+        expected[0, 1:4, :] = 1.
+        result = SquareNeighbourhood.neighbourhood_totals(data, 2, 1)
         self.assertArrayEqual(result, expected)
 
+    def test_complex(self):
+        """Test that complex data are summed as complex numbers."""
+        data = self.data.astype(complex)
+        data[0, 2, 2] = 0.5+0.5j
+        result = SquareNeighbourhood.neighbourhood_totals(data, 1, 1)
+        self.assertEqual(result.dtype, np.complex128)
+        self.assertArrayAlmostEqual(result[0, 2, 2], 8.5+0.5j)
 
-class Test_mean_over_neighbourhood(IrisTest):
 
-    """Test for calculating mean value in neighbourhood."""
+class Test__calculate_neighbourhood_block(IrisTest):
 
-    def setUp(self):
-        """Set up cube and expected results for tests."""
-
-        # This array is the output from cumulate_array when a 3x3 array of 1's
-        # with a 0 at the centre point (1,1) is passed in.
-        # A Halo has been added to the data.
-        self.data = np.array(
-            [[0., 0., 0., 0., 0., 0., 0.],
-             [0., 0., 0., 0., 0., 0., 0.],
-             [0., 0., 1., 2., 3., 3., 3.],
-             [0., 0., 2., 3., 5., 5., 5.],
-             [0., 0., 3., 5., 8., 8., 8.],
-             [0., 0., 3., 5., 8., 8., 8.],
-             [0., 0., 3., 5., 8., 8., 8.]])
-        self.cube = Cube(self.data, long_name='test')
-        self.x_coord = DimCoord([0, 1, 2, 3, 4, 5, 6],
-                                standard_name='longitude')
-        self.y_coord = DimCoord([0, 1, 2, 3, 4, 5, 6],
-                                standard_name='latitude')
-        self.cube.add_dim_coord(self.x_coord, 1)
-        self.cube.add_dim_coord(self.y_coord, 0)
-        self.mask = self.cube.copy()
-        self.mask.rename('mask_data')
-        # This array is the output from cumulate_array when a 3x3 array of 1's
-        # A Halo of missing points has been added to the data.
-        self.mask.data = np.array(
-            [[0., 0., 0., 0., 0., 0., 0.],
-             [0., 0., 0., 0., 0., 0., 0.],
-             [0., 0., 1., 2., 3., 3., 3.],
-             [0., 0., 2., 4., 6., 6., 6.],
-             [0., 0., 3., 6., 9., 9., 9.],
-             [0., 0., 3., 6., 9., 9., 9.],
-             [0., 0., 3., 6., 9., 9., 9.]])
-        self.nan_mask = np.zeros(self.cube.data.shape, dtype=int)
-        self.width = 1
-        self.expected = np.array(
-            [[0.88888889, 0.83333333, 0.83333333, 0.88888889,
-              0.83333333, 1.0, 0.88888889],
-             [0.88888889, 0.85714286, 0.75000000, 0.83333333,
-              0.75000000, 1.0, 0.83333333],
-             [0.83333333, 0.87500000, 0.75000000, 0.83333333,
-              0.75000000, 1.0, 0.83333333],
-             [0.83333333, 0.66666667, 0.83333333, 0.88888889,
-              0.83333333, 1.0, 0.88888889],
-             [0.88888889, 0.85714286, 0.75000000, 0.83333333,
-              0.75000000, 1.0, 0.83333333],
-             [0.83333333, 0.80000000, 1.00000000, 1.00000000,
-              1.00000000, 1.0, 1.00000000],
-             [1.00000000, 1.00000000, 0.83333333, 0.88888889,
-              0.83333333, 1.0, 0.88888889]])
-
-    def test_basic_fraction(self):
-        """Test cube with correct data is produced when mean over
-           neighbourhood is calculated where the sum_or_fraction option is
-           set to "fraction"."""
-        result = SquareNeighbourhood().mean_over_neighbourhood(
-            self.cube, self.mask, self.width, self.width)
-        self.assertIsInstance(result, Cube)
-        self.assertArrayAlmostEqual(result.data, self.expected)
+    """Test the neighbourhood processing of a block of slices."""
 
-    def test_basic_sum(self):
-        """Test cube with correct data is produced when mean over
-           neighbourhood is calculated where the sum_or_fraction option is
-           set to "sum"."""
-        expected = np.array(
-            [[8., 5., -5., -8., -5., -3., 8.],
-             [8., 6., -3., -5., -3., -2., 5.],
-             [5., 7., 3., 5., 3., 2., -5.],
-             [-5., -2., 5., 8., 5., 3., -8.],
-             [-8., -6., 3., 5., 3., 2., -5.],
-             [-5., -4., 2., 3., 2., 1., -3.],
-             [-3., -6., -5., -8., -5., -3., 8.]])
+    def setUp(self):
+        """Set up a block of two slices with different masks."""
+        self.data = np.ones((2, 5, 5), dtype=np.float32)
+        self.mask = np.ones((2, 5, 5), dtype=np.float32)
+        self.mask[1, 2, 2] = 0.
+        self.data[1, 2, 2] = 0.
+
+    def test_fraction(self):
+        """Test that the fraction is calculated using the neighbourhood area
+        of each slice."""
+        result = SquareNeighbourhood()._calculate_neighbourhood_block(
+            self.data, self.mask, 1, 1)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(result, np.ones((2, 5, 5)))
+
+    def test_sum(self):
+        """Test that the sum is returned."""
         result = SquareNeighbourhood(
-            sum_or_fraction="sum").mean_over_neighbourhood(
-                self.cube, self.mask, self.width, self.width)
-        self.assertIsInstance(result, Cube)
-        self.assertArrayAlmostEqual(result.data, expected)
+            sum_or_fraction="sum")._calculate_neighbourhood_block(
+                self.data, self.mask, 1, 1)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(result[0, 2, 2], 9.)
+        self.assertArrayAlmostEqual(result[1, 2, 2], 8.)
+
+    def test_fully_masked_neighbourhood(self):
+        """Test that NaN is returned where the neighbourhood area is
+        zero."""
+        mask = np.zeros((1, 5, 5), dtype=np.float32)
+        data = np.zeros((1, 5, 5), dtype=np.float32)
+        result = SquareNeighbourhood()._calculate_neighbourhood_block(
+            data, mask, 1, 1)
+        self.assertTrue(np.isnan(result).all())
 
 
 class Test_set_up_cubes_to_be_neighbourhooded(IrisTest):
@@ -330,133 +299,17 @@ class Test_set_up_cubes_to_be_neighbourhooded(IrisTest):
         self.assertArrayEqual(result_nan_array, expected_nans)
 
 
-class Test__pad_and_calculate_neighbourhood(IrisTest):
-
-    """Test the padding and calculation of neighbourhood processing."""
-
-    def setUp(self):
-        """Set up a cube."""
-        self.cube = set_up_cube(
-            zero_point_indices=((0, 0, 1, 1),), num_time_points=1,
-            num_grid_points=3)
-        for sliced_cube in self.cube.slices(["projection_y_coordinate",
-                                             "projection_x_coordinate"]):
-            break
-        sliced_cube.remove_coord("realization")
-        sliced_cube.remove_coord("time")
-        self.cube = sliced_cube
-        self.mask = self.cube.copy()
-        self.mask.data[::] = 1.0
-        self.mask.rename('masked_data')
-
-    def test_basic(self):
-        """Test setting up cubes to be padded and then passed into
-        neighbourhood processing."""
-        expected_data = np.array(
-            [[0.85714286, 0.75, 0.83333333, 0.85714286, 0.75, 1., 0.85714286],
-             [0.85714286, 0.8, 0.75, 0.75, 0.5, np.nan, 0.75],
-             [0.75, 0.83333333, 0.75, 0.8, 0.66666667, 1., 0.8],
-             [0.8, 0.5, 0.83333333, 0.85714286, 0.75, 1., 0.85714286],
-             [0.85714286, 0.8, 0.75, 0.75, 0.5, np.nan, 0.75],
-             [0.75, 0.66666667, 1., 1., 1., np.nan, 1.],
-             [1., 1., 0.83333333, 0.85714286, 0.75, 1., 0.85714286]])
-
-        grid_cells_x = grid_cells_y = 1
-        cube = self.cube
-        mask_cube = cube.copy()
-        mask_cube.data[::] = 1.0
-        mask_cube.data[1, 2] = 0.0
-        mask_cube.data[2, 2] = 0.0
-        # set_up_cubes_to_be_neighbourhooded would set masked points to 0.0
-        cube.data[1, 2] = 0.0
-        cube.data[2, 2] = 0.0
-        mask_cube.rename('mask_data')
-
-        nbcube = (
-            SquareNeighbourhood()._pad_and_calculate_neighbourhood(
-                cube, mask_cube, grid_cells_x, grid_cells_y))
-        self.assertIsInstance(nbcube, Cube)
-        self.assertArrayAlmostEqual(nbcube.data, expected_data)
-
-    def test_complex(self):
-        """Test neighbourhooding with an array of complex wind directions"""
-        # set up cube with complex wind directions 30-60 degrees
-        a = 0.54066949+0.82535591j
-        b = 0.56100423+0.80502117j
-        c = 0.5+0.8660254j
-        d = 0.59150635+0.77451905j
-
-        expected_data_complex = np.array(
-            [[a, b, b, a, b, c, a],
-             [a, 0.55228934+0.81373606j, d, b, d, c, b],
-             [b, 0.54575318+0.82027223j, d, b, d, c, b],
-             [b, 0.62200847+0.74401694j, b, a, b, c, a],
-             [a, 0.55228934+0.81373606j, d, b, d, c, b],
-             [b, 0.57320508+0.79282032j, c, c, c, c, c],
-             [c, c, b, a, b, c, a]])
-
-        expected_data_deg = np.array(
-            [[56.77222443, 55.12808228, 55.12808228, 56.77222443, 55.12808228,
-              60.00000381, 56.77222443],
-             [56.77222443, 55.83494186, 52.63074112, 55.12808228, 52.63074112,
-              60.00000381, 55.12808228],
-             [55.12808228, 56.36291885, 52.63074112, 55.12808228, 52.63074112,
-              60.00000381, 55.12808228],
-             [55.12808228, 50.10391235, 55.12808228, 56.77222443, 55.12808228,
-              60.00000381, 56.77222443],
-             [56.77222443, 55.83494186, 52.63074112, 55.12808228, 52.63074112,
-              60.00000381, 55.12808228],
-             [55.12808228, 54.13326263, 60.00000381, 60.00000381, 60.00000381,
-              60.00000381, 60.00000381],
-             [60.00000381, 60.00000381, 55.12808228, 56.77222443, 55.12808228,
-              60.00000381, 56.77222443]],
-            dtype=np.float32
-        )
-
-        self.cube.data = WindDirection.deg_to_complex(30.*self.cube.data + 30.)
-        nbcube = (
-            SquareNeighbourhood()._pad_and_calculate_neighbourhood(
-                self.cube, self.mask, 1, 1))
-        self.assertTrue(np.any(np.iscomplex(nbcube.data)))
-        self.assertArrayAlmostEqual(nbcube.data, expected_data_complex)
-        self.assertArrayAlmostEqual(WindDirection.complex_to_deg(nbcube.data),
-                                    expected_data_deg)
-
-    def test_complex_masked(self):
-        """Test complex neighbourhooding works with a mask"""
+class Test__mask_and_clip(IrisTest):
 
-        mask_cube = self.cube.copy()
-        mask_cube.data[::] = 1.0
-        mask_cube.data[1, 2] = 0.0
-        mask_cube.data[2, 2] = 0.0
-
-        self.cube.data = WindDirection.deg_to_complex(30.*self.cube.data + 30.)
-
-        # set_up_cubes_to_be_neighbourhooded would set masked points to 0.0
-        self.cube.data[1, 2] = 0.0
-        self.cube.data[2, 2] = 0.0
-        mask_cube.rename('mask_data')
-
-        nbcube = (
-            SquareNeighbourhood()._pad_and_calculate_neighbourhood(
-                self.cube, mask_cube, 1, 1))
-        self.assertIsInstance(nbcube, Cube)
-
-
-class Test__remove_padding_and_mask(IrisTest):
-
-    """Test the removal of padding and dealing with masked data."""
+    """Test dealing with masked data and clipping."""
 
     def setUp(self):
         """Set up a cube."""
-        self.padded_cube = set_up_cube(
-            zero_point_indices=((0, 0, 3, 3),), num_time_points=1,
-            num_grid_points=7)
-        self.padded_cube = iris.util.squeeze(self.padded_cube)
         self.cube = set_up_cube(
             zero_point_indices=((0, 0, 1, 1),), num_time_points=1,
             num_grid_points=3)
         self.cube = iris.util.squeeze(self.cube)
+        self.nbcube = self.cube.copy()
         self.mask_cube = self.cube.copy()
         masked_array = np.ones(self.mask_cube.data.shape)
         masked_array[1, 2] = 0
@@ -467,23 +320,20 @@ class Test__remove_padding_and_mask(IrisTest):
         self.no_mask.data = np.ones(self.mask_cube.data.shape)
 
     def test_without_masked_data(self):
-        """Test that removing a halo of points from the data on a cube
-        has worked as intended when the input data is not masked."""
+        """Test that the data are unchanged when the input data is not
+        masked."""
         expected = np.array(
             [[1., 1., 1.],
              [1., 0., 1.],
              [1., 1., 1.]])
-        grid_cells_x = grid_cells_y = 1
-        nbcube = (
-            SquareNeighbourhood()._remove_padding_and_mask(
-                self.padded_cube, self.cube, self.no_mask,
-                grid_cells_x, grid_cells_y))
+        nbcube = SquareNeighbourhood()._mask_and_clip(
+            self.nbcube, self.cube, self.no_mask)
         self.assertIsInstance(nbcube, Cube)
         self.assertArrayAlmostEqual(nbcube.data, expected)
 
     def test_with_masked_data(self):
-        """Test that removing a halo of points from the data on a cube
-        has worked as intended when the input data has an associated mask."""
+        """Test that the mask is applied when the input data has an
+        associated mask."""
         expected = np.array(
             [[1., 1., 1.],
              [1., 0., 1.],
@@ -492,27 +342,22 @@ class Test__remove_padding_and_mask(IrisTest):
             [[False, True, False],
              [False, False, True],
              [False, False, False]])
-        grid_cells_x = grid_cells_y = 1
-        nbcube = (
-            SquareNeighbourhood()._remove_padding_and_mask(
-                self.padded_cube, self.cube, self.mask_cube,
-                grid_cells_x, grid_cells_y))
+        nbcube = SquareNeighbourhood()._mask_and_clip(
+            self.nbcube, self.cube, self.mask_cube)
         self.assertIsInstance(nbcube, Cube)
         self.assertArrayAlmostEqual(nbcube.data.data, expected)
         self.assertArrayAlmostEqual(nbcube.data.mask, expected_mask)
 
     def test_with_masked_data_and_no_remasking(self):
-        """Test that removing halo works correctly with remask=False"""
+        """Test that the mask is not applied with remask=False"""
         expected = np.array(
             [[1., 1., 1.],
              [1., 0., 1.],
              [1., 1., 1.]])
-        grid_cells_x = grid_cells_y = 1
-        nbcube = (
-            SquareNeighbourhood(re_mask=False)._remove_padding_and_mask(
-                self.padded_cube, self.cube, self.mask_cube,
-                grid_cells_x, grid_cells_y))
+        nbcube = SquareNeighbourhood(re_mask=False)._mask_and_clip(
+            self.nbcube, self.cube, self.mask_cube)
         self.assertIsInstance(nbcube, Cube)
+        self.assertFalse(np.ma.is_masked(nbcube.data))
         self.assertArrayAlmostEqual(nbcube.data, expected)
 
     def test_clipping(self):
@@ -521,13 +366,10 @@ class Test__remove_padding_and_mask(IrisTest):
             [[1., 1., 1.],
              [1., 0., 1.],
              [1., 1., 1.]])
-        grid_cells_x = grid_cells_y = 1
-        self.padded_cube.data[2, 2] = 1.1
-        self.padded_cube.data[3, 3] = -0.1
-        nbcube = (
-            SquareNeighbourhood(re_mask=False)._remove_padding_and_mask(
-                self.padded_cube, self.cube, self.mask_cube,
-                grid_cells_x, grid_cells_y))
+        self.nbcube.data[0, 0] = 1.1
+        self.nbcube.data[1, 1] = -0.1
+        nbcube = SquareNeighbourhood(re_mask=False)._mask_and_clip(
+            self.nbcube, self.cube, self.mask_cube)
         self.assertIsInstance(nbcube, Cube)
         self.assertArrayAlmostEqual(nbcube.data, expected)
 
@@ -847,6 +689,18 @@ class Test_run(IrisTest):
         self.assertArrayAlmostEqual(result.data[0, 0], expected_1)
         self.assertArrayAlmostEqual(result.data[0, 1], expected_2)
 
+    def test_multiple_blocks(self):
+        """Test that processing the slices in several blocks gives the same
+        result as processing them in a single block."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2), (0, 1, 1, 2)), num_time_points=2,
+            num_grid_points=5)
+        cube.data[0, 1, 0, 0] = np.nan
+        expected = SquareNeighbourhood().run(cube, self.RADIUS)
+        with patch("improver.nbhood.square_kernel.MAX_POINTS_PER_BLOCK", 25):
+            result = SquareNeighbourhood().run(cube, self.RADIUS)
+        self.assertArrayEqual(result.data, expected.data)
+
     def test_metadata(self):
         """Test that a cube with correct metadata is produced by the run
         method."""
@@ -85,6 +85,23 @@ class Test__init__(IrisTest):
         with self.assertRaisesRegex(InvalidCubeError, msg):
             _ = AdvectField(vel_x, vel_y)
 
+    def test_advection_method(self):
+        """Test the advection method and precision are set"""
+        vel_x = set_up_xy_velocity_cube("advection_velocity_x")
+        vel_y = set_up_xy_velocity_cube("advection_velocity_y")
+        plugin = AdvectField(vel_x, vel_y, advection_method="gather",
+                             single_precision=True)
+        self.assertEqual(plugin.advection_method, "gather")
+        self.assertTrue(plugin.single_precision)
+
+    def test_raises_advection_method_error(self):
+        """Test error is raised if the advection method is not recognised"""
+        vel_x = set_up_xy_velocity_cube("advection_velocity_x")
+        vel_y = set_up_xy_velocity_cube("advection_velocity_y")
+        msg = "Advection method 'nearest' not recognised"
+        with self.assertRaisesRegex(ValueError, msg):
+            _ = AdvectField(vel_x, vel_y, advection_method="nearest")
+
 
 class Test__repr__(IrisTest):
     """Test class representation"""
@@ -230,9 +247,91 @@ class Test__advect_field(IrisTest):
                                     expected_data[~result.mask])
         self.assertArrayEqual(result.mask, expected_mask)
 
+    def test_preallocated_output(self):
+        """Test data are advected into a preallocated output array, giving
+        the same result as a newly allocated array"""
+        expected = self.dummy_plugin._advect_field(
+            self.data, self.grid_vel_x, self.grid_vel_y, self.timestep)
+        adv_field = np.zeros((2,) + self.data.shape, dtype=np.float32)
+        result = self.dummy_plugin._advect_field(
+            self.data, self.grid_vel_x, self.grid_vel_y, self.timestep,
+            adv_field=adv_field[1])
+        self.assertIsInstance(result, np.ma.MaskedArray)
+        self.assertArrayEqual(result.mask, expected.mask)
+        self.assertArrayAlmostEqual(result[~result.mask],
+                                    expected[~expected.mask])
+        self.assertArrayAlmostEqual(adv_field[1][~result.mask],
+                                    expected[~expected.mask])
+        self.assertArrayEqual(adv_field[0], 0.)
+
 
-class Test_process(IrisTest):
-    """Test dimensioned cube data is correctly advected"""
+class Test__gather_advected_field(IrisTest):
+    """Tests for the gather advection method, which should reproduce the
+    results of the scatter method"""
+
+    def setUp(self):
+        """Set up scatter and gather plugins, and random velocities and data
+        on a larger grid"""
+        vel_x = set_up_xy_velocity_cube("advection_velocity_x")
+        vel_y = set_up_xy_velocity_cube("advection_velocity_y")
+        self.scatter_plugin = AdvectField(vel_x, vel_y)
+        self.gather_plugin = AdvectField(vel_x, vel_y,
+                                         advection_method="gather")
+
+        random_state = np.random.RandomState(0)
+        shape = (20, 30)
+        self.grid_vel_x = random_state.uniform(
+            -2., 2., shape).astype(np.float32)
+        self.grid_vel_y = random_state.uniform(
+            -2., 2., shape).astype(np.float32)
+        self.data = random_state.uniform(0., 10., shape)
+        self.timestep = 1.7
+
+    def assert_methods_match(self, data, plugin=None, decimal=5):
+        """Advect the data with both methods and compare the results"""
+        if plugin is None:
+            plugin = self.gather_plugin
+        expected = self.scatter_plugin._advect_field(
+            data, self.grid_vel_x, self.grid_vel_y, self.timestep)
+        result = plugin._advect_field(
+            data, self.grid_vel_x, self.grid_vel_y, self.timestep)
+        self.assertIsInstance(result, np.ma.MaskedArray)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayEqual(result.mask, expected.mask)
+        self.assertArrayAlmostEqual(result[~result.mask],
+                                    expected[~expected.mask],
+                                    decimal=decimal)
+
+    def test_basic(self):
+        """Test the gather method matches the scatter method"""
+        self.assert_methods_match(self.data)
+
+    def test_masked_input(self):
+        """Test masked data propagate to the same points as for the scatter
+        method"""
+        mask = np.zeros(self.data.shape, dtype=bool)
+        mask[5:8, 10:14] = True
+        mask[:, -1] = True
+        self.assert_methods_match(np.ma.MaskedArray(self.data, mask=mask))
+
+    def test_nan_input(self):
+        """Test NaNs propagate to the same points as for the scatter
+        method"""
+        self.data[12, 3] = np.nan
+        self.assert_methods_match(self.data)
+
+    def test_single_precision(self):
+        """Test float32 arithmetic gives the same result to tolerance"""
+        self.gather_plugin.single_precision = True
+        self.assert_methods_match(self.data, decimal=4)
+
+    def test_integer_data(self):
+        """Test integer data are advected as for the scatter method"""
+        self.assert_methods_match(self.data.astype(np.int32))
+
+
+class SetUpPluginAndCube(IrisTest):
+    """Set up a plugin instance and a cube to advect"""
 
     def setUp(self):
         """Set up plugin instance and a cube to advect"""
@@ -264,6 +363,10 @@ class Test_process(IrisTest):
 
         self.timestep = datetime.timedelta(seconds=600)
 
+
+class Test_process(SetUpPluginAndCube):
+    """Test dimensioned cube data is correctly advected"""
+
     def test_basic(self):
         """Test plugin returns a cube"""
         result = self.plugin.process(self.cube, self.timestep)
@@ -479,5 +582,55 @@ class Test_process(IrisTest):
             result.coord("forecast_reference_time").dtype, np.int64)
 
 
+class Test_process_multiple(SetUpPluginAndCube):
+    """Test dimensioned cube data is correctly advected to several time
+    steps"""
+
+    def setUp(self):
+        """Set up plugin instance, a cube to advect and time steps"""
+        super().setUp()
+        self.timesteps = [datetime.timedelta(seconds=seconds)
+                          for seconds in [0, 300, 600]]
+
+    def test_basic(self):
+        """Test plugin returns an iterator of cubes, one per time step"""
+        result = list(self.plugin.process_multiple(self.cube, self.timesteps))
+        self.assertEqual(len(result), 3)
+        for cube in result:
+            self.assertIsInstance(cube, iris.cube.Cube)
+
+    def test_matches_process(self):
+        """Test the advected values and times match those from advecting to
+        each time step separately"""
+        result = self.plugin.process_multiple(self.cube, self.timesteps)
+        for cube, timestep in zip(result, self.timesteps):
+            expected = self.plugin.process(self.cube, timestep)
+            self.assertArrayEqual(np.ma.getmaskarray(cube.data),
+                                  np.ma.getmaskarray(expected.data))
+            self.assertArrayAlmostEqual(cube.data, expected.data)
+            self.assertEqual(cube.coord("time"), expected.coord("time"))
+            self.assertEqual(cube.coord("forecast_period"),
+                             expected.coord("forecast_period"))
+
+    def test_threads(self):
+        """Test advecting the time steps in parallel gives the same results
+        in the same order"""
+        expected = self.plugin.process_multiple(self.cube, self.timesteps)
+        result = self.plugin.process_multiple(self.cube, self.timesteps,
+                                              max_workers=2)
+        for cube, expected_cube in zip(result, expected):
+            self.assertArrayAlmostEqual(cube.data, expected_cube.data)
+            self.assertEqual(cube.coord("forecast_period"),
+                             expected_cube.coord("forecast_period"))
+
+    def test_raises_max_workers_error(self):
+        """Test an error is raised, before any advection, if the number of
+        workers is less than one"""
+        msg = "Number of workers is less than one: 0"
+        with self.assertRaisesRegex(ValueError, msg):
+            self.plugin.process_multiple(self.cube, self.timesteps,
+                                         max_workers=0)
+
+
 if __name__ == '__main__':
     unittest.main()
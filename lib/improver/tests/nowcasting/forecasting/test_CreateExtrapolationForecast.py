@@ -115,6 +115,22 @@ class Test__init__(SetUpCubes):
         self.assertIsInstance(plugin.advection_plugin, AdvectField)
         self.assertEqual(plugin.advection_plugin.metadata_dict, metadata_dict)
 
+    def test_advection_method(self):
+        """Test that the advection method and precision are passed to the
+        advection plugin."""
+        input_cube = self.precip_cube.copy()
+        input_cube.rename("air_temperature")
+        input_cube.units = "K"
+        plugin = CreateExtrapolationForecast(
+            input_cube, self.vel_x, self.vel_y)
+        self.assertEqual(plugin.advection_plugin.advection_method, "scatter")
+        self.assertFalse(plugin.advection_plugin.single_precision)
+        plugin = CreateExtrapolationForecast(
+            input_cube, self.vel_x, self.vel_y, advection_method="gather",
+            single_precision=True)
+        self.assertEqual(plugin.advection_plugin.advection_method, "gather")
+        self.assertTrue(plugin.advection_plugin.single_precision)
+
     def test_no_orographic_enhancement(self):
         """Test what happens if no orographic enhancement cube is provided"""
         message = ("For precipitation fields, orographic enhancement cube "
@@ -238,5 +254,29 @@ class Test_extrapolate(SetUpCubes):
             plugin.extrapolate()
 
 
+class Test_extrapolate_multiple(SetUpCubes):
+    """Test the extrapolate_multiple method."""
+
+    def test_with_orographic_enhancement(self):
+        """Test plugin returns the same forecast cubes, in the same order,
+        as extrapolating to each lead time separately, with orographic
+        enhancement."""
+        plugin = CreateExtrapolationForecast(
+                self.precip_cube, self.vel_x, self.vel_y,
+                orographic_enhancement_cube=self.oe_cube)
+        leadtimes = [0, 10]
+        result = list(plugin.extrapolate_multiple(leadtimes, max_workers=2))
+        self.assertEqual(len(result), 2)
+        for cube, leadtime in zip(result, leadtimes):
+            expected = plugin.extrapolate(leadtime_minutes=leadtime)
+            self.assertArrayEqual(np.ma.getmaskarray(cube.data),
+                                  np.ma.getmaskarray(expected.data))
+            self.assertArrayAlmostEqual(cube.data, expected.data)
+            self.assertEqual(cube.coord("time").points,
+                             expected.coord("time").points)
+            self.assertEqual(cube.coord("forecast_period").points,
+                             leadtime*60)
+
+
 if __name__ == '__main__':
     unittest.main()
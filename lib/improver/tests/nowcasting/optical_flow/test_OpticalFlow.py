@@ -229,6 +229,32 @@ class Test__make_subboxes(OpticalFlowUtilityTest):
         self.assertArrayAlmostEqual(weights, expected_weights)
 
 
+class Test__box_sums(OpticalFlowUtilityTest):
+    """Test _box_sums function"""
+
+    def test_values(self):
+        """Test the field is summed over each box, including the smaller
+        boxes at the edges of the field"""
+        expected_sums = np.array([[4., 12., 9.],
+                                  [0., 3., 3.]])
+        self.plugin.boxsize = 2
+        sums = self.plugin._box_sums(self.plugin.data1)
+        self.assertArrayAlmostEqual(sums, expected_sums)
+
+
+class Test__box_weights(OpticalFlowUtilityTest):
+    """Test _box_weights function"""
+
+    def test_values(self):
+        """Test output weights values match those from _make_subboxes"""
+        expected_weights = np.array([[0.54216664, 0.95606307, 0.917915],
+                                     [0., 0.46473857, 0.54216664]])
+        self.plugin.boxsize = 2
+        weights = self.plugin._box_weights()
+        self.assertEqual(weights.dtype, np.float32)
+        self.assertArrayAlmostEqual(weights, expected_weights)
+
+
 class OpticalFlowDisplacementTest(IrisTest):
     """Class with shared plugin definition for smoothing and regridding
     tests"""
@@ -334,6 +360,18 @@ class Test__smart_smooth(OpticalFlowDisplacementTest):
         umat = self.plugin._smart_smooth(self.umat, self.umat, self.weights)
         self.assertArrayAlmostEqual(umat, expected_umat)
 
+    def test_stacked(self):
+        """Test stacked u and v matrices are smoothed independently"""
+        expected_umat = self.plugin._smart_smooth(
+            self.umat, self.umat, self.weights)
+        expected_vmat = self.plugin._smart_smooth(
+            self.vmat, self.vmat, self.weights)
+        stacked = np.stack([self.umat, self.vmat])
+        umat, vmat = self.plugin._smart_smooth(
+            stacked, stacked, self.weights)
+        self.assertArrayAlmostEqual(umat, expected_umat)
+        self.assertArrayAlmostEqual(vmat, expected_vmat)
+
 
 class Test__smooth_advection_fields(OpticalFlowDisplacementTest):
     """Test smoothing of advection displacements"""
@@ -355,6 +393,18 @@ class Test__smooth_advection_fields(OpticalFlowDisplacementTest):
                                                     self.weights)
         self.assertArrayAlmostEqual(vmat[0], first_row_v)
 
+    def test_stacked(self):
+        """Test stacked u and v matrices give the same results as smoothing
+        each separately"""
+        expected_umat = self.plugin._smooth_advection_fields(
+            self.umat, self.weights)
+        expected_vmat = self.plugin._smooth_advection_fields(
+            self.vmat, self.weights)
+        umat, vmat = self.plugin._smooth_advection_fields(
+            np.stack([self.umat, self.vmat]), self.weights)
+        self.assertArrayAlmostEqual(umat, expected_umat)
+        self.assertArrayAlmostEqual(vmat, expected_vmat)
+
 
 class Test_solve_for_uv(IrisTest):
     """Test solve_for_uv function"""
@@ -378,6 +428,27 @@ class Test_solve_for_uv(IrisTest):
         self.assertAlmostEqual(v, 2.)
 
 
+class Test_solve_for_uv_boxes(IrisTest):
+    """Test solve_for_uv_boxes function"""
+
+    def setUp(self):
+        """Define the sums of the products of the derivatives in two boxes,
+        the first equivalent to the inputs of Test_solve_for_uv and the
+        second singular"""
+        self.sum_xx = np.array([5., 0.])
+        self.sum_xy = np.array([4., 0.])
+        self.sum_yy = np.array([13., 0.])
+        self.sum_xt = np.array([-13., 0.])
+        self.sum_yt = np.array([-30., 0.])
+
+    def test_values(self):
+        """Test output values, which are zero for the singular box"""
+        umat, vmat = OpticalFlow().solve_for_uv_boxes(
+            self.sum_xx, self.sum_xy, self.sum_yy, self.sum_xt, self.sum_yt)
+        self.assertArrayAlmostEqual(umat, [1., 0.])
+        self.assertArrayAlmostEqual(vmat, [2., 0.])
+
+
 class Test_extreme_value_check(IrisTest):
     """Test extreme_value_check function"""
 
@@ -125,6 +125,17 @@ def set_up_orography_cube(data, xo=400000., yo=0.):
     return cube
 
 
+def stack_point_distances(plugin, max_sin_cos):
+    """
+    Stack the distances to the upstream components for every upstream step
+    into a 3D array.
+    """
+    max_roi = plugin._get_max_roi(max_sin_cos)
+    return np.concatenate([
+        plugin._get_point_distance_layer(step, max_roi, max_sin_cos)
+        for step in range(np.amax(max_roi))])
+
+
 class Test__init__(IrisTest):
     """Test the __init__ method"""
 
@@ -456,25 +467,26 @@ class Test__point_orogenh(IrisTest):
         self.assertArrayAlmostEqual(result, expected_values)
 
 
-class Test__get_point_distances(IrisTest):
-    """Test the _get_point_distances function"""
+class Test__get_point_distance_layer(IrisTest):
+    """Test the _get_point_distance_layer function"""
 
     def setUp(self):
         """Define input matrices and plugin"""
-        self.wind_speed = np.ones((3, 4), dtype=np.float32)
         sin_wind_dir = np.linspace(0, 1, 12).reshape(3, 4)
         cos_wind_dir = np.sqrt(1. - np.square(sin_wind_dir))
         self.max_sin_cos = np.where(abs(sin_wind_dir) > abs(cos_wind_dir),
                                     abs(sin_wind_dir), abs(cos_wind_dir))
         self.plugin = OrographicEnhancement()
         self.plugin.grid_spacing_km = 3.
+        self.max_roi = self.plugin._get_max_roi(self.max_sin_cos)
 
     def test_basic(self):
         """Test the function returns an array of the expected shape"""
-        distance = self.plugin._get_point_distances(
-            self.wind_speed, self.max_sin_cos)
+        distance = self.plugin._get_point_distance_layer(
+            1, self.max_roi, self.max_sin_cos)
         self.assertIsInstance(distance, np.ndarray)
-        self.assertSequenceEqual(distance.shape, (5, 3, 4))
+        self.assertSequenceEqual(distance.shape, (1, 3, 4))
+        self.assertEqual(distance.dtype, np.float32)
 
     def test_values_with_nans(self):
         """Test for expected values including nans"""
@@ -490,12 +502,14 @@ class Test__get_point_distances(IrisTest):
         slice_4 = np.full_like(slice_0, np.nan)
         slice_4[0, 0] = 4.
         slice_4[-1, -1] = 4.
-        expected_data = np.array([slice_0, slice_1, slice_2, slice_3, slice_4])
+        expected_data = [slice_0, slice_1, slice_2, slice_3, slice_4]
 
-        distance = self.plugin._get_point_distances(
-            self.wind_speed, self.max_sin_cos)
-        self.assertTrue(
-            np.allclose(distance, expected_data, equal_nan=True))
+        self.assertEqual(np.amax(self.max_roi), len(expected_data))
+        for step, expected in enumerate(expected_data):
+            distance = self.plugin._get_point_distance_layer(
+                step, self.max_roi, self.max_sin_cos)
+            self.assertTrue(
+                np.allclose(distance[0], expected, equal_nan=True))
 
 
 class Test__locate_source_points(IrisTest):
@@ -511,8 +525,7 @@ class Test__locate_source_points(IrisTest):
 
     def test_basic(self):
         """Test location of source points"""
-        distance = self.plugin._get_point_distances(
-            self.wind_speed, self.cos_wind_dir)
+        distance = stack_point_distances(self.plugin, self.cos_wind_dir)
         xsrc, ysrc = self.plugin._locate_source_points(
             self.wind_speed, distance,
             self.sin_wind_dir, self.cos_wind_dir)
@@ -548,8 +561,7 @@ class Test__compute_weighted_values(IrisTest):
         self.wind_speed = np.full((5, 5), 25., dtype=np.float32)
         sin_wind_dir = np.full((5, 5), 0.4, dtype=np.float32)
         cos_wind_dir = np.full((5, 5), np.sqrt(0.84), dtype=np.float32)
-        self.distance = self.plugin._get_point_distances(
-            self.wind_speed, cos_wind_dir)
+        self.distance = stack_point_distances(self.plugin, cos_wind_dir)
         self.xsrc, self.ysrc = self.plugin._locate_source_points(
             self.wind_speed, self.distance, sin_wind_dir, cos_wind_dir)
 
@@ -621,6 +633,37 @@ class Test__add_upstream_component(IrisTest):
         result = self.plugin._add_upstream_component(self.point_orogenh)
         self.assertArrayAlmostEqual(result, expected_values)
 
+    def test_matches_full_stack(self):
+        """Test the result streamed over upstream steps matches that
+        calculated from the full 3D arrays of distances and source points,
+        for varying wind directions"""
+        self.plugin.uwind.data = np.linspace(
+            -20., 20., 25, dtype=np.float32).reshape(5, 5)
+        self.plugin.uwind.data[2, 2] = 0.
+        self.plugin.vwind.data[2, 2] = 0.
+        wind_speed = np.sqrt(np.square(self.plugin.uwind.data) +
+                             np.square(self.plugin.vwind.data))
+        mask = np.isclose(wind_speed, 0)
+        sin_wind_dir = np.zeros(wind_speed.shape, dtype=np.float32)
+        sin_wind_dir[~mask] = (
+            self.plugin.uwind.data[~mask] / wind_speed[~mask])
+        cos_wind_dir = np.zeros(wind_speed.shape, dtype=np.float32)
+        cos_wind_dir[~mask] = (
+            self.plugin.vwind.data[~mask] / wind_speed[~mask])
+        max_sin_cos = np.maximum(abs(sin_wind_dir), abs(cos_wind_dir))
+
+        distance = stack_point_distances(self.plugin, max_sin_cos)
+        xsrc, ysrc = self.plugin._locate_source_points(
+            wind_speed, distance, sin_wind_dir, cos_wind_dir)
+        orogenh, weights = self.plugin._compute_weighted_values(
+            self.point_orogenh, xsrc, ysrc, distance, wind_speed)
+        expected = (self.plugin.efficiency_factor * orogenh[~mask] /
+                    weights[~mask])
+
+        result = self.plugin._add_upstream_component(self.point_orogenh)
+        self.assertArrayAlmostEqual(result[~mask], expected)
+        self.assertEqual(result[2, 2], 0.)
+
 
 class Test__create_output_cubes(IrisTest):
     """Test the _create_output_cubes method"""
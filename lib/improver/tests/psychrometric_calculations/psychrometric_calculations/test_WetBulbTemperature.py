@@ -31,6 +31,8 @@
 """Unit tests for psychrometric_calculations WetBulbTemperature"""
 
 import unittest
+
+import numpy as np
 import iris
 from iris.cube import Cube
 from iris.tests import IrisTest
@@ -209,6 +211,86 @@ class Test_calculate_wet_bulb_temperature(Test_WetBulbTemperature):
         self.assertEqual(result.units, Unit('K'))
 
 
+class Test_calculate_wet_bulb_temperature_data(IrisTest):
+
+    """Test the array based calculation of wet bulb temperatures."""
+
+    def setUp(self):
+        """Set up arrays of temperature (K), relative humidity (fractional)
+        and pressure (Pa)."""
+        self.temperature = np.array([183.15, 260.65, 338.15])
+        self.relative_humidity = np.array([0.6, 0.7, 0.8])
+        self.pressure = np.array([1.E5, 9.9E4, 9.8E4])
+        self.expected = [183.15, 259.883055, 333.960651]
+
+    def test_values(self):
+        """Basic wet bulb temperature calculation."""
+        result = WetBulbTemperature().calculate_wet_bulb_temperature_data(
+            self.temperature, self.relative_humidity, self.pressure)
+        self.assertIsInstance(result, np.ndarray)
+        self.assertEqual(result.dtype, np.float64)
+        self.assertArrayAlmostEqual(result, self.expected)
+
+    def test_float32(self):
+        """Test that float32 inputs are solved and returned as float32."""
+        result = WetBulbTemperature().calculate_wet_bulb_temperature_data(
+            self.temperature.astype(np.float32),
+            self.relative_humidity.astype(np.float32),
+            self.pressure.astype(np.float32))
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(result, self.expected, decimal=3)
+
+    def test_chunking(self):
+        """Test that processing the points in chunks gives the same result
+        as processing them all at once."""
+        plugin = WetBulbTemperature()
+        expected = plugin.calculate_wet_bulb_temperature_data(
+            self.temperature, self.relative_humidity, self.pressure)
+        result = plugin.calculate_wet_bulb_temperature_data(
+            self.temperature, self.relative_humidity, self.pressure,
+            chunk_size=2)
+        self.assertArrayEqual(result, expected)
+
+    def test_multi_dimensional(self):
+        """Test a (realization, height, y, x) input with a pressure array
+        that is broadcast across realizations."""
+        temperature = np.broadcast_to(self.temperature, (2, 2, 1, 3))
+        relative_humidity = np.broadcast_to(self.relative_humidity,
+                                            (2, 2, 1, 3))
+        pressure = np.broadcast_to(self.pressure, (2, 1, 3))
+        result = WetBulbTemperature().calculate_wet_bulb_temperature_data(
+            temperature, relative_humidity, pressure, chunk_size=5)
+        self.assertEqual(result.shape, (2, 2, 1, 3))
+        for index in np.ndindex(2, 2, 1):
+            self.assertArrayAlmostEqual(result[index], self.expected)
+
+    def test_masked_data(self):
+        """Test that masked input points are masked in the output and do not
+        affect the unmasked points."""
+        temperature = np.ma.masked_array(self.temperature,
+                                         mask=[False, True, False])
+        result = WetBulbTemperature().calculate_wet_bulb_temperature_data(
+            temperature, self.relative_humidity, self.pressure)
+        self.assertArrayEqual(result.mask, [False, True, False])
+        self.assertArrayAlmostEqual(result.data[[0, 2]],
+                                    [self.expected[0], self.expected[2]])
+
+    @ManageWarnings(record=True)
+    def test_masked_fill_value_out_of_range(self, warning_list=None):
+        """Test that a fill value beyond the range of the SVP table that is
+        hidden by the mask does not raise the range warning."""
+        temperature = np.ma.masked_array([183.15, -32768., 338.15],
+                                         mask=[False, True, False])
+        result = WetBulbTemperature().calculate_wet_bulb_temperature_data(
+            temperature, self.relative_humidity, self.pressure)
+        warning_msg = "Wet bulb temperatures are"
+        self.assertFalse(any(warning_msg in str(item)
+                             for item in warning_list))
+        self.assertArrayEqual(result.mask, [False, True, False])
+        self.assertArrayAlmostEqual(result.data[[0, 2]],
+                                    [self.expected[0], self.expected[2]])
+
+
 class Test_process(Test_WetBulbTemperature):
 
     """Test the calculation of wet bulb temperatures from temperature,
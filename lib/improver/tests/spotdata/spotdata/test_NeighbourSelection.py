@@ -30,7 +30,11 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Unit tests for NeighbourSelection class"""
 
+import os
 import unittest
+from subprocess import call as Call
+from tempfile import mkdtemp
+
 import numpy as np
 import scipy
 
@@ -529,6 +533,87 @@ class Test_build_KDTree(Test_NeighbourSelection):
         self.assertIsInstance(result, scipy.spatial.ckdtree.cKDTree)
 
 
+class Test_build_KDTree_cached(Test_NeighbourSelection):
+
+    """Test the KDTree nodes are stored in, and reused from, the neighbour
+    cache directory."""
+
+    def setUp(self):
+        """Set up a temporary cache directory."""
+        super().setUp()
+        self.directory = mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary cache directory."""
+        Call(['rm', '-rf', self.directory])
+
+    def test_nodes_stored(self):
+        """Test that the nodes are written to the cache directory, and that
+        the tree matches that built without the cache."""
+        plugin = NeighbourSelection(
+            land_constraint=True, neighbour_cache_directory=self.directory)
+        result, result_nodes = plugin.build_KDTree(self.region_land_mask)
+        expected, expected_nodes = NeighbourSelection(
+            land_constraint=True).build_KDTree(self.region_land_mask)
+
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.assertIsInstance(result, scipy.spatial.ckdtree.cKDTree)
+        self.assertArrayEqual(result.data, expected.data)
+        self.assertArrayEqual(result_nodes, expected_nodes)
+
+    def test_nodes_reused(self):
+        """Test that a second call for the same grid loads the stored nodes
+        as memory-mapped arrays, without writing any new files."""
+        plugin = NeighbourSelection(neighbour_cache_directory=self.directory)
+        _, expected_nodes = plugin.build_KDTree(self.region_land_mask)
+        result, result_nodes = plugin.build_KDTree(self.region_land_mask)
+
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.assertIsInstance(result_nodes, np.memmap)
+        self.assertArrayEqual(result_nodes, expected_nodes)
+        self.assertEqual(result.n, self.region_land_mask.data.size)
+
+    def test_different_land_mask(self):
+        """Test that a different land mask on the same grid is stored
+        separately."""
+        plugin = NeighbourSelection(
+            land_constraint=True, neighbour_cache_directory=self.directory)
+        plugin.build_KDTree(self.region_land_mask)
+        land_mask = self.region_land_mask.copy()
+        land_mask.data[8, 8] = 1
+        _, result_nodes = plugin.build_KDTree(land_mask)
+
+        self.assertEqual(len(os.listdir(self.directory)), 4)
+        self.assertEqual(result_nodes.shape[0], 4)
+
+
+class Test_grid_identity(Test_NeighbourSelection):
+
+    """Test the hash that identifies the KDTree nodes of a grid."""
+
+    def test_repeatable(self):
+        """Test the same grid and points give the same hash."""
+        plugin = NeighbourSelection()
+        indices = np.arange(3)
+        result = plugin.grid_identity(self.region_land_mask, indices, indices)
+        expected = plugin.grid_identity(
+            self.region_land_mask.copy(), indices.copy(), indices.copy())
+        self.assertEqual(result, expected)
+
+    def test_different_grids(self):
+        """Test different grids and included points give different
+        hashes."""
+        plugin = NeighbourSelection()
+        indices = np.arange(3)
+        region = plugin.grid_identity(
+            self.region_land_mask, indices, indices)
+        other_points = plugin.grid_identity(
+            self.region_land_mask, indices, indices + 1)
+        global_grid = plugin.grid_identity(
+            self.global_land_mask, indices, indices)
+        self.assertEqual(len({region, other_points, global_grid}), 3)
+
+
 class Test_select_minimum_dz(Test_NeighbourSelection):
 
     """Test extraction of the minimum height difference points from a provided
@@ -607,6 +692,76 @@ class Test_select_minimum_dz(Test_NeighbourSelection):
                             for item in warning_list))
 
 
+class Test_select_minimum_dz_multiple(Test_NeighbourSelection):
+
+    """Test extraction of the minimum height difference points for many sites
+    at once, which should match select_minimum_dz for each site. As for
+    select_minimum_dz, the nodes are chosen along the line of islands at a y
+    index of 4."""
+
+    def setUp(self):
+        """Set up nodes, and tree query results for three sites."""
+        super().setUp()
+        self.nodes = np.array([[0, 4], [1, 4], [2, 4], [3, 4], [4, 4]])
+        self.distances = np.array([[0, 1, 2, 3, np.inf],
+                                   [0, 1, 2, 3, np.inf],
+                                   [0, 1, np.inf, np.inf, np.inf]])
+        self.indices = np.array([[0, 1, 2, 3, 5],
+                                 [2, 1, 0, 3, 5],
+                                 [4, 2, 5, 5, 5]])
+        self.site_altitudes = np.array([3., 5., 1.])
+
+    def test_basic(self):
+        """Test the neighbour with the minimum vertical displacement is
+        selected for each site, with the nearest chosen in tied cases."""
+        plugin = NeighbourSelection()
+        result, found = plugin.select_minimum_dz_multiple(
+            self.region_orography, self.site_altitudes, self.nodes,
+            self.distances, self.indices)
+        self.assertArrayEqual(result, [[0, 4], [1, 4], [4, 4]])
+        self.assertArrayEqual(found, [True, True, True])
+
+    def test_matches_single_site(self):
+        """Test the result matches select_minimum_dz for each site."""
+        plugin = NeighbourSelection()
+        result, _ = plugin.select_minimum_dz_multiple(
+            self.region_orography, self.site_altitudes, self.nodes,
+            self.distances, self.indices)
+        for index, site_altitude in enumerate(self.site_altitudes):
+            expected = plugin.select_minimum_dz(
+                self.region_orography, site_altitude, self.nodes,
+                self.distances[index], self.indices[index])
+            self.assertArrayEqual(result[index], expected)
+
+    def test_all_invalid_points(self):
+        """Test a site with all nodes beyond the imposed search_radius is
+        flagged as having no neighbour found."""
+        plugin = NeighbourSelection()
+        self.distances[1] = np.inf
+        self.indices[1] = 5
+        _, found = plugin.select_minimum_dz_multiple(
+            self.region_orography, self.site_altitudes, self.nodes,
+            self.distances, self.indices)
+        self.assertArrayEqual(found, [True, False, True])
+
+    @ManageWarnings(record=True)
+    def test_incomplete_search(self, warning_list=None):
+        """Test a warning is raised when the number of nearest neighbours
+        searched for the minimum dz neighbour does not exhaust the
+        search_radius for any site."""
+        plugin = NeighbourSelection(search_radius=6)
+        self.distances[2] = np.arange(5)
+        self.indices[2] = np.arange(5)
+        plugin.select_minimum_dz_multiple(
+            self.region_orography, self.site_altitudes, self.nodes,
+            self.distances, self.indices)
+
+        msg = "Limit on number of nearest neighbours"
+        self.assertTrue(any([msg in str(warning) for warning in warning_list]))
+        self.assertTrue(any(item.category == UserWarning
+                            for item in warning_list))
+
+
 class Test_process(Test_NeighbourSelection):
 
     """Test the process method of the NeighbourSelection class."""
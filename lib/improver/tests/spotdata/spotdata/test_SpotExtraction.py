@@ -32,6 +32,7 @@
 
 import unittest
 import numpy as np
+import dask.array as da
 
 import iris
 from iris.tests import IrisTest
@@ -193,6 +194,140 @@ class Test_extract_diagnostic_data(Test_SpotExtraction):
         self.assertArrayEqual(result, expected)
 
 
+class Test_grid_point_indices(Test_SpotExtraction):
+
+    """Test the calculation of flattened grid point neighbour indices in the
+    native dimension order of the diagnostic cube."""
+
+    def test_xy_ordered_cube(self):
+        """Test indices for a cube that is natively ordered xy."""
+        plugin = SpotExtraction()
+        result = plugin.grid_point_indices(self.coordinate_cube,
+                                           self.diagnostic_cube_xy)
+        self.assertArrayEqual(result, [0, 0, 12, 12])
+        self.assertArrayEqual(
+            self.diagnostic_cube_xy.data.ravel()[result], [0, 0, 12, 12])
+
+    def test_yx_ordered_cube(self):
+        """Test indices for a cube that is natively ordered yx, which index
+        the flattened data without reordering the cube."""
+        plugin = SpotExtraction()
+        self.coordinate_cube.data[1] = [1, 3]
+        result = plugin.grid_point_indices(self.coordinate_cube,
+                                           self.diagnostic_cube_yx)
+        self.assertArrayEqual(result, [0, 16, 12, 12])
+        self.assertArrayEqual(
+            self.diagnostic_cube_yx.data.ravel()[result], [0, 8, 12, 12])
+
+
+class Test_extract_diagnostic_data_multiple(Test_SpotExtraction):
+
+    """Test the extraction of data for all leading dimensions at once."""
+
+    def setUp(self):
+        """Set up a diagnostic cube with a leading realization dimension."""
+        super().setUp()
+        cubes = iris.cube.CubeList()
+        for realization in range(2):
+            cube = self.diagnostic_cube_yx.copy(
+                data=self.diagnostic_cube_yx.data + 100*realization)
+            cube.add_aux_coord(iris.coords.DimCoord(
+                [realization], standard_name='realization', units=1))
+            cubes.append(cube)
+        self.cube = cubes.merge_cube()
+        self.flat_indices = SpotExtraction().grid_point_indices(
+            self.coordinate_cube, self.cube)
+
+    def test_leading_dimension(self):
+        """Test values are extracted for each realization."""
+        plugin = SpotExtraction()
+        expected = [[0, 0, 12, 12], [100, 100, 112, 112]]
+        result = plugin.extract_diagnostic_data_multiple(self.flat_indices,
+                                                         self.cube)
+        self.assertArrayEqual(result, expected)
+
+    def test_non_trailing_spatial_dimensions(self):
+        """Test values are extracted when the spatial dimensions are not
+        the trailing dimensions of the cube."""
+        plugin = SpotExtraction()
+        self.cube.transpose([1, 0, 2])
+        expected = [[0, 0, 12, 12], [100, 100, 112, 112]]
+        flat_indices = plugin.grid_point_indices(self.coordinate_cube,
+                                                 self.cube)
+        result = plugin.extract_diagnostic_data_multiple(flat_indices,
+                                                         self.cube)
+        self.assertArrayEqual(result, expected)
+
+    def test_masked_data(self):
+        """Test the mask is retained for masked data."""
+        plugin = SpotExtraction()
+        self.cube.data = np.ma.masked_equal(self.cube.data, 112)
+        result = plugin.extract_diagnostic_data_multiple(self.flat_indices,
+                                                         self.cube)
+        self.assertIsInstance(result, np.ma.MaskedArray)
+        self.assertArrayEqual(result.mask, [[False, False, False, False],
+                                            [False, False, True, True]])
+
+
+class Test_extract_diagnostic_data_lazy(Test_SpotExtraction):
+
+    """Test the extraction of data from a cube with lazy data, reading only
+    the chunks containing grid point neighbours."""
+
+    def setUp(self):
+        """Set up a diagnostic cube with a leading realization dimension and
+        lazy data split into spatial chunks."""
+        super().setUp()
+        cubes = iris.cube.CubeList()
+        for realization in range(2):
+            cube = self.diagnostic_cube_yx.copy(
+                data=self.diagnostic_cube_yx.data + 100*realization)
+            cube.add_aux_coord(iris.coords.DimCoord(
+                [realization], standard_name='realization', units=1))
+            cubes.append(cube)
+        self.cube = cubes.merge_cube()
+        self.cube.data = da.from_array(self.cube.data, chunks=(1, 2, 2))
+        self.coordinate_cube.data[1] = [1, 3]
+        self.expected = [[0, 8, 12, 12], [100, 108, 112, 112]]
+
+    def test_values(self):
+        """Test values are extracted for each realization, and the cube's
+        data are not realised."""
+        plugin = SpotExtraction()
+        result = plugin.extract_diagnostic_data_lazy(self.coordinate_cube,
+                                                     self.cube)
+        self.assertArrayEqual(result, self.expected)
+        self.assertNotIsInstance(result, np.ma.MaskedArray)
+        self.assertTrue(self.cube.has_lazy_data())
+
+    def test_tile_size(self):
+        """Test the values are unchanged when the sites are grouped into
+        tiles smaller than the chunks."""
+        plugin = SpotExtraction()
+        self.cube.data = self.cube.lazy_data().rechunk((2, 5, 5))
+        result = plugin.extract_diagnostic_data_lazy(
+            self.coordinate_cube, self.cube, tile_size=1)
+        self.assertArrayEqual(result, self.expected)
+
+    def test_xy_ordered_cube(self):
+        """Test extraction from a cube that is natively ordered xy."""
+        plugin = SpotExtraction()
+        self.cube.transpose([0, 2, 1])
+        result = plugin.extract_diagnostic_data_lazy(self.coordinate_cube,
+                                                     self.cube)
+        self.assertArrayEqual(result, self.expected)
+
+    def test_masked_data(self):
+        """Test the mask is retained for masked data."""
+        plugin = SpotExtraction()
+        self.cube.data = da.ma.masked_equal(self.cube.lazy_data(), 108)
+        result = plugin.extract_diagnostic_data_lazy(self.coordinate_cube,
+                                                     self.cube)
+        self.assertIsInstance(result, np.ma.MaskedArray)
+        self.assertArrayEqual(result.mask, [[False, False, False, False],
+                                            [False, True, False, False]])
+
+
 class Test_build_diagnostic_cube(Test_SpotExtraction):
 
     """Test the building of a spot data cube with given inputs."""
@@ -285,5 +420,97 @@ class Test_process(Test_SpotExtraction):
         self.assertEqual(result.coord('realization'), expected_coord)
 
 
+class Test_process_multiple(Test_SpotExtraction):
+
+    """Test the process_multiple method which extracts data for many
+    diagnostics at once, giving the same cubes as the process method."""
+
+    def setUp(self):
+        """Set up a diagnostic cube with leading realization and time
+        dimensions."""
+        super().setUp()
+        cubes = iris.cube.CubeList()
+        for realization in range(2):
+            for time in range(3):
+                cube = self.diagnostic_cube_yx.copy(
+                    data=self.diagnostic_cube_yx.data + 10*time +
+                    100*realization)
+                cube.add_aux_coord(iris.coords.DimCoord(
+                    [realization], standard_name='realization', units=1))
+                cube.add_aux_coord(iris.coords.DimCoord(
+                    [3600*time], standard_name='time',
+                    units='seconds since 1970-01-01 00:00:00'))
+                cube.add_aux_coord(iris.coords.AuxCoord(
+                    [time], standard_name='forecast_period', units='hours'))
+                cubes.append(cube)
+        self.cube = cubes.merge_cube()
+
+    def test_matches_process(self):
+        """Test the cubes match those returned by process for diagnostics
+        with different dimension orders."""
+        plugin = SpotExtraction(grid_metadata_identifier=None)
+        cube_xy = self.cube.copy()
+        cube_xy.transpose([0, 1, 3, 2])
+        diagnostic_cubes = [self.cube, cube_xy, self.diagnostic_cube_xy]
+        result = plugin.process_multiple(self.neighbour_cube,
+                                         diagnostic_cubes)
+        self.assertIsInstance(result, iris.cube.CubeList)
+        self.assertEqual(len(result), 3)
+        for spotdata_cube, diagnostic_cube in zip(result, diagnostic_cubes):
+            expected = plugin.process(self.neighbour_cube, diagnostic_cube)
+            self.assertEqual(spotdata_cube, expected)
+
+    def test_leading_dimensions(self):
+        """Test the leading dimensions and their coordinates are retained
+        ahead of the spot index dimension."""
+        plugin = SpotExtraction(grid_metadata_identifier=None)
+        result, = plugin.process_multiple(self.neighbour_cube, [self.cube])
+        self.assertEqual(result.shape, (2, 3, 4))
+        self.assertEqual(result.coord_dims('spot_index'), (2,))
+        self.assertEqual(result.coord_dims('forecast_period'), (1,))
+        self.assertArrayEqual(result.data[1, 2], [120, 120, 132, 132])
+        self.assertArrayEqual(result.coord('latitude').points, self.latitudes)
+        self.assertDictEqual(result.attributes, self.cube.attributes)
+
+    def test_length_one_leading_dimension(self):
+        """Test a leading dimension of length one becomes a scalar
+        coordinate, as it does in process."""
+        plugin = SpotExtraction(grid_metadata_identifier=None)
+        cube = self.cube[:1, 0]
+        self.assertEqual(cube.shape, (1, 5, 5))
+        expected = plugin.process(self.neighbour_cube, cube)
+        result, = plugin.process_multiple(self.neighbour_cube, [cube])
+        self.assertEqual(result.shape, (4,))
+        self.assertEqual(result.shape, expected.shape)
+        self.assertEqual(
+            [coord.name() for coord in result.coords(dim_coords=True)],
+            [coord.name() for coord in expected.coords(dim_coords=True)])
+        self.assertEqual(result.coord_dims('realization'), ())
+        for coord in expected.coords():
+            self.assertEqual(result.coord(coord.name()), coord)
+            self.assertEqual(result.coord_dims(coord.name()),
+                             expected.coord_dims(coord))
+        self.assertArrayEqual(result.data, expected.data)
+
+    def test_lazy_data(self):
+        """Test a cube with lazy data gives the same cube as process, without
+        its data being realised."""
+        plugin = SpotExtraction(grid_metadata_identifier=None)
+        expected = plugin.process(self.neighbour_cube, self.cube)
+        self.cube.data = da.from_array(self.cube.data, chunks=(1, 1, 3, 3))
+        result, = plugin.process_multiple(self.neighbour_cube, [self.cube])
+        self.assertEqual(result, expected)
+        self.assertTrue(self.cube.has_lazy_data())
+
+    def test_unmatched_cube_error(self):
+        """Test that an error is raised if any diagnostic cube does not have
+        the expected attributes matching."""
+        plugin = SpotExtraction(grid_metadata_identifier='mosg')
+        msg = 'Cubes do not share the metadata identified '
+        with self.assertRaisesRegex(ValueError, msg):
+            plugin.process_multiple(self.neighbour_cube,
+                                    [self.diagnostic_cube_xy])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -260,6 +260,30 @@ class Test_process(IrisTest):
         self.assertArrayAlmostEqual(result.data.data, expected_result_array)
         self.assertArrayEqual(result.data.mask, mask.reshape(1, 1, 5, 5))
 
+    def test_masked_array_fuzzybounds(self):
+        """Test masked arrays are handled correctly with fuzzy bounds. The
+        output is masked where the input is masked, and the input values,
+        rather than fuzzy truth values, are retained beneath the mask."""
+        cube = self.cube.copy()
+        data = np.zeros((1, 5, 5))
+        mask = np.zeros((1, 5, 5))
+        data[0][2][2] = 0.5
+        data[0][0][0] = -32768.0
+        data[0][1][1] = 0.6
+        mask[0][0][0] = 1
+        mask[0][1][1] = 1
+        cube.data = np.ma.MaskedArray(data, mask=mask)
+        bounds = (0.6 * self.fuzzy_factor, 0.6 * (2. - self.fuzzy_factor))
+        plugin = Threshold(0.6, fuzzy_bounds=bounds)
+        result = plugin.process(cube)
+        expected_result_array = np.zeros((1, 1, 5, 5))
+        expected_result_array[0][0][2][2] = 1.0/3.0
+        expected_result_array[0][0][0][0] = -32768.0
+        expected_result_array[0][0][1][1] = 0.6
+        self.assertIsInstance(result.data, np.ma.MaskedArray)
+        self.assertArrayEqual(result.data.mask, mask.reshape(1, 1, 5, 5))
+        self.assertArrayAlmostEqual(result.data.data, expected_result_array)
+
     def test_threshold_fuzzy(self):
         """Test when a point is in the fuzzy threshold area."""
         plugin = Threshold(0.6, fuzzy_factor=self.fuzzy_factor)
@@ -432,6 +456,34 @@ class Test_process(IrisTest):
         self.assertIsInstance(result, Cube)
         self.assertArrayAlmostEqual(result.data, expected_result_array)
 
+    def test_unsorted_thresholds(self):
+        """Test that thresholds provided out of order give the same cube as
+        the sorted thresholds, with an ascending threshold coordinate."""
+        expected = Threshold([0.2, 0.4, 0.6]).process(self.cube)
+        result = Threshold([0.6, 0.2, 0.4]).process(self.cube)
+        self.assertArrayAlmostEqual(result.coord('threshold').points,
+                                    [0.2, 0.4, 0.6])
+        self.assertArrayEqual(result.data, expected.data)
+
+    def test_multiple_thresholds_with_fuzzy_bounds(self):
+        """Test multiple thresholds where only some have fuzzy bounds."""
+        plugin = Threshold([0.2, 0.4], fuzzy_bounds=[(0.2, 0.2), (0.3, 0.6)])
+        result = plugin.process(self.cube)
+        expected_result_array = np.zeros((2, 1, 5, 5))
+        expected_result_array[0][0][2][2] = 1.
+        expected_result_array[1][0][2][2] = 0.75
+        self.assertArrayAlmostEqual(result.data, expected_result_array)
+
+    def test_threshold_equal_to_float32_data(self):
+        """Test that a float32 data value equal to the threshold, once the
+        threshold is represented in float32, does not exceed it."""
+        self.cube.data = self.cube.data.astype(np.float32)
+        self.cube.data[0][2][2] = 0.1
+        result = Threshold([0.1, 0.2]).process(self.cube)
+        expected_result_array = np.zeros((2, 1, 5, 5), dtype=np.float32)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayEqual(result.data, expected_result_array)
+
     def test_threshold_below_fuzzy_miss(self):
         """Test not meeting the threshold in fuzzy below-threshold-mode."""
         plugin = Threshold(
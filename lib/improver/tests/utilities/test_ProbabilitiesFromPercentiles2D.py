@@ -267,6 +267,64 @@ class Test_percentile_interpolation(IrisTest):
         self.assertArrayAlmostEqual(probability_cube.data, expected)
 
 
+class Test_interpolate_percentile_values(IrisTest):
+
+    """Test the array based interpolation of percentile values to
+    probabilities."""
+
+    def setUp(self):
+        """ Set up orography and percentiles arrays """
+        self.thresholds = set_up_threshold_cube().data
+        self.percentiles_cube = set_up_percentiles_cube()
+        self.plugin = ProbabilitiesFromPercentiles2D(
+            self.percentiles_cube, 'new_name')
+
+    def test_values(self):
+        """Test that interpolated probabilities match the reference
+        probabilities."""
+        result = self.plugin.interpolate_percentile_values(
+            self.thresholds, self.percentiles_cube.data)
+        self.assertArrayAlmostEqual(result, set_reference_probabilities())
+
+    def test_leading_dimensions(self):
+        """Test that all leading dimensions are processed together, with the
+        thresholds broadcast across them."""
+        percentile_values = np.stack([self.percentiles_cube.data,
+                                      self.percentiles_cube.data + 100.,
+                                      self.percentiles_cube.data - 100.],
+                                     axis=1)
+        expected = np.array([
+            set_reference_probabilities(),
+            self.plugin.interpolate_percentile_values(
+                self.thresholds - 100., self.percentiles_cube.data),
+            self.plugin.interpolate_percentile_values(
+                self.thresholds + 100., self.percentiles_cube.data)])
+        result = self.plugin.interpolate_percentile_values(
+            self.thresholds, percentile_values)
+        self.assertEqual(result.shape, (3, 4, 4))
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_inverse_ordering(self):
+        """Test values when the percentile values decrease with
+        percentile."""
+        self.percentiles_cube.data = np.flipud(self.percentiles_cube.data)
+        plugin = ProbabilitiesFromPercentiles2D(self.percentiles_cube,
+                                                'new_name')
+        result = plugin.interpolate_percentile_values(
+            self.thresholds, self.percentiles_cube.data)
+        self.assertArrayAlmostEqual(result,
+                                    1. - set_reference_probabilities())
+
+    def test_out(self):
+        """Test that the probabilities are written into a provided array."""
+        out = np.empty((4, 4), dtype=np.float32)
+        result = self.plugin.interpolate_percentile_values(
+            self.thresholds.astype(np.float32), self.percentiles_cube.data,
+            out=out)
+        self.assertIs(result, out)
+        self.assertArrayAlmostEqual(out, set_reference_probabilities())
+
+
 class Test_process(IrisTest):
 
     """Test top level processing function that calls
@@ -350,6 +408,38 @@ class Test_process(IrisTest):
         self.assertEqual(percentiles_cube.coords(dim_coords=True)[0],
                          probability_cube.coords(dim_coords=True)[0])
 
+    def test_values_with_leading_dimension(self):
+        """Test that probabilities are calculated for every slice of a
+        percentiles cube with a leading dimension, and that the percentile
+        dimension need not be first."""
+        percentiles_cube = set_up_percentiles_cube()
+        test_data = np.array([percentiles_cube.data,
+                              percentiles_cube.data + 100.])
+        new_model_coord = build_coordinate([0, 1],
+                                           long_name='leading_coord',
+                                           coord_type=DimCoord,
+                                           data_type=int)
+        input_cube = iris.cube.Cube(
+            test_data, long_name="snow_level", units="m",
+            dim_coords_and_dims=[
+                (new_model_coord, 0),
+                (percentiles_cube.coord('percentiles'), 1),
+                (percentiles_cube.coord('projection_y_coordinate'), 2),
+                (percentiles_cube.coord('projection_x_coordinate'), 3)])
+        input_cube.transpose([2, 0, 1, 3])
+        shifted_probabilities = np.zeros(shape=(16,))
+        shifted_probabilities[6:14] = np.linspace(0., 0.875, 8)
+        shifted_probabilities[14:] = 1.
+        expected = np.array([set_reference_probabilities(),
+                             shifted_probabilities.reshape(4, 4)])
+        expected = np.moveaxis(expected, 0, 1)
+
+        plugin_instance = ProbabilitiesFromPercentiles2D(
+            input_cube, 'new_name')
+        probability_cube = plugin_instance.process(self.orography_cube)
+        self.assertEqual(probability_cube.coord_dims('leading_coord'), (1,))
+        self.assertArrayAlmostEqual(probability_cube.data, expected)
+
     @ManageWarnings(record=True)
     def test_threshold_dimensions(self, warning_list=None):
         """Test threshold data is correctly sliced and processed if eg a
@@ -287,281 +287,133 @@ class Test_check_input_cubes(IrisTest):
             plugin.check_input_cubes(cubes)
 
 
-class Test_invert_condition(IrisTest):
-
-    """Test the invert condition method."""
+def set_up_test_queries():
+    """Set up a small decision tree, in which the node 'fail_0' can be
+    reached by two routes, and fields for testing."""
+    threshold = AuxCoord(1.0, units='mm hr-1')
+    queries = {}
+    for node, succeed, fail, field in (
+            ('start_node', 'success_1', 'fail_0', 'field_a'),
+            ('success_1', 1, 'fail_0', 'field_b'),
+            ('fail_0', 2, 3, 'field_c')):
+        queries[node] = {
+            'succeed': succeed, 'fail': fail,
+            'probability_thresholds': [0.5],
+            'threshold_condition': '>=',
+            'condition_combination': '',
+            'diagnostic_fields': [field],
+            'diagnostic_thresholds': [threshold],
+            'diagnostic_conditions': ['above']}
+    threshold_value = threshold.points.item()
+    fields = {
+        ('field_a', threshold_value): np.array([1.0, 1.0, 0.0, 0.0, np.nan]),
+        ('field_b', threshold_value): np.array([1.0, 0.0, 0.0, 1.0, 1.0]),
+        ('field_c', threshold_value): np.array([0.0, 1.0, 0.0, 1.0, 1.0])}
+    return queries, fields
+
+
+class Test_order_nodes(IrisTest):
+
+    """Test the order_nodes method."""
 
     def test_basic(self):
-        """Test that the invert_condition method returns a tuple of strings."""
-        plugin = WeatherSymbols()
-        tree = plugin.queries
-        result = plugin.invert_condition(tree[list(tree.keys())[0]])
-        self.assertIsInstance(result, tuple)
-        self.assertEqual(len(result), 2)
-        self.assertIsInstance(result[0], str)
-        self.assertIsInstance(result[1], str)
-
-    def test_invert_thresholds_correctly(self):
-        """Test invert_condition inverts thresholds correctly."""
-        plugin = WeatherSymbols()
-        node = {'threshold_condition': '>=', 'condition_combination': ''}
-        possible_inputs = ['>=', '<=', '<', '>']
-        inverse_outputs = ['<', '>', '>=', '<=']
-        for i, val in enumerate(possible_inputs):
-            node['threshold_condition'] = val
-            result = plugin.invert_condition(node)
-            self.assertEqual(result[0], inverse_outputs[i])
-
-    def test_invert_combination_correctly(self):
-        """Test invert_condition inverts combination correctly."""
-        plugin = WeatherSymbols()
-        node = {'threshold_condition': '>=', 'condition_combination': ''}
-        possible_inputs = ['AND', 'OR', '']
-        inverse_outputs = ['OR', 'AND', '']
-        for i, val in enumerate(possible_inputs):
-            node['condition_combination'] = val
-            result = plugin.invert_condition(node)
-            self.assertEqual(result[1], inverse_outputs[i])
+        """Test that each node comes after all the nodes that lead to it."""
+        queries, _ = set_up_test_queries()
+        result = WeatherSymbols.order_nodes(queries, 'start_node')
+        self.assertListEqual(result, ['start_node', 'success_1', 'fail_0'])
 
+    def test_decision_trees(self):
+        """Test that every node of the decision trees is ordered after its
+        parents."""
+        for wxtree in ['high_resolution', 'global']:
+            plugin = WeatherSymbols(wxtree=wxtree)
+            result = plugin.node_order
+            self.assertEqual(result[0], 'heavy_precipitation')
+            for index, node in enumerate(result):
+                for next_node in (plugin.queries[node]['succeed'],
+                                  plugin.queries[node]['fail']):
+                    if not isinstance(next_node, int):
+                        self.assertGreater(result.index(next_node), index)
 
-class Test_construct_condition(IrisTest):
 
-    """Test the construct condition method."""
+class Test_extract_fields(IrisTest):
 
-    def test_basic(self):
-        """Test that the construct_condition method returns a string."""
-        plugin = WeatherSymbols()
-        constraint_value = iris.Constraint(
-            name='probability_of_rainfall_rate_above_threshold',
-            coord_values={'threshold': 0.03})
-        condition = '<'
-        prob_threshold = 0.5
-        gamma = None
-        expected = ("cubes.extract(Constraint(name="
-                    "'probability_of_rainfall_rate_above_threshold',"
-                    " coord_values={'threshold': 0.03})"
-                    ")[0].data < 0.5")
-        result = plugin.construct_condition(constraint_value,
-                                            condition,
-                                            prob_threshold,
-                                            gamma)
-        self.assertIsInstance(result, str)
-        self.assertEqual(result, expected)
-
-    def test_works_with_lists(self):
-        """Test that the construct_condition method works with a list
-        of Constraints. """
-        plugin = WeatherSymbols()
-        constraint_list = [
-            iris.Constraint(
-                name='probability_of_lwe_snowfall_rate_above_threshold',
-                coord_values={'threshold': 0.03}),
-            iris.Constraint(
-                name='probability_of_rainfall_rate_above_threshold',
-                coord_values={'threshold': 0.03})]
-        condition = '<'
-        prob_threshold = 0.5
-        gamma = 0.7
-        expected = ("(cubes.extract(Constraint(name="
-                    "'probability_of_lwe_snowfall_rate_above_threshold', "
-                    "coord_values={'threshold': 0.03}))[0].data - "
-                    "cubes.extract(Constraint(name="
-                    "'probability_of_rainfall_rate_above_threshold', "
-                    "coord_values={'threshold': 0.03}))[0].data * 0.7) < 0.5")
-        result = plugin.construct_condition(constraint_list,
-                                            condition,
-                                            prob_threshold,
-                                            gamma)
-        self.assertIsInstance(result, str)
-        self.assertEqual(result, expected)
-
-
-class Test_format_condition_chain(IrisTest):
-
-    """Test the format_condition_chain method."""
+    """Test the extract_fields method."""
 
     def test_basic(self):
-        """Test that the format_condition_chain method returns a string."""
-        plugin = WeatherSymbols()
-        conditions = ['condition1', 'condition2']
-        expected = '(condition1) & (condition2)'
-        result = plugin.format_condition_chain(conditions)
-        self.assertIsInstance(result, str)
-        self.assertEqual(result, expected)
-
-    def test_works_with_or(self):
-        """Test that the format_condition_chain method works with OR."""
+        """Test that each required field is extracted once."""
+        cubes = set_up_wxcubes()
         plugin = WeatherSymbols()
-        conditions = ['condition1', 'condition2']
-        expected = '(condition1) | (condition2)'
-        result = plugin.format_condition_chain(conditions,
-                                               condition_combination='OR')
-        self.assertIsInstance(result, str)
-        self.assertEqual(result, expected)
+        plugin.check_input_cubes(cubes)
+        result = plugin.extract_fields(cubes)
+        self.assertIsInstance(result, dict)
+        threshold = plugin.queries['heavy_precipitation'][
+            'diagnostic_thresholds'][0].points.item()
+        key = ('probability_of_rainfall_rate_above_threshold', threshold)
+        self.assertIn(key, result)
+        self.assertArrayEqual(result[key], cubes[1].data[2])
+        self.assertEqual(len(set(result)), len(result))
 
 
-class Test_create_condition_chain(IrisTest):
-    """Test the create_condition_chain method."""
+class Test_evaluate_condition(IrisTest):
 
-    def setUp(self):
-        """ Set up queries for testing"""
-        self.dummy_queries = {
-            'significant_precipitation': {
-                'succeed': 'heavy_precipitation',
-                'fail': 'any_precipitation',
-                'probability_thresholds': [0.5, 0.5],
-                'threshold_condition': '>=',
-                'condition_combination': 'OR',
-                'diagnostic_fields':
-                    ['probability_of_rainfall_rate_above_threshold',
-                     'probability_of_lwe_snowfall_rate_above_threshold'],
-                'diagnostic_thresholds': [AuxCoord(0.03, units='mm hr-1'),
-                                          AuxCoord(0.03, units='mm hr-1')],
-                'diagnostic_conditions': ['above', 'above']}
-        }
+    """Test the evaluate_condition method."""
 
-    def test_basic(self):
-        """Test create_condition_chain returns a list of strings."""
-        plugin = WeatherSymbols()
-        test_condition = self.dummy_queries['significant_precipitation']
-        result = plugin.create_condition_chain(test_condition)
-        expected = ("(cubes.extract(iris.Constraint(name='probability_of_"
-                    "rainfall_rate_above_threshold', rainfall_rate=lambda "
-                    "cell: 0.03 * {t_min} < "
-                    "cell < 0.03 * {t_max}))[0].data >= 0.5) | (cubes.extract"
-                    "(iris.Constraint("
-                    "name='probability_of_lwe_snowfall_rate_above_threshold',"
-                    " lwe_snowfall_rate=lambda cell: 0.03 * {t_min} < cell < "
-                    "0.03 * {t_max}))[0].data >= 0.5)".format(
-                        t_min=(1. - WeatherSymbols().float_tolerance),
-                        t_max=(1. + WeatherSymbols().float_tolerance)))
-        self.assertIsInstance(result, list)
-        self.assertIsInstance(result[0], str)
-        self.assertEqual(result[0], expected)
-
-    def test_old_naming_convention(self):
-        """Test create_condition_chain can return conditions using old
-        threshold coordinate name"""
-        plugin = WeatherSymbols()
-        plugin.coord_named_threshold = True
-        test_condition = self.dummy_queries['significant_precipitation']
-        result = plugin.create_condition_chain(test_condition)
-        expected = ("(cubes.extract(iris.Constraint(name='probability_of_"
-                    "rainfall_rate_above_threshold', threshold=lambda "
-                    "cell: 0.03 * {t_min} < "
-                    "cell < 0.03 * {t_max}))[0].data >= 0.5) | (cubes.extract"
-                    "(iris.Constraint("
-                    "name='probability_of_lwe_snowfall_rate_above_threshold',"
-                    " threshold=lambda cell: 0.03 * {t_min} < cell < "
-                    "0.03 * {t_max}))[0].data >= 0.5)".format(
-                        t_min=(1. - WeatherSymbols().float_tolerance),
-                        t_max=(1. + WeatherSymbols().float_tolerance)))
-        self.assertIsInstance(result, list)
-        self.assertIsInstance(result[0], str)
-        self.assertEqual(result[0], expected)
-
-
-class Test_construct_extract_constraint(IrisTest):
-
-    """Test the construct_extract_constraint method ."""
+    def setUp(self):
+        """Set up queries and fields for testing."""
+        self.queries, self.fields = set_up_test_queries()
 
     def test_basic(self):
-        """Test construct_extract_constraint returns a iris.Constraint."""
+        """Test that the condition is evaluated at every point, and that
+        NaN points are flagged as not valid."""
         plugin = WeatherSymbols()
-        diagnostic = 'probability_of_rainfall_rate_above_threshold'
-        threshold = AuxCoord(0.03, units='mm hr-1')
-        result = plugin.construct_extract_constraint(diagnostic,
-                                                     threshold, False)
-        expected = ("iris.Constraint("
-                    "name='probability_of_rainfall_rate_above_threshold', "
-                    "rainfall_rate=lambda cell: 0.03 * {t_min} < cell < "
-                    "0.03 * {t_max})".format(
-                        t_min=(1. - WeatherSymbols().float_tolerance),
-                        t_max=(1. + WeatherSymbols().float_tolerance)))
-        self.assertIsInstance(result, str)
-        self.assertEqual(result, expected)
-
-    def test_old_naming_convention(self):
-        """Test construct_extract_constraint can return a constraint with a
-        "threshold" coordinate"""
+        condition, valid = plugin.evaluate_condition(
+            self.queries['start_node'], self.fields)
+        self.assertArrayEqual(condition, [True, True, False, False, False])
+        self.assertArrayEqual(valid, [True, True, True, True, False])
+
+    def test_points(self):
+        """Test that the condition is only evaluated at the selected
+        points."""
         plugin = WeatherSymbols()
-        diagnostic = 'probability_of_rainfall_rate_above_threshold'
-        threshold = AuxCoord(0.03, units='mm hr-1')
-        result = plugin.construct_extract_constraint(diagnostic,
-                                                     threshold, True)
-        expected = ("iris.Constraint("
-                    "name='probability_of_rainfall_rate_above_threshold', "
-                    "threshold=lambda cell: 0.03 * {t_min} < cell < 0.03 * "
-                    "{t_max})".format(
-                        t_min=(1. - WeatherSymbols().float_tolerance),
-                        t_max=(1. + WeatherSymbols().float_tolerance)))
-        self.assertIsInstance(result, str)
-        self.assertEqual(result, expected)
-
-    def test_list_of_constraints(self):
-        """Test construct_extract_constraint returns a list
-           of iris.Constraint."""
+        points = np.array([False, True, True, False, True])
+        condition, valid = plugin.evaluate_condition(
+            self.queries['start_node'], self.fields, points=points)
+        self.assertArrayEqual(condition, [True, False, False])
+        self.assertArrayEqual(valid, [True, True, False])
+
+    def test_combined_fields(self):
+        """Test the subtraction of two fields with a gamma factor, and the
+        combination of conditions."""
+        threshold = self.queries['start_node']['diagnostic_thresholds'][0]
+        query = {'probability_thresholds': [0., 0.5],
+                 'threshold_condition': '>=',
+                 'condition_combination': 'OR',
+                 'diagnostic_fields': [['field_a', 'field_b'], 'field_c'],
+                 'diagnostic_gamma': [0.5, None],
+                 'diagnostic_thresholds': [[threshold, threshold],
+                                           threshold]}
         plugin = WeatherSymbols()
-        diagnostics = ['probability_of_rainfall_rate_above_threshold',
-                       'probability_of_lwe_snowfall_rate_above_threshold']
-        thresholds = [AuxCoord(0.03, units='mm hr-1'),
-                      AuxCoord(0.03, units='mm hr-1')]
-        result = plugin.construct_extract_constraint(diagnostics,
-                                                     thresholds, False)
-
-        expected = ("iris.Constraint("
-                    "name='probability_of_lwe_snowfall_rate_above_threshold', "
-                    "lwe_snowfall_rate=lambda cell: 0.03 * {t_min} < cell "
-                    "< 0.03 * {t_max})".format(
-                        t_min=(1. - WeatherSymbols().float_tolerance),
-                        t_max=(1. + WeatherSymbols().float_tolerance)))
-        self.assertIsInstance(result, list)
-        self.assertIsInstance(result[1], str)
-        self.assertEqual(len(result), 2)
-        self.assertEqual(result[1], expected)
-
-
-class Test_find_all_routes(IrisTest):
+        condition, valid = plugin.evaluate_condition(query, self.fields)
+        self.assertArrayEqual(condition, [True, True, True, True, True])
+        self.assertArrayEqual(valid, [True, True, True, True, False])
 
-    """Test the find_all_routes method ."""
 
-    def setUp(self):
-        """ Setup testing graph """
-        self.test_graph = {'start_node': ['success_1', 'fail_0'],
-                           'success_1': ['success_1_1', 'fail_1_0'],
-                           'fail_0': ['success_0_1', 3],
-                           'success_1_1': [1, 2],
-                           'fail_1_0': [2, 4],
-                           'success_0_1': [5, 1]}
+class Test_evaluate_decision_tree(IrisTest):
+
+    """Test the evaluate_decision_tree method."""
 
     def test_basic(self):
-        """Test find_all_routes returns a list of expected nodes."""
-        plugin = WeatherSymbols()
-        result = plugin.find_all_routes(self.test_graph,
-                                        'start_node',
-                                        3)
-        expected_nodes = [['start_node',
-                           'fail_0',
-                           3]]
-        self.assertIsInstance(result, list)
-        self.assertListEqual(result, expected_nodes)
-
-    def test_multiple_routes(self):
-        """Test find_all_routes finds multiple routes."""
+        """Test that the points are routed to the expected leaves,
+        including through a node that can be reached by two routes."""
+        queries, fields = set_up_test_queries()
         plugin = WeatherSymbols()
-        result = plugin.find_all_routes(self.test_graph,
-                                        'start_node',
-                                        1)
-        expected_nodes = [['start_node',
-                           'success_1',
-                           'success_1_1',
-                           1],
-                          ['start_node',
-                           'fail_0',
-                           'success_0_1',
-                           1]]
-        self.assertIsInstance(result, list)
-        self.assertListEqual(result, expected_nodes)
+        plugin.queries = queries
+        plugin.start_node = 'start_node'
+        plugin.node_order = plugin.order_nodes(queries, 'start_node')
+        result = plugin.evaluate_decision_tree(
+            fields, np.full(5, -1, dtype=np.int32))
+        self.assertArrayEqual(result, [1, 2, 3, 2, -1])
 
 
 class Test_create_symbol_cube(IrisTest):
@@ -670,6 +522,64 @@ class Test_process(IrisTest):
         self.assertArrayEqual(result.data,
                               expected_wxcode)
 
+    def test_multiple_times(self):
+        """Test process returns the right values for several validity times
+        in a single call, with day and night symbols at different times."""
+        plugin = WeatherSymbols()
+        cubes = iris.cube.CubeList([])
+        for cube in self.cubes:
+            later_cube = cube.copy()
+            later_cube.coord('time').points = (
+                cube.coord('time').points + 11.5)
+            cubes.append(
+                iris.cube.CubeList([cube, later_cube]).concatenate_cube())
+        result = plugin.process(cubes)
+        expected_wxcode = np.array([[1, 3, 5,
+                                     6, 7, 8,
+                                     10, 11, 12],
+                                    [0, 2, 5,
+                                     6, 7, 8,
+                                     9, 11, 12]]).reshape(2, 3, 3)
+        self.assertArrayEqual(result.data, expected_wxcode)
+        self.assertEqual(result.coord_dims('time'), (0,))
+
+    def test_multiple_realizations(self):
+        """Test process returns the right values for several realizations,
+        with the realization dimension leading in the output, whatever its
+        position in the inputs."""
+        plugin = WeatherSymbols()
+        cubes = iris.cube.CubeList([])
+        for cube in self.cubes:
+            realizations = iris.cube.CubeList([])
+            for realization in range(2):
+                realization_cube = cube.copy()
+                realization_cube.add_aux_coord(
+                    AuxCoord(realization, 'realization', units='1'))
+                realizations.append(realization_cube)
+            cubes.append(realizations.merge_cube())
+        cubes[0].transpose([1, 0, 2, 3, 4])
+        result = plugin.process(cubes)
+        expected_wxcode = np.array([1, 3, 5,
+                                    6, 7, 8,
+                                    10, 11, 12]).reshape(1, 3, 3)
+        self.assertArrayEqual(result.data,
+                              np.stack([expected_wxcode, expected_wxcode]))
+        self.assertEqual(result.coord_dims('realization'), (0,))
+        self.assertEqual(result.coord_dims('time'), (1,))
+
+    def test_mismatched_times(self):
+        """Test process raises an error if the inputs are not all at the same
+        validity times."""
+        plugin = WeatherSymbols()
+        later_cube = self.cubes[1].copy()
+        later_cube.coord('time').points = (
+            later_cube.coord('time').points + 1.)
+        self.cubes[1] = iris.cube.CubeList(
+            [self.cubes[1], later_cube]).concatenate_cube()
+        msg = 'does not match the weather symbol shape'
+        with self.assertRaisesRegex(ValueError, msg):
+            plugin.process(self.cubes)
+
     def test_basic_global(self):
         """Test process returns a wxcode cube with right values for global. """
         plugin = WeatherSymbols(wxtree='global')
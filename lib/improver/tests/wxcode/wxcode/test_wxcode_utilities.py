@@ -41,7 +41,7 @@ import numpy as np
 import iris
 from iris.cube import Cube
 from iris.tests import IrisTest
-from iris.coords import DimCoord
+from iris.coords import AuxCoord, DimCoord
 from iris.exceptions import CoordinateNotFoundError
 
 from cf_units import Unit, date2num
@@ -381,6 +381,25 @@ class Test_update_daynight(IrisTest):
         result = update_daynight(cube)
         self.assertArrayEqual(result.data, expected_result)
 
+    def test_wxcode_multiple_realizations(self):
+        """Test the day/night mask is applied to every realization."""
+        cube = set_up_wxcube()
+        cube.data = self.cube_data
+        realizations = iris.cube.CubeList([])
+        for realization in range(2):
+            realization_cube = cube.copy()
+            realization_cube.add_aux_coord(
+                AuxCoord(realization, 'realization', units='1'))
+            realizations.append(realization_cube)
+        cube = realizations.merge_cube()
+        cube.transpose([1, 0, 2, 3])
+        result = update_daynight(cube)
+        expected_result = update_daynight(set_up_wxcube()[0].copy(
+            data=self.cube_data[0])).data
+        self.assertEqual(result.shape, (1, 2, 16, 16))
+        self.assertArrayEqual(result.data[0, 0], expected_result)
+        self.assertArrayEqual(result.data[0, 1], expected_result)
+
     def test_wxcode_time_as_attribute(self):
         """ Test code works if time is an attribute not a dimension """
         cube = set_up_wxcube()
@@ -180,6 +180,49 @@ class BasicThreshold(object):
         ).format(self.thresholds, self.fuzzy_bounds,
                  self.below_thresh_ok)
 
+    @staticmethod
+    def _create_threshold_cube(input_cube, thresholds, truth_values):
+        """
+        Create a cube of thresholded data with a leading threshold dimension
+        from the input cube, without copying the input cube's data.
+
+        Args:
+            input_cube (iris.cube.Cube):
+                The cube that has been thresholded.
+            thresholds (list of floats):
+                The ascending threshold values, in the units of the input
+                cube.
+            truth_values (numpy.ndarray):
+                The thresholded data, with a leading threshold dimension
+                followed by the dimensions of the input cube.
+
+        Returns:
+            cube (iris.cube.Cube):
+                Cube of the thresholded data with the metadata of the input
+                cube and a threshold dimension coordinate.
+        """
+        threshold_coord = iris.coords.DimCoord(
+            np.array(thresholds, dtype=np.float32), long_name="threshold",
+            units=input_cube.units)
+        cube = iris.cube.Cube(
+            truth_values, dim_coords_and_dims=[(threshold_coord, 0)],
+            **input_cube.metadata._asdict())
+
+        new_coords = {}
+        for coord in input_cube.dim_coords:
+            new_coord = coord.copy()
+            dim, = input_cube.coord_dims(coord)
+            cube.add_dim_coord(new_coord, dim + 1)
+            new_coords[id(coord)] = new_coord
+        for coord in input_cube.aux_coords:
+            new_coord = coord.copy()
+            cube.add_aux_coord(new_coord, tuple(
+                dim + 1 for dim in input_cube.coord_dims(coord)))
+            new_coords[id(coord)] = new_coord
+        for factory in input_cube.aux_factories:
+            cube.add_aux_factory(factory.updated(new_coords))
+        return cube
+
     def process(self, input_cube):
         """Convert each point to a truth value based on provided threshold
         values. The truth value may or may not be fuzzy depending upon if
@@ -215,7 +258,6 @@ class BasicThreshold(object):
         if input_cube.dtype.kind == 'i':
             input_cube_dtype = np.float32
 
-        thresholded_cubes = iris.cube.CubeList()
         if np.isnan(input_cube.data).any():
             raise ValueError("Error: NaN detected in input cube data")
 
@@ -228,48 +270,67 @@ class BasicThreshold(object):
                 self.threshold_units.convert(threshold, input_cube.units)
                 for threshold in bounds]) for bounds in self.fuzzy_bounds]
 
-        # apply fuzzy thresholding
-        for threshold, bounds in zip(self.thresholds, self.fuzzy_bounds):
-            cube = input_cube.copy()
-            # if upper and lower bounds are equal, set a deterministic 0/1
-            # probability based on exceedance of the threshold
-            if bounds[0] == bounds[1]:
-                truth_value = cube.data > threshold
-            # otherwise, scale exceedance probabilities linearly between 0/1
-            # at the min/max fuzzy bounds and 0.5 at the threshold value
-            else:
-                truth_value = np.where(
-                    cube.data < threshold,
-                    rescale(cube.data,
-                            data_range=(bounds[0], threshold),
-                            scale_range=(0., 0.5),
-                            clip=True),
-                    rescale(cube.data,
-                            data_range=(threshold, bounds[1]),
-                            scale_range=(0.5, 1.),
-                            clip=True),
-                )
-            truth_value = truth_value.astype(input_cube_dtype)
-            # if requirement is for probabilities below threshold (rather than
-            # above), invert the exceedance probability
-            if self.below_thresh_ok:
-                truth_value = 1. - truth_value
-
-            cube.data = truth_value
-            # Overwrite masked values that have been thresholded
-            # with the un-thresholded values from the input cube.
-            if np.ma.is_masked(cube.data):
-                cube.data[input_cube.data.mask] = (
-                    input_cube.data[input_cube.data.mask])
-            coord = iris.coords.DimCoord(
-                np.array([threshold], dtype=np.float32),
-                long_name="threshold",
-                units=cube.units)
-            cube.add_aux_coord(coord)
-            cube = iris.util.new_axis(cube, 'threshold')
-            thresholded_cubes.append(cube)
-
-        cube, = thresholded_cubes.concatenate()
+        # Process the thresholds in ascending order, as required for the
+        # threshold dimension coordinate.
+        order = np.argsort(self.thresholds, kind='mergesort')
+        thresholds = [self.thresholds[index] for index in order]
+        fuzzy_bounds = [self.fuzzy_bounds[index] for index in order]
+
+        # Fill a single preallocated array with the truth values for every
+        # threshold, rather than building and concatenating a cube for each.
+        data = np.ma.getdata(input_cube.data)
+        truth_values = np.empty((len(thresholds),) + data.shape,
+                                dtype=input_cube_dtype)
+        if all(bounds[0] == bounds[1] for bounds in fuzzy_bounds):
+            # With no fuzziness, the thresholds exceeded by each point are
+            # all those below its value in the sorted thresholds, so one
+            # search gives the truth values for every threshold.
+            compare_dtype = (data.dtype if data.dtype.kind == 'f' else
+                             np.float64)
+            n_exceeded = np.searchsorted(
+                np.array(thresholds, dtype=compare_dtype), data, side='left')
+            for index in range(len(thresholds)):
+                np.less(index, n_exceeded, out=truth_values[index])
+        else:
+            for index, (threshold, bounds) in enumerate(
+                    zip(thresholds, fuzzy_bounds)):
+                # if upper and lower bounds are equal, set a deterministic
+                # 0/1 probability based on exceedance of the threshold
+                if bounds[0] == bounds[1]:
+                    truth_values[index] = data > threshold
+                # otherwise, scale exceedance probabilities linearly between
+                # 0/1 at the min/max fuzzy bounds and 0.5 at the threshold
+                # value
+                else:
+                    truth_values[index] = np.where(
+                        data < threshold,
+                        rescale(data,
+                                data_range=(bounds[0], threshold),
+                                scale_range=(0., 0.5),
+                                clip=True),
+                        rescale(data,
+                                data_range=(threshold, bounds[1]),
+                                scale_range=(0.5, 1.),
+                                clip=True),
+                    )
+
+        # if requirement is for probabilities below threshold (rather than
+        # above), invert the exceedance probability
+        if self.below_thresh_ok:
+            np.subtract(1., truth_values, out=truth_values)
+
+        # Mask the thresholded data where the input is masked, retaining the
+        # un-thresholded values from the input cube beneath the mask.
+        if np.ma.is_masked(input_cube.data):
+            mask = np.ma.getmaskarray(input_cube.data)
+            truth_values[:, mask] = data[mask]
+            truth_values = np.ma.masked_array(
+                truth_values,
+                mask=np.broadcast_to(mask, truth_values.shape).copy())
+
+        cube = self._create_threshold_cube(input_cube, thresholds,
+                                           truth_values)
+
         # TODO: Correct when formal cf-standards exists
         # Force the metadata to temporary conventions
         if self.below_thresh_ok:
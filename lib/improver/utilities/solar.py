@@ -288,15 +288,17 @@ class DayNightMask(object):
         """
         daynight_mask = self._create_daynight_mask(cube)
         dtvalues = iris_time_to_datetime(daynight_mask.coord('time'))
+        # The grid is the same for every time, so only transform it once.
+        trg_crs = lat_lon_determine(daynight_mask[0])
+        if trg_crs is not None:
+            lats, lons = transform_grid_to_lat_lon(daynight_mask[0])
         for i, dtval in enumerate(dtvalues):
             mask_cube = daynight_mask[i]
             day_of_year = (dtval - dt.datetime(dtval.year, 1, 1)).days
             dtval = dtval + dt.timedelta(seconds=dtval.second)
             utc_hour = (dtval.hour * 60.0 + dtval.minute) / 60.0
-            trg_crs = lat_lon_determine(mask_cube)
             # Grids that are not Lat Lon
             if trg_crs is not None:
-                lats, lons = transform_grid_to_lat_lon(mask_cube)
                 solar_el = calc_solar_elevation(lats, lons,
                                                 day_of_year, utc_hour)
                 mask_cube.data[np.where(solar_el > 0.0)] = self.day
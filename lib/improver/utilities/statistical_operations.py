@@ -30,12 +30,10 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Module to contain statistical operations."""
 
-import iris
 import numpy as np
 import warnings
 from iris.exceptions import CoordinateNotFoundError
-from improver.utilities.cube_checker import (find_percentile_coordinate,
-                                             check_cube_coordinates)
+from improver.utilities.cube_checker import find_percentile_coordinate
 
 
 class ProbabilitiesFromPercentiles2D(object):
@@ -109,7 +107,7 @@ class ProbabilitiesFromPercentiles2D(object):
         percentile_slices = percentiles_cube.slices_over(
             self.percentile_coordinate)
         self.inverse_ordering = False
-        first_percentile = percentile_slices.next().data
+        first_percentile = next(percentile_slices).data
         for percentile_values in percentile_slices:
             last_percentile = percentile_values.data
         if (first_percentile - last_percentile >= 0).all():
@@ -144,6 +142,21 @@ class ProbabilitiesFromPercentiles2D(object):
                                         cube.coord(axis='x')]))
         probabilities = cube_format.copy(data=np.full(cube_format.shape,
                                                       np.nan, dtype=float))
+        self._update_probability_metadata(probabilities, threshold_cube)
+        return probabilities
+
+    def _update_probability_metadata(self, probabilities, threshold_cube):
+        """
+        Modify the metadata of a cube created from the percentiles cube, in
+        place, to describe probabilities relative to the threshold cube.
+
+        Args:
+            probabilities (iris.cube.Cube):
+                Cube created from the percentiles cube that will be filled
+                with probabilities.
+            threshold_cube (iris.cube.Cube):
+                The cube of values used as thresholds.
+        """
         try:
             probabilities.remove_coord(self.percentile_coordinate)
         except CoordinateNotFoundError:
@@ -155,17 +168,19 @@ class ProbabilitiesFromPercentiles2D(object):
         probabilities.attributes['relative_to_threshold'] = 'below'
         if self.inverse_ordering is True:
             probabilities.attributes['relative_to_threshold'] = 'above'
-        return probabilities
 
-    def percentile_interpolation(self, threshold_cube, percentiles_cube):
+    def interpolate_percentile_values(self, thresholds, percentile_values,
+                                      out=None):
         """
-        Using a percentiles_cube containing a distinct percentile distribution
-        for each point on a 2-dimensional grid, we can interpolate through each
-        distribution to obtain a probability. The point to which we interpolate
-        is defined by the threshold_cube.
-        Note that the current implementation assumes that in cases of a
-        degenerate percentile distribution, the right most bin in which a
-        threshold value is found is chosen.
+        Interpolate through the percentile distribution at every point to
+        find the probability associated with the threshold at that point.
+        Each point's bracketing percentiles are found with a binary search
+        performed for all points together, relying upon the values at each
+        point being sorted along the percentile axis, in the sense given by
+        inverse_ordering.
+
+        Note that in cases of a degenerate percentile distribution, the right
+        most band in which a threshold value is found is chosen.
 
         e.g.
         ::
@@ -178,6 +193,84 @@ class ProbabilitiesFromPercentiles2D(object):
         approach is not suitable with these degenerate distributions, so be
         wary of the returned probabilities.
 
+        Points with a threshold value below the lowest percentile band are
+        given a probability of 0, and those with a threshold on or above the
+        highest percentile value are given a probability of 1.
+
+        Args:
+            thresholds (numpy.ndarray):
+                Array of "threshold" values, which must be broadcastable to
+                the shape of percentile_values without its leading
+                dimension.
+            percentile_values (numpy.ndarray):
+                Array of values with the percentile dimension leading, e.g.
+                (percentile, realization, y, x).
+
+        Keyword Args:
+            out (numpy.ndarray):
+                Optional array with the shape of percentile_values without its
+                leading dimension into which the probabilities are written.
+
+        Returns:
+            out (numpy.ndarray):
+                Array of probabilities with the shape of percentile_values
+                without its leading dimension.
+        """
+        percentiles = self.percentile_coordinate.points.astype(np.float32)
+        n_percentiles = percentile_values.shape[0]
+        shape = percentile_values.shape[1:]
+        values = np.ma.getdata(percentile_values).astype(
+            np.float32, copy=False).reshape(n_percentiles, -1)
+        thresholds = np.broadcast_to(
+            np.ma.getdata(thresholds), shape).reshape(-1)
+        if out is None:
+            out = np.empty(shape, dtype=np.result_type(thresholds.dtype,
+                                                       np.float32))
+
+        # Find the number of percentile values that each threshold is on or
+        # above (on or below for inverse ordering) using a binary search.
+        low = np.zeros(thresholds.shape, dtype=np.intp)
+        high = np.full(thresholds.shape, n_percentiles, dtype=np.intp)
+        for _ in range(n_percentiles.bit_length()):
+            searching = low < high
+            middle = np.minimum((low + high) // 2, n_percentiles - 1)
+            middle_values = np.take_along_axis(
+                values, middle[np.newaxis], axis=0)[0]
+            in_band = (thresholds <= middle_values if self.inverse_ordering
+                       else thresholds >= middle_values)
+            low = np.where(searching & in_band, middle + 1, low)
+            high = np.where(searching & ~in_band, middle, high)
+        lower = low - 1
+
+        # Where there is no band above the lower bound the upper bound is set
+        # to be the same as the lower bound.
+        lower_index = np.maximum(lower, 0)
+        upper_index = np.minimum(lower_index + 1, n_percentiles - 1)
+        lower_values = np.take_along_axis(
+            values, lower_index[np.newaxis], axis=0)[0]
+        upper_values = np.take_along_axis(
+            values, upper_index[np.newaxis], axis=0)[0]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            denominator = upper_values - lower_values
+            interpolants = (thresholds - lower_values) / denominator
+            probabilities = (
+                percentiles[lower_index] + interpolants *
+                (percentiles[upper_index] - percentiles[lower_index]))
+        probabilities /= np.float32(100.)
+
+        probabilities[(denominator == 0) | np.isinf(interpolants)] = 1.
+        probabilities[lower < 0] = 0.
+        out[...] = probabilities.reshape(shape)
+        return out
+
+    def percentile_interpolation(self, threshold_cube, percentiles_cube):
+        """
+        Using a percentiles_cube containing a distinct percentile distribution
+        for each point on a 2-dimensional grid, we can interpolate through each
+        distribution to obtain a probability. The point to which we interpolate
+        is defined by the threshold_cube.
+
         Examples:
             This simple linear interpolator works in the following way.
 
@@ -197,128 +290,38 @@ class ProbabilitiesFromPercentiles2D(object):
                   [3.0, 3.0, 3.0],
                   [5.0, 5.0, 5.0] ]
 
-            value_bounds::
-
-                [ [[np.nan, np.nan, np.nan],
-                   [np.nan, np.nan, np.nan],
-                   [np.nan, np.nan, np.nan]],
-
-                  [[np.nan, np.nan, np.nan],
-                   [np.nan, np.nan, np.nan],
-                   [np.nan, np.nan, np.nan]] ]
-
-            percentile_bounds::
-
-                [ [[-1, -1, -1],
-                   [-1, -1, -1],
-                   [-1, -1, -1]],
+            1. For each point, find the percentile band in which the threshold
+               lies; here we assume inverse_ordering is False. The thresholds
+               of 1.0 lie below the lowest band, those of 3.0 lie in the band
+               between the 0th and 50th percentiles, and those of 5.0 lie
+               above the highest band.
 
-                  [[-1, -1, -1],
-                   [-1, -1, -1],
-                   [-1, -1, -1]] ]
-
-            1. Create slices over each percentile, and using the correct
-               inequality (as determined by inverse_ordering) compare the
-               threshold values to the percentiles slice; here we assume
-               inverse_ordering is False, so we use >=. We then populate the
-               value_bounds and percentile_bounds arrays.
-
-               Slice 0 - 0th Percentile::
-
-                   [[1.0 >= 2.0, 1.0 >= 2.0, 1.0 >= 2.0],
-                    [3.0 >= 2.0, 3.0 >= 2.0, 3.0 >= 2.0],
-                    [5.0 >= 2.0, 5.0 >= 2.0, 5.0 >= 2.0]]
-
-                   [[False, False, False],
-                    [True, True, True],
-                    [True, True, True]]
-
-               The value_bounds array has a leading dimensions with 2 indices
-               to be associated with the lower [0] and upper bounds [1] about
-               the threshold being considered. The [0] index is populated with
-               the values in the slice of percentiles_cube at every True index.
-               The [1] index is populated with the values in the next slice of
-               percentiles_cube.
-               ::
-
-                   [ [[np.nan, np.nan, np.nan],
-                      [2.0, 2.0, 2.0],
-                      [2.0, 2.0, 2.0]],
-
-                     [[np.nan, np.nan, np.nan],
-                      [4.0, 4.0, 4.0],
-                      [4.0, 4.0, 4.0]] ]
-
-               The percentile_bounds array is also contains a leading dimension
-               associated with lower and upper bounds about the thresholds. The
-               lower bound array is populated at every True index with the
-               current percentile value (0 in this first slice), whilst the
-               upper bound array takes the percentile value from the next
-               slice.
-               ::
-
-                   [ [[-1, -1, -1],
-                      [0, 0, 0],
-                      [0, 0, 0]],
-
-                     [[-1, -1, -1],
-                      [50, 50, 50],
-                      [50, 50, 50]] ]
-
-               After the same process is applied to the next slice, the 50th
-               percentile, we end up with value_bounds::
-
-                   [ [[np.nan, np.nan, np.nan],
-                      [2.0, 2.0, 2.0],
-                      [4.0, 4.0, 4.0]],
-
-                     [[np.nan, np.nan, np.nan],
-                      [4.0, 4.0, 4.0],
-                      [4.0, 4.0, 4.0]] ]
-
-               And percentile bounds::
-
-                   [ [[-1, -1, -1],
-                      [0, 0, 0],
-                      [50, 50, 50]],
-
-                     [[-1, -1, -1],
-                      [50, 50, 50],
-                      [50, 50, 50]] ]
-
-               Note that where there is no availble +1 index in the
-               percentiles_cube the upper bound is set to be the same as the
-               lower_bound.
-
-            2. When all slices have been interated over, the interpolants are
-               calculated using the threshold values and the values_bounds.
+            2. Calculate the interpolants using the threshold values and the
+               values bounding the band.
                ::
 
                    (threshold_cube.data - lower_bound) /
                    (upper_bound - lower_bound)
 
-               If the upper_bound and lower_bound are the same this leads to
-               a divide by 0 calculation, resulting in np.inf as the output.
-
             3. The interpolants are used to calculate the percentile value at
-               each point in the array using the percentile_bounds.
+               each point in the array using the percentiles bounding the
+               band, which are divided by 100 to give a fractional
+               probability.
                ::
 
                    lower_percentile_bound + interpolants *
                    (upper_percentile_bounds - lower_percentile_bounds)
 
-               The percentiles are divided by 100 to give a fractional
-               probability.
+            4. Points below the lowest band are given a probability of 0, and
+               points above the highest band a probability of 1.
+               ::
 
-            5. Any probabilities that are calculated to be np.inf indicate that
-               the associated point has a threshold value that is above
-               the top percentile band. These points are given a probability
-               value of 1.
+                   [ [0.0, 0.0, 0.0],
+                     [0.25, 0.25, 0.25],
+                     [1.0, 1.0, 1.0] ]
 
-            4. Any points for which the calculated probability is np.nan had
-               threshold values that were never found to fall within a
-               percentile band, and so must be below the lowest band. These
-               points are given a probability value of 0.
+            See interpolate_percentile_values for the treatment of degenerate
+            percentile distributions.
 
         Args:
             threshold_cube (iris.cube.Cube):
@@ -337,59 +340,22 @@ class ProbabilitiesFromPercentiles2D(object):
                 between percentile values.
 
         """
-        percentiles = self.percentile_coordinate.points
         probabilities = self.create_probability_cube(percentiles_cube,
                                                      threshold_cube)
-
-        # Create array with additional 2 dimensions to contain upper and lower
-        # bounds.
-        array_shape = [2] + list(threshold_cube.shape)
-        percentile_bounds = np.full(array_shape, -1, dtype=np.float32)
-        value_bounds = np.full(array_shape, np.nan, dtype=np.float32)
-
-        for index, pslice in enumerate(percentiles_cube.slices_over(
-                self.percentile_coordinate)):
-            # Change to use < & > to force degenerate percentile distributions
-            # to use the first percentile band that the threshold falls within.
-            indices = (threshold_cube.data <= pslice.data
-                       if self.inverse_ordering else
-                       threshold_cube.data >= pslice.data)
-            percentile_bounds[0, indices] = percentiles[index]
-            value_bounds[0, indices] = pslice.data[indices]
-            try:
-                # Usual behaviour where the threshold value falls between
-                # values corresponding to percentiles.
-                percentile_bounds[1, indices] = percentiles[index + 1]
-                value_bounds[1, indices] = percentiles_cube[index+1].data[
-                    indices]
-            except IndexError:
-                # Invoked if we have reached the top of the available values.
-                percentile_bounds[1, indices] = percentiles[index]
-                value_bounds[1, indices] = pslice.data[indices]
-
-        with np.errstate(divide='ignore', invalid='ignore'):
-            numerator = (threshold_cube.data - value_bounds[0])
-            denominator = np.diff(value_bounds, n=1, axis=0)[0]
-            interpolants = numerator/denominator
-            interpolants[denominator == 0] = np.inf
-
-        with np.errstate(invalid='ignore'):
-            probabilities.data, = (percentile_bounds[0] + interpolants *
-                                   np.diff(percentile_bounds, n=1, axis=0))
-        probabilities.data = probabilities.data/np.float32(100.)
-
-        above_top_band = np.isinf(interpolants)
-        below_bottom_band = np.isnan(value_bounds[0])
-        probabilities.data[below_bottom_band] = 0.
-        probabilities.data[above_top_band] = 1.
-
+        percentile_dim, = percentiles_cube.coord_dims(
+            self.percentile_coordinate)
+        percentile_values = np.moveaxis(percentiles_cube.data,
+                                        percentile_dim, 0)
+        probabilities.data = self.interpolate_percentile_values(
+            threshold_cube.data, percentile_values)
         return probabilities
 
     def process(self, threshold_cube):
         """
-        Slice the percentiles cube over any non-spatial coordinates
-        (realization, time, etc) if present, and call the percentile
-        interpolation method for each resulting cube.
+        Calculate probabilities for the whole of the percentiles cube,
+        including any non-spatial dimensions (realization, time, etc), in a
+        single pass. The threshold values are broadcast across the
+        non-spatial dimensions.
 
         Args:
             threshold_cube (iris.cube.Cube):
@@ -401,10 +367,6 @@ class ProbabilitiesFromPercentiles2D(object):
                 A cube of probabilities obtained by interpolating between
                 percentile values at the "threshold" level.
         """
-        cube_slices = self.percentiles_cube.slices(
-            [self.percentile_coordinate, self.percentiles_cube.coord(axis='y'),
-             self.percentiles_cube.coord(axis='x')])
-
         if threshold_cube.ndim != 2:
             msg = ('threshold cube has too many ({} > 2) dimensions - slicing '
                    'to x-y grid'.format(threshold_cube.ndim))
@@ -416,17 +378,33 @@ class ProbabilitiesFromPercentiles2D(object):
         if threshold_cube.units != self.percentiles_cube.units:
             threshold_cube.convert_units(self.percentiles_cube.units)
 
-        output_cubes = iris.cube.CubeList()
-        for cube_slice in cube_slices:
-            output_cube = self.percentile_interpolation(threshold_cube,
-                                                        cube_slice)
-            output_cubes.append(output_cube)
+        thresholds = threshold_cube.data
+        if threshold_cube.coord_dims(threshold_cube.coord(axis='y'))[0] != 0:
+            thresholds = thresholds.T
 
-        probability_cube = output_cubes.merge_cube()
+        # Move the percentile dimension to the front and the spatial
+        # dimensions to the end so that the thresholds broadcast.
+        percentile_values = np.moveaxis(
+            self.percentiles_cube.data,
+            [self.percentiles_cube.coord_dims(coord)[0] for coord in
+             [self.percentile_coordinate,
+              self.percentiles_cube.coord(axis='y'),
+              self.percentiles_cube.coord(axis='x')]],
+            [0, -2, -1])
 
         reference_cube = next(self.percentiles_cube.slices_over(
             self.percentile_coordinate))
-
-        probability_cube = check_cube_coordinates(reference_cube,
-                                                  probability_cube)
+        probabilities = np.empty(
+            reference_cube.shape,
+            dtype=np.result_type(thresholds.dtype, np.float32))
+        self.interpolate_percentile_values(
+            thresholds, percentile_values,
+            out=np.moveaxis(
+                probabilities,
+                [reference_cube.coord_dims(reference_cube.coord(axis=axis))[0]
+                 for axis in ['y', 'x']],
+                [-2, -1]))
+
+        probability_cube = reference_cube.copy(data=probabilities)
+        self._update_probability_metadata(probability_cube, threshold_cube)
         return probability_cube
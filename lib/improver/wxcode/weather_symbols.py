@@ -32,10 +32,10 @@
 
 
 import numpy as np
-import copy
 import iris
 
 from improver.utilities.cube_checker import find_threshold_coordinate
+from improver.utilities.cube_manipulation import enforce_coordinate_ordering
 from improver.utilities.cube_metadata import extract_diagnostic_name
 
 from improver.wxcode.wxcode_utilities import (add_wxcode_metadata,
@@ -53,6 +53,9 @@ class WeatherSymbols(object):
     to determine the most representative weather symbol for each site
     defined in the input cubes.
     """
+    # Comparison functions for the threshold conditions in the tree.
+    COMPARISONS = {'>=': np.greater_equal, '<=': np.less_equal,
+                   '>': np.greater, '<': np.less}
 
     def __init__(self, wxtree='high_resolution'):
         """
@@ -78,6 +81,10 @@ class WeatherSymbols(object):
         # flag to indicate whether to expect "threshold" as a coordinate name
         # (defaults to False, checked on reading input cubes)
         self.coord_named_threshold = False
+        # The root of the decision tree and the order in which the nodes
+        # are evaluated, so that each node follows all of its parents.
+        self.start_node = 'heavy_precipitation'
+        self.node_order = self.order_nodes(self.queries, self.start_node)
 
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
@@ -153,269 +160,211 @@ class WeatherSymbols(object):
         return
 
     @staticmethod
-    def invert_condition(test_conditions):
+    def order_nodes(queries, start):
         """
-        Invert a comparison condition to select the negative case.
+        Order the nodes of the decision tree so that every node comes after
+        all of the nodes that lead to it. Nodes can be reached by more than
+        one route, so the tree is treated as a directed acyclic graph.
 
         Args:
-            test_conditions (dict):
-                A single query from the decision tree.
+            queries (dict):
+                The queries that comprise the decision tree.
+            start (string):
+                The node name of the tree root.
+
         Returns:
-            (tuple): tuple containing:
-                **inverted_threshold** (string):
-                    A string representing the inverted comparison.
-                **inverted_combination** (string):
-                    A string representing the inverted combination
+            node_order (list):
+                The names of the nodes reachable from the root, in the order
+                in which they can be evaluated.
         """
-        threshold = test_conditions['threshold_condition']
-        inverted_threshold = threshold
-        if threshold == '>=':
-            inverted_threshold = '<'
-        elif threshold == '<=':
-            inverted_threshold = '>'
-        elif threshold == '<':
-            inverted_threshold = '>='
-        elif threshold == '>':
-            inverted_threshold = '<='
-        combination = test_conditions['condition_combination']
-        inverted_combination = combination
-        if combination == 'OR':
-            inverted_combination = 'AND'
-        elif combination == 'AND':
-            inverted_combination = 'OR'
-
-        return inverted_threshold, inverted_combination
+        visited = set()
+        post_order = []
 
-    @staticmethod
-    def construct_condition(extract_constraint, condition,
-                            probability_threshold, gamma):
-        """
-        Create a string representing a comparison condition.
+        def visit(node):
+            """Add the node to the post order after its descendants."""
+            visited.add(node)
+            for next_node in (queries[node]['succeed'],
+                              queries[node]['fail']):
+                if next_node in queries and next_node not in visited:
+                    visit(next_node)
+            post_order.append(node)
 
-        Args:
-            extract_constraint (string or list of strings):
-                A string, or list of strings, encoding iris constraints
-                that will be used to extract the correct diagnostic cube
-                (by name) from the input cube list and the correct threshold
-                from that cube.
-            condition (string):
-                The condition statement (e.g. greater than, >).
-            probability_threshold (float):
-                The probability value to use in the comparison.
-            gamma (float or None):
-                The gamma factor to multiply one field by when performing
-                a subtraction. This value will be None in the case that
-                extract_constraint is not a list; it will not be used.
-        Returns:
-            string:
-                The formatted condition statement,
-                e.g.::
-
-                  cubes.extract(Constraint(
-                          name='probability_of_rainfall_rate_above_threshold',
-                          coord_values={'threshold': 0.03})
-                                )[0].data < 0.5)
-        """
-        if isinstance(extract_constraint, list):
-            return ('(cubes.extract({})[0].data - cubes.extract({})[0].data * '
-                    '{}) {} {}'.format(
-                        extract_constraint[0], extract_constraint[1], gamma,
-                        condition, probability_threshold))
-        return 'cubes.extract({})[0].data {} {}'.format(
-            extract_constraint, condition, probability_threshold)
+        visit(start)
+        return post_order[::-1]
 
     @staticmethod
-    def format_condition_chain(conditions, condition_combination='AND'):
+    def _ordered_data(cube):
         """
-        Chain individual condition statements together in a format that
-        numpy.where can use to make a series of comparisons.
+        Return the data of a cube with any realization and time dimensions
+        leading, in the same order as enforce_coordinate_ordering, without
+        modifying the cube.
 
         Args:
-            conditions (list):
-                A list of conditions to be combined into a single comparison
-                statement.
-            condition_combination (string):
-                The method by which multiple conditions should be combined,
-                either AND or OR.
-        Returns:
-            string:
-                A string formatted as a chain of conditions suitable for use in
-                a numpy.where statement.
-                e.g. (condition 1) & (condition 2)
-        """
-        if condition_combination == 'OR':
-            return ('({}) | '*len(conditions)).format(*conditions).strip('| ')
-        return ('({}) & '*len(conditions)).format(*conditions).strip('& ')
-
-    def create_condition_chain(self, test_conditions):
-        """
-        A wrapper to call the construct_condition function for all the
-        conditions specified in a single query.
+            cube (iris.cube.Cube):
+                A cube of a single diagnostic field.
 
-        Args:
-            test_conditions (dict):
-                A query from the decision tree.
         Returns:
-            condition_chain (list):
-                A list of strings that describe the conditions comprising the
-                query.
-                e.g.::
-
-                  [
-                    "(cubes.extract(Constraint(
-                          name='probability_of_rainfall_rate_above_threshold',
-                          coord_values={'threshold': 0.03})
-                     )[0].data < 0.5) |
-                     (cubes.extract(Constraint(
-                          name=
-                          'probability_of_lwe_snowfall_rate_above_threshold',
-                          coord_values={'threshold': 0.03})
-                     )[0].data < 0.5)"
-                  ]
+            numpy.ndarray:
+                A view of the cube data with the dimensions reordered.
         """
-        conditions = []
-        loop = 0
-        for diagnostic, p_threshold, d_threshold in zip(
-                test_conditions['diagnostic_fields'],
-                test_conditions['probability_thresholds'],
-                test_conditions['diagnostic_thresholds']):
-
-            gamma = test_conditions.get('diagnostic_gamma')
-            if gamma is not None:
-                gamma = gamma[loop]
-            loop += 1
-
-            extract_constraint = WeatherSymbols.construct_extract_constraint(
-                diagnostic, d_threshold, self.coord_named_threshold)
-            conditions.append(
-                WeatherSymbols.construct_condition(
-                    extract_constraint, test_conditions['threshold_condition'],
-                    p_threshold, gamma))
-        condition_chain = WeatherSymbols.format_condition_chain(
-            conditions,
-            condition_combination=test_conditions['condition_combination'])
-        return [condition_chain]
-
-    @staticmethod
-    def construct_extract_constraint(
-            diagnostics, thresholds, coord_named_threshold):
+        leading_dims = [cube.coord_dims(coord_name)[0]
+                        for coord_name in ["realization", "time"]
+                        if cube.coords(coord_name, dim_coords=True)]
+        order = leading_dims + [dim for dim in range(cube.ndim)
+                                if dim not in leading_dims]
+        return cube.data.transpose(order)
+
+    def extract_fields(self, cubes):
         """
-        Construct an iris constraint.
+        Extract each diagnostic field and threshold required by the decision
+        tree from the input cubes once, so that the nodes that share a field
+        do not extract it again. Any realization and time dimensions are
+        placed first, so that fields from cubes with different dimension
+        orders can be compared point by point.
 
         Args:
-            diagnostics (string or list of strings):
-                The names of the diagnostics to be extracted from the CubeList.
-            thresholds (iris.AuxCoord or list of iris.AuxCoord):
-                All thresholds within the given diagnostic cubes that are
-                needed, including units.  Note these are NOT coords from the
-                original cubes, just constructs to associate units with values.
-            coord_named_threshold (bool):
-                If true, use old naming convention for threshold coordinates
-                (coord.long_name=threshold).  Otherwise extract threshold
-                coordinate name from diagnostic name
+            cubes (iris.cube.CubeList):
+                A CubeList containing the input diagnostic cubes, which have
+                been checked by check_input_cubes.
 
         Returns:
-            string or list of strings:
-                String, or list of strings, encoding iris cube constraints.
+            fields (dict):
+                Dictionary of the data arrays, keyed by a tuple of the
+                diagnostic name and threshold value.
         """
-        def _constraint_string(diagnostic, threshold_name, threshold_val):
-            """
-            Return iris constraint as a string for deferred creation of the
-            lambda functions.
-            Args:
-                diagnostic (string):
-                    Name of diagnostic
-                threshold_name (string):
-                    Name of threshold coordinate on input cubes
-                threshold_val (float):
-                    Value of threshold coordinate required
-            Returns: (string)
-            """
-            return ("iris.Constraint(name='{diagnostic}', {threshold_name}="
-                    "lambda cell: {threshold_val} * {float_min} < cell < "
-                    "{threshold_val} * {float_max})".format(
-                        diagnostic=diagnostic, threshold_name=threshold_name,
-                        threshold_val=threshold_val,
-                        float_min=(1. - WeatherSymbols().float_tolerance),
-                        float_max=(1. + WeatherSymbols().float_tolerance)))
-
-        # if input is list, loop over and return a list of strings
-        if isinstance(diagnostics, list):
-            constraints = []
+        fields = {}
+        for query in self.queries.values():
+            diagnostics = expand_nested_lists(query, 'diagnostic_fields')
+            thresholds = expand_nested_lists(query, 'diagnostic_thresholds')
             for diagnostic, threshold in zip(diagnostics, thresholds):
-                if coord_named_threshold:
+                threshold_val = threshold.points.item()
+                if (diagnostic, threshold_val) in fields:
+                    continue
+                if self.coord_named_threshold:
                     threshold_coord_name = "threshold"
                 else:
                     threshold_coord_name = extract_diagnostic_name(diagnostic)
-                threshold_val = threshold.points.item()
-                constraints.append(
-                    _constraint_string(
-                        diagnostic, threshold_coord_name, threshold_val))
-            return constraints
-
-        # otherwise, return a string
-        if coord_named_threshold:
-            threshold_coord_name = "threshold"
-        else:
-            threshold_coord_name = extract_diagnostic_name(diagnostics)
-        threshold_val = thresholds.points.item()
-        constraint = _constraint_string(
-            diagnostics, threshold_coord_name, threshold_val)
-        return constraint
-
-    @staticmethod
-    def find_all_routes(graph, start, end, route=None):
+                constraint = iris.Constraint(
+                    name=diagnostic,
+                    coord_values={threshold_coord_name: (
+                        lambda cell, threshold_val=threshold_val: (
+                            threshold_val * (1. - self.float_tolerance) <
+                            cell <
+                            threshold_val * (1. + self.float_tolerance)))})
+                fields[(diagnostic, threshold_val)] = self._ordered_data(
+                    cubes.extract(constraint)[0])
+        return fields
+
+    def evaluate_condition(self, query, fields, points=None):
         """
-        Function to trace all routes through the decision tree.
+        Evaluate the condition of a single query, comparing each field with
+        its threshold once.
 
         Args:
-            graph (dict):
-                A dictionary that describes each node in the tree,
-                e.g. {<node_name>: [<succeed_name>, <fail_name>]}
-            start (string):
-                The node name of the tree root (currently always
-                heavy_precipitation).
-            end (int):
-                The weather symbol code to which we are tracing all routes.
-            route (list):
-                A list of node names found so far.
+            query (dict):
+                A single query from the decision tree.
+            fields (dict):
+                The data arrays returned by extract_fields.
+
+        Keyword Args:
+            points (numpy.ndarray or None):
+                Boolean array, of the same shape as the fields, selecting
+                the points at which the condition is evaluated. If None,
+                the condition is evaluated at every point.
 
         Returns:
-            routes (list):
-                A list of node names that defines the route from the tree root
-                to the weather symbol leaf (end of chain).
+            (tuple): tuple containing:
+                **condition** (numpy.ndarray):
+                    Boolean array that is True where the condition is
+                    satisfied.
+                **valid** (numpy.ndarray):
+                    Boolean array that is True where all of the data used
+                    in the condition are finite. Points that are not valid
+                    follow neither branch of the query.
+            If points is given, both arrays are one dimensional and contain
+            only the selected points.
+        """
+        comparison = self.COMPARISONS[query['threshold_condition']]
+
+        def _data(key):
+            """Return the field for a key at the selected points."""
+            data = fields[key]
+            return data if points is None else data[points]
+
+        condition = None
+        valid = None
+        for index, (diagnostic, p_threshold, d_threshold) in enumerate(zip(
+                query['diagnostic_fields'], query['probability_thresholds'],
+                query['diagnostic_thresholds'])):
+            if isinstance(diagnostic, list):
+                gamma = query['diagnostic_gamma'][index]
+                data = (
+                    _data((diagnostic[0], d_threshold[0].points.item())) -
+                    _data((diagnostic[1], d_threshold[1].points.item())) *
+                    gamma)
+            else:
+                data = _data((diagnostic, d_threshold.points.item()))
+            test = comparison(data, p_threshold)
+            if condition is None:
+                condition = test
+                valid = np.isfinite(data)
+                continue
+            if query['condition_combination'] == 'OR':
+                condition = condition | test
+            else:
+                condition = condition & test
+            valid = valid & np.isfinite(data)
+        return condition, valid
+
+    def evaluate_decision_tree(self, fields, symbols):
+        """
+        Route every point down the decision tree, evaluating the condition
+        of each node once at the points that reach it, and set the weather
+        symbol at each leaf reached.
 
-        References:
-            Method based upon Python Patterns - Implementing Graphs essay
-            https://www.python.org/doc/essays/graphs/
+        Args:
+            fields (dict):
+                The data arrays returned by extract_fields.
+            symbols (numpy.ndarray):
+                Integer array, initialised to -1, to be filled with the
+                weather symbols. Points that do not reach a leaf, e.g.
+                because of NaN data, are left unchanged.
+
+        Returns:
+            symbols (numpy.ndarray):
+                The array of weather symbols.
         """
-        if route is None:
-            route = []
-
-        route = route + [start]
-        if start == end:
-            return [route]
-        if start not in graph.keys():
-            return []
-
-        routes = []
-        for node in graph[start]:
-            if node not in route:
-                newroutes = WeatherSymbols.find_all_routes(graph, node, end,
-                                                           route)
-                routes.extend(newroutes)
-        return routes
+        reaching_node = {self.start_node: np.ones(symbols.shape, dtype=bool)}
+        for node in self.node_order:
+            at_node = reaching_node.pop(node)
+            query = self.queries[node]
+            condition, valid = self.evaluate_condition(
+                query, fields, points=at_node)
+            succeed = np.zeros_like(at_node)
+            succeed[at_node] = condition
+            fail = np.zeros_like(at_node)
+            fail[at_node] = ~condition & valid
+            for next_node, follows_branch in ((query['succeed'], succeed),
+                                              (query['fail'], fail)):
+                if isinstance(next_node, int):
+                    symbols[follows_branch] = next_node
+                elif next_node in reaching_node:
+                    reaching_node[next_node] |= follows_branch
+                else:
+                    reaching_node[next_node] = follows_branch
+        return symbols
 
     @staticmethod
     def create_symbol_cube(cube):
         """
         Create an empty weather_symbol cube initialised with -1 across the
-        grid.
+        grid, with any realization and time dimensions leading.
 
         Args:
             cube (iris.cube.Cube):
-                An x-y slice of one of the input cubes, used to define the
-                size of the weather symbol grid.
+                One of the input cubes, used to define the size of the
+                weather symbol grid and any realization and time
+                dimensions.
         Returns:
             symbols (iris.cube.Cube):
                 A cube full of -1 values, with suitable metadata to describe
@@ -423,12 +372,13 @@ class WeatherSymbols(object):
         """
         threshold_coord = find_threshold_coordinate(cube)
         cube_format = next(cube.slices_over([threshold_coord]))
-        symbols = cube_format.copy(data=np.full(cube_format.data.shape, -1,
+        symbols = cube_format.copy(data=np.full(cube_format.shape, -1,
                                                 dtype=np.int))
 
         symbols.remove_coord(threshold_coord)
         symbols.attributes.pop('relative_to_threshold')
         symbols = add_wxcode_metadata(symbols)
+        enforce_coordinate_ordering(symbols, ["realization", "time"])
 
         return symbols
 
@@ -436,6 +386,10 @@ class WeatherSymbols(object):
         """Apply the decision tree to the input cubes to produce weather
         symbol output.
 
+        The input cubes may contain several validity times and realizations,
+        in which case the decision tree is evaluated for all of them at once
+        and the day/night mask is calculated once for each validity time.
+
         Args:
             cubes (iris.cube.CubeList):
                 A cubelist containing the diagnostics required for the
@@ -444,53 +398,28 @@ class WeatherSymbols(object):
         Returns:
             symbols (iris.cube.Cube):
                 A cube of weather symbols.
+
+        Raises:
+            ValueError:
+                If the diagnostic fields do not all have the same shape,
+                e.g. because they are not all at the same times.
         """
         # Check input cubes contain required data
         self.check_input_cubes(cubes)
 
-        # Construct graph nodes dictionary
-        graph = {key: [self.queries[key]['succeed'], self.queries[key]['fail']]
-                 for key in self.queries.keys()}
-
-        # Search through tree for all leaves (weather code end points)
-        defined_symbols = []
-        for item in self.queries.values():
-            for value in item.values():
-                if isinstance(value, int):
-                    defined_symbols.append(value)
-
-        # Create symbol cube
+        # Extract each required field once, then route every point down
+        # the tree, evaluating each node once.
+        fields = self.extract_fields(cubes)
         symbols = self.create_symbol_cube(cubes[0])
+        for (diagnostic, threshold), data in fields.items():
+            if data.shape != symbols.shape:
+                msg = ('Input field {} with threshold {} has shape {}, which '
+                       'does not match the weather symbol shape {}. All the '
+                       'inputs must have the same times and realizations.')
+                raise ValueError(msg.format(diagnostic, threshold, data.shape,
+                                            symbols.shape))
+        symbols.data = self.evaluate_decision_tree(fields, symbols.data)
 
-        # Loop over possible symbols
-        for symbol_code in defined_symbols:
-            # In current decision tree
-            # start node is heavy_precipitation
-            routes = self.find_all_routes(graph, 'heavy_precipitation',
-                                          symbol_code)
-
-            # Loop over possible routes from root to leaf
-            for route in routes:
-                conditions = []
-                for i_node in range(len(route)-1):
-                    current_node = route[i_node]
-                    current = copy.copy(self.queries[current_node])
-                    try:
-                        next_node = route[i_node+1]
-                    except KeyError:
-                        next_node = symbol_code
-
-                    if current['fail'] == next_node:
-                        (current['threshold_condition'],
-                         current['condition_combination']) = (
-                             self.invert_condition(current))
-
-                    conditions.extend(self.create_condition_chain(current))
-
-                test_chain = self.format_condition_chain(conditions)
-
-                # Set grid locations to suitable weather symbol
-                symbols.data[np.where(eval(test_chain))] = symbol_code
         # Update symbols for day or night.
         symbols = update_daynight(symbols)
         return symbols
@@ -121,6 +121,9 @@ def expand_nested_lists(query, key):
 def update_daynight(cubewx):
     """ Update weather cube depending on whether it is day or night
 
+    The day/night mask is calculated once for each validity time, and is
+    applied to all the other dimensions of the cube, e.g. realization.
+
     Args:
         cubewx(Iris.cube.Cube):
             Cube containing only daytime weather symbols.
@@ -144,16 +147,18 @@ def update_daynight(cubewx):
     daynightplugin = solar.DayNightMask()
     daynight_mask = daynightplugin.process(cubewx_daynight)
 
-    # Loop over the codes which decrease by 1 if a night time value
+    # Broadcast the time, y and x dimensions of the mask onto any other
+    # dimensions of the weather symbol cube.
+    dim_map = [cubewx_daynight.coord_dims(coord)[0]
+               for coord in daynight_mask.coords(dim_coords=True)]
+    is_night = iris.util.broadcast_to_shape(
+        daynight_mask.data != daynightplugin.day, cubewx_daynight.shape,
+        tuple(dim_map))
+
+    # The codes which decrease by 1 if a night time value
     # e.g. 1 - sunny day becomes 0 - clear night.
-    for val in DAYNIGHT_CODES:
-        index = np.where(cubewx_daynight.data == val)
-        # Where day leave as is, where night correct weather
-        # code to value  - 1.
-        cubewx_daynight.data[index] = np.where(
-            daynight_mask.data[index] == daynightplugin.day,
-            cubewx_daynight.data[index],
-            cubewx_daynight.data[index] - 1)
+    index = np.isin(cubewx_daynight.data, DAYNIGHT_CODES) & is_night
+    cubewx_daynight.data[index] = cubewx_daynight.data[index] - 1
 
     if not time_dim:
         cubewx_daynight = iris.util.squeeze(cubewx_daynight)
@@ -36,6 +36,8 @@
 usage: improver-ensemble-calibration [-h] [--profile]
                                      [--profile_file PROFILE_FILE]
                                      [--predictor_of_mean CALIBRATE_MEAN_FLAG]
+                                     [--minimisation_method METHOD]
+                                     [--streaming_training]
                                      [--save_mean MEAN_FILE]
                                      [--save_variance VARIANCE_FILE]
                                      [--num_realizations NUMBER_OF_REALIZATIONS]
@@ -94,6 +96,17 @@ optional arguments:
                         calibrated mean. Currently the ensemble mean ("mean")
                         and the ensemble realizations ("realizations") are
                         supported as the predictors. Default: "mean".
+  --minimisation_method METHOD
+                        The method used to minimise the CRPS when estimating
+                        the calibration coefficients. "nelder-mead" uses only
+                        evaluations of the CRPS. "l-bfgs-b" also uses the
+                        analytic gradient of the CRPS and typically converges
+                        in far fewer evaluations. Default: "nelder-mead".
+  --streaming_training  Option to process the historic forecasts and truths
+                        one validity time at a time when estimating the
+                        calibration coefficients, keeping only the data needed
+                        for the minimisation. This reduces the memory needed
+                        for long training periods.
   --save_mean MEAN_FILE
                         Option to save the mean output from
                         EnsembleCalibration plugin. If used, a path to save
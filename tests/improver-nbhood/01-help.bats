@@ -37,7 +37,10 @@ usage: improver-nbhood [-h] [--profile] [--profile_file PROFILE_FILE]
                        [--radius RADIUS | --radii-by-lead-time RADII_BY_LEAD_TIME LEAD_TIME_IN_HOURS]
                        [--degrees_as_complex] [--weighted_mode]
                        [--sum_or_fraction {sum,fraction}] [--re_mask]
+                       [--convolution_backend {direct,fft,spans,auto}]
+                       [--accumulation_precision {float64,longdouble}]
                        [--percentiles PERCENTILES [PERCENTILES ...]]
+                       [--memory_budget MEMORY_BUDGET]
                        [--input_mask_filepath INPUT_MASK_FILE]
                        [--halo_radius HALO_RADIUS] [--apply-recursive-filter]
                        [--input_filepath_alphas_x_cube ALPHAS_X_FILE]
@@ -105,9 +108,28 @@ optional arguments:
                         Therefore, the neighbourhood processing may result in
                         values being present in areas that were originally
                         masked.
+  --convolution_backend {direct,fft,spans,auto}
+                        The method used to apply a circular kernel when
+                        calculating "probabilities". "direct" correlates the
+                        data with the kernel exactly; "fft" and "spans" are
+                        faster approximate methods for large kernels, and
+                        "spans" is only available if weighted_mode is not set.
+                        "auto" selects the cheapest method for the kernel and
+                        grid. "direct" is the default option.
+  --accumulation_precision {float64,longdouble}
+                        The precision used to calculate the sums over a square
+                        neighbourhood. "float64" uses a compensated double
+                        precision sum; "longdouble" uses extended precision,
+                        where available, which needs more memory. "float64" is
+                        the default option.
   --percentiles PERCENTILES [PERCENTILES ...]
                         Calculate values at the specified percentiles from the
                         neighbourhood surrounding each grid point.
+  --memory_budget MEMORY_BUDGET
+                        Approximate limit, in megabytes, on the memory used to
+                        hold the neighbourhood points for which percentiles
+                        are calculated at once. Only applicable for
+                        calculating "percentiles" output. Default=1024
   --input_mask_filepath INPUT_MASK_FILE
                         A path to an input mask NetCDF file to be used to mask
                         the input file. This is currently only supported for
@@ -39,6 +39,7 @@ usage: improver-neighbour-finding [-h] [--profile]
                                   [--minimum_dz]
                                   [--search_radius SEARCH_RADIUS]
                                   [--node_limit NODE_LIMIT]
+                                  [--neighbour_cache_directory NEIGHBOUR_CACHE_DIRECTORY]
                                   [--site_coordinate_system SITE_COORDINATE_SYSTEM]
                                   [--site_x_coordinate SITE_X_COORDINATE]
                                   [--site_y_coordinate SITE_Y_COORDINATE]
@@ -99,6 +100,12 @@ Apply constraints to neighbour choice:
                         considered. If the search_radius is likely to contain
                         more than 36 points, this value should be increased to
                         ensure all points are considered.
+  --neighbour_cache_directory NEIGHBOUR_CACHE_DIRECTORY
+                        A directory in which to store the KDTree nodes used to
+                        find constrained neighbours, so that they can be
+                        reused by later runs on the same grid, whatever the
+                        site list. The nodes are calculated and stored on
+                        first use for each grid and land mask.
 
 Site list options:
   --site_coordinate_system SITE_COORDINATE_SYSTEM
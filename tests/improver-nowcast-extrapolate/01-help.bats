@@ -35,7 +35,8 @@
   read -d '' expected <<'__TEXT__' || true
 usage: improver-nowcast-extrapolate [-h] [--profile]
                                     [--profile_file PROFILE_FILE]
-                                    [--output_dir OUTPUT_DIR | --output_filepaths OUTPUT_FILEPATHS [OUTPUT_FILEPATHS ...]]
+                                    [--output_dir OUTPUT_DIR | --output_filepaths OUTPUT_FILEPATHS [OUTPUT_FILEPATHS ...]
+                                    | --output_filepath OUTPUT_FILEPATH]
                                     [--eastward_advection_filepath EASTWARD_ADVECTION_FILEPATH]
                                     [--northward_advection_filepath NORTHWARD_ADVECTION_FILEPATH]
                                     [--advection_speed_filepath ADVECTION_SPEED_FILEPATH]
@@ -45,6 +46,9 @@ usage: improver-nowcast-extrapolate [-h] [--profile]
                                     [--json_file JSON_FILE]
                                     [--max_lead_time MAX_LEAD_TIME]
                                     [--lead_time_interval LEAD_TIME_INTERVAL]
+                                    [--max_workers MAX_WORKERS]
+                                    [--advection_method {scatter,gather}]
+                                    [--single_precision]
                                     INPUT_FILEPATH
 
 Extrapolate input data to required lead times.
@@ -62,6 +66,9 @@ optional arguments:
   --output_filepaths OUTPUT_FILEPATHS [OUTPUT_FILEPATHS ...]
                         List of full paths to output nowcast files, in order
                         of increasing lead time.
+  --output_filepath OUTPUT_FILEPATH
+                        Full path to a single output nowcast file containing
+                        all of the lead times.
   --orographic_enhancement_filepaths OROGRAPHIC_ENHANCEMENT_FILEPATHS [OROGRAPHIC_ENHANCEMENT_FILEPATHS ...]
                         List or wildcarded file specification to the input
                         orographic enhancement files. Orographic enhancement
@@ -77,6 +84,19 @@ optional arguments:
                         Maximum lead time required (mins).
   --lead_time_interval LEAD_TIME_INTERVAL
                         Interval between required lead times (mins).
+  --max_workers MAX_WORKERS
+                        Maximum number of threads used to extrapolate the data
+                        to different lead times at the same time. Default is
+                        1.
+  --advection_method {scatter,gather}
+                        Method used to advect the data. "scatter" adds the
+                        contribution of each of the four source points
+                        surrounding each fractional source location in turn;
+                        "gather" interpolates bilinearly at the fractional
+                        source locations in a single pass, which is faster and
+                        uses less memory. Default is "scatter".
+  --single_precision    If set, and the "gather" advection method is used, the
+                        advection is performed using float32 arithmetic only.
 
 Advect using files containing the x  and y components of the velocity:
   --eastward_advection_filepath EASTWARD_ADVECTION_FILEPATH
@@ -42,7 +42,7 @@ usage: improver-spot-extract [-h] [--profile] [--profile_file PROFILE_FILE]
                              [--grid_metadata_identifier GRID_METADATA_IDENTIFIER]
                              [--json_file JSON_FILE] [--suppress_warnings]
                              NEIGHBOUR_FILEPATH DIAGNOSTIC_FILEPATH
-                             OUTPUT_FILEPATH
+                             [DIAGNOSTIC_FILEPATH ...] OUTPUT_FILEPATH
 
 Extract diagnostic data from gridded fields for spot data sites. It is
 possible to apply a temperature lapse rate adjustment to temperature data that
@@ -53,7 +53,10 @@ positional arguments:
   NEIGHBOUR_FILEPATH    Path to a NetCDF file of spot-data neighbours. This
                         file also contains the spot site information.
   DIAGNOSTIC_FILEPATH   Path to a NetCDF file containing the diagnostic data
-                        to be extracted.
+                        to be extracted. Several files may be given, in which
+                        case the grid point neighbours are found once and the
+                        spot data for all the diagnostics are written to one
+                        output file.
   OUTPUT_FILEPATH       The output path for the resulting NetCDF
 
 optional arguments:
@@ -47,6 +47,7 @@ usage: improver-weighted-blending [-h] [--profile]
                                   [--cval NON_LINEAR_FACTOR]
                                   [--wts_dict WEIGHTS_DICTIONARY]
                                   [--weighting_coord WEIGHTING_COORD]
+                                  [--streaming] [--float64_accumulator]
                                   COORDINATE_TO_AVERAGE_OVER
                                   WEIGHTED_BLEND_MODE INPUT_FILES
                                   [INPUT_FILES ...] OUTPUT_FILE
@@ -162,6 +163,20 @@ dict weights options:
                         Name of coordinate over which linear weights should be
                         scaled. This coordinate must be avilable in the
                         weights dictionary.
+
+streaming options:
+  Options for blending one input field at a time, so that only a single
+  field and the accumulated blend are held in memory.
+
+  --streaming           If set, the weighted contribution of each slice along
+                        the blending coordinate is accumulated in turn, rather
+                        than collapsing the merged cube in one go. Percentile
+                        data are always blended in one go.
+  --float64_accumulator
+                        If set, the weighted contributions are accumulated in
+                        float64 to reduce rounding errors when blending many
+                        inputs. The output is still float32. Requires
+                        --streaming.
 __HELP__
   [[ "$output" == "$expected" ]]
 }
@@ -59,6 +59,9 @@ be converted:
 
 positional arguments:
   INPUT_FILES           Paths to files containing the required input diagnostics.
+                        Files containing the same diagnostic at different
+                        validity times are merged, so that the weather symbols
+                        for all of the times are calculated together.
   OUTPUT_FILE           The output path for the processed NetCDF.
 
 optional arguments: